@@ -0,0 +1,85 @@
+import threading
+from uuid import UUID
+
+import structlog
+
+from ..core.cache import TTLCache
+from .config import auth_config
+from .schemas import AuthUser
+from .versions import Version
+
+logger: structlog.stdlib.BoundLogger = structlog.get_logger()
+
+
+class AuthUserCache:
+    """
+    Cache of resolved `AuthUser` objects keyed by principal id.
+
+    Every entry is stored with the permissions version that was current
+    before the principal was loaded from the database. Services that change
+    a principal's roles, group membership or deletion status bump that
+    version through `invalidate`, or `invalidate_all` when a change can
+    affect many principals at once (e.g. a group role's permissions). Any
+    entry stored under an older version is treated as a miss, so a request
+    racing with a mutation can never repopulate the cache with stale scopes.
+
+    Versions are process local; the entry TTL bounds how long another
+    worker may serve a principal resolved before the change.
+    """
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self._entries: TTLCache[UUID, tuple[Version, AuthUser]] = TTLCache(
+            max_size=max_size, ttl=ttl, name="auth_user"
+        )
+        self._epoch = 0
+        self._versions: dict[UUID, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def entries(self) -> TTLCache[UUID, tuple[Version, AuthUser]]:
+        return self._entries
+
+    def version(self, principal_id: UUID) -> Version:
+        return (self._epoch, self._versions.get(principal_id, 0))
+
+    def get(self, principal_id: UUID) -> AuthUser | None:
+        entry = self._entries.get(principal_id)
+
+        if entry is None:
+            return None
+
+        version, auth_user = entry
+        if version != self.version(principal_id):
+            self._entries.pop(principal_id)
+            return None
+
+        # callers are free to mutate the returned principal
+        return auth_user.model_copy(deep=True)
+
+    def set(self, auth_user: AuthUser, version: Version) -> None:
+        if version != self.version(auth_user.id):
+            return
+
+        self._entries.set(auth_user.id, (version, auth_user.model_copy(deep=True)))
+
+    def invalidate(self, *principal_ids: UUID) -> None:
+        with self._lock:
+            for principal_id in principal_ids:
+                self._versions[principal_id] = self._versions.get(principal_id, 0) + 1
+                self._entries.pop(principal_id)
+
+        logger.debug("Invalidated cached principals", principal_ids=principal_ids)
+
+    def invalidate_all(self) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._versions.clear()
+            self._entries.clear()
+
+        logger.debug("Invalidated all cached principals", epoch=self._epoch)
+
+
+auth_user_cache = AuthUserCache(
+    max_size=auth_config.AUTH_CACHE_MAX_SIZE,
+    ttl=auth_config.AUTH_CACHE_TTL_SECONDS,
+)
@@ -15,6 +15,11 @@ class Config(BaseConfig):
     REFRESH_EXPIRES_IN_DAYS: int = 30
     WEBSERVER_SECRET: str = "WEBSERVER_SECRET_KEY"
     ALLOWED_IPS: list[str] = ["127.0.0.1"]
+    AUTH_CACHE_TTL_SECONDS: float = 60
+    AUTH_CACHE_MAX_SIZE: int = 10000
+    SELF_CONTAINED_ACCESS_TOKENS: bool = False
+    PERMISSIONS_VERSION_TTL_SECONDS: float = 5
+    PASSWORD_VERIFY_CONCURRENCY: int = 4
 
     def __init__(self) -> None:
         super().__init__()
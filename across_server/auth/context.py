@@ -0,0 +1,87 @@
+from fastapi import HTTPException
+from pydantic import BaseModel, ConfigDict
+from starlette.types import Scope
+
+from .enums import PrincipalType
+from .tokens import AccessToken
+from .tokens.access_token import AccessTokenData
+
+PRINCIPAL_STATE_KEY = "principal"
+
+
+class RequestPrincipal(BaseModel):
+    """
+    Bearer token of a request, decoded and validated at most once.
+
+    Params:
+        token: raw bearer token from the `Authorization` header, if any.
+        token_data: validated access token payload when decoding succeeded.
+        error: the 401 raised while decoding, re-raised to every caller.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True, frozen=True)
+
+    token: str | None = None
+    token_data: AccessTokenData | None = None
+    error: HTTPException | None = None
+
+    @property
+    def id(self) -> str | None:
+        return self.token_data.sub if self.token_data else None
+
+    @property
+    def type(self) -> PrincipalType | None:
+        return self.token_data.type if self.token_data else None
+
+
+def get_bearer_token(scope: Scope) -> str | None:
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                return token.strip()
+            return None
+
+    return None
+
+
+def get_request_principal(scope: Scope) -> RequestPrincipal:
+    """
+    Return the principal of the request, decoding the bearer token on first use.
+    The result is memoized on the ASGI scope state so rate limiting,
+    authentication and logging share one decode per request.
+    """
+    state = scope.setdefault("state", {})
+    principal: RequestPrincipal | None = state.get(PRINCIPAL_STATE_KEY)
+
+    if principal is None:
+        principal = _decode(get_bearer_token(scope))
+        state[PRINCIPAL_STATE_KEY] = principal
+
+    return principal
+
+
+def decode_access_token(token: str, scope: Scope | None = None) -> AccessTokenData:
+    """
+    Decode an access token, reusing the request's memoized decode when the
+    token is the request's own bearer token.
+    """
+    principal = get_request_principal(scope) if scope is not None else None
+
+    if principal is None or principal.token != token:
+        principal = _decode(token)
+
+    if principal.token_data is None:
+        raise principal.error or HTTPException(status_code=401)
+
+    return principal.token_data
+
+
+def _decode(token: str | None) -> RequestPrincipal:
+    if token is None:
+        return RequestPrincipal()
+
+    try:
+        return RequestPrincipal(token=token, token_data=AccessToken().decode(token))
+    except HTTPException as error:
+        return RequestPrincipal(token=token, error=error)
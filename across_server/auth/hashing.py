@@ -1,5 +1,10 @@
+import anyio
+import anyio.to_thread
 from argon2 import PasswordHasher
 
+from ..core import metrics
+from .config import auth_config
+
 password_hasher = PasswordHasher(
     time_cost=3,
     memory_cost=65536,
@@ -8,3 +13,27 @@ password_hasher = PasswordHasher(
     salt_len=64,
     encoding="utf-8",
 )
+
+_verify_limiter: anyio.CapacityLimiter | None = None
+
+
+async def verify(hash: str, password: str) -> bool:
+    """
+    Verify a password against an argon2 hash off the event loop.
+
+    Verification is deliberately slow and memory hard, so it runs in a worker
+    thread bounded by `PASSWORD_VERIFY_CONCURRENCY` so a burst of token requests
+    neither blocks other traffic nor exhausts the shared thread pool.
+    Raises the same `argon2.exceptions` as `PasswordHasher.verify`.
+    """
+    global _verify_limiter
+
+    if _verify_limiter is None:
+        _verify_limiter = anyio.CapacityLimiter(auth_config.PASSWORD_VERIFY_CONCURRENCY)
+
+    return await anyio.to_thread.run_sync(
+        password_hasher.verify, hash, password, limiter=_verify_limiter
+    )
+
+
+metrics.watch_limiter("password_verify", lambda: _verify_limiter)
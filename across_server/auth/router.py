@@ -97,7 +97,7 @@ async def verify(
     email = magic_link.verify(token)
 
     auth_user = await service.get_authenticated_user(email=email)
-    all_tokens = service.get_auth_tokens(auth_user)
+    all_tokens = await service.get_auth_tokens(auth_user)
 
     setRefreshTokenCookie(response, all_tokens["refresh"])
 
@@ -113,7 +113,7 @@ async def refresh_token(
     token_data = tokens.RefreshToken().decode(refresh_token)
 
     user = await service.get_authenticated_user(user_id=UUID(token_data.sub))
-    auth_tokens = service.get_auth_tokens(user)
+    auth_tokens = await service.get_auth_tokens(user)
 
     setRefreshTokenCookie(response, auth_tokens["refresh"])
 
@@ -134,7 +134,7 @@ async def token(
     response: Response,
     service: Annotated[AuthService, Depends(AuthService)],
 ) -> schemas.AccessTokenResponse:
-    auth_tokens = service.get_auth_tokens(auth_user)
+    auth_tokens = await service.get_auth_tokens(auth_user)
 
     if grant_type == enums.GrantType.JWT:
         setRefreshTokenCookie(response, auth_tokens["refresh"])
@@ -7,15 +7,17 @@ import structlog
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBasicCredentials
 from pydantic import EmailStr
-from sqlalchemy import false, select
+from sqlalchemy import Select, false, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, raiseload
+from starlette.types import Scope
 
-from ..auth.hashing import password_hasher
 from ..core.date_utils import convert_to_utc
 from ..core.exceptions import AcrossHTTPException
 from ..db import get_session, models
-from . import magic_link, schemas, tokens
+from . import context, hashing, magic_link, schemas, tokens, versions
+from .cache import auth_user_cache
+from .config import auth_config
 
 logger: structlog.stdlib.BoundLogger = structlog.get_logger()
 
@@ -35,21 +37,18 @@ class AuthService:
     async def authenticate_user(
         self,
         token: str,
+        scope: Scope | None = None,
     ) -> schemas.AuthUser:
-        token_data = tokens.AccessToken().decode(token)
-        auth_user = await self.get_authenticated_user(user_id=UUID(token_data.sub))
+        token_data = context.decode_access_token(token, scope)
 
-        return auth_user
+        return await self._resolve_principal(token_data, schemas.PrincipalType.USER)
 
     async def authenticate_service_account(
         self, credentials: HTTPBasicCredentials
     ) -> schemas.AuthUser:
-        query = select(models.ServiceAccount).where(
-            (models.ServiceAccount.id == credentials.username)
-        )
-
-        result = await self.db.execute(query)
-        service_account = result.unique().scalar_one_or_none()
+        # load the permission graph up front so a successful verify
+        # does not need a second round trip to build the principal
+        service_account = await self._get_service_account(UUID(credentials.username))
 
         if service_account is None:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
@@ -73,11 +72,7 @@ class AuthService:
                 service_account_id=service_account.id,
                 key=f"xxxx{credentials.password[-4:]}",
             )
-            password_hasher.verify(service_account.hashed_key, credentials.password)
-            auth_user = await self.get_authenticated_service_account(
-                username=UUID(credentials.username)
-            )
-            return auth_user
+            await hashing.verify(service_account.hashed_key, credentials.password)
         except (
             argon2.exceptions.VerifyMismatchError,
             argon2.exceptions.VerificationError,
@@ -92,29 +87,92 @@ class AuthService:
                 },
             )
 
+        return self._build_service_account_auth_user(service_account)
+
     async def authenticate_jwt(
         self,
         token: str,
+        scope: Scope | None = None,
+    ) -> schemas.AuthUser:
+        token_data = context.decode_access_token(token, scope)
+
+        return await self._resolve_principal(token_data, token_data.type)
+
+    async def _resolve_principal(
+        self,
+        token_data: tokens.access_token.AccessTokenData,
+        principal_type: schemas.PrincipalType,
     ) -> schemas.AuthUser:
-        token_data = tokens.AccessToken().decode(token)
+        """
+        Build the principal from a self-contained token when its permissions
+        version is still current, otherwise resolve it from the cache or database.
+        """
+        principal_id = UUID(token_data.sub)
+
+        if (
+            auth_config.SELF_CONTAINED_ACCESS_TOKENS
+            and token_data.ver is not None
+            and token_data.type == principal_type
+        ):
+            if token_data.ver == await versions.get(self.db, principal_id):
+                return tokens.AccessToken().to_auth_user(token_data)
 
-        if token_data.type == "user":
-            auth_user = await self.get_authenticated_user(user_id=UUID(token_data.sub))
-        elif token_data.type == "service_account":
-            auth_user = await self.get_authenticated_service_account(
-                username=UUID(token_data.sub)
+            logger.debug(
+                "Access token permissions version is stale",
+                principal_id=principal_id,
+                token_version=token_data.ver,
             )
 
+        return await self._get_cached_principal(principal_id, principal_type)
+
+    async def _get_cached_principal(
+        self, principal_id: UUID, principal_type: schemas.PrincipalType
+    ) -> schemas.AuthUser:
+        """
+        Resolve a principal from the auth cache, falling back to the database.
+        The version is captured before querying so that an invalidation which
+        lands mid-query prevents the stale result from being cached.
+        """
+        auth_user = auth_user_cache.get(principal_id)
+
+        if auth_user is not None and auth_user.type == principal_type:
+            return auth_user
+
+        version = auth_user_cache.version(principal_id)
+        auth_user = await self._load_principal(principal_id, principal_type)
+        auth_user_cache.set(auth_user, version)
+
         return auth_user
 
-    def get_auth_tokens(
+    async def _load_principal(
+        self, principal_id: UUID, principal_type: schemas.PrincipalType
+    ) -> schemas.AuthUser:
+        if principal_type == schemas.PrincipalType.USER:
+            return await self.get_authenticated_user(user_id=principal_id)
+
+        return await self.get_authenticated_service_account(username=principal_id)
+
+    async def get_auth_tokens(
         self,
         auth_user: schemas.AuthUser,
     ) -> Tokens:
         access_token = tokens.AccessToken()
         refresh_token = tokens.RefreshToken()
 
-        encoded_access_token = access_token.encode(access_token.to_encode(auth_user))
+        version = None
+
+        if auth_config.SELF_CONTAINED_ACCESS_TOKENS:
+            # self-contained tokens carry the version they were issued under
+            # so they can be authorized without loading the principal. The
+            # principal given may predate a bump, e.g. when cached, so it is
+            # reloaded after reading the version: the token never carries
+            # permissions older than the version it claims.
+            version = await versions.get(self.db, auth_user.id)
+            auth_user = await self._load_principal(auth_user.id, auth_user.type)
+
+        encoded_access_token = access_token.encode(
+            access_token.to_encode(auth_user, version)
+        )
         encoded_refresh_token = refresh_token.encode(
             refresh_token.to_encode(auth_user.id)
         )
@@ -182,24 +240,47 @@ class AuthService:
         self,
         username: UUID,
     ) -> schemas.AuthUser:
-        query = (
+        service_account = await self._get_service_account(username)
+
+        if service_account is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+
+        return self._build_service_account_auth_user(service_account)
+
+    @staticmethod
+    def service_account_query(service_account_id: UUID) -> Select:
+        """
+        The service account with exactly the graph its principal is built from,
+        in one statement. Every relationship is `selectin` by default, so any
+        other is refused rather than loaded in a statement of its own.
+        """
+        return (
             select(models.ServiceAccount)
-            .where((models.ServiceAccount.id == username))
+            .where((models.ServiceAccount.id == service_account_id))
             .options(
-                joinedload(models.ServiceAccount.group_roles).joinedload(
-                    models.GroupRole.permissions
-                )
+                joinedload(models.ServiceAccount.group_roles).options(
+                    joinedload(models.GroupRole.group).raiseload("*"),
+                    joinedload(models.GroupRole.permissions).raiseload("*"),
+                    raiseload("*"),
+                ),
+                joinedload(models.ServiceAccount.user).raiseload("*"),
+                joinedload(models.ServiceAccount.roles).options(
+                    joinedload(models.Role.permissions).raiseload("*"),
+                    raiseload("*"),
+                ),
+                raiseload("*"),
             )
-            .options(joinedload(models.ServiceAccount.user))
-            .options(joinedload(models.ServiceAccount.roles))
         )
 
-        result = await self.db.execute(query)
-        service_account = result.unique().scalar_one_or_none()
-
-        if service_account is None:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+    async def _get_service_account(
+        self, service_account_id: UUID
+    ) -> models.ServiceAccount | None:
+        result = await self.db.execute(self.service_account_query(service_account_id))
+        return result.unique().scalar_one_or_none()
 
+    def _build_service_account_auth_user(
+        self, service_account: models.ServiceAccount
+    ) -> schemas.AuthUser:
         user_list = service_account.user
         owner = user_list[0] if user_list else None
 
@@ -1,9 +1,10 @@
 from typing import Annotated
 from uuid import UUID
 
-from fastapi import Depends, HTTPException, Path, status
+from fastapi import Depends, HTTPException, Path, Request, status
 from fastapi.security import SecurityScopes
 
+from .config import auth_config
 from .schemas import AuthUser
 from .security import (
     get_bearer_credentials,
@@ -12,25 +13,28 @@ from .service import AuthService
 
 
 async def authenticate(
+    request: Request,
     service: Annotated[AuthService, Depends(AuthService)],
     token: Annotated[str, Depends(get_bearer_credentials)],
 ) -> AuthUser:
-    return await service.authenticate_user(token)
+    return await service.authenticate_user(token, request.scope)
 
 
 async def authenticate_jwt(
+    request: Request,
     service: Annotated[AuthService, Depends(AuthService)],
     token: Annotated[str, Depends(get_bearer_credentials)],
 ) -> AuthUser:
-    return await service.authenticate_jwt(token)
+    return await service.authenticate_jwt(token, request.scope)
 
 
 async def auth_user_or_none(
+    request: Request,
     service: Annotated[AuthService, Depends(AuthService)],
     token: Annotated[str, Depends(get_bearer_credentials)],
 ) -> AuthUser | None:
     try:
-        return await service.authenticate_jwt(token)
+        return await service.authenticate_jwt(token, request.scope)
     except HTTPException:
         return None
 
@@ -133,3 +137,13 @@ async def webserver_access(
         status_code=status.HTTP_403_FORBIDDEN,
         detail="Forbidden",
     )
+
+
+async def internal_access(request: Request) -> None:
+    """
+    Dependency restricting internal routes (e.g. `/metrics`) to direct peers
+    listed in `ALLOWED_IPS`. Forwarded headers are ignored on purpose, a
+    request relayed by the load balancer is never internal.
+    """
+    if request.client is None or request.client.host not in auth_config.ALLOWED_IPS:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
@@ -15,11 +15,21 @@ class AccessTokenData(TokenData[str]):
         scopes: scopes from the user's roles.
         groups: groups the user belongs to and their associated scopes.
         type: either "user" or "service_account" AuthUserType enum
+        ver: permissions version (global epoch, principal version) the token was
+            issued under, only present on self-contained tokens.
+        admin_groups: string UUIDs of the groups the principal administers.
+        first_name, last_name, username: profile of the principal, as loaded
+            from the database, only present on self-contained tokens.
     """
 
     scopes: list[str]
     groups: list[Group]
     type: PrincipalType
+    ver: tuple[int, int] | None = None
+    admin_groups: list[str] = []
+    first_name: str | None = None
+    last_name: str | None = None
+    username: str | None = None
 
 
 class AccessToken(Token[AccessTokenData, AuthUser]):
@@ -29,5 +39,35 @@ class AccessToken(Token[AccessTokenData, AuthUser]):
     def data_model(self) -> type[AccessTokenData]:
         return AccessTokenData
 
-    def to_encode(self, auth_user: AuthUser) -> AccessTokenData:
-        return AccessTokenData(sub=str(auth_user.id), **auth_user.model_dump())
+    def to_encode(
+        self, auth_user: AuthUser, version: tuple[int, int] | None = None
+    ) -> AccessTokenData:
+        # self-contained tokens carry everything the principal is rebuilt from
+        excluded = {"first_name", "last_name", "username"} if version is None else set()
+        return AccessTokenData(
+            sub=str(auth_user.id),
+            ver=version,
+            admin_groups=[str(group.id) for group in auth_user.groups if group.is_admin]
+            if version is not None
+            else [],
+            **auth_user.model_dump(exclude=excluded),
+        )
+
+    def to_auth_user(self, data: AccessTokenData) -> AuthUser:
+        """Rebuild the principal from the claims of a self-contained token"""
+        return AuthUser(
+            id=data.sub,
+            scopes=data.scopes,
+            groups=[
+                Group(
+                    id=group.id,
+                    scopes=group.scopes,
+                    is_admin=str(group.id) in data.admin_groups,
+                )
+                for group in data.groups
+            ],
+            type=data.type,
+            first_name=data.first_name,
+            last_name=data.last_name,
+            username=data.username,
+        )
@@ -0,0 +1,81 @@
+from uuid import UUID
+
+import structlog
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.cache import TTLCache
+from ..db import models
+from .config import auth_config
+
+logger: structlog.stdlib.BoundLogger = structlog.get_logger()
+
+GLOBAL_VERSION_ID = UUID(int=0)
+
+# (global epoch, principal version)
+Version = tuple[int, int]
+
+_version_cache: TTLCache[UUID, Version] = TTLCache(
+    max_size=auth_config.AUTH_CACHE_MAX_SIZE,
+    ttl=auth_config.PERMISSIONS_VERSION_TTL_SECONDS,
+    name="permissions_version",
+)
+
+
+async def get(db: AsyncSession, principal_id: UUID) -> Version:
+    """
+    Current permissions version of a principal, shared by all workers.
+    Lookups are cached for `PERMISSIONS_VERSION_TTL_SECONDS`, which bounds how
+    long a revoked self-contained token can still be accepted.
+    """
+    version = _version_cache.get(principal_id)
+
+    if version is not None:
+        return version
+
+    result = await db.execute(
+        select(models.PermissionVersion.id, models.PermissionVersion.version).where(
+            models.PermissionVersion.id.in_([GLOBAL_VERSION_ID, principal_id])
+        )
+    )
+    versions = {id: version for id, version in result.tuples().all()}
+
+    version = (versions.get(GLOBAL_VERSION_ID, 0), versions.get(principal_id, 0))
+    _version_cache.set(principal_id, version)
+
+    return version
+
+
+async def bump(db: AsyncSession, *principal_ids: UUID) -> None:
+    """
+    Increment the permissions version of each principal.
+    Executed within the caller's transaction so the bump commits with the change.
+    """
+    if not principal_ids:
+        return
+
+    statement = insert(models.PermissionVersion).values(
+        [{"id": principal_id, "version": 1} for principal_id in set(principal_ids)]
+    )
+    await db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[models.PermissionVersion.id],
+            set_={"version": models.PermissionVersion.version + 1},
+        )
+    )
+
+    for principal_id in principal_ids:
+        _version_cache.pop(principal_id)
+
+    logger.debug("Bumped permissions version", principal_ids=principal_ids)
+
+
+async def bump_all(db: AsyncSession) -> None:
+    """Increment the global epoch, revoking every self-contained token"""
+    await bump(db, GLOBAL_VERSION_ID)
+    _version_cache.clear()
+
+
+def clear() -> None:
+    _version_cache.clear()
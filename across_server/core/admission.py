@@ -0,0 +1,184 @@
+"""
+Admission control of CPU-heavy requests.
+
+Thread limits bound how many computations run at once, not how many wait: a
+burst of visibility requests queues hundreds of offloaded calls, each one
+eventually reaching the 60 second execution limit after waiting its turn,
+while every other request waits behind them. An `AdmissionController` instead
+admits requests against a budget of their estimated cost, queueing the ones
+that don't fit, in order, for a bounded time. Requests arriving to a full
+queue, or waiting too long, are rejected at once with a `503` and a
+`Retry-After`, so clients back off while the admitted requests complete.
+
+The budget is per app process, as are the thread limits it sits in front of.
+"""
+
+import asyncio
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException, status
+
+from . import metrics
+
+admission_queue_depth = metrics.registry.gauge(
+    "admission_queue_depth", "Requests waiting to be admitted", ("controller",)
+)
+admission_cost_in_use = metrics.registry.gauge(
+    "admission_cost_in_use",
+    "Estimated cost of the requests admitted and not done yet",
+    ("controller",),
+)
+admission_admitted = metrics.registry.counter(
+    "admission_admitted", "Requests admitted", ("controller",)
+)
+admission_rejected = metrics.registry.counter(
+    "admission_rejected",
+    "Requests rejected, as the queue was full or they waited too long",
+    ("controller", "reason"),
+)
+
+
+class ServiceOverloadedException(HTTPException):
+    def __init__(self, retry_after: int):
+        # not logged as an error: rejecting is how an overload is shed
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many calculations in progress, retry later.",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+class Admission:
+    """An admitted request, holding its cost of the budget until released"""
+
+    def __init__(self, controller: "AdmissionController", cost: float) -> None:
+        self._controller = controller
+        self.cost = cost
+        self.released = False
+
+    def release(self) -> None:
+        """Give the cost back to the budget, once however often called"""
+        if not self.released:
+            self.released = True
+            self._controller._release(self.cost)
+
+
+class AdmissionController:
+    """
+    Requests admitted against a budget of their estimated cost.
+
+    Parameters
+    ----------
+    name : str
+        Identifier used when reporting statistics.
+    max_cost : float
+        Total estimated cost of the requests admitted at once. A request
+        costing more is admitted alone.
+    max_queue : int
+        Requests waiting to be admitted before new ones are rejected.
+    max_wait : float
+        Seconds a request waits to be admitted before being rejected.
+    retry_after : int
+        Seconds rejected clients are asked to wait before retrying.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_cost: float,
+        max_queue: int,
+        max_wait: float,
+        retry_after: int,
+    ) -> None:
+        self.name = name
+        self.max_cost = max_cost
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.retry_after = retry_after
+        self.cost_in_use = 0.0
+        self._queue: deque[tuple[float, asyncio.Future[None]]] = deque()
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def _fits(self, cost: float) -> bool:
+        return self.cost_in_use + cost <= self.max_cost
+
+    def _admit(self, cost: float) -> Admission:
+        self.cost_in_use += cost
+        admission_admitted.inc(1, self.name)
+        self._report()
+        return Admission(self, cost)
+
+    def _release(self, cost: float) -> None:
+        self.cost_in_use -= cost
+        self._wake()
+        self._report()
+
+    def _wake(self) -> None:
+        # in order, so a costly request isn't starved by cheaper ones behind it
+        while self._queue and self._fits(self._queue[0][0]):
+            cost, waiter = self._queue.popleft()
+            if not waiter.done():
+                self.cost_in_use += cost
+                waiter.set_result(None)
+
+    def _report(self) -> None:
+        admission_queue_depth.set(len(self._queue), self.name)
+        admission_cost_in_use.set(self.cost_in_use, self.name)
+
+    def _reject(self, reason: str) -> ServiceOverloadedException:
+        admission_rejected.inc(1, self.name, reason)
+        return ServiceOverloadedException(self.retry_after)
+
+    async def acquire(self, cost: float) -> Admission:
+        """
+        Admit a request of estimated `cost`, waiting for the budget if needed.
+
+        Raises
+        ------
+        ServiceOverloadedException
+            When the queue is full, or the request waited `max_wait` seconds.
+        """
+        cost = min(cost, self.max_cost)
+
+        if not self._queue and self._fits(cost):
+            return self._admit(cost)
+
+        if len(self._queue) >= self.max_queue:
+            raise self._reject("queue_full")
+
+        entry = (cost, asyncio.get_running_loop().create_future())
+        self._queue.append(entry)
+        self._report()
+
+        try:
+            await asyncio.wait_for(entry[1], self.max_wait)
+        except BaseException as error:
+            if entry[1].done() and not entry[1].cancelled():
+                # admitted as it stopped waiting
+                self._release(cost)
+            elif entry in self._queue:
+                self._queue.remove(entry)
+                # the requests behind it may fit now
+                self._wake()
+                self._report()
+
+            if isinstance(error, TimeoutError):
+                raise self._reject("timeout") from None
+            raise
+
+        admission_admitted.inc(1, self.name)
+        self._report()
+        return Admission(self, cost)
+
+    @asynccontextmanager
+    async def admit(self, cost: float) -> AsyncIterator[Admission]:
+        """Admit a request of estimated `cost` for the duration of the block"""
+        admission = await self.acquire(cost)
+        try:
+            yield admission
+        finally:
+            admission.release()
@@ -0,0 +1,214 @@
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any, Generic, TypeVar
+
+from . import metrics
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+# every live cache, reported on scrape by `_collect_caches`
+_caches: "weakref.WeakSet[TTLCache[Any, Any] | SizedLRUCache[Any, Any]]" = (
+    weakref.WeakSet()
+)
+
+cache_hits = metrics.registry.counter(
+    "cache_hits", "Cache lookups served from the cache", ("cache",)
+)
+cache_misses = metrics.registry.counter(
+    "cache_misses", "Cache lookups that missed or found an expired entry", ("cache",)
+)
+cache_entries = metrics.registry.gauge(
+    "cache_entries", "Entries currently held by the cache", ("cache",)
+)
+cache_size_bytes = metrics.registry.gauge(
+    "cache_size_bytes", "Estimated size of the entries held by the cache", ("cache",)
+)
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Bounded, in-process LRU cache with per-entry time-to-live.
+
+    Entries are evicted in least-recently-used order once `max_size` is
+    reached and are treated as missing once older than `ttl` seconds.
+    Hit and miss counters are kept so cache effectiveness can be reported.
+
+    Parameters
+    ----------
+    max_size : int
+        Maximum number of entries held at once.
+    ttl : float
+        Lifetime of an entry in seconds.
+    name : str
+        Identifier used when reporting cache statistics.
+    """
+
+    def __init__(self, max_size: int, ttl: float, name: str = "") -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        # guards the ordered dict, entries may be touched from worker threads
+        self._lock = threading.Lock()
+        _caches.add(self)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: K) -> V | None:
+        with self._lock:
+            entry = self._data.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def peek(self, key: K) -> V | None:
+        """Like `get`, without counting a lookup or refreshing the entry's recency"""
+        with self._lock:
+            entry = self._data.get(key)
+
+            if entry is None or entry[0] < time.monotonic():
+                return None
+
+            return entry[1]
+
+    def set(self, key: K, value: V) -> None:
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def pop(self, key: K) -> V | None:
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return entry[1] if entry else None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class SizedLRUCache(Generic[K, V]):
+    """
+    Bounded, in-process LRU cache weighing entries by their size.
+
+    Entries are evicted in least-recently-used order once their total size,
+    as estimated by `sizeof`, exceeds `max_bytes`. Entries larger than
+    `max_bytes` on their own are not stored.
+
+    Parameters
+    ----------
+    max_bytes : int
+        Maximum total size of the entries held at once.
+    sizeof : Callable[[V], int]
+        Estimates the size of a value in bytes, called once when stored.
+    name : str
+        Identifier used when reporting cache statistics.
+    """
+
+    def __init__(
+        self, max_bytes: int, sizeof: Callable[[V], int], name: str = ""
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.size = 0
+        self._data: OrderedDict[K, tuple[int, V]] = OrderedDict()
+        self._lock = threading.Lock()
+        _caches.add(self)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: K) -> V | None:
+        with self._lock:
+            entry = self._data.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: K, value: V) -> None:
+        size = self.sizeof(value)
+
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self.size -= previous[0]
+
+            self._data[key] = (size, value)
+            self.size += size
+
+            while self.size > self.max_bytes:
+                _, (evicted, _) = self._data.popitem(last=False)
+                self.size -= evicted
+
+    def pop(self, key: K) -> V | None:
+        with self._lock:
+            entry = self._data.pop(key, None)
+
+            if entry is None:
+                return None
+
+            self.size -= entry[0]
+            return entry[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+
+
+@metrics.registry.collector
+def _collect_caches() -> None:
+    totals: dict[str, tuple[int, int, int]] = {}
+    sizes: dict[str, int] = {}
+
+    for cache in list(_caches):
+        hits, misses, entries = totals.get(cache.name, (0, 0, 0))
+        totals[cache.name] = (
+            hits + cache.hits,
+            misses + cache.misses,
+            entries + len(cache),
+        )
+        if isinstance(cache, SizedLRUCache):
+            sizes[cache.name] = sizes.get(cache.name, 0) + cache.size
+
+    for name, (hits, misses, entries) in totals.items():
+        cache_hits.set(hits, name)
+        cache_misses.set(misses, name)
+        cache_entries.set(entries, name)
+
+    for name, size in sizes.items():
+        cache_size_bytes.set(size, name)
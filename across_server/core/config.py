@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 from .enums import Environments
@@ -27,9 +29,107 @@ class Config(BaseConfig):
     LOG_LEVEL: str = "DEBUG"
     # Adjusts the output being rendered as JSON (False for dev with pretty-print).
     LOG_JSON_FORMAT: bool = False
+    # Records queued for the log writer thread before new ones are dropped.
+    LOG_QUEUE_SIZE: int = 10000
+    # Fraction of successful requests faster than LOG_SLOW_REQUEST_MS that are
+    # logged, errors and slow requests are always logged.
+    LOG_SAMPLE_RATE: float = 1.0
+    LOG_SLOW_REQUEST_MS: float = 1000
 
     # Request Headers
     REQUEST_ID_HEADER: str = "X-Request-ID"
+    # Adds DB and total time to responses, see https://www.w3.org/TR/server-timing/
+    SERVER_TIMING_HEADER: bool = True
+
+    # Tracing, see `core/tracing.py`
+    TRACING_EXPORTER: Literal["none", "log", "otlp"] = "log"
+    # Only requests at least this slow are exported
+    TRACING_MIN_DURATION_MS: float = 1000
+    TRACING_OTLP_FILE: str = "traces.otlp.jsonl"
+    # Traces queued for the OTLP writer thread before new ones are dropped
+    TRACING_OTLP_QUEUE_SIZE: int = 1000
+
+    # Worker threads for offloaded calls, shared by everything but the
+    # workloads below, which are bounded separately, see `core/workloads.py`
+    THREAD_LIMIT_DEFAULT: int = 40
+    THREAD_LIMIT_EPHEMERIS: int = 8
+    THREAD_LIMIT_VISIBILITY: int = 8
+    THREAD_LIMIT_RESOLVE_OBJECT: int = 4
+    # Worker processes for ephemeris and visibility computations per app
+    # process, 0 computes in threads, see `core/processes.py`
+    PROCESS_POOL_WORKERS: int = 0
+    # Event loop lag sampling, see `core/loop_monitor.py`
+    LOOP_MONITOR_INTERVAL_MS: float = 500
+    LOOP_LAG_WARN_MS: float = 100
+
+    # Computed ephemerides kept across requests in chunks of
+    # EPHEMERIS_CACHE_CHUNK_SECONDS, see `routes/v1/tools/ephemeris/cache.py`
+    EPHEMERIS_CACHE_MAX_MB: float = 512
+    EPHEMERIS_CACHE_CHUNK_SECONDS: int = 86400
+    # Opt-in: finer steps of the ephemeris types listed are interpolated from
+    # these, the others are computed at every step. The error bounds of
+    # {"tle": 300, "jpl": 300, "spice": 300, "ground": 1800} are documented in
+    # `routes/v1/tools/ephemeris/interpolation.py`
+    EPHEMERIS_INTERPOLATION_STEP_SIZES: dict[str, int] = {}
+    # JPL and SPICE ephemerides precomputed by `scripts/precompute_ephemeris.py`
+    # for the step sizes of visibility requests, stored at the step each is
+    # computed at, see `routes/v1/tools/ephemeris/store.py`
+    EPHEMERIS_STORE_DIR: str = "ephemeris"
+    EPHEMERIS_STORE_STEP_SIZES: list[int] = [60, 300, 3600]
+    EPHEMERIS_STORE_DAYS_BEFORE: int = 7
+    EPHEMERIS_STORE_DAYS_AFTER: int = 30
+
+    # Targets of a batch visibility request, and how many are computed per
+    # offloaded call, their results streaming back as each call completes
+    VISIBILITY_BATCH_MAX_TARGETS: int = 1000
+    VISIBILITY_BATCH_CHUNK_SIZE: int = 50
+
+    # Visibility windows kept across requests, the latest ranges of each
+    # target, see `routes/v1/tools/visibility_calculator/cache.py`
+    VISIBILITY_CACHE_MAX_SIZE: int = 2000
+    VISIBILITY_CACHE_TTL_SECONDS: int = 86400
+    VISIBILITY_CACHE_RANGES: int = 4
+
+    # Branches of a joint visibility request running at once, each on its own
+    # database session
+    VISIBILITY_JOINT_CONCURRENCY: int = 4
+
+    # Adaptive visibility windows are evaluated every coarse step, then refined
+    # around their edges to the precision, which must divide the coarse step,
+    # see `routes/v1/tools/visibility_calculator/refinement.py`
+    VISIBILITY_ADAPTIVE_COARSE_STEP_SECONDS: int = 300
+    VISIBILITY_ADAPTIVE_PRECISION_SECONDS: int = 10
+
+    # Estimated cost, in steps of the date range per instrument or target, of
+    # the visibility requests computed at once per app process. Requests over
+    # budget wait in a bounded queue for a bounded time, or are rejected with a
+    # 503, see `core/admission.py`
+    VISIBILITY_ADMISSION_MAX_COST: int = 100_000
+    VISIBILITY_ADMISSION_MAX_QUEUE: int = 64
+    VISIBILITY_ADMISSION_MAX_WAIT_SECONDS: float = 10
+    VISIBILITY_ADMISSION_RETRY_AFTER_SECONDS: int = 15
+
+    # Footprints of survey instruments, ready to project to their pointings,
+    # see `routes/v1/tools/visibility_calculator/footprints.py`
+    VISIBILITY_FOOTPRINT_CACHE_MAX_SIZE: int = 256
+    VISIBILITY_FOOTPRINT_CACHE_TTL_SECONDS: int = 3600
+
+    # Visibility jobs run in the background, per app process, a date chunk at
+    # a time, see `routes/v1/tools/visibility_calculator/jobs/`
+    VISIBILITY_JOB_WORKERS: int = 2
+    VISIBILITY_JOB_CHUNK_DAYS: int = 7
+    VISIBILITY_JOB_MAX_DAYS: int = 400
+    VISIBILITY_JOB_POLL_SECONDS: float = 5
+    # Running jobs not heard from since are claimed again
+    VISIBILITY_JOB_STALE_SECONDS: int = 600
+    # Completed jobs and their results are deleted after
+    VISIBILITY_JOB_RETENTION_DAYS: int = 7
+
+    # Profiling of requests sent with an `X-Profile` header by system principals,
+    # see `core/profiling.py`
+    PROFILING_ENABLED: bool = False
+    PROFILING_INTERVAL_MS: float = 5
+    PROFILING_DIR: str = "profiles"
 
     # Always hide local only routes -- mainly used for client generation locally.
     HIDE_LOCAL_ROUTE: bool = True
@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class VisibilityJobKind(str, Enum):
+    WINDOWS = "windows"
+    JOINT_WINDOWS = "joint_windows"
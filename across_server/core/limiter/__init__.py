@@ -1,4 +1,14 @@
-from .config import rules
+from .backend import BucketStore, MemoryBucketStore, TokenBucketBackend
+from .config import costs, limiter_config, rules
 from .limiter import authenticate_limit, on_limit_exceeded
 
-__all__ = ["on_limit_exceeded", "authenticate_limit", "rules"]
+__all__ = [
+    "on_limit_exceeded",
+    "authenticate_limit",
+    "rules",
+    "costs",
+    "limiter_config",
+    "BucketStore",
+    "MemoryBucketStore",
+    "TokenBucketBackend",
+]
@@ -0,0 +1,137 @@
+import math
+import re
+import time
+import weakref
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+from typing import Protocol
+
+from ratelimit import Rule
+from ratelimit.backends import BaseBackend
+
+from .. import metrics
+
+# (key, capacity, refill rate in tokens per second)
+type Bucket = tuple[str, float, float]
+
+rate_limit_buckets = metrics.registry.gauge(
+    "rate_limit_buckets", "Token buckets held by in-memory bucket stores"
+)
+rate_limit_evictions = metrics.registry.counter(
+    "rate_limit_evictions", "Idle token buckets evicted from in-memory bucket stores"
+)
+
+
+class BucketStore(Protocol):
+    """
+    Storage for token buckets.
+
+    Implementations must take tokens from all buckets atomically, either every
+    bucket is charged or none is, and must use a single clock for all callers.
+    A store shared by several workers (e.g. backed by a Redis script) makes them
+    enforce one budget, the in-memory store only covers a single process.
+    """
+
+    async def take(self, buckets: Sequence[Bucket], cost: float) -> float:
+        """
+        Take `cost` tokens from every bucket.
+        Returns 0 when admitted, otherwise the seconds until the request fits.
+        """
+        ...
+
+
+class MemoryBucketStore:
+    """
+    Process local bucket store with least-recently-used eviction.
+
+    At most `max_keys` buckets are held. Evicting an idle bucket only forgets
+    tokens it would have refilled anyway, a bucket evicted while drained lets
+    that client start over with a full bucket.
+    """
+
+    def __init__(self, max_keys: int) -> None:
+        self.max_keys = max_keys
+        self.evictions = 0
+        # key: (tokens, last refill timestamp)
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        _stores.add(self)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    async def take(self, buckets: Sequence[Bucket], cost: float) -> float:
+        # no awaits below, the check and charge are atomic on the event loop
+        now = time.monotonic()
+        refilled: list[tuple[str, float]] = []
+        wait = 0.0
+
+        for key, capacity, rate in buckets:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            # a request costing more than the whole bucket drains it entirely
+            charge = min(cost, capacity)
+
+            if tokens < charge:
+                wait = max(wait, (charge - tokens) / rate)
+
+            refilled.append((key, tokens - charge))
+
+        if wait > 0:
+            return wait
+
+        for key, tokens in refilled:
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+            self.evictions += 1
+            rate_limit_evictions.inc()
+
+        return 0
+
+
+_stores: "weakref.WeakSet[MemoryBucketStore]" = weakref.WeakSet()
+
+
+@metrics.registry.collector
+def _collect_stores() -> None:
+    rate_limit_buckets.set(sum(len(store) for store in list(_stores)))
+
+
+class TokenBucketBackend(BaseBackend):
+    """
+    Token bucket backend for `ratelimit.RateLimitMiddleware`.
+
+    Each limit of a rule, e.g. `Rule(second=3)`, becomes a bucket holding
+    `limit` tokens refilled at `limit` per window. Requests are charged the
+    weight of the first matching pattern in `costs`, or 1, so expensive
+    routes consume more of the budget than cheap ones.
+    `Rule.block_time` is not supported.
+    """
+
+    def __init__(self, store: BucketStore, costs: Mapping[str, float]) -> None:
+        self.store = store
+        self.costs = [(re.compile(pattern), cost) for pattern, cost in costs.items()]
+
+    def cost(self, path: str) -> float:
+        for pattern, cost in self.costs:
+            if pattern.match(path):
+                return cost
+
+        return 1
+
+    async def retry_after(self, path: str, user: str, rule: Rule) -> int:
+        cost = self.cost(path)
+
+        if cost <= 0:
+            return 0
+
+        buckets = [
+            (key, limit, limit / window)
+            for key, (limit, window) in rule.ruleset(path, user).items()
+        ]
+
+        wait = await self.store.take(buckets, cost)
+
+        return math.ceil(wait) if wait > 0 else 0
@@ -14,6 +14,15 @@ class Config(BaseConfig):
     LIMIT_USER_REQUESTS_PER_SECOND: int = 3
     LIMIT_SERVICE_ACCOUNT_REQUESTS_PER_SECOND: int = 10
 
+    # maximum number of rate limit buckets held in memory per worker
+    LIMIT_MAX_KEYS: int = 100_000
+
+    # request cost of the compute heavy tools routes
+    LIMIT_VISIBILITY_COST: float = 10
+    LIMIT_VISIBILITY_BATCH_COST: float = 30
+    LIMIT_VISIBILITY_JOB_COST: float = 30
+    LIMIT_RESOLVE_OBJECT_COST: float = 2
+
 
 limiter_config = Config()
 
@@ -40,3 +49,20 @@ rules: dict[str, Sequence[Rule]] = {
         ),
     ],
 }
+
+# Weight of a request against the limits above, requests cost 1 by default
+# A request costing more than a rule's limit drains that bucket entirely
+# ORDER MATTERS! costs are resolved in order by first match
+costs: dict[str, float] = {
+    r"^/health$": 0,
+    r".*/tools/visibility-calculator/windows/[^/]+/batch$": (
+        limiter_config.LIMIT_VISIBILITY_BATCH_COST
+    ),
+    r".*/tools/visibility-calculator/jobs/windows/": (
+        limiter_config.LIMIT_VISIBILITY_JOB_COST
+    ),
+    # polling the progress and downloading the result of a job
+    r".*/tools/visibility-calculator/jobs/": 1,
+    r".*/tools/visibility-calculator/": limiter_config.LIMIT_VISIBILITY_COST,
+    r".*/tools/resolve-object/": limiter_config.LIMIT_RESOLVE_OBJECT_COST,
+}
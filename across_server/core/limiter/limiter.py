@@ -1,41 +1,26 @@
 import structlog
 from fastapi import status
-from jwt import DecodeError, ExpiredSignatureError, InvalidSignatureError
-from ratelimit.auths.jwt import EmptyInformation, create_jwt_auth
 from ratelimit.types import ASGIApp, Receive, Scope, Send
 
 from across_server.core.middleware.parse_client_ip import parse_client_ip
 
-from ...auth.config import auth_config
+from ...auth.context import get_request_principal
 
 type LimitKey = str
 type LimitGroup = str
 
 logger: structlog.stdlib.BoundLogger = structlog.get_logger()
 
-jwt_auth = create_jwt_auth(
-    auth_config.JWT_SECRET_KEY, auth_config.JWT_ALGORITHM, "sub", "type"
-)
-
 
 async def authenticate_limit(scope: Scope) -> tuple[LimitKey, LimitGroup]:
     ip = await parse_client_ip(scope=scope)
 
-    user_id: str  # uuid
-    limit_group: str  # "user" or "service_account" if jwt, else "default"
-
-    try:
-        user_id, limit_group = await jwt_auth(scope)
-    except (
-        EmptyInformation,
-        InvalidSignatureError,
-        ExpiredSignatureError,
-        DecodeError,
-        AssertionError,
-    ):
-        user_id = "anonymous"
-        limit_group = "default"
-        # can add a debug log to see what it is otherwise the log will be called every time a normal GET request is called that doesn't have authentication information
+    # decoded once per request and shared with auth and the access log
+    principal = get_request_principal(scope)
+
+    user_id: str = principal.id or "anonymous"  # uuid
+    # "user" or "service_account" if jwt, else "default"
+    limit_group: str = principal.type.value if principal.type else "default"
 
     user_limit_key = f"{ip} {user_id}"
 
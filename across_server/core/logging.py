@@ -1,12 +1,28 @@
+import atexit
+import json
 import logging
+import logging.handlers
+import queue
 import sys
 import typing
 from collections.abc import MutableMapping
+from datetime import datetime, timezone
 from types import TracebackType
 
 import structlog
 from asgi_correlation_id import correlation_id
-from structlog.types import Processor
+from structlog.types import Processor, WrappedLogger
+
+from . import metrics
+
+log_records_dropped = metrics.registry.counter(
+    "log_records_dropped", "Log records dropped because the log queue was full"
+)
+
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+
+_listener: logging.handlers.QueueListener | None = None
+_queue_handler: logging.Handler | None = None
 
 
 def _add_correlation(
@@ -15,16 +31,112 @@ def _add_correlation(
     event_dict: MutableMapping[str, typing.Any],
 ) -> MutableMapping[str, typing.Any]:
     """Add request id to log message."""
-    if request_id := correlation_id.get():
+    # records from stdlib loggers are formatted on the writer thread, their
+    # request id was captured when they were enqueued
+    record = event_dict.get("_record")
+    request_id = getattr(record, "request_id", None) or correlation_id.get()
+
+    if request_id:
         event_dict["request_id"] = request_id
     return event_dict
 
 
+def _add_record_timestamp(
+    logger: logging.Logger,
+    method_name: str,
+    event_dict: MutableMapping[str, typing.Any],
+) -> MutableMapping[str, typing.Any]:
+    """
+    Stamp records from stdlib loggers with the time they were logged, as
+    `TimeStamper` does structlog events, rather than when the writer thread
+    formats them.
+    """
+    record: logging.LogRecord = event_dict["_record"]
+    event_dict["timestamp"] = datetime.fromtimestamp(
+        record.created, timezone.utc
+    ).strftime(TIMESTAMP_FORMAT)
+    return event_dict
+
+
+class JSONRenderer:
+    """
+    Render the event dict as compact JSON with a single reused encoder.
+    Equivalent to `structlog.processors.JSONRenderer()` minus its per call
+    encoder setup and circular reference checks.
+    """
+
+    def __init__(self) -> None:
+        self._encode = json.JSONEncoder(
+            separators=(",", ":"),
+            check_circular=False,
+            default=_fallback,
+        ).encode
+
+    def __call__(
+        self,
+        logger: WrappedLogger,
+        method_name: str,
+        event_dict: MutableMapping[str, typing.Any],
+    ) -> str:
+        return self._encode(event_dict)
+
+
+def _fallback(obj: typing.Any) -> typing.Any:
+    # same fallback as structlog's renderer, e.g. for UUIDs and datetimes
+    return repr(obj) if isinstance(obj, Exception) else str(obj)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    Hand records to the listener thread, so formatting and rendering happen
+    there instead of on the event loop, and drop records rather than block
+    when the queue is full.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.request_id = correlation_id.get()
+
+        # the message of stdlib records is merged now, as their arguments may
+        # change before the writer thread gets to them, structlog events are
+        # rendered from their event dict
+        if not hasattr(record, "_logger"):
+            record.msg = record.getMessage()
+            record.args = None
+
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            log_records_dropped.inc()
+
+
+def shutdown() -> None:
+    """Flush queued records and stop the writer thread"""
+    global _listener, _queue_handler
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+
+
+# records still queued at exit would otherwise be lost with the daemon thread
+atexit.register(shutdown)
+
+
 # This setup was heavily borrowed from https://gist.github.com/nymous/f138c7f06062b7c43c060bf03759c29e
-def setup(json_logs: bool = False, log_level: str = "INFO") -> None:
+def setup(
+    json_logs: bool = False, log_level: str = "INFO", queue_size: int = 10000
+) -> None:
+    global _listener, _queue_handler
     shared_processors: list[Processor] = [
         _add_correlation,
-        structlog.processors.TimeStamper(fmt="%Y-%m-%dT%H:%M:%S.%f"),
+        structlog.processors.TimeStamper(fmt=TIMESTAMP_FORMAT),
         structlog.contextvars.merge_contextvars,
         structlog.stdlib.add_logger_name,
         structlog.stdlib.add_log_level,
@@ -51,14 +163,23 @@ def setup(json_logs: bool = False, log_level: str = "INFO") -> None:
 
     log_renderer: structlog.types.Processor
     if json_logs:
-        log_renderer = structlog.processors.JSONRenderer()
+        log_renderer = JSONRenderer()
     else:
         log_renderer = structlog.dev.ConsoleRenderer()
 
+    # `logging` entries are formatted on the listener's thread, so they are
+    # stamped with the time they were logged rather than formatted
+    foreign_pre_chain: list[Processor] = [
+        _add_record_timestamp
+        if isinstance(processor, structlog.processors.TimeStamper)
+        else processor
+        for processor in shared_processors
+    ]
+
     formatter = structlog.stdlib.ProcessorFormatter(
         # These run ONLY on `logging` entries that do NOT originate within
         # structlog.
-        foreign_pre_chain=shared_processors,
+        foreign_pre_chain=foreign_pre_chain,
         # These run on ALL entries after the pre_chain is done.
         processors=[
             # Remove _record & _from_structlog.
@@ -71,7 +192,14 @@ def setup(json_logs: bool = False, log_level: str = "INFO") -> None:
     # Use OUR `ProcessorFormatter` to format all `logging` entries.
     handler.setFormatter(formatter)
     root_logger = logging.getLogger()
-    root_logger.addHandler(handler)
+
+    # The root logger only enqueues records, rendering and writing them to the
+    # stream happens on the listener's thread so it never stalls the event loop.
+    shutdown()
+    _queue_handler = _QueueHandler(queue.Queue(maxsize=queue_size))
+    _listener = logging.handlers.QueueListener(_queue_handler.queue, handler)
+    _listener.start()
+    root_logger.addHandler(_queue_handler)
     root_logger.setLevel(log_level.upper())
 
     # Only output warning files changed
@@ -0,0 +1,60 @@
+"""
+Event loop lag monitor.
+
+Sleeps for `LOOP_MONITOR_INTERVAL_MS` in a loop and measures how late it wakes
+up. Anything blocking the loop (CPU bound code, synchronous IO) delays every
+request by that much. Lag and the occupancy of the thread offload limiters
+are reported as metrics, and logged when the lag goes over
+`LOOP_LAG_WARN_MS` or calls queue for a worker thread.
+"""
+
+import time
+
+import anyio
+import structlog
+
+from . import metrics, workloads
+from .config import config
+
+logger: structlog.stdlib.BoundLogger = structlog.get_logger()
+
+event_loop_lag = metrics.registry.histogram(
+    "event_loop_lag_seconds",
+    "How late the event loop ran a timer",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+
+
+def check(lag: float) -> None:
+    """Record a lag sample, logging the limiters when the process is saturated"""
+    event_loop_lag.observe(lag)
+
+    statistics = {
+        name: limiter.statistics() for name, limiter in workloads.limiters().items()
+    }
+    saturated = [name for name, stats in statistics.items() if stats.tasks_waiting]
+
+    if lag * 1000 >= config.LOOP_LAG_WARN_MS or saturated:
+        logger.warning(
+            "Event loop lag or thread offload saturation",
+            lag=lag,
+            saturated=saturated,
+            limiters={
+                name: {
+                    "busy": stats.borrowed_tokens,
+                    "waiting": stats.tasks_waiting,
+                    "capacity": stats.total_tokens,
+                }
+                for name, stats in statistics.items()
+            },
+        )
+
+
+async def run() -> None:
+    """Sample the loop lag until cancelled"""
+    interval = config.LOOP_MONITOR_INTERVAL_MS / 1000
+
+    while True:
+        start = time.perf_counter()
+        await anyio.sleep(interval)
+        check(max(time.perf_counter() - start - interval, 0))
@@ -0,0 +1,284 @@
+"""
+Minimal Prometheus compatible metrics.
+
+Metrics are plain in-process values updated from the event loop, rendered in
+the Prometheus text exposition format (version 0.0.4) on scrape. Values that
+already live elsewhere (pool sizes, cache counters, limiter occupancy) are
+read by collectors registered with `registry.collector` when scraped, so the
+hot paths pay nothing for them.
+
+Label values must come from small, fixed sets (route templates, status codes,
+cache names), never raw paths or ids.
+"""
+
+import asyncio
+import math
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Sequence
+
+import anyio
+import anyio.to_thread
+
+type LabelValues = tuple[str, ...]
+type Sample = tuple[str, LabelValues, float]
+
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+    60,
+)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return f"{{{pairs}}}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+class Metric:
+    type: str = "untyped"
+    # appended to the exposed metric name, e.g. counters end in _total
+    suffix: str = ""
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def samples(self) -> Iterable[Sample]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        name = f"{self.name}{self.suffix}"
+        lines = [
+            f"# HELP {name} {self.documentation}",
+            f"# TYPE {name} {self.type}",
+        ]
+        for suffix, labels, value in self.samples():
+            names = self.labelnames + (("le",) if suffix == "_bucket" else ())
+            lines.append(
+                f"{name}{suffix}{_format_labels(names, labels)} {_format_value(value)}"
+            )
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type = "counter"
+    suffix = "_total"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, *labels: str) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def set(self, value: float, *labels: str) -> None:
+        """Mirror a count kept elsewhere, for use from collectors only"""
+        self._values[labels] = value
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> Iterable[Sample]:
+        for labels, value in list(self._values.items()):
+            yield "", labels, value
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+    def inc(self, amount: float = 1, *labels: str) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, amount: float = 1, *labels: str) -> None:
+        self.inc(-amount, *labels)
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def clear(self) -> None:
+        self._values.clear()
+
+    def samples(self) -> Iterable[Sample]:
+        for labels, value in list(self._values.items()):
+            yield "", labels, value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels: [per bucket counts..., +Inf count], sum
+        self._counts: dict[LabelValues, list[int]] = {}
+        self._sums: dict[LabelValues, float] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        counts = self._counts.get(labels)
+
+        if counts is None:
+            counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+            self._sums[labels] = 0
+
+        # counts are stored per bucket and accumulated when rendered
+        counts[bisect_left(self.buckets, value)] += 1
+        self._sums[labels] += value
+
+    def count(self, *labels: str) -> int:
+        return sum(self._counts.get(labels, ()))
+
+    def samples(self) -> Iterable[Sample]:
+        for labels, counts in list(self._counts.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                yield "_bucket", (*labels, _format_value(bound)), cumulative
+            yield "_sum", labels, self._sums[labels]
+            yield "_count", labels, cumulative
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+        self._collectors: list[Callable[[], None]] = []
+
+    def register[M: Metric](self, metric: M) -> M:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def collector(self, fn: Callable[[], None]) -> Callable[[], None]:
+        """Register a function that refreshes gauges right before a scrape"""
+        self._collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        for collect in self._collectors:
+            collect()
+
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+registry = Registry()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+thread_offload_busy = registry.gauge(
+    "thread_offload_busy",
+    "Worker threads currently running offloaded calls",
+    ("limiter",),
+)
+thread_offload_waiting = registry.gauge(
+    "thread_offload_waiting",
+    "Offloaded calls queued for a worker thread",
+    ("limiter",),
+)
+thread_offload_capacity = registry.gauge(
+    "thread_offload_capacity",
+    "Maximum concurrent offloaded calls",
+    ("limiter",),
+)
+
+
+def _default_limiter() -> anyio.CapacityLimiter | None:
+    # the default limiter only exists inside a running event loop
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+    return anyio.to_thread.current_default_thread_limiter()
+
+
+_limiters: dict[str, Callable[[], anyio.CapacityLimiter | None]] = {
+    "default": _default_limiter,
+}
+
+
+def watch_limiter(
+    name: str, get_limiter: Callable[[], anyio.CapacityLimiter | None]
+) -> None:
+    """
+    Report the occupancy of a thread offload limiter on scrape.
+    `get_limiter` may return None while the limiter has not been created yet.
+    """
+    _limiters[name] = get_limiter
+
+
+@registry.collector
+def _collect_limiters() -> None:
+    for name, get_limiter in _limiters.items():
+        limiter = get_limiter()
+        if limiter is None:
+            continue
+
+        statistics = limiter.statistics()
+        thread_offload_busy.set(statistics.borrowed_tokens, name)
+        thread_offload_waiting.set(statistics.tasks_waiting, name)
+        thread_offload_capacity.set(statistics.total_tokens, name)
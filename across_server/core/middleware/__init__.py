@@ -1,5 +1,7 @@
 from .logging import LoggingMiddleware
+from .metrics import MetricsMiddleware
 
 __all__ = [
     "LoggingMiddleware",
+    "MetricsMiddleware",
 ]
@@ -1,14 +1,34 @@
+import random
 import time
 
 import structlog
+from asgi_correlation_id import correlation_id
 from fastapi import Request, Response, status
+from starlette.datastructures import MutableHeaders
 from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from across_server.auth.context import get_request_principal
+from across_server.core import profiling, tracing
+from across_server.core.config import config
+from across_server.core.middleware.metrics import route_template
 from across_server.core.middleware.parse_client_ip import parse_client_ip
+from across_server.db import query_stats
 
 logger: structlog.stdlib.BoundLogger = structlog.get_logger()
 
 
+def sample_rate(status_code: int, duration_ns: int) -> float:
+    """
+    Fraction of requests like this one that are logged. Errors and slow
+    requests are always logged, the remaining requests (health checks, cheap
+    reads) are sampled at `LOG_SAMPLE_RATE`.
+    """
+    if status_code >= 400 or duration_ns >= config.LOG_SLOW_REQUEST_MS * 1e6:
+        return 1.0
+
+    return config.LOG_SAMPLE_RATE
+
+
 class LoggingMiddleware:
     def __init__(self, app: ASGIApp) -> None:
         self.app = app
@@ -21,12 +41,28 @@ class LoggingMiddleware:
         request = Request(scope, receive)
         start_time = time.perf_counter_ns()
         response = Response(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        db_stats, db_stats_token = query_stats.start()
+        root_span, trace_token = tracing.start(request.method)
+        profiler = profiling.start(scope, correlation_id.get())
 
         async def send_wrapper(message: Message) -> None:
             nonlocal response
             if message["type"] == "http.response.start":
                 response = Response(status_code=message["status"])
 
+                if config.SERVER_TIMING_HEADER:
+                    elapsed_ms = (time.perf_counter_ns() - start_time) / 1e6
+                    MutableHeaders(scope=message).append(
+                        "Server-Timing",
+                        f'db;dur={db_stats.duration_ns / 1e6:.3f};desc="{db_stats.statements} queries", '
+                        f"total;dur={elapsed_ms:.3f}",
+                    )
+
+                if profiler is not None:
+                    MutableHeaders(scope=message).append(
+                        "X-Profile", profiler.path.name
+                    )
+
             await send(message)
 
         try:
@@ -35,22 +71,40 @@ class LoggingMiddleware:
             structlog.stdlib.get_logger("api.error").exception("Uncaught exception")
             raise
         finally:
+            if profiler is not None:
+                profiler.stop()
+
             process_time = time.perf_counter_ns() - start_time
+            query_stats.stop(db_stats_token)
+            root_span.name = f"{request.method} {route_template(scope)}"
+            root_span.set(status_code=response.status_code)
             status_code = response.status_code
-            route = request.url.path
-            client_host = await parse_client_ip(scope=scope)
-            client_port = request.client.port if request.client else ""
-            http_method = request.method
-            http_version = scope.get("http_version", "")
-
-            logger.info(
-                f'{client_host}:{client_port} - "{http_method} {route} HTTP/{http_version}" {status_code}',
-                http={
-                    "url": str(request.url),
-                    "status_code": status_code,
-                    "method": http_method,
-                    "version": http_version,
-                },
-                network={"client": {"ip": client_host, "port": client_port}},
-                duration=process_time,
-            )
+
+            rate = sample_rate(status_code, process_time)
+
+            if rate >= 1 or random.random() < rate:
+                route = request.url.path
+                client_host = await parse_client_ip(scope=scope)
+                client_port = request.client.port if request.client else ""
+                http_method = request.method
+                http_version = scope.get("http_version", "")
+                # the limiter has already decoded the token, this is a cache read
+                principal = get_request_principal(scope)
+
+                logger.info(
+                    f'{client_host}:{client_port} - "{http_method} {route} HTTP/{http_version}" {status_code}',
+                    http={
+                        "url": str(request.url),
+                        "status_code": status_code,
+                        "method": http_method,
+                        "version": http_version,
+                    },
+                    network={"client": {"ip": client_host, "port": client_port}},
+                    principal={"id": principal.id, "type": principal.type},
+                    db=db_stats.to_dict(),
+                    duration=process_time,
+                    # lets log queries weight sampled entries back up
+                    sample_rate=rate,
+                )
+            # exported after the access log so it stays the request's first line
+            tracing.stop(root_span, trace_token)
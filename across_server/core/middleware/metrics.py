@@ -0,0 +1,66 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from across_server.core import metrics
+
+UNMATCHED_ROUTE = "unmatched"
+
+http_request_duration = metrics.registry.histogram(
+    "http_request_duration_seconds",
+    "Time to handle a request, by route template",
+    ("method", "route", "status"),
+)
+http_requests_in_flight = metrics.registry.gauge(
+    "http_requests_in_flight", "Requests currently being handled"
+)
+
+
+def route_template(scope: Scope) -> str:
+    """
+    Return the template of the route that handled the request, e.g.
+    `/v1/schedule/{schedule_id}`, so label values never contain raw paths.
+    Routers set the matched API route on the shared scope, mounted apps
+    extend its `root_path`. Plain starlette routes (the docs) and requests
+    that matched nothing are reported as `unmatched`.
+    """
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+
+    if path is None:
+        return UNMATCHED_ROUTE
+
+    return f"{scope.get('root_path', '')}{path}"
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+            await send(message)
+
+        http_requests_in_flight.inc()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec()
+            http_request_duration.observe(
+                time.perf_counter() - start_time,
+                scope["method"],
+                route_template(scope),
+                str(status_code),
+            )
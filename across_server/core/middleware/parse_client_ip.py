@@ -2,8 +2,16 @@ from ratelimit.auths.ip import client_ip
 from ratelimit.auths.jwt import EmptyInformation
 from ratelimit.types import Scope
 
+CLIENT_IP_STATE_KEY = "client_ip"
+
 
 async def parse_client_ip(scope: Scope) -> str:
+    # memoized on the scope state, the limiter, its blocked handler and the
+    # access log all need the client ip of the same request
+    state = scope.setdefault("state", {})
+    if CLIENT_IP_STATE_KEY in state:
+        return state[CLIENT_IP_STATE_KEY]
+
     ip = "unknown"
 
     try:
@@ -20,4 +28,6 @@ async def parse_client_ip(scope: Scope) -> str:
                 #   Spoofed: x-forwarded-for: "1.1.1.1, 2.2.2.2, 10.1.13.128"
                 ip = value.decode("utf-8").split(",")[-1].strip()
 
+    state[CLIENT_IP_STATE_KEY] = ip
+
     return ip
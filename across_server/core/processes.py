@@ -0,0 +1,120 @@
+"""
+Process pool for the CPU-bound computations.
+
+Ephemeris and visibility computations hold the GIL for most of their run, so
+in worker threads one of them runs at a time per process, and they delay the
+event loop and every other request of the process. With
+`PROCESS_POOL_WORKERS` above zero they run in a pool of worker processes
+instead, started with the app and warmed up with astropy's IERS tables and
+solar system ephemeris loaded. Calls still borrow from the limiter of their
+workload (see `workloads.py`), which bounds how many queue on the pool.
+
+With no workers, the default, they run in threads as before: check
+`enabled()` to pick.
+"""
+
+import asyncio
+import multiprocessing
+import os
+from collections.abc import Callable
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any
+
+import structlog
+
+from . import tracing, workloads
+from .config import config
+
+logger: structlog.stdlib.BoundLogger = structlog.get_logger()
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def _warm() -> None:
+    """Load what the first computation of a worker would, before it is needed"""
+    # deferred so only the workers import astropy's coordinates here
+    from astropy.coordinates import (  # type: ignore[import-untyped]
+        GCRS,
+        ITRS,
+        SkyCoord,
+        get_body,
+    )
+    from astropy.time import Time  # type: ignore[import-untyped]
+    from astropy.utils import iers  # type: ignore[import-untyped]
+
+    # as set by `main.py`, which workers don't import
+    iers.conf.auto_download = False
+    iers.conf.auto_max_age = None
+
+    try:
+        now = Time.now()
+        get_body("moon", now)
+        SkyCoord(0, 0, unit="deg", frame=GCRS(obstime=now)).transform_to(
+            ITRS(obstime=now)
+        )
+    except Exception as error:
+        # the worker still computes, loading the data on first use instead
+        logger.warning("Failed to preload astropy data", e=error)
+
+
+def _ready() -> int:
+    return os.getpid()
+
+
+def enabled() -> bool:
+    return _pool is not None
+
+
+async def start() -> None:
+    """Start and warm up the worker processes, if configured"""
+    global _pool
+
+    if config.PROCESS_POOL_WORKERS <= 0 or _pool is not None:
+        return
+
+    # forking would copy the event loop and its threads' locks
+    _pool = ProcessPoolExecutor(
+        max_workers=config.PROCESS_POOL_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_warm,
+    )
+    # workers start on demand, while none is idle each call starts one
+    await asyncio.gather(
+        *(
+            asyncio.wrap_future(_pool.submit(_ready))
+            for _ in range(config.PROCESS_POOL_WORKERS)
+        )
+    )
+    logger.info("Started process pool", workers=config.PROCESS_POOL_WORKERS)
+
+
+def stop() -> None:
+    global _pool
+
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def submit[R](func: Callable[..., R], *args: Any, **kwargs: Any) -> Future[R]:
+    """
+    Run `func` in a worker process, for calls from a worker thread. `func`,
+    its arguments and its result are pickled.
+    """
+    if _pool is None:
+        raise RuntimeError("The process pool is not started")
+
+    return _pool.submit(func, *args, **kwargs)
+
+
+async def run[R](
+    workload: workloads.Workload,
+    name: str,
+    func: Callable[..., R],
+    *args: Any,
+    **kwargs: Any,
+) -> R:
+    """Run `func` in a worker process, bounded by the workload's limiter"""
+    async with workloads.limiter(workload):
+        with tracing.span(name):
+            return await asyncio.wrap_future(submit(func, *args, **kwargs))
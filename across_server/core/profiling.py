@@ -0,0 +1,164 @@
+"""
+On-demand statistical profiling of single requests.
+
+When `PROFILING_ENABLED` is set, a request sent with the `X-Profile` header by
+a principal holding a `system` scope is sampled by a background thread that
+periodically records the stacks of the event loop thread and the worker
+threads. The samples are written to `PROFILING_DIR/<request id>.folded` in the
+collapsed stack format read by flamegraph.pl, speedscope and inferno.
+
+The sampler sees whole threads, so requests running concurrently on the same
+worker show up in the profile too, and only one request per process is
+profiled at a time. When disabled, the only cost is a flag check per request.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+
+import structlog
+from starlette.types import Scope
+
+from ..auth.context import get_request_principal
+from .config import config
+
+logger: structlog.stdlib.BoundLogger = structlog.get_logger()
+
+PROFILE_HEADER = b"x-profile"
+# anyio names the threads backing `to_thread.run_sync` like this
+_WORKER_THREAD_PREFIX = "AnyIO worker thread"
+
+_active = threading.Lock()
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _is_idle(frame: FrameType) -> bool:
+    # worker threads waiting for work, not worth a sample
+    return frame.f_code.co_name == "wait" and frame.f_code.co_filename.endswith(
+        "threading.py"
+    )
+
+
+class Profiler:
+    """
+    Sample the stacks of the calling (event loop) thread and of the worker
+    threads every `interval` seconds until stopped, then write the folded
+    stacks to `path` from the sampler thread.
+    """
+
+    def __init__(self, path: Path, interval: float) -> None:
+        self.path = path
+        self.interval = interval
+        self.samples = 0
+        self.stacks: Counter[str] = Counter()
+        self._loop_thread = threading.get_ident()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="request-profiler", daemon=True
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling, the profile is written without blocking the caller"""
+        self._stopped.set()
+
+    def sample(self) -> None:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+
+        for thread_id, frame in sys._current_frames().items():
+            name = names.get(thread_id, "")
+            if thread_id != self._loop_thread and not name.startswith(
+                _WORKER_THREAD_PREFIX
+            ):
+                continue
+            if _is_idle(frame):
+                continue
+
+            labels = []
+            current: FrameType | None = frame
+            while current is not None:
+                labels.append(_frame_label(current))
+                current = current.f_back
+
+            labels.append(name)
+            self.stacks[";".join(reversed(labels))] += 1
+
+        self.samples += 1
+
+    def write(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(
+            "".join(f"{stack} {count}\n" for stack, count in self.stacks.items())
+        )
+
+    def _run(self) -> None:
+        try:
+            while not self._stopped.wait(self.interval):
+                self.sample()
+
+            self.write()
+            logger.info(
+                "Saved request profile", path=str(self.path), samples=self.samples
+            )
+        except Exception:
+            logger.exception("Failed to profile request", path=str(self.path))
+        finally:
+            _active.release()
+
+
+def _requested(scope: Scope) -> bool:
+    for name, _ in scope.get("headers", []):
+        if name == PROFILE_HEADER:
+            return True
+
+    return False
+
+
+def _is_system(scope: Scope) -> bool:
+    # the scopes are signed into the access token, no lookup needed
+    principal = get_request_principal(scope)
+
+    if principal.token_data is None:
+        return False
+
+    return any(granted.startswith("system") for granted in principal.token_data.scopes)
+
+
+def start(scope: Scope, request_id: str | None) -> Profiler | None:
+    """
+    Start profiling the request if it asked for it and is allowed to,
+    returns the running profiler to `stop` once the request is done.
+    """
+    if not config.PROFILING_ENABLED or not _requested(scope):
+        return None
+
+    if not _is_system(scope):
+        logger.warning("Ignoring profile request from a non system principal")
+        return None
+
+    if not _active.acquire(blocking=False):
+        logger.warning("Ignoring profile request, another request is profiled")
+        return None
+
+    profiler = Profiler(
+        path=Path(config.PROFILING_DIR) / f"{request_id or time.time_ns()}.folded",
+        interval=config.PROFILING_INTERVAL_MS / 1000,
+    )
+
+    try:
+        profiler.start()
+    except Exception:
+        _active.release()
+        raise
+
+    return profiler
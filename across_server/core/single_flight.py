@@ -0,0 +1,98 @@
+"""
+Coalescing of identical in-flight computations.
+
+When a transient is announced, many clients ask for the same target within
+seconds: each request would compute the same ephemeris, visibility or name
+resolution before the first one is cached. A `SingleFlight` runs one task per
+key instead, concurrent calls with the same key waiting on it and sharing its
+result or exception.
+
+The task is shared, not owned by the call that started it: a caller leaving,
+e.g. as its client disconnects, stops waiting without cancelling it for the
+others. It is cancelled once no caller waits for it anymore, and forgotten,
+so the next call starts afresh. Only coalesce computations that don't use the
+request of the call starting them, such as its database session, which is
+closed when that request ends.
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from functools import partial
+from typing import Generic, TypeVar
+
+from . import metrics
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+single_flight_calls = metrics.registry.counter(
+    "single_flight_calls", "Calls starting a coalesced computation", ("flight",)
+)
+single_flight_joined = metrics.registry.counter(
+    "single_flight_joined",
+    "Calls waiting on an identical computation already in flight",
+    ("flight",),
+)
+
+
+class _Flight(Generic[V]):
+    def __init__(self, task: "asyncio.Task[V]") -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight(Generic[K, V]):
+    """
+    Concurrent calls of the same key, sharing one in-flight computation.
+
+    Parameters
+    ----------
+    name : str
+        Identifier used when reporting statistics.
+    """
+
+    def __init__(self, name: str = "") -> None:
+        self.name = name
+        self._flights: dict[K, _Flight[V]] = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    def _forget(self, key: K, flight: _Flight[V]) -> None:
+        # unless a new flight has taken the key meanwhile
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def _done(self, key: K, flight: _Flight[V], task: "asyncio.Task[V]") -> None:
+        self._forget(key, flight)
+        # retrieved, should every caller have left before it failed
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key: K, compute: Callable[[], Awaitable[V]]) -> V:
+        """
+        The result of `compute()`, or of the computation of the same key
+        already in flight.
+        """
+        flight = self._flights.get(key)
+
+        if flight is None:
+
+            async def run() -> V:
+                return await compute()
+
+            flight = _Flight(asyncio.create_task(run()))
+            flight.task.add_done_callback(partial(self._done, key, flight))
+            self._flights[key] = flight
+            single_flight_calls.inc(1, self.name)
+        else:
+            single_flight_joined.inc(1, self.name)
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if not flight.waiters and not flight.task.done():
+                flight.task.cancel()
+                self._forget(key, flight)
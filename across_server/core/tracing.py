@@ -0,0 +1,317 @@
+"""
+Lightweight in-process tracing.
+
+A trace is started per request by `LoggingMiddleware` and identified by the
+request id. Code running within the request opens nested spans with `span`,
+`traced` or `in_thread`; outside of a trace they are no-ops, so background
+jobs and tests pay nothing. The current span lives in a context variable,
+which `anyio.to_thread.run_sync` copies into the worker thread, so spans
+opened inside offloaded calls nest under the span that awaited them.
+
+Finished traces slower than `TRACING_MIN_DURATION_MS` are exported as a
+structured log event, or appended to `TRACING_OTLP_FILE` as OTLP/JSON
+`ExportTraceServiceRequest` lines, depending on `TRACING_EXPORTER`. OTLP
+traces are queued to a writer thread, like log records, which renders and
+appends them off the event loop.
+"""
+
+import atexit
+import functools
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import threading
+import time
+import uuid
+from collections.abc import Awaitable, Callable, Generator
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, cast
+
+import structlog
+from asgi_correlation_id import correlation_id
+
+from . import metrics
+from .config import config
+
+SERVICE_NAME = "across-server"
+
+traces_dropped = metrics.registry.counter(
+    "traces_dropped", "Traces dropped because the OTLP export queue was full"
+)
+
+logger: structlog.stdlib.BoundLogger = structlog.get_logger()
+
+type AttributeValue = str | int | float | bool
+
+
+class Span:
+    def __init__(
+        self,
+        name: str,
+        trace: "Trace",
+        parent_id: str | None = None,
+        attributes: dict[str, AttributeValue] | None = None,
+    ) -> None:
+        self.name = name
+        self.trace = trace
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.attributes: dict[str, AttributeValue] = attributes or {}
+        self.thread = threading.current_thread().name
+        self.error: str | None = None
+        self.start_unix_ns = time.time_ns()
+        self.duration_ns = 0
+        self._start_ns = time.perf_counter_ns()
+
+    def set(self, **attributes: AttributeValue) -> None:
+        self.attributes.update(attributes)
+
+    def finish(self) -> None:
+        self.duration_ns = time.perf_counter_ns() - self._start_ns
+        self.trace.spans.append(self)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start_unix_ns,
+            "duration": self.duration_ns,
+            "thread": self.thread,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class Trace:
+    """Spans finished within one request, appended from any thread"""
+
+    def __init__(self, trace_id: str) -> None:
+        self.trace_id = trace_id
+        self.spans: list[Span] = []
+
+
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+def current() -> Span | None:
+    return _current_span.get()
+
+
+def set_attributes(**attributes: AttributeValue) -> None:
+    """Add attributes to the current span, if any"""
+    if (current_span := _current_span.get()) is not None:
+        current_span.set(**attributes)
+
+
+def _trace_id() -> str:
+    # request ids are uuid4s, whose 32 hex digits are a valid trace id
+    request_id = correlation_id.get()
+
+    if request_id:
+        trace_id = request_id.replace("-", "")
+        if len(trace_id) == 32:
+            return trace_id
+
+    return uuid.uuid4().hex
+
+
+def start(name: str, **attributes: AttributeValue) -> tuple[Span, Token[Span | None]]:
+    """Start a new trace with a root span, activated for the current context"""
+    root = Span(name, Trace(_trace_id()), attributes=attributes)
+    return root, _current_span.set(root)
+
+
+def stop(root: Span, token: Token[Span | None]) -> None:
+    """Finish the root span and export the trace"""
+    _current_span.reset(token)
+    root.finish()
+
+    if root.duration_ns >= config.TRACING_MIN_DURATION_MS * 1e6:
+        export(root)
+
+
+@contextmanager
+def span(name: str, **attributes: AttributeValue) -> Generator[Span | None]:
+    """Time the block as a child of the current span, a no-op outside a trace"""
+    parent = _current_span.get()
+
+    if parent is None:
+        yield None
+        return
+
+    child = Span(name, parent.trace, parent.span_id, attributes)
+    token = _current_span.set(child)
+
+    try:
+        yield child
+    except BaseException as error:
+        child.error = type(error).__name__
+        raise
+    finally:
+        _current_span.reset(token)
+        child.finish()
+
+
+def traced[**P, R](
+    name: str,
+) -> Callable[[Callable[P, Awaitable[R]]], Callable[P, Awaitable[R]]]:
+    """Decorate a coroutine function to run within a span"""
+
+    def decorator(func: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+        @functools.wraps(func)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            with span(name):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def in_thread[R](name: str, func: Callable[[], R]) -> Callable[[], R]:
+    """
+    Wrap a callable handed to `anyio.to_thread.run_sync` so it runs in a span
+    recording how long it queued for a worker thread.
+    """
+    if _current_span.get() is None:
+        return func
+
+    submitted_ns = time.perf_counter_ns()
+
+    def run() -> R:
+        with span(name) as thread_span:
+            if thread_span is not None:
+                thread_span.set(queued=time.perf_counter_ns() - submitted_ns)
+            return func()
+
+    return run
+
+
+def export(root: Span) -> None:
+    if config.TRACING_EXPORTER == "log":
+        logger.info(
+            f"trace {root.name}",
+            trace_id=root.trace.trace_id,
+            duration=root.duration_ns,
+            spans=[span.to_dict() for span in root.trace.spans],
+        )
+    elif config.TRACING_EXPORTER == "otlp":
+        _write_otlp(root.trace)
+
+
+def _otlp_value(value: AttributeValue) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        # 64 bit integers are strings in OTLP/JSON
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": value}
+
+
+def to_otlp(trace: Trace) -> dict[str, Any]:
+    """Render the trace as an OTLP/JSON `ExportTraceServiceRequest`"""
+    spans = []
+
+    for trace_span in trace.spans:
+        attributes = {**trace_span.attributes, "thread.name": trace_span.thread}
+        otlp_span: dict[str, Any] = {
+            "traceId": trace.trace_id,
+            "spanId": trace_span.span_id,
+            "name": trace_span.name,
+            # server for the request's root span, internal otherwise
+            "kind": 2 if trace_span.parent_id is None else 1,
+            "startTimeUnixNano": str(trace_span.start_unix_ns),
+            "endTimeUnixNano": str(trace_span.start_unix_ns + trace_span.duration_ns),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)}
+                for key, value in attributes.items()
+            ],
+            "status": (
+                {"code": 2, "message": trace_span.error}
+                if trace_span.error
+                else {"code": 1}
+            ),
+        }
+        if trace_span.parent_id is not None:
+            otlp_span["parentSpanId"] = trace_span.parent_id
+        spans.append(otlp_span)
+
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [
+                        {
+                            "key": "service.name",
+                            "value": {"stringValue": SERVICE_NAME},
+                        },
+                        {
+                            "key": "deployment.environment",
+                            "value": {"stringValue": config.APP_ENV},
+                        },
+                    ]
+                },
+                "scopeSpans": [{"scope": {"name": "across_server"}, "spans": spans}],
+            }
+        ]
+    }
+
+
+class _OtlpFormatter(logging.Formatter):
+    """Render the trace carried by a record as an OTLP/JSON line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(to_otlp(cast(Trace, record.msg)), separators=(",", ":"))
+
+
+_otlp_queue: queue.Queue[logging.LogRecord] | None = None
+_otlp_listener: logging.handlers.QueueListener | None = None
+_otlp_start_lock = threading.Lock()
+
+
+def _otlp_writer() -> queue.Queue[logging.LogRecord]:
+    global _otlp_queue, _otlp_listener
+
+    # started on first export, appending to the file configured then
+    with _otlp_start_lock:
+        if _otlp_queue is None:
+            handler = logging.FileHandler(config.TRACING_OTLP_FILE, delay=True)
+            handler.setFormatter(_OtlpFormatter())
+            _otlp_queue = queue.Queue(maxsize=config.TRACING_OTLP_QUEUE_SIZE)
+            _otlp_listener = logging.handlers.QueueListener(_otlp_queue, handler)
+            _otlp_listener.start()
+
+        return _otlp_queue
+
+
+def _write_otlp(trace: Trace) -> None:
+    record = logging.LogRecord(__name__, logging.INFO, __file__, 0, trace, None, None)
+
+    try:
+        _otlp_writer().put_nowait(record)
+    except queue.Full:
+        traces_dropped.inc()
+
+
+def shutdown() -> None:
+    """Flush queued OTLP traces and stop the writer thread"""
+    global _otlp_queue, _otlp_listener
+
+    with _otlp_start_lock:
+        if _otlp_listener is not None:
+            _otlp_listener.stop()
+            for handler in _otlp_listener.handlers:
+                handler.close()
+
+        _otlp_queue = None
+        _otlp_listener = None
+
+
+# traces still queued at exit would otherwise be lost with the daemon thread
+atexit.register(shutdown)
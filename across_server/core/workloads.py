@@ -0,0 +1,53 @@
+"""
+Thread offload limits per workload.
+
+`anyio.to_thread.run_sync` borrows from one default limiter shared by the
+whole process, so a burst of visibility calculations can take every token and
+queue the short offloaded calls of unrelated requests behind it. Heavy
+workloads instead borrow from limiters of their own, sized by the
+`THREAD_LIMIT_*` settings, leaving the default limiter to everything else.
+"""
+
+from collections.abc import Callable
+from typing import Literal
+
+import anyio
+import anyio.to_thread
+
+from . import metrics
+from .config import config
+
+type Workload = Literal["ephemeris", "visibility", "resolve_object"]
+
+_limits: dict[Workload, int] = {
+    "ephemeris": config.THREAD_LIMIT_EPHEMERIS,
+    "visibility": config.THREAD_LIMIT_VISIBILITY,
+    "resolve_object": config.THREAD_LIMIT_RESOLVE_OBJECT,
+}
+_limiters: dict[str, anyio.CapacityLimiter] = {}
+
+
+def limiter(workload: Workload) -> anyio.CapacityLimiter:
+    # created on first use, from within the event loop
+    if workload not in _limiters:
+        _limiters[workload] = anyio.CapacityLimiter(_limits[workload])
+
+    return _limiters[workload]
+
+
+def limiters() -> dict[str, anyio.CapacityLimiter]:
+    """Limiters created so far, including the default one"""
+    return {"default": anyio.to_thread.current_default_thread_limiter(), **_limiters}
+
+
+async def run_sync[R](workload: Workload, func: Callable[[], R]) -> R:
+    """Run `func` in a worker thread, bounded by the workload's limiter"""
+    return await anyio.to_thread.run_sync(func, limiter=limiter(workload))
+
+
+def _watch(workload: Workload) -> None:
+    metrics.watch_limiter(workload, lambda: _limiters.get(workload))
+
+
+for _workload in _limits:
+    _watch(_workload)
@@ -24,6 +24,12 @@ class Config(BaseSettings):
 
     DRIVER_NAME: str = "postgresql+asyncpg"
 
+    # Slow statement log, see `db/slow_queries.py`
+    SLOW_QUERY_THRESHOLD_MS: float = 500
+    SLOW_QUERY_MAX_STATEMENTS: int = 500
+    SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS: float = 300
+    SLOW_QUERY_EXPLAIN_CONCURRENCY: int = 1
+
     def __init__(self) -> None:
         super().__init__()
 
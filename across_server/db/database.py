@@ -10,7 +10,9 @@ from sqlalchemy.ext.asyncio import (
     create_async_engine,
 )
 
+from ..core import metrics
 from ..core.config import config as core_config
+from . import query_stats, slow_queries
 from .config import config
 
 logger: structlog.stdlib.BoundLogger = structlog.get_logger()
@@ -18,6 +20,16 @@ logger: structlog.stdlib.BoundLogger = structlog.get_logger()
 engine: AsyncEngine
 async_session: async_sessionmaker
 
+db_pool_size = metrics.registry.gauge(
+    "db_pool_size", "Persistent connections the pool keeps open"
+)
+db_pool_checked_out = metrics.registry.gauge(
+    "db_pool_checked_out", "Connections currently checked out of the pool"
+)
+db_pool_overflow = metrics.registry.gauge(
+    "db_pool_overflow", "Connections open beyond the pool size"
+)
+
 
 # see: https://docs.sqlalchemy.org/en/20/core/events.html#sqlalchemy.events.DialectEvents.do_connect
 def refresh_token(
@@ -44,6 +56,8 @@ def init() -> None:
         pool_pre_ping=True,
         connect_args={"ssl": "require" if not core_config.is_local() else False},
     )
+    query_stats.instrument(engine.sync_engine)
+    slow_queries.instrument(engine)
     logger.debug("Created async db engine")
 
     async_session = async_sessionmaker(
@@ -58,6 +72,18 @@ def init() -> None:
         event.listen(engine.sync_engine, "do_connect", refresh_token)
 
 
+@metrics.registry.collector
+def _collect_pool() -> None:
+    if "engine" not in globals():
+        return
+
+    engine_pool = engine.pool
+    if isinstance(engine_pool, pool.QueuePool):
+        db_pool_size.set(engine_pool.size())
+        db_pool_checked_out.set(engine_pool.checkedout())
+        db_pool_overflow.set(max(engine_pool.overflow(), 0))
+
+
 async def get_session() -> AsyncGenerator[AsyncSession]:
     """
     Dependency to handle session lifecycle per request.
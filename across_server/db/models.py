@@ -17,6 +17,7 @@ from sqlalchemy import (
     Table,
     UniqueConstraint,
     desc,
+    text,
 )
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.ext.asyncio import AsyncAttrs
@@ -385,6 +386,54 @@ class User(Base, CreatableMixin, ModifiableMixin):
     )
 
 
+class PermissionVersion(Base):
+    """
+    Monotonic version of a principal's permissions.
+
+    `id` is the user or service account id, the nil UUID row holds the
+    global epoch bumped by changes that affect many principals at once.
+    """
+
+    __tablename__ = "permission_version"
+
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class VisibilityJob(Base, CreatableMixin):
+    """
+    A visibility calculation run in the background, see
+    `routes/v1/tools/visibility_calculator/jobs/`.
+
+    `checkpoint` holds the windows of each date chunk computed so far, and
+    `heartbeat_on` when its worker last reported, at most one job per
+    `fingerprint` of its kind and parameters is queued or running.
+    """
+
+    __tablename__ = "visibility_job"
+
+    kind: Mapped[str] = mapped_column(String(50), nullable=False)
+    parameters: Mapped[dict] = mapped_column(JSON, nullable=False)
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False, index=True)
+    status: Mapped[str] = mapped_column(String(50), nullable=False, index=True)
+    progress: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+    checkpoint: Mapped[list] = mapped_column(JSON, nullable=False, default=list)
+    result: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    error: Mapped[str | None] = mapped_column(String(1024), nullable=True)
+    heartbeat_on: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    completed_on: Mapped[datetime | None] = mapped_column(
+        DateTime, nullable=True, index=True
+    )
+
+    __table_args__ = (
+        Index(
+            "ix_visibility_job_pending_fingerprint",
+            "fingerprint",
+            unique=True,
+            postgresql_where=text("status IN ('queued', 'running')"),
+        ),
+    )
+
+
 class Group(Base, CreatableMixin, ModifiableMixin):
     __tablename__: str = "group"
 
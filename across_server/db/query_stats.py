@@ -0,0 +1,152 @@
+import time
+from collections import Counter
+from collections.abc import Generator
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any
+
+from sqlalchemy import Engine, event
+from sqlalchemy.engine import Connection, ExceptionContext, ExecutionContext
+
+from . import slow_queries
+from .config import config
+
+_QUERY_START_KEY = "query_start_ns"
+
+
+class QueryStats:
+    """
+    Statements executed while the stats are active.
+
+    SQLAlchemy runs the async engine's sync internals in a greenlet sharing the
+    caller's context, so statements are attributed to the request whose
+    context activated the stats.
+    """
+
+    def __init__(self, parent: "QueryStats | None" = None) -> None:
+        self.parent = parent
+        self.statements = 0
+        self.duration_ns = 0
+        self.rows = 0
+        self.slowest_ns = 0
+        self.slowest_statement: str | None = None
+        self._counts: Counter[str] = Counter()
+
+    @property
+    def max_repeats(self) -> int:
+        """Executions of the most repeated statement, a tell of N+1 loading"""
+        return max(self._counts.values(), default=0)
+
+    def record(self, statement: str, duration_ns: int, rows: int) -> None:
+        self.statements += 1
+        self.duration_ns += duration_ns
+        self.rows += max(rows, 0)
+        self._counts[statement] += 1
+
+        if duration_ns > self.slowest_ns:
+            self.slowest_ns = duration_ns
+            self.slowest_statement = statement
+
+        if self.parent is not None:
+            self.parent.record(statement, duration_ns, rows)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "statements": self.statements,
+            "duration": self.duration_ns,
+            "rows": self.rows,
+            "max_repeats": self.max_repeats,
+            "slowest": {
+                "duration": self.slowest_ns,
+                "statement": self.slowest_statement,
+            },
+        }
+
+
+_query_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def current() -> QueryStats | None:
+    return _query_stats.get()
+
+
+def start() -> tuple[QueryStats, Token[QueryStats | None]]:
+    """
+    Activate new stats for the current context.
+    Stats already active, e.g. from `query_budget`, keep receiving statements.
+    """
+    stats = QueryStats(parent=_query_stats.get())
+    return stats, _query_stats.set(stats)
+
+
+def stop(token: Token[QueryStats | None]) -> None:
+    _query_stats.reset(token)
+
+
+@contextmanager
+def query_budget(max_statements: int) -> Generator[QueryStats]:
+    """
+    Fail when more than `max_statements` are executed within the block.
+
+    Intended for tests, to catch lazy loading (N+1) regressions:
+
+        with query_budget(2):
+            await async_client.get("/v1/user/")
+    """
+    stats, token = start()
+
+    try:
+        yield stats
+    finally:
+        stop(token)
+
+    assert stats.statements <= max_statements, (
+        f"Executed {stats.statements} statements, over the budget of "
+        f"{max_statements}. Most repeated statement ran {stats.max_repeats} times."
+    )
+
+
+def _before_cursor_execute(
+    conn: Connection,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: ExecutionContext | None,
+    executemany: bool,
+) -> None:
+    conn.info.setdefault(_QUERY_START_KEY, []).append(time.perf_counter_ns())
+
+
+def _after_cursor_execute(
+    conn: Connection,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: ExecutionContext | None,
+    executemany: bool,
+) -> None:
+    duration_ns = time.perf_counter_ns() - conn.info[_QUERY_START_KEY].pop()
+    stats = _query_stats.get()
+
+    if stats is not None:
+        stats.record(statement, duration_ns, cursor.rowcount)
+
+    if duration_ns >= config.SLOW_QUERY_THRESHOLD_MS * 1e6:
+        slow_queries.record(statement, parameters, duration_ns, executemany)
+
+
+def _handle_error(exception_context: ExceptionContext) -> None:
+    # failed statements never reach after_cursor_execute
+    conn = exception_context.connection
+    if conn is not None and conn.info.get(_QUERY_START_KEY):
+        conn.info[_QUERY_START_KEY].pop()
+
+
+def instrument(engine: Engine) -> None:
+    """Record every statement executed by the engine into the active stats"""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
@@ -0,0 +1,171 @@
+"""
+Slow statement log.
+
+Statements slower than `SLOW_QUERY_THRESHOLD_MS` are aggregated by fingerprint,
+the statement with whitespace and expanded `IN` lists collapsed. The first
+slow execution of a fingerprint, and then at most one every
+`SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS`, schedules an `EXPLAIN (FORMAT JSON)` of
+the statement with the same parameters. It runs as a detached task on its own
+connection, so the request that ran the statement never waits for it.
+"""
+
+import asyncio
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from collections.abc import Sequence
+from contextvars import Context
+from datetime import datetime, timezone
+from typing import Any
+
+import structlog
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .config import config
+
+logger: structlog.stdlib.BoundLogger = structlog.get_logger()
+
+# statements that EXPLAIN describes without side effects
+_EXPLAINABLE = re.compile(r"^\s*(select|with)\b", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+# `IN ($1, $2, ...)` varies with the number of values, not the plan shape
+_IN_LIST = re.compile(
+    r"\bIN \((?:\$\d+|%s|\?|%\(\w+\)s)(?:, (?:\$\d+|%s|\?|%\(\w+\)s))*\)",
+    re.IGNORECASE,
+)
+
+
+class SlowStatement:
+    def __init__(self, fingerprint: str, statement: str) -> None:
+        self.fingerprint = fingerprint
+        self.statement = statement
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.last_seen: datetime | None = None
+        self.parameters: list[str] = []
+        self.plan: Any = None
+        self.plan_error: str | None = None
+        self.explained_at = 0.0
+
+
+_statements: OrderedDict[str, SlowStatement] = OrderedDict()
+_tasks: set[asyncio.Task[None]] = set()
+_engine: AsyncEngine | None = None
+
+
+def normalize(statement: str) -> str:
+    return _IN_LIST.sub("IN (...)", _WHITESPACE.sub(" ", statement).strip())
+
+
+def fingerprint(statement: str) -> str:
+    return hashlib.sha1(normalize(statement).encode()).hexdigest()[:16]
+
+
+def parameter_shape(parameters: Any, executemany: bool) -> list[str]:
+    """Types of the bound parameters, never their values"""
+    if executemany and isinstance(parameters, Sequence) and parameters:
+        return [f"{len(parameters)} x {shape}" for shape in _shape(parameters[0])]
+
+    return _shape(parameters)
+
+
+def _shape(parameters: Any) -> list[str]:
+    if isinstance(parameters, dict):
+        return [f"{key}: {type(value).__name__}" for key, value in parameters.items()]
+    if isinstance(parameters, Sequence) and not isinstance(parameters, str):
+        return [type(value).__name__ for value in parameters]
+    return []
+
+
+def statements() -> list[SlowStatement]:
+    """Aggregated slow statements, slowest total time first"""
+    return sorted(_statements.values(), key=lambda slow: slow.total_ns, reverse=True)
+
+
+def clear() -> None:
+    _statements.clear()
+
+
+def record(
+    statement: str, parameters: Any, duration_ns: int, executemany: bool
+) -> None:
+    """Aggregate a statement that went over the threshold"""
+    if statement.startswith("EXPLAIN "):
+        return
+
+    key = fingerprint(statement)
+    slow = _statements.get(key)
+
+    if slow is None:
+        slow = _statements[key] = SlowStatement(key, normalize(statement))
+        while len(_statements) > config.SLOW_QUERY_MAX_STATEMENTS:
+            _statements.popitem(last=False)
+
+    _statements.move_to_end(key)
+    slow.count += 1
+    slow.total_ns += duration_ns
+    slow.max_ns = max(slow.max_ns, duration_ns)
+    slow.last_seen = datetime.now(timezone.utc)
+    slow.parameters = parameter_shape(parameters, executemany)
+
+    logger.warning(
+        "Slow statement",
+        fingerprint=key,
+        duration=duration_ns,
+        parameters=slow.parameters,
+    )
+
+    if not executemany and _EXPLAINABLE.match(statement):
+        _schedule_explain(slow, statement, parameters)
+
+
+def _schedule_explain(slow: SlowStatement, statement: str, parameters: Any) -> None:
+    now = time.monotonic()
+
+    if _engine is None or (
+        slow.explained_at
+        and now - slow.explained_at < config.SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS
+    ):
+        return
+
+    if len(_tasks) >= config.SLOW_QUERY_EXPLAIN_CONCURRENCY:
+        return
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # sync engine use outside the app, nothing to schedule on
+        return
+
+    slow.explained_at = now
+    # a fresh context keeps the EXPLAIN out of the request's query stats and trace
+    task = loop.create_task(
+        _explain(_engine, slow, statement, parameters), context=Context()
+    )
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+async def _explain(
+    engine: AsyncEngine, slow: SlowStatement, statement: str, parameters: Any
+) -> None:
+    try:
+        async with engine.connect() as conn:
+            result = await conn.exec_driver_sql(
+                f"EXPLAIN (FORMAT JSON) {statement}", parameters
+            )
+            slow.plan = result.scalar()
+            slow.plan_error = None
+    except Exception as error:
+        slow.plan_error = str(error)
+        logger.warning(
+            "Failed to explain slow statement", fingerprint=slow.fingerprint, e=error
+        )
+
+
+def instrument(engine: AsyncEngine) -> None:
+    """Use `engine` to EXPLAIN slow statements"""
+    global _engine
+    _engine = engine
@@ -1,24 +1,35 @@
+import asyncio
 import os
 import time
 import uuid
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 from pathlib import Path
 from typing import AsyncGenerator
 
+import anyio.to_thread
 import structlog
 from asgi_correlation_id import CorrelationIdMiddleware
 from astropy.utils import iers  # type: ignore
-from fastapi import FastAPI, status
+from fastapi import Depends, FastAPI, Response, status
 from fastapi.responses import FileResponse, RedirectResponse
 from ratelimit import RateLimitMiddleware
-from ratelimit.backends.simple import MemoryBackend
 
 from across_server import db
 
 from . import __version__
-from .core import config, limiter, logging
-from .core.middleware import LoggingMiddleware
+from .auth.strategies import internal_access
+from .core import (
+    config,
+    limiter,
+    logging,
+    loop_monitor,
+    metrics,
+    processes,
+    tracing,
+)
+from .core.middleware import LoggingMiddleware, MetricsMiddleware
 from .routes import v1
+from .routes.v1.tools.visibility_calculator import jobs as visibility_jobs
 
 # Disable auto-downloading of IERS data
 iers.conf.auto_download = False
@@ -33,11 +44,29 @@ logger: structlog.stdlib.BoundLogger = structlog.get_logger()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
-    logging.setup(json_logs=config.LOG_JSON_FORMAT, log_level=config.LOG_LEVEL)
+    logging.setup(
+        json_logs=config.LOG_JSON_FORMAT,
+        log_level=config.LOG_LEVEL,
+        queue_size=config.LOG_QUEUE_SIZE,
+    )
     db.init()
+    anyio.to_thread.current_default_thread_limiter().total_tokens = (
+        config.THREAD_LIMIT_DEFAULT
+    )
+    monitor = asyncio.create_task(loop_monitor.run())
+    await processes.start()
+    await visibility_jobs.worker.start()
 
     yield
 
+    await visibility_jobs.worker.stop()
+    processes.stop()
+    monitor.cancel()
+    with suppress(asyncio.CancelledError):
+        await monitor
+    tracing.shutdown()
+    logging.shutdown()
+
 
 tags_metadata = [
     {
@@ -64,10 +93,16 @@ app.add_middleware(LoggingMiddleware)
 app.add_middleware(
     RateLimitMiddleware,
     authenticate=limiter.authenticate_limit,
-    backend=MemoryBackend(),
+    # swap the store for a shared one to enforce one budget across workers
+    backend=limiter.TokenBucketBackend(
+        limiter.MemoryBucketStore(max_keys=limiter.limiter_config.LIMIT_MAX_KEYS),
+        costs=limiter.costs,
+    ),
     config=limiter.rules,
     on_blocked=limiter.on_limit_exceeded,
 )
+# outside the limiter so rejected requests are measured too
+app.add_middleware(MetricsMiddleware)
 # This middleware must be placed after the logging, to populate the context with the request ID
 # NOTE: Why last??
 # Answer: middlewares are applied in the reverse order of when they are added (you can verify this
@@ -91,6 +126,15 @@ async def get() -> str:
     return "ok"
 
 
+@app.get(
+    "/metrics",
+    include_in_schema=False,
+    dependencies=[Depends(internal_access)],
+)
+async def get_metrics() -> Response:
+    return Response(content=metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+
 @app.get("/favicon.ico", include_in_schema=False)
 async def get_favicon() -> FileResponse:
     return FileResponse(Path("static/favicon.ico"))
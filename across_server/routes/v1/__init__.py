@@ -14,6 +14,7 @@ from . import (
     permission,
     role,
     schedule,
+    slow_query,
     system_service_account,
     telescope,
     tle,
@@ -49,3 +50,4 @@ api.include_router(tools.router)
 api.include_router(observation_request.router)
 api.include_router(broker_event.router)
 api.include_router(broker_alert.router)
+api.include_router(slow_query.router)
@@ -5,6 +5,8 @@ from fastapi import Depends
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from .....auth import versions
+from .....auth.cache import auth_user_cache
 from .....core.exceptions import DuplicateEntityException
 from .....db import models
 from .....db.database import get_session
@@ -72,7 +74,9 @@ class GroupInviteService:
         """Accept a group invite and delete the invite entity"""
         invite.group.users.append(invite.receiver)
         await self.db.delete(invite)
+        await versions.bump(self.db, invite.receiver.id)
         await self.db.commit()
+        auth_user_cache.invalidate(invite.receiver.id)
 
     async def delete(self, invite: models.GroupInvite) -> None:
         """Delete an invite entity from the database"""
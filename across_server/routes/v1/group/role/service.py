@@ -6,6 +6,8 @@ from fastapi import Depends
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from .....auth import versions
+from .....auth.cache import auth_user_cache
 from .....db import get_session, models
 from ...group.exceptions import GroupNotFoundException
 from .exceptions import GroupRoleNotFoundException
@@ -69,7 +71,9 @@ class GroupRoleService:
 
         user.group_roles.append(group_role)
 
+        await versions.bump(self.db, user.id)
         await self.db.commit()
+        auth_user_cache.invalidate(user.id)
         return group_role
 
     async def remove(
@@ -88,7 +92,14 @@ class GroupRoleService:
         if group_role in user.group_roles:
             user.group_roles.remove(group_role)
 
+        principal_ids = [
+            user.id,
+            *(service_account.id for service_account in user.service_accounts),
+        ]
+
+        await versions.bump(self.db, *principal_ids)
         await self.db.commit()
+        auth_user_cache.invalidate(*principal_ids)
 
     async def create(
         self, role_name: str, permissions: list[models.Permission], group_id: UUID
@@ -99,7 +110,10 @@ class GroupRoleService:
 
         self.db.add(group_role)
 
+        await versions.bump_all(self.db)
         await self.db.commit()
+        # group scopes are aggregated from every role in the group
+        auth_user_cache.invalidate_all()
         return group_role
 
     async def update(
@@ -116,11 +130,15 @@ class GroupRoleService:
         group_role.name = role_name
         group_role.permissions = permissions
 
+        await versions.bump_all(self.db)
         await self.db.commit()
+        auth_user_cache.invalidate_all()
         return group_role
 
     async def delete(self, group_role: models.GroupRole) -> None:
         # Delete the role, this will cascade delete the group_role from all users and service accounts.
         await self.db.delete(group_role)
 
+        await versions.bump_all(self.db)
         await self.db.commit()
+        auth_user_cache.invalidate_all()
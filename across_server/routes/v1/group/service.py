@@ -6,6 +6,8 @@ from fastapi import Depends
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ....auth import versions
+from ....auth.cache import auth_user_cache
 from ....db import get_session, models
 from .exceptions import GroupNotFoundException
 from .role.service import GroupRoleService
@@ -51,4 +53,6 @@ class GroupService:
         if user in group.users:
             group.users.remove(user)
 
+        await versions.bump(self.db, user.id)
         await self.db.commit()
+        auth_user_cache.invalidate(user.id)
@@ -23,6 +23,8 @@ class InstrumentService:
     -------
     get(instrument_id: UUID) -> models.Instrument
         Retrieve the Instrument record with the given id.
+    get_by_ids(instrument_ids: list[UUID]) -> list[models.Instrument]
+        Retrieve the Instrument records with the given ids, in one query.
     get_many(data: schemas.InstrumentRead) -> Sequence[models.Instrument]
         Retrieves many Instruments based on the Instrument filter params.
     has_footprint()
@@ -64,6 +66,43 @@ class InstrumentService:
 
         return instrument
 
+    async def get_by_ids(self, instrument_ids: list[UUID]) -> list[models.Instrument]:
+        """
+        Retrieve the Instrument records with the given ids, in one query,
+        along with their telescopes.
+        Parameters
+        ----------
+        instrument_ids : list[UUID]
+            the Instrument ids
+        Returns
+        -------
+        list[models.Instrument]
+            The Instruments with the given ids, in the order of the ids
+        Raises
+        ------
+        InstrumentNotFoundException
+        """
+        options = [
+            selectinload(models.Instrument.footprints),
+            selectinload(models.Instrument.filters),
+        ]
+        query = (
+            select(models.Instrument)
+            .where(models.Instrument.id.in_(instrument_ids))
+            .options(*options)
+        )
+
+        result = await self.db.execute(query)
+        instruments = {
+            instrument.id: instrument for instrument in result.scalars().all()
+        }
+
+        for instrument_id in instrument_ids:
+            if instrument_id not in instruments:
+                raise InstrumentNotFoundException(instrument_id)
+
+        return [instruments[instrument_id] for instrument_id in instrument_ids]
+
     async def has_footprint(self, instrument_id: UUID) -> bool:
         query = (
             select(models.Instrument)
@@ -6,6 +6,7 @@ from sqlalchemy import func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import noload, selectinload
 
+from across_server.core import metrics
 from across_server.core.enums.instrument_fov import InstrumentFOV
 
 from ....db import models
@@ -17,6 +18,13 @@ from .exceptions import (
     ScheduleNotFoundException,
 )
 
+schedules_ingested = metrics.registry.counter(
+    "schedules_ingested", "Schedules inserted by schedule ingestion"
+)
+observations_ingested = metrics.registry.counter(
+    "observations_ingested", "Observations inserted by schedule ingestion"
+)
+
 
 class ScheduleService:
     """
@@ -264,6 +272,8 @@ class ScheduleService:
                 self.db.add(footprint)
 
         await self.db.commit()
+        schedules_ingested.inc()
+        observations_ingested.inc(len(schedule_create.observations))
         return schedule.id
 
     async def create_many(
@@ -341,6 +351,8 @@ class ScheduleService:
             )
         )
         await self.db.commit()
+        schedules_ingested.inc(len(schedules_to_add))
+        observations_ingested.inc(len(observations_to_add))
         return schedule_ids
 
     async def _exists(self, checksums: list[str]) -> Sequence[models.Schedule]:
@@ -0,0 +1,4 @@
+from . import schemas
+from .router import router
+
+__all__ = ["router", "schemas"]
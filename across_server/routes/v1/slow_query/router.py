@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Security, status
+
+from .... import auth
+from ....db import slow_queries
+from . import schemas
+
+router = APIRouter(
+    prefix="/slow-query",
+    tags=["Slow Query"],
+)
+
+
+@router.get(
+    "/",
+    summary="Read slow queries",
+    description="Statements that went over the slow query threshold on this server, grouped by fingerprint, slowest total time first.",
+    operation_id="get_slow_queries",
+    status_code=status.HTTP_200_OK,
+    responses={
+        status.HTTP_200_OK: {
+            "model": list[schemas.SlowQuery],
+            "description": "Return the slow queries",
+        },
+    },
+    dependencies=[
+        Security(auth.strategies.global_access, scopes=["system:slow-query:read"])
+    ],
+)
+async def get_many() -> list[schemas.SlowQuery]:
+    return [
+        schemas.SlowQuery.model_validate(slow) for slow in slow_queries.statements()
+    ]
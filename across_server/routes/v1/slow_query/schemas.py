@@ -0,0 +1,42 @@
+from datetime import datetime
+from typing import Any
+
+from ....core.schemas.base import BaseSchema
+
+
+class SlowQuery(BaseSchema):
+    """
+    A statement that went over the slow query threshold, aggregated over all
+    of its executions since the server started.
+
+    Parameters
+    ----------
+    fingerprint : str
+        Hash of the normalized statement
+    statement : str
+        Normalized SQL, without bound values
+    count : int
+        Slow executions of the statement
+    total_ns : int
+        Combined duration of the slow executions in nanoseconds
+    max_ns : int
+        Slowest execution in nanoseconds
+    last_seen : datetime | None
+        Time of the last slow execution
+    parameters : list[str]
+        Types of the bound parameters of the last slow execution
+    plan : Any
+        `EXPLAIN (FORMAT JSON)` output, once captured
+    plan_error : str | None
+        Why the plan could not be captured
+    """
+
+    fingerprint: str
+    statement: str
+    count: int
+    total_ns: int
+    max_ns: int
+    last_seen: datetime | None
+    parameters: list[str]
+    plan: Any
+    plan_error: str | None
@@ -0,0 +1,312 @@
+"""
+Cross-request cache of computed ephemerides.
+
+Ephemerides are cached in chunks of `EPHEMERIS_CACHE_CHUNK_SECONDS` (a day by
+default) aligned to the step grid, keyed by everything the computation
+depends on: the ephemeris type, its parameters (for TLEs, the TLE lines and
+so their epoch) and the step size. A range is served by slicing and stitching
+the chunks covering it, computing only the missing ones, with contiguous
+missing chunks computed at once.
+
+A chunk also holds its end point, the first point of the next chunk, so a
+range ending on a chunk boundary, e.g. a whole day, never needs the next
+chunk for a single point.
+"""
+
+import math
+from collections.abc import Hashable
+from datetime import datetime, timezone
+from typing import Any, Protocol
+
+import astropy.units as u  # type: ignore[import-untyped]
+import numpy as np
+from across.tools.ephemeris import Ephemeris
+from astropy.coordinates import (  # type: ignore[import-untyped]
+    BaseCoordinateFrame,
+    BaseRepresentationOrDifferential,
+    SkyCoord,
+)
+from astropy.time import Time, TimeDelta  # type: ignore[import-untyped]
+
+from .....core.cache import SizedLRUCache
+from .....core.config import config
+
+type EphemerisKey = tuple[Hashable, ...]
+
+# values computed per step, anything else (e.g. the location of a ground
+# observatory) is the same over the whole ephemeris
+_SERIES = (
+    "timestamp",
+    "gcrs",
+    "earth_location",
+    "moon",
+    "sun",
+    "earth",
+    "longitude",
+    "latitude",
+    "height",
+    "earth_radius_angle",
+    "moon_radius_angle",
+    "sun_radius_angle",
+    "distance",
+)
+
+
+class ComputeEphemeris(Protocol):
+    def __call__(self, *, begin: datetime, end: datetime) -> Ephemeris: ...
+
+
+class CachedEphemeris(Ephemeris):
+    """An ephemeris sliced from or stitched together from computed ones"""
+
+    # the key of the cached chunks, set by the ephemeris service so results
+    # computed from the ephemeris can be cached by its source
+    key: EphemerisKey | None = None
+
+    def __init__(self, step_size: TimeDelta, series: dict[str, Any]) -> None:
+        # the base initializer computes the timestamps, here they are given
+        self.__dict__.update(series)
+        self.step_size = step_size
+        self._step_seconds = float(step_size.to_value(u.s))
+        self.begin = self.timestamp[0]
+        self.end = self.timestamp[-1]
+        self._start_unix = float(self.begin.unix)
+
+    def prepare_data(self) -> None:
+        """Nothing to prepare, the values are computed already"""
+
+
+def _is_series(value: Any, length: int) -> bool:
+    return getattr(value, "shape", None) == (length,)
+
+
+def _slice(
+    ephemeris: Ephemeris, start: int, stop: int, copy: bool = False
+) -> CachedEphemeris:
+    """
+    Points `start` to `stop` of the ephemeris. Slices are views of the
+    ephemeris, `copy` them so they don't keep all of it alive.
+    """
+    length = len(ephemeris)
+    series = {}
+
+    for name in _SERIES:
+        value: Any = getattr(ephemeris, name, None)
+        if _is_series(value, length):
+            value = value[start:stop]
+            if copy:
+                value = value.copy()
+        series[name] = value
+
+    return CachedEphemeris(ephemeris.step_size, series)
+
+
+def _concatenate_frames(frames: list[BaseCoordinateFrame]) -> BaseCoordinateFrame:
+    # frames only concatenate with equal attributes, and obstime varies
+    attributes = {}
+
+    for name in frames[0].frame_attributes:
+        values = [getattr(frame, name) for frame in frames]
+        if all(_is_series(value, len(frame)) for value, frame in zip(values, frames)):
+            attributes[name] = np.concatenate(values)
+
+    data = np.concatenate([frame.data for frame in frames])
+    return frames[0].replicate_without_data(**attributes).realize_frame(data)
+
+
+def _concatenate_values(values: list[Any]) -> Any:
+    if isinstance(values[0], SkyCoord):
+        return SkyCoord(_concatenate_frames([value.frame for value in values]))
+    if isinstance(values[0], BaseCoordinateFrame):
+        return _concatenate_frames(values)
+    return np.concatenate(values)
+
+
+def _concatenate(pieces: list[CachedEphemeris]) -> CachedEphemeris:
+    if len(pieces) == 1:
+        return pieces[0]
+
+    series = {}
+
+    for name in _SERIES:
+        values = [getattr(piece, name) for piece in pieces]
+        if all(_is_series(value, len(piece)) for value, piece in zip(values, pieces)):
+            series[name] = _concatenate_values(values)
+        else:
+            series[name] = values[0]
+
+    return CachedEphemeris(pieces[0].step_size, series)
+
+
+def _nbytes(value: Any) -> int:
+    """Estimated memory held by the arrays of an astropy value"""
+    if isinstance(value, np.ndarray):
+        # includes quantities and earth locations
+        return value.nbytes
+    if isinstance(value, Time):
+        return value.jd1.nbytes + value.jd2.nbytes
+    if isinstance(value, SkyCoord):
+        return _nbytes(value.frame)
+    if isinstance(value, BaseCoordinateFrame):
+        return _nbytes(value.data) + sum(
+            _nbytes(getattr(value, name)) for name in value.frame_attributes
+        )
+    if isinstance(value, BaseRepresentationOrDifferential):
+        return sum(_nbytes(getattr(value, name)) for name in value.components) + sum(
+            _nbytes(differential)
+            for differential in getattr(value, "differentials", {}).values()
+        )
+    return 0
+
+
+def sizeof(ephemeris: Ephemeris) -> int:
+    return sum(_nbytes(getattr(ephemeris, name, None)) for name in _SERIES)
+
+
+def _unix(value: datetime) -> float:
+    # naive datetimes are UTC, as for astropy
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def runs(indices: list[int]) -> list[list[int]]:
+    """Split sorted indices into runs of consecutive ones"""
+    grouped: list[list[int]] = []
+
+    for index in indices:
+        if grouped and grouped[-1][-1] == index - 1:
+            grouped[-1].append(index)
+        else:
+            grouped.append([index])
+
+    return grouped
+
+
+class ChunkGrid:
+    """
+    Points of the step grid grouped in chunks of `size` steps, the grid
+    ephemerides are computed on. Each chunk holds `size + 1` points, its last
+    point being the first point of the next chunk.
+    """
+
+    def __init__(self, step_size: int, chunk_seconds: int) -> None:
+        self.step_size = step_size
+        self.size = max(1, math.ceil(chunk_seconds / step_size))
+
+    def point(self, value: datetime) -> int:
+        """The grid point at or before `value`"""
+        return math.floor(_unix(value) / self.step_size)
+
+    def begin(self, index: int) -> datetime:
+        """The first point of chunk `index`"""
+        return datetime.fromtimestamp(
+            index * self.size * self.step_size, tz=timezone.utc
+        )
+
+    def pieces(self, begin: datetime, end: datetime) -> list[tuple[int, int, int]]:
+        """
+        The chunks covering the points from `begin` to `end`, as
+        `(chunk index, start, stop)` with the slice of each chunk's points.
+        """
+        first_point = self.point(begin)
+        last_point = self.point(end)
+        first = first_point // self.size
+        # a range ending on a chunk boundary ends with the last chunk's end point
+        last = max(first, (last_point - 1) // self.size)
+
+        return [
+            (
+                index,
+                max(first_point - index * self.size, 0),
+                last_point - index * self.size + 1 if index == last else self.size,
+            )
+            for index in range(first, last + 1)
+        ]
+
+
+class EphemerisCache:
+    """
+    Ephemeris chunks shared across requests, in a LRU bounded by their
+    estimated size.
+
+    Parameters
+    ----------
+    max_bytes : int
+        Maximum estimated size of the cached chunks.
+    chunk_seconds : int
+        Length of a chunk, rounded up to a whole number of steps.
+    """
+
+    def __init__(self, max_bytes: int, chunk_seconds: int) -> None:
+        self.chunk_seconds = chunk_seconds
+        self.chunks: SizedLRUCache[tuple[EphemerisKey, int], CachedEphemeris] = (
+            SizedLRUCache(max_bytes=max_bytes, sizeof=sizeof, name="ephemeris")
+        )
+
+    def get(
+        self,
+        key: EphemerisKey,
+        begin: datetime,
+        end: datetime,
+        step_size: int,
+        compute: ComputeEphemeris,
+    ) -> CachedEphemeris:
+        """
+        Return the ephemeris from `begin` to `end` for `key`, computing the
+        chunks that are not cached with `compute`. Blocks while computing, so
+        call it from a worker thread.
+
+        Parameters
+        ----------
+        key : EphemerisKey
+            Identifies the ephemeris, excluding the step size.
+        begin : datetime
+            The start of the range, floored to the step grid.
+        end : datetime
+            The end of the range, floored to the step grid.
+        step_size : int
+            The step size in seconds.
+        compute : ComputeEphemeris
+            Computes the ephemeris for the given key and step size from
+            `begin` to `end`.
+
+        Returns
+        -------
+        Ephemeris
+            The ephemeris over the range, equal to computing it at once.
+        """
+        grid = ChunkGrid(step_size, self.chunk_seconds)
+        pieces = grid.pieces(begin, end)
+        chunks: dict[int, CachedEphemeris] = {}
+        missing: list[int] = []
+
+        for index, _, _ in pieces:
+            chunk = self.chunks.get(((*key, step_size), index))
+            if chunk is None:
+                missing.append(index)
+            else:
+                chunks[index] = chunk
+
+        for run in runs(missing):
+            computed = compute(begin=grid.begin(run[0]), end=grid.begin(run[-1] + 1))
+            for offset, index in enumerate(run):
+                start = offset * grid.size
+                chunk = _slice(
+                    computed, start, start + grid.size + 1, copy=len(run) > 1
+                )
+                self.chunks.set(((*key, step_size), index), chunk)
+                chunks[index] = chunk
+
+        return _concatenate(
+            [_slice(chunks[index], start, stop) for index, start, stop in pieces]
+        )
+
+    def clear(self) -> None:
+        self.chunks.clear()
+
+
+ephemeris_cache = EphemerisCache(
+    max_bytes=int(config.EPHEMERIS_CACHE_MAX_MB * 2**20),
+    chunk_seconds=config.EPHEMERIS_CACHE_CHUNK_SECONDS,
+)
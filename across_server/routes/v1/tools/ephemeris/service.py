@@ -1,9 +1,9 @@
+from collections.abc import Hashable
 from datetime import datetime
 from functools import partial
 from typing import Annotated
 from uuid import UUID
 
-import anyio.to_thread
 import astropy.units as u  # type: ignore[import-untyped]
 import structlog
 from across.tools.core.schemas import tle as tle_schemas
@@ -18,21 +18,36 @@ from astropy.coordinates import Latitude, Longitude  # type: ignore[import-untyp
 from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from .....core import processes, tracing, workloads
+from .....core.config import config
 from .....core.enums.ephemeris_type import EphemerisType
+from .....core.single_flight import SingleFlight
 from .....db.database import get_session
 from ...observatory import schemas as observatory_schemas
 from ...observatory.exceptions import ObservatoryNotFoundException
 from ...observatory.service import ObservatoryService
 from ...tle.exceptions import TLENotFoundException
 from ...tle.service import TLEService
+from .cache import (
+    CachedEphemeris,
+    ChunkGrid,
+    ComputeEphemeris,
+    EphemerisKey,
+    ephemeris_cache,
+)
 from .exceptions import (
     EphemerisCalculationNotFound,
     EphemerisNotFound,
     EphemerisTypeNotFound,
 )
+from .interpolation import coarse_range, coarse_step, interpolate
+from .shared import ProcessCompute
+from .store import ephemeris_store
 
 logger: structlog.stdlib.BoundLogger = structlog.get_logger()
 
+_ephemerides: SingleFlight[Hashable, CachedEphemeris] = SingleFlight("ephemeris")
+
 
 class EphemerisService:
     """
@@ -43,7 +58,11 @@ class EphemerisService:
     SPICE, and ground-based observatories. It retrieves the necessary
     parameters from the database and computes the ephemeris data for a given
     date range. The computations are performed in a separate thread to avoid
-    blocking the event loop.
+    blocking the event loop, and cached across requests in day-long chunks
+    (see `cache.py`), so overlapping ranges are only computed once, and
+    identical requests at once share one computation (see
+    `core/single_flight.py`). Fine steps are interpolated from a coarser
+    ephemeris (see `interpolation.py`).
 
     Methods
     -------
@@ -81,6 +100,59 @@ class EphemerisService:
         self.tle_service = tle_service
         self.observatory_service = observatory_service
 
+    async def _compute(
+        self,
+        name: str,
+        key: EphemerisKey,
+        compute: ComputeEphemeris,
+        date_range_begin: datetime,
+        date_range_end: datetime,
+        step_size: int,
+        compute_step: int,
+    ) -> Ephemeris:
+        """
+        Get the ephemeris from the cross-request cache, computing the missing
+        parts with `compute` in a thread to avoid blocking the event loop.
+        When `compute` steps by more than `step_size`, the ephemeris is
+        interpolated from the coarser one, see `interpolation.py`. With the
+        process pool started, `compute` runs in a worker process, see
+        `core/processes.py`. The ephemeris is returned with `key` set.
+        """
+        if processes.enabled():
+            compute = ProcessCompute(compute)
+
+        def get_ephem() -> CachedEphemeris:
+            if compute_step == step_size:
+                ephemeris = ephemeris_cache.get(
+                    key, date_range_begin, date_range_end, step_size, compute
+                )
+            else:
+                coarse_begin, coarse_end = coarse_range(
+                    date_range_begin, date_range_end, compute_step
+                )
+                coarse = ephemeris_cache.get(
+                    key, coarse_begin, coarse_end, compute_step, compute
+                )
+                ephemeris = interpolate(
+                    coarse, date_range_begin, date_range_end, step_size
+                )
+
+            ephemeris.key = key
+            return ephemeris
+
+        # identical requests in flight at once share one computation
+        grid = ChunkGrid(step_size, step_size)
+        return await _ephemerides.do(
+            (
+                key,
+                step_size,
+                compute_step,
+                grid.point(date_range_begin),
+                grid.point(date_range_end),
+            ),
+            lambda: workloads.run_sync("ephemeris", tracing.in_thread(name, get_ephem)),
+        )
+
     async def _get_tle_ephem(
         self,
         parameters: observatory_schemas.TLEParameters,
@@ -128,17 +200,45 @@ class EphemerisService:
 
         tle = tle_schemas.TLE.model_validate(tle_model.__dict__)
 
-        # Perform ephemeris computation in a thread to avoid blocking the event loop
+        compute_step = coarse_step(EphemerisType.TLE, step_size)
+        eph_func = partial(compute_tle_ephemeris, step_size=compute_step, tle=tle)
+        # the TLE lines include its epoch, a newer TLE makes a new entry
+        return await self._compute(
+            "compute_tle_ephemeris",
+            (EphemerisType.TLE, parameters.norad_id, tle.tle1, tle.tle2),
+            eph_func,
+            date_range_begin,
+            date_range_end,
+            step_size,
+            compute_step,
+        )
+
+    def _jpl_source(
+        self, parameters: observatory_schemas.JPLParameters, step_size: int
+    ) -> tuple[EphemerisKey, ComputeEphemeris]:
+        """The cache and store key of a JPL ephemeris, and how to compute it"""
         eph_func = partial(
-            compute_tle_ephemeris,
-            begin=date_range_begin,
-            end=date_range_end,
+            compute_jpl_ephemeris,
             step_size=step_size,
-            tle=tle,
+            naif_id=parameters.naif_id,
         )
-        ephem = await anyio.to_thread.run_sync(eph_func)
+        return (EphemerisType.JPL, parameters.naif_id), eph_func
 
-        return ephem
+    def _spice_source(
+        self, parameters: observatory_schemas.SPICEParameters, step_size: int
+    ) -> tuple[EphemerisKey, ComputeEphemeris]:
+        """The cache and store key of a SPICE ephemeris, and how to compute it"""
+        eph_func = partial(
+            compute_spice_ephemeris,
+            step_size=step_size,
+            spice_kernel_url=parameters.spice_kernel_url,
+            naif_id=parameters.naif_id,
+        )
+        return (
+            EphemerisType.SPICE,
+            parameters.spice_kernel_url,
+            parameters.naif_id,
+        ), eph_func
 
     async def _get_jpl_ephem(
         self,
@@ -165,14 +265,17 @@ class EphemerisService:
         JPLEphemeris
             The computed JPL ephemeris for the specified date range.
         """
-        eph_func = partial(
-            compute_jpl_ephemeris,
-            begin=date_range_begin,
-            end=date_range_end,
-            step_size=step_size,
-            naif_id=parameters.naif_id,
+        compute_step = coarse_step(EphemerisType.JPL, step_size)
+        key, eph_func = self._jpl_source(parameters, compute_step)
+        return await self._compute(
+            "compute_jpl_ephemeris",
+            key,
+            ephemeris_store.compute(key, compute_step, eph_func),
+            date_range_begin,
+            date_range_end,
+            step_size,
+            compute_step,
         )
-        return await anyio.to_thread.run_sync(eph_func)
 
     async def _get_spice_ephem(
         self,
@@ -199,15 +302,17 @@ class EphemerisService:
         SPICEEphemeris
             The computed SPICE ephemeris for the specified date range.
         """
-        eph_func = partial(
-            compute_spice_ephemeris,
-            begin=date_range_begin,
-            end=date_range_end,
-            step_size=step_size,
-            spice_kernel_url=parameters.spice_kernel_url,
-            naif_id=parameters.naif_id,
+        compute_step = coarse_step(EphemerisType.SPICE, step_size)
+        key, eph_func = self._spice_source(parameters, compute_step)
+        return await self._compute(
+            "compute_spice_ephemeris",
+            key,
+            ephemeris_store.compute(key, compute_step, eph_func),
+            date_range_begin,
+            date_range_end,
+            step_size,
+            compute_step,
         )
-        return await anyio.to_thread.run_sync(eph_func)
 
     async def _get_ground_ephem(
         self,
@@ -234,17 +339,30 @@ class EphemerisService:
         GroundEphemeris
             The computed ground ephemeris for the specified date range.
         """
+        compute_step = coarse_step(EphemerisType.GROUND, step_size)
         eph_func = partial(
             compute_ground_ephemeris,
-            begin=date_range_begin,
-            end=date_range_end,
-            step_size=step_size,
+            step_size=compute_step,
             longitude=Longitude(parameters.longitude * u.deg),  # type: ignore
             latitude=Latitude(parameters.latitude * u.deg),  # type: ignore
             height=parameters.height * u.m,  # type: ignore
         )
-        return await anyio.to_thread.run_sync(eph_func)
+        return await self._compute(
+            "compute_ground_ephemeris",
+            (
+                EphemerisType.GROUND,
+                parameters.longitude,
+                parameters.latitude,
+                parameters.height,
+            ),
+            eph_func,
+            date_range_begin,
+            date_range_end,
+            step_size,
+            compute_step,
+        )
 
+    @tracing.traced("ephemeris.get")
     async def get(
         self,
         observatory_id: UUID,
@@ -298,8 +416,11 @@ class EphemerisService:
         # Sort ephemeris types by priority
         ephemeris_types.sort(key=lambda x: x.priority)
 
+        tracing.set_attributes(observatory=observatory.name, step_size=step_size)
+
         # Iterate through the ephemeris types and return the first valid one
         for etype in ephemeris_types:
+            tracing.set_attributes(ephemeris_type=etype.ephemeris_type)
             try:
                 if etype.ephemeris_type == EphemerisType.TLE and isinstance(
                     etype.parameters, observatory_schemas.TLEParameters
@@ -348,3 +469,75 @@ class EphemerisService:
         raise EphemerisCalculationNotFound(
             observatory_id=observatory.id, ephem_types=ephemeris_types
         )
+
+    async def precompute(
+        self,
+        observatory: observatory_schemas.Observatory,
+        date_range_begin: datetime,
+        date_range_end: datetime,
+    ) -> int:
+        """
+        Compute the JPL and SPICE ephemerides of an observatory into the
+        ephemeris store, at the step each step size in
+        `EPHEMERIS_STORE_STEP_SIZES` is computed at, so requests no longer
+        depend on Horizons or kernel downloads.
+
+        Parameters
+        ----------
+        observatory : observatory_schemas.Observatory
+            The observatory, with its ephemeris parameters.
+        date_range_begin : datetime
+            The start of the range to store, limited to the operational range.
+        date_range_end : datetime
+            The end of the range to store, limited to the operational range.
+
+        Returns
+        -------
+        int
+            The number of chunks computed and stored.
+        """
+        if observatory.operational is not None:
+            if observatory.operational.begin:
+                date_range_begin = max(date_range_begin, observatory.operational.begin)
+            if observatory.operational.end:
+                date_range_end = min(date_range_end, observatory.operational.end)
+
+        if date_range_begin > date_range_end:
+            return 0
+
+        written = 0
+
+        for etype in observatory.ephemeris_types or []:
+            # interpolated steps are read from their coarse step only
+            compute_steps = sorted(
+                {
+                    coarse_step(etype.ephemeris_type, step_size)
+                    for step_size in config.EPHEMERIS_STORE_STEP_SIZES
+                }
+            )
+
+            for step_size in compute_steps:
+                if etype.ephemeris_type == EphemerisType.JPL and isinstance(
+                    etype.parameters, observatory_schemas.JPLParameters
+                ):
+                    key, eph_func = self._jpl_source(etype.parameters, step_size)
+                elif etype.ephemeris_type == EphemerisType.SPICE and isinstance(
+                    etype.parameters, observatory_schemas.SPICEParameters
+                ):
+                    key, eph_func = self._spice_source(etype.parameters, step_size)
+                else:
+                    break
+
+                written += await workloads.run_sync(
+                    "ephemeris",
+                    partial(
+                        ephemeris_store.precompute,
+                        key,
+                        step_size,
+                        eph_func,
+                        date_range_begin,
+                        date_range_end,
+                    ),
+                )
+
+        return written
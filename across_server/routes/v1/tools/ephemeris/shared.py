@@ -0,0 +1,222 @@
+"""
+Ephemerides passed between processes in shared memory.
+
+An ephemeris holds megabytes of arrays, about 4 MB for a week of minute
+steps. Returned from a worker process as is, all of it is pickled through the
+pool's pipe and unpickled by the thread collecting results, holding the GIL
+meanwhile. Instead, the arrays are copied into one shared memory block, and
+only the description of how to rebuild the astropy values around them, a few
+kilobytes, is pickled. The loading process copies the arrays out, and the
+block is unlinked once every process is done with it.
+"""
+
+from datetime import datetime
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any
+
+import astropy.units as u  # type: ignore[import-untyped]
+import numpy as np
+from across.tools.ephemeris import Ephemeris
+from astropy.coordinates import (  # type: ignore[import-untyped]
+    BaseCoordinateFrame,
+    BaseRepresentationOrDifferential,
+    SkyCoord,
+)
+from astropy.time import Time, TimeDelta  # type: ignore[import-untyped]
+
+from .....core import processes
+from .cache import _SERIES, CachedEphemeris, ComputeEphemeris
+
+# start arrays on cache line boundaries
+_ALIGNMENT = 64
+
+
+class _Packer:
+    """Replaces the arrays of astropy values with indices into `arrays`"""
+
+    def __init__(self) -> None:
+        self.arrays: list[np.ndarray] = []
+
+    def _array(self, value: np.ndarray) -> int:
+        self.arrays.append(np.require(value, requirements="C"))
+        return len(self.arrays) - 1
+
+    def pack(self, value: Any) -> tuple[Any, ...]:
+        if isinstance(value, Time):
+            location = None if value.location is None else self.pack(value.location)
+            return (
+                "time",
+                value.scale,
+                value.format,
+                self._array(value.jd1),
+                self._array(value.jd2),
+                location,
+            )
+        if isinstance(value, SkyCoord):
+            return ("skycoord", self.pack(value.frame))
+        if isinstance(value, BaseCoordinateFrame):
+            attributes = {
+                name: self.pack(getattr(value, name)) for name in value.frame_attributes
+            }
+            data = self.pack(value.data) if value.has_data else None
+            return ("frame", type(value), attributes, data)
+        if isinstance(value, BaseRepresentationOrDifferential):
+            components = {
+                name: self.pack(getattr(value, name)) for name in value.components
+            }
+            differentials = {
+                key: self.pack(differential)
+                for key, differential in getattr(value, "differentials", {}).items()
+            }
+            return ("representation", type(value), components, differentials)
+        if isinstance(value, u.Quantity):
+            # includes earth locations, and e.g. the wrap angle of longitudes
+            state = {key: item for key, item in vars(value).items() if key != "info"}
+            return (
+                "quantity",
+                type(value),
+                self._array(value.view(np.ndarray)),
+                state,
+            )
+        return ("object", value)
+
+
+def _unpack(packed: tuple[Any, ...], arrays: list[np.ndarray]) -> Any:
+    kind = packed[0]
+
+    if kind == "time":
+        _, scale, format, jd1, jd2, location = packed
+        time = Time(
+            arrays[jd1],
+            arrays[jd2],
+            format="jd",
+            scale=scale,
+            location=None if location is None else _unpack(location, arrays),
+        )
+        time.format = format
+        return time
+    if kind == "skycoord":
+        return SkyCoord(_unpack(packed[1], arrays))
+    if kind == "frame":
+        _, frame_class, attributes, data = packed
+        frame = frame_class(
+            **{name: _unpack(value, arrays) for name, value in attributes.items()}
+        )
+        return frame if data is None else frame.realize_frame(_unpack(data, arrays))
+    if kind == "representation":
+        _, representation_class, components, differentials = packed
+        representation = representation_class(
+            **{name: _unpack(value, arrays) for name, value in components.items()},
+            copy=False,
+        )
+        if differentials:
+            representation = representation.with_differentials(
+                {key: _unpack(value, arrays) for key, value in differentials.items()}
+            )
+        return representation
+    if kind == "quantity":
+        _, quantity_class, index, state = packed
+        quantity = arrays[index].view(quantity_class)
+        quantity.__dict__.update(state)
+        return quantity
+    return packed[1]
+
+
+class SharedEphemeris:
+    """
+    An ephemeris copied into shared memory, pickled as the name of the block
+    and the description of its values.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        layout: list[tuple[int, np.dtype, tuple[int, ...]]],
+        step_seconds: float,
+        series: dict[str, tuple[Any, ...]],
+    ) -> None:
+        self.name = name
+        self.layout = layout
+        self.step_seconds = step_seconds
+        self.series = series
+
+    @classmethod
+    def create(cls, ephemeris: Ephemeris) -> "SharedEphemeris":
+        packer = _Packer()
+        series = {name: packer.pack(getattr(ephemeris, name, None)) for name in _SERIES}
+
+        layout = []
+        size = 0
+        for array in packer.arrays:
+            layout.append((size, array.dtype, array.shape))
+            size += -(-array.nbytes // _ALIGNMENT) * _ALIGNMENT
+
+        memory = SharedMemory(create=True, size=max(size, 1))
+        try:
+            buffer = np.ndarray((memory.size,), np.uint8, buffer=memory.buf)
+            for (offset, _, _), array in zip(layout, packer.arrays):
+                buffer[offset : offset + array.nbytes] = array.reshape(-1).view(
+                    np.uint8
+                )
+            # the buffer must be released before the memory is closed
+            del buffer
+        except BaseException:
+            memory.close()
+            memory.unlink()
+            raise
+        memory.close()
+
+        return cls(
+            memory.name,
+            layout,
+            float(ephemeris.step_size.to_value(u.s)),
+            series,
+        )
+
+    def load(self) -> CachedEphemeris:
+        """Copy the ephemeris out of shared memory"""
+        memory = SharedMemory(name=self.name)
+        try:
+            buffer = np.ndarray((memory.size,), np.uint8, buffer=memory.buf)
+            arrays = [
+                buffer[offset : offset + dtype.itemsize * int(np.prod(shape))]
+                .view(dtype)
+                .reshape(shape)
+                .copy()
+                for offset, dtype, shape in self.layout
+            ]
+            del buffer
+        finally:
+            memory.close()
+
+        return CachedEphemeris(
+            TimeDelta(self.step_seconds * u.s),
+            {name: _unpack(packed, arrays) for name, packed in self.series.items()},
+        )
+
+    def unlink(self) -> None:
+        """Free the shared memory, once every process loaded the ephemeris"""
+        memory = SharedMemory(name=self.name)
+        memory.close()
+        memory.unlink()
+
+
+def compute_shared(
+    compute: ComputeEphemeris, begin: datetime, end: datetime
+) -> SharedEphemeris:
+    """Compute the ephemeris in a worker process, returned in shared memory"""
+    return SharedEphemeris.create(compute(begin=begin, end=end))
+
+
+class ProcessCompute:
+    """Computes an ephemeris in the process pool, see `core/processes.py`"""
+
+    def __init__(self, compute: ComputeEphemeris) -> None:
+        self.compute = compute
+
+    def __call__(self, *, begin: datetime, end: datetime) -> Ephemeris:
+        shared = processes.submit(compute_shared, self.compute, begin, end).result()
+        try:
+            return shared.load()
+        finally:
+            shared.unlink()
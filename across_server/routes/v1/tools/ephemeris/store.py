@@ -0,0 +1,203 @@
+"""
+On-disk store of precomputed JPL and SPICE ephemerides.
+
+Computing these ephemerides queries JPL Horizons or downloads SPICE kernels,
+the slowest and least reliable calls made for a visibility. A background job
+(`scripts/precompute_ephemeris.py`) stores them ahead of time over a rolling
+window, and the service reads the store before computing.
+
+Only the GCRS state vectors come from the network, so the store holds just
+those: one `.npy` file of `(points, 6)` float64 positions (km) and velocities
+(km/s) per chunk of the `ChunkGrid`, read memory-mapped. The rest of the
+ephemeris (Sun, Moon and Earth positions, angular radii) is computed locally
+from the stored states.
+"""
+
+import hashlib
+import os
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+
+import astropy.units as u  # type: ignore[import-untyped]
+import numpy as np
+import structlog
+from across.tools.ephemeris import Ephemeris
+from astropy.coordinates import (  # type: ignore[import-untyped]
+    GCRS,
+    ITRS,
+    CartesianDifferential,
+    CartesianRepresentation,
+    SkyCoord,
+)
+
+from .....core.config import config
+from .cache import ChunkGrid, ComputeEphemeris, EphemerisKey, runs
+
+logger: structlog.stdlib.BoundLogger = structlog.get_logger()
+
+
+class StoredEphemeris(Ephemeris):
+    """An ephemeris computed from stored GCRS state vectors"""
+
+    def __init__(
+        self,
+        begin: datetime,
+        end: datetime,
+        step_size: int,
+        states: np.ndarray,
+    ) -> None:
+        super().__init__(begin, end, step_size)
+        self.states = states
+
+    def prepare_data(self) -> None:
+        # as computed by the JPL and SPICE ephemerides from their states
+        self.gcrs = SkyCoord(
+            CartesianRepresentation(self.states[:, :3].T * u.km).with_differentials(
+                CartesianDifferential(self.states[:, 3:].T * u.km / u.s)
+            ),
+            frame=GCRS(obstime=self.timestamp),
+        )
+        self.earth_location = self.gcrs.transform_to(
+            ITRS(obstime=self.timestamp)
+        ).earth_location
+
+
+def states(ephemeris: Ephemeris) -> np.ndarray:
+    """The GCRS state vectors of an ephemeris, as stored"""
+    return np.hstack(
+        (
+            ephemeris.gcrs.cartesian.xyz.to_value(u.km).T,
+            ephemeris.gcrs.velocity.d_xyz.to_value(u.km / u.s).T,
+        )
+    )
+
+
+class EphemerisStore:
+    """
+    State vector chunks stored under `path`, in a directory per ephemeris
+    and step size.
+
+    Parameters
+    ----------
+    path : Path
+        The directory of the store.
+    chunk_seconds : int
+        Length of a chunk, rounded up to a whole number of steps.
+    """
+
+    def __init__(self, path: Path, chunk_seconds: int) -> None:
+        self.path = path
+        self.chunk_seconds = chunk_seconds
+
+    def _directory(self, key: EphemerisKey, step_size: int) -> Path:
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+        return self.path / digest / str(step_size)
+
+    def read(
+        self, key: EphemerisKey, step_size: int, begin: datetime, end: datetime
+    ) -> np.ndarray | None:
+        """The stored states from `begin` to `end`, None unless all are stored"""
+        grid = ChunkGrid(step_size, self.chunk_seconds)
+        directory = self._directory(key, step_size)
+        pieces = []
+
+        for index, start, stop in grid.pieces(begin, end):
+            try:
+                chunk = np.load(directory / f"{index}.npy", mmap_mode="r")
+            except FileNotFoundError:
+                return None
+            except (OSError, ValueError) as error:
+                logger.warning("Unreadable ephemeris chunk", index=index, e=error)
+                return None
+
+            if len(chunk) != grid.size + 1:
+                return None
+            pieces.append(chunk[start:stop])
+
+        return np.concatenate(pieces)
+
+    def compute(
+        self, key: EphemerisKey, step_size: int, fallback: ComputeEphemeris
+    ) -> ComputeEphemeris:
+        """Compute from the stored states if stored, with `fallback` otherwise"""
+        # unlike a closure, a partial can be sent to a worker process
+        return partial(self._compute, key, step_size, fallback)
+
+    def _compute(
+        self,
+        key: EphemerisKey,
+        step_size: int,
+        fallback: ComputeEphemeris,
+        *,
+        begin: datetime,
+        end: datetime,
+    ) -> Ephemeris:
+        stored = self.read(key, step_size, begin, end)
+
+        if stored is None:
+            return fallback(begin=begin, end=end)
+
+        ephemeris = StoredEphemeris(begin, end, step_size, stored)
+        ephemeris.compute()
+        return ephemeris
+
+    def precompute(
+        self,
+        key: EphemerisKey,
+        step_size: int,
+        compute: ComputeEphemeris,
+        begin: datetime,
+        end: datetime,
+    ) -> int:
+        """
+        Compute and store the chunks from `begin` to `end` that are not stored
+        yet, returns the number of chunks written. Blocks while computing.
+        """
+        grid = ChunkGrid(step_size, self.chunk_seconds)
+        directory = self._directory(key, step_size)
+        missing = [
+            index
+            for index, _, _ in grid.pieces(begin, end)
+            if not (directory / f"{index}.npy").exists()
+        ]
+
+        for run in runs(missing):
+            computed = states(
+                compute(begin=grid.begin(run[0]), end=grid.begin(run[-1] + 1))
+            )
+            directory.mkdir(parents=True, exist_ok=True)
+
+            for offset, index in enumerate(run):
+                start = offset * grid.size
+                self._write(
+                    directory / f"{index}.npy",
+                    computed[start : start + grid.size + 1],
+                )
+
+        return len(missing)
+
+    def _write(self, path: Path, chunk: np.ndarray) -> None:
+        # readers never see a partly written chunk
+        partial_path = path.with_name(f".{path.name}.{os.getpid()}")
+        with open(partial_path, "wb") as file:
+            np.save(file, np.ascontiguousarray(chunk, dtype=np.float64))
+        os.replace(partial_path, path)
+
+    def prune(self, before: datetime) -> int:
+        """Delete the chunks ending before `before`, returns how many"""
+        pruned = 0
+
+        for path in self.path.glob("*/*/*.npy"):
+            grid = ChunkGrid(int(path.parent.name), self.chunk_seconds)
+            if (int(path.stem) + 1) * grid.size < grid.point(before):
+                path.unlink(missing_ok=True)
+                pruned += 1
+
+        return pruned
+
+
+ephemeris_store = EphemerisStore(
+    path=Path(config.EPHEMERIS_STORE_DIR),
+    chunk_seconds=config.EPHEMERIS_CACHE_CHUNK_SECONDS,
+)
@@ -1,17 +1,20 @@
 import json
 from functools import partial
 
-import anyio.to_thread
 import httpx
 from astropy.coordinates.name_resolve import (  # type: ignore[import-untyped]
     NameResolveError,
 )
 from astropy.coordinates.sky_coordinate import SkyCoord  # type: ignore[import-untyped]
 
+from .....core import workloads
 from .....core.schemas.coordinate import Coordinate
+from .....core.single_flight import SingleFlight
 from .exceptions import NameNotFoundException
 from .schemas import NameResolver, NameResolverRead
 
+_resolutions: SingleFlight[str, NameResolver] = SingleFlight("resolve_object")
+
 
 class NameResolveService:
     """
@@ -20,6 +23,8 @@ class NameResolveService:
     This service provides methods to resolve an object name into its coordinates
     by either querying the ANTARES broker (for transients with ZTF names) or by
     using the Strasbourg astronomical Data Center (CDS) name resolver.
+    Concurrent resolutions of the same name share one query, see
+    `core/single_flight.py`.
 
     Methods
     --------
@@ -28,8 +33,13 @@ class NameResolveService:
     """
 
     async def resolve(self, data: NameResolverRead) -> NameResolver:
-        if "ztf" in data.object_name.lower()[:3]:
-            coord = await self._antares_resolver("ZTF" + data.object_name[3:])
+        # identical requests in flight at once share one resolution
+        name = " ".join(data.object_name.split())
+        return await _resolutions.do(name, lambda: self._resolve(name))
+
+    async def _resolve(self, object_name: str) -> NameResolver:
+        if "ztf" in object_name.lower()[:3]:
+            coord = await self._antares_resolver("ZTF" + object_name[3:])
             if coord.ra is not None:
                 return NameResolver.model_validate(
                     {"ra": coord.ra, "dec": coord.dec, "resolver": "ANTARES"}
@@ -39,9 +49,11 @@ class NameResolveService:
             try:
                 cds_resolve_function = partial(
                     SkyCoord.from_name,
-                    name=data.object_name,
+                    name=object_name,
+                )
+                skycoord = await workloads.run_sync(
+                    "resolve_object", cds_resolve_function
                 )
-                skycoord = await anyio.to_thread.run_sync(cds_resolve_function)
                 if skycoord.ra is not None and skycoord.dec is not None:
                     return NameResolver.model_validate(
                         {
@@ -52,10 +64,10 @@ class NameResolveService:
                     )
 
             except NameResolveError:
-                raise NameNotFoundException(name=data.object_name)
+                raise NameNotFoundException(name=object_name)
 
         # If no resolution occurred, report a 404 error
-        raise NameNotFoundException(name=data.object_name)
+        raise NameNotFoundException(name=object_name)
 
     async def _antares_resolver(self, name: str) -> Coordinate:
         """
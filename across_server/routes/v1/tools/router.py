@@ -14,3 +14,4 @@ router = APIRouter(
 
 router.include_router(resolve_object.router)
 router.include_router(visibility_calculator.router)
+router.include_router(visibility_calculator.jobs.router)
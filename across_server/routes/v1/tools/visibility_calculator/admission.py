@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from .....core.admission import AdmissionController
+from .....core.config import config
+
+visibility_admission = AdmissionController(
+    "visibility",
+    max_cost=config.VISIBILITY_ADMISSION_MAX_COST,
+    max_queue=config.VISIBILITY_ADMISSION_MAX_QUEUE,
+    max_wait=config.VISIBILITY_ADMISSION_MAX_WAIT_SECONDS,
+    retry_after=config.VISIBILITY_ADMISSION_RETRY_AFTER_SECONDS,
+)
+
+
+def visibility_cost(
+    date_range_begin: datetime,
+    date_range_end: datetime,
+    hi_res: bool,
+    adaptive: bool = False,
+    count: int = 1,
+) -> float:
+    """
+    The estimated cost of calculating the visibility of `count` instruments or
+    targets: the steps of the date range each is evaluated at.
+    """
+    if adaptive:
+        # the edges refined after are few compared to the coarse steps
+        step_size = config.VISIBILITY_ADAPTIVE_COARSE_STEP_SECONDS
+    elif hi_res:
+        step_size = 60
+    else:
+        step_size = 3600
+
+    steps = (date_range_end - date_range_begin).total_seconds() / step_size
+    return max(steps, 1) * count
@@ -0,0 +1,230 @@
+"""
+Cross-request cache of visibility windows.
+
+The same instrument is often asked for the visibility of the same target
+over overlapping days, by the web frontend and by automation reacting to
+broker alerts. Windows are cached keyed by everything they depend on: the
+instrument's constraints (hashed), the observatory, the coordinate rounded to
+an arcsecond, the step size, the minimum visibility duration, and the
+ephemeris source, whose key holds e.g. the TLE lines and so its epoch.
+Changing the constraints or a newer TLE makes a new key, older entries
+expire after `VISIBILITY_CACHE_TTL_SECONDS`.
+
+Each key keeps its latest `VISIBILITY_CACHE_RANGES` date ranges, and a range
+within a cached one is served by cutting the cached windows: constraints are
+evaluated per step on the same grid whatever the range, so the windows of a
+range are the cached windows clipped to it, their clipped ends constrained
+by the window, minus those left shorter than the minimum duration.
+
+Only windows are cached, the returned visibilities don't carry the arrays
+computed along with them, so can't be used to find a joint visibility.
+"""
+
+import hashlib
+import json
+import math
+from collections import OrderedDict
+from collections.abc import Hashable
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+import astropy.units as u  # type: ignore[import-untyped]
+import numpy as np
+from across.tools.core.enums import ConstraintType
+from across.tools.core.schemas import (
+    ConstrainedDate,
+    ConstraintReason,
+    VisibilityWindow,
+    Window,
+)
+from across.tools.core.schemas.visibility import VisibilityComputedValues
+from across.tools.ephemeris import Ephemeris
+from across.tools.visibility import EphemerisVisibility
+from astropy.time import Time  # type: ignore[import-untyped]
+
+from .....core.cache import TTLCache
+from .....core.config import config
+
+type VisibilityKey = tuple[Hashable, ...]
+
+
+def visibility_key(
+    constraints: list[Any],
+    observatory_id: UUID,
+    ephemeris: Ephemeris,
+    ra: float,
+    dec: float,
+    step_size: int,
+    min_visibility_duration: int,
+) -> VisibilityKey | None:
+    """
+    The cache key of the windows computed from these parameters, with
+    `constraints` as JSON, None when the ephemeris doesn't tell its source
+    and so can't be cached.
+    """
+    source = getattr(ephemeris, "key", None)
+    if source is None:
+        return None
+
+    payload = json.dumps(constraints, sort_keys=True)
+
+    return (
+        hashlib.sha256(payload.encode()).hexdigest(),
+        observatory_id,
+        source,
+        round(ra * 3600),
+        round(dec * 3600),
+        step_size,
+        min_visibility_duration,
+    )
+
+
+def _grid(value: datetime | Time, step_size: float) -> int:
+    """The index of the step at or before `value`, as visibilities floor to it"""
+    return math.floor(Time(value).unix / step_size)
+
+
+def range_key(
+    key: VisibilityKey, begin: datetime, end: datetime, step_size: int
+) -> VisibilityKey:
+    """
+    The key of the windows of `key` from `begin` to `end`, alike for ranges
+    flooring to the same steps
+    """
+    return (*key, _grid(begin, step_size), _grid(end, step_size))
+
+
+def _index(value: Time, step_size: float) -> int:
+    return round(value.unix / step_size)
+
+
+def _bound(
+    bound: ConstrainedDate, index: int, step_size: float, clipped: bool
+) -> ConstrainedDate:
+    if not clipped:
+        return bound
+
+    return ConstrainedDate(
+        datetime=Time(index * step_size, format="unix").datetime,
+        constraint=ConstraintType.WINDOW,
+        observatory_id=bound.observatory_id,
+    )
+
+
+def cut(
+    visibility: EphemerisVisibility, begin: datetime, end: datetime
+) -> EphemerisVisibility:
+    """
+    The visibility from `begin` to `end`, within the range of `visibility`,
+    as if computed over that range.
+    """
+    step_size = float(visibility.step_size.to_value(u.s))
+    first = _grid(begin, step_size)
+    # the end point itself isn't evaluated
+    last = _grid(end, step_size) - 1
+    window_reason = f"{visibility.observatory_name} {ConstraintType.WINDOW.value}"
+
+    windows = []
+    for visibility_window in visibility.visibility_windows:
+        window = visibility_window.window
+        window_first = max(_index(window.begin.datetime, step_size), first)
+        window_last = min(_index(window.end.datetime, step_size), last)
+
+        duration = int((window_last - window_first) * step_size)
+        if duration <= visibility.min_vis:
+            continue
+
+        # a window reaching the range's ends is constrained by the range
+        begin_clipped = window_first == first
+        end_clipped = window_last == last
+        reason = visibility_window.constraint_reason
+        start_reason = window_reason if begin_clipped else reason.start_reason
+        end_reason = window_reason if end_clipped else reason.end_reason
+
+        windows.append(
+            VisibilityWindow(
+                window=Window(
+                    begin=_bound(window.begin, window_first, step_size, begin_clipped),
+                    end=_bound(window.end, window_last, step_size, end_clipped),
+                ),
+                max_visibility_duration=duration,
+                constraint_reason=ConstraintReason(
+                    start_reason=start_reason, end_reason=end_reason
+                ),
+            )
+        )
+
+    return visibility.model_copy(
+        update={
+            "begin": Time(first * step_size, format="unix"),
+            "end": Time((last + 1) * step_size, format="unix"),
+            "visibility_windows": windows,
+        }
+    )
+
+
+def _windows_only(visibility: EphemerisVisibility) -> EphemerisVisibility:
+    """The visibility without the ephemeris and arrays it was computed with"""
+    windows_only = visibility.model_copy(
+        update={
+            "constraints": [],
+            "timestamp": None,
+            "inconstraint": np.array([], dtype=np.bool_),
+            "calculated_constraints": OrderedDict(),
+            "computed_values": VisibilityComputedValues(),
+        }
+    )
+    windows_only.__dict__["ephemeris"] = None
+    return windows_only
+
+
+class VisibilityCache:
+    """
+    Visibility windows shared across requests, the latest `ranges` date
+    ranges computed for each of at most `max_size` keys.
+
+    Parameters
+    ----------
+    max_size : int
+        Maximum number of keys held at once.
+    ttl : float
+        Lifetime of the ranges of a key in seconds, from the latest one.
+    ranges : int
+        Maximum number of date ranges held per key.
+    """
+
+    def __init__(self, max_size: int, ttl: float, ranges: int) -> None:
+        self.ranges = ranges
+        self.entries: TTLCache[VisibilityKey, tuple[EphemerisVisibility, ...]] = (
+            TTLCache(max_size=max_size, ttl=ttl, name="visibility")
+        )
+
+    def get(
+        self, key: VisibilityKey, begin: datetime, end: datetime
+    ) -> EphemerisVisibility | None:
+        """The windows from `begin` to `end`, cut from a cached range covering it"""
+        for visibility in self.entries.peek(key) or ():
+            step_size = float(visibility.step_size.to_value(u.s))
+            if _grid(visibility.begin, step_size) <= _grid(begin, step_size) and _grid(
+                end, step_size
+            ) <= _grid(visibility.end, step_size):
+                self.entries.hits += 1
+                return cut(visibility, begin, end)
+
+        self.entries.misses += 1
+        return None
+
+    def set(self, key: VisibilityKey, visibility: EphemerisVisibility) -> None:
+        ranges = self.entries.peek(key) or ()
+        self.entries.set(key, (_windows_only(visibility), *ranges[: self.ranges - 1]))
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+
+visibility_cache = VisibilityCache(
+    max_size=config.VISIBILITY_CACHE_MAX_SIZE,
+    ttl=config.VISIBILITY_CACHE_TTL_SECONDS,
+    ranges=config.VISIBILITY_CACHE_RANGES,
+)
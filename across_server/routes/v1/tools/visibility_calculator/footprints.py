@@ -0,0 +1,226 @@
+"""
+Pointings of survey instruments, for their pointing constraints.
+
+The pointing constraint of a survey instrument holds the footprint of each of
+its observations near the target over the date range, and a month of a survey
+holds tens of thousands. Observations scheduled along with their footprints
+are used as stored, already projected. The footprints of the others are the
+instrument's footprint projected to their pointing, all of them at once with
+numpy, with the results of across-tools' projection of one footprint at a
+time.
+
+The instrument's detectors as unit vectors, and its extent to find the
+observations near a target, are kept per instrument and footprint.
+"""
+
+from collections.abc import Hashable, Sequence
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+import numpy as np
+from across.tools.core.schemas import Coordinate, Polygon
+from across.tools.footprint import Footprint as ToolsFootprint
+from across.tools.footprint.schemas import Pointing
+from astropy.time import Time  # type: ignore[import-untyped]
+from geoalchemy2 import WKBElement
+from geoalchemy2.shape import to_shape
+
+from .....core.cache import TTLCache
+from .....core.config import config
+from .....core.math_utils import gc_distance
+from ...footprint.schemas import Point
+
+
+class InstrumentFootprint:
+    """
+    The footprint of an instrument, centered on (0, 0), as needed to project
+    it to many pointings.
+
+    Parameters
+    ----------
+    detectors : list[np.ndarray]
+        The vertices of each detector, as cartesian unit vectors of shape (n, 3)
+    extent : float
+        The largest great circle distance of a vertex from the center, in
+        degrees
+    """
+
+    def __init__(self, detectors: list[np.ndarray], extent: float) -> None:
+        self.detectors = detectors
+        self.extent = extent
+
+    @classmethod
+    def create(cls, footprints: list[list[Point]]) -> "InstrumentFootprint":
+        detectors = []
+        extent = 0.0
+        for footprint in footprints:
+            ra = np.asarray([point.x for point in footprint])
+            dec = np.asarray([point.y for point in footprint])
+
+            extent = max(extent, float(np.max(gc_distance(ra, dec, 0.0, 0.0))))
+
+            phi = np.deg2rad(90 - dec)
+            theta = np.deg2rad(ra)
+            detectors.append(
+                np.stack(
+                    [
+                        np.cos(theta) * np.sin(phi),
+                        np.sin(theta) * np.sin(phi),
+                        np.cos(phi),
+                    ],
+                    axis=-1,
+                )
+            )
+
+        return cls(detectors, extent)
+
+
+_footprints: TTLCache[Hashable, InstrumentFootprint] = TTLCache(
+    max_size=config.VISIBILITY_FOOTPRINT_CACHE_MAX_SIZE,
+    ttl=config.VISIBILITY_FOOTPRINT_CACHE_TTL_SECONDS,
+    name="instrument_footprint",
+)
+
+
+def instrument_footprint(
+    instrument_id: UUID, footprints: list[list[Point]]
+) -> InstrumentFootprint:
+    """The footprint of an instrument, cached until its footprints change"""
+    key = (
+        instrument_id,
+        tuple(
+            tuple((point.x, point.y) for point in footprint) for footprint in footprints
+        ),
+    )
+
+    footprint = _footprints.get(key)
+    if footprint is None:
+        footprint = InstrumentFootprint.create(footprints)
+        _footprints.set(key, footprint)
+
+    return footprint
+
+
+def _rotation(axis: int, theta_deg: np.ndarray) -> np.ndarray:
+    """Rotation matrices around a cartesian axis, as across-tools' `x_rot` etc"""
+    theta = np.deg2rad(theta_deg)
+    cos, sin = np.cos(theta), np.sin(theta)
+    one, zero = np.ones_like(theta), np.zeros_like(theta)
+
+    if axis == 0:
+        rows = [[one, zero, zero], [zero, cos, -sin], [zero, sin, cos]]
+    elif axis == 1:
+        rows = [[cos, zero, sin], [zero, one, zero], [-sin, zero, cos]]
+    else:
+        rows = [[cos, -sin, zero], [sin, cos, zero], [zero, zero, one]]
+
+    return np.stack([np.stack(row, axis=-1) for row in rows], axis=-2)
+
+
+def project(
+    footprint: InstrumentFootprint,
+    ra: np.ndarray,
+    dec: np.ndarray,
+    roll_angle: np.ndarray,
+) -> list[ToolsFootprint]:
+    """
+    The footprint projected to each pointing, as `Footprint.project` would,
+    with the angles in degrees.
+    """
+    x_rot = _rotation(0, -1.0 * roll_angle)
+    y_rot = _rotation(1, dec)
+    z_rot = _rotation(2, -1.0 * ra)
+
+    projected_detectors = []
+    for vectors in footprint.detectors:
+        # rotated in across-tools' order, (pointings, vertices, 3)
+        rotated = vectors @ x_rot @ y_rot @ z_rot
+        x, y, z = rotated[..., 0], rotated[..., 1], rotated[..., 2]
+
+        r = np.sqrt(x**2 + y**2 + z**2)
+        theta = np.arctan2(y / r, x / r)
+        phi = np.arccos(z / r)
+        projected_dec = np.round(90 - np.rad2deg(phi), 5)
+        projected_ra = np.where(
+            theta < 0,
+            np.round(360 + np.rad2deg(theta), 5),
+            np.round(np.rad2deg(theta), 5),
+        )
+
+        projected_detectors.append(
+            [
+                Polygon.model_construct(
+                    coordinates=[
+                        Coordinate.model_construct(ra=vertex_ra, dec=vertex_dec)
+                        for vertex_ra, vertex_dec in zip(pointing_ra, pointing_dec)
+                    ]
+                )
+                for pointing_ra, pointing_dec in zip(
+                    projected_ra.tolist(), projected_dec.tolist()
+                )
+            ]
+        )
+
+    return [
+        ToolsFootprint.model_construct(detectors=list(detectors))
+        for detectors in zip(*projected_detectors)
+    ]
+
+
+def _stored_footprint(polygons: list[WKBElement]) -> ToolsFootprint:
+    detectors = []
+    for polygon in polygons:
+        x, y = to_shape(polygon).exterior.coords.xy  # type: ignore[attr-defined]
+        detectors.append(
+            Polygon(
+                coordinates=[
+                    Coordinate(ra=ra, dec=dec)
+                    for ra, dec in zip(x.tolist(), y.tolist())
+                ]
+            )
+        )
+
+    return ToolsFootprint(detectors=detectors)
+
+
+def build_pointings(
+    footprint: InstrumentFootprint, observations: Sequence[Sequence[Any]]
+) -> list[Pointing]:
+    """
+    The pointings of observations, given as rows of their id, pointing ra,
+    dec and angle, date range begin and end, and one of their stored
+    footprint polygons, if any, per row.
+    """
+    stored: dict[UUID, list[WKBElement]] = {}
+    ranges: dict[UUID, tuple[datetime, datetime]] = {}
+    pointed: dict[UUID, tuple[float, float, float]] = {}
+
+    for id, ra, dec, angle, begin, end, polygon in observations:
+        if id not in ranges:
+            ranges[id] = (begin, end)
+            if ra is not None and dec is not None:
+                pointed[id] = (ra, dec, angle or 0.0)
+        if polygon is not None:
+            stored.setdefault(id, []).append(polygon)
+
+    footprints = {id: _stored_footprint(polygons) for id, polygons in stored.items()}
+
+    to_project = [id for id in pointed if id not in stored]
+    if to_project:
+        ra, dec, angle = np.asarray([pointed[id] for id in to_project]).T
+        footprints.update(zip(to_project, project(footprint, ra, dec, angle)))
+
+    # in the order of the observations
+    ids = [id for id in ranges if id in footprints]
+    if not ids:
+        return []
+    begins = Time([ranges[id][0] for id in ids])
+    ends = Time([ranges[id][1] for id in ids])
+
+    return [
+        Pointing.model_construct(
+            footprint=footprints[id], start_time=begins[index], end_time=ends[index]
+        )
+        for index, id in enumerate(ids)
+    ]
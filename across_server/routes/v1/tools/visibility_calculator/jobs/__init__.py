@@ -0,0 +1,4 @@
+from . import worker
+from .router import router
+
+__all__ = ["router", "worker"]
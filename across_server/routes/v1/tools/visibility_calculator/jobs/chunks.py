@@ -0,0 +1,81 @@
+"""
+Date chunks of a visibility job, and stitching their windows back together.
+
+A job computes its date range `VISIBILITY_JOB_CHUNK_DAYS` at a time,
+checkpointing the windows of each chunk. Constraints are evaluated per step
+on the same grid whatever the range, so the windows of the whole range are
+those of its chunks, joined where one runs across the boundary between two.
+
+To tell those apart, each chunk but the last also evaluates the first step
+of the next one, and is computed keeping windows of a single step: a window
+reaching the boundary in one chunk, and starting at it in the next, is one
+window. The minimum visibility duration of the job is applied once stitched.
+"""
+
+from datetime import datetime, timedelta
+
+from ......core.config import config
+from ..schemas import ConstraintReason, VisibilityWindow, Window
+
+_EPOCH = datetime(1970, 1, 1)
+
+# computes the windows of a chunk whatever their duration
+CHUNK_MIN_VISIBILITY_DURATION = -1
+
+
+def chunk_ranges(
+    begin: datetime, end: datetime, step_size: int
+) -> list[tuple[datetime, datetime]]:
+    """The date ranges of the chunks of a job from `begin` to `end`"""
+    step = timedelta(seconds=step_size)
+    chunk = timedelta(days=config.VISIBILITY_JOB_CHUNK_DAYS)
+    # visibilities begin at the step at or before `begin`
+    chunk_begin = _EPOCH + (begin - _EPOCH) // step * step
+
+    ranges = []
+    # a next chunk of a single step is evaluated as the overlap of this one
+    while chunk_begin + chunk + step < end:
+        ranges.append((chunk_begin, chunk_begin + chunk + step))
+        chunk_begin += chunk
+    ranges.append((chunk_begin, end))
+
+    return ranges
+
+
+def stitch(
+    chunks: list[list[VisibilityWindow]], step_size: int, min_visibility_duration: int
+) -> list[VisibilityWindow]:
+    """The windows of consecutive chunks, as if computed over their whole range"""
+    windows: list[VisibilityWindow] = []
+
+    for chunk in chunks:
+        for index, window in enumerate(chunk):
+            previous = windows[-1] if windows else None
+            if (
+                index == 0
+                and previous is not None
+                and abs(
+                    (
+                        window.window.begin.datetime - previous.window.end.datetime
+                    ).total_seconds()
+                )
+                < step_size / 2
+            ):
+                # the step at the boundary is in both windows
+                windows[-1] = VisibilityWindow(
+                    window=Window(begin=previous.window.begin, end=window.window.end),
+                    max_visibility_duration=previous.max_visibility_duration
+                    + window.max_visibility_duration,
+                    constraint_reason=ConstraintReason(
+                        start_reason=previous.constraint_reason.start_reason,
+                        end_reason=window.constraint_reason.end_reason,
+                    ),
+                )
+            else:
+                windows.append(window)
+
+    return [
+        window
+        for window in windows
+        if window.max_visibility_duration > min_visibility_duration
+    ]
@@ -0,0 +1,22 @@
+from uuid import UUID
+
+from fastapi import status
+
+from ......core.exceptions import AcrossHTTPException, NotFoundException
+
+
+class VisibilityJobNotFoundException(NotFoundException):
+    def __init__(self, job_id: UUID):
+        super().__init__(entity_name="Visibility job", entity_id=job_id)
+
+
+class VisibilityJobNotCompleteException(AcrossHTTPException):
+    def __init__(self, job_id: UUID, job_status: str, error: str | None = None):
+        super().__init__(
+            status_code=status.HTTP_409_CONFLICT,
+            message=error or f"Visibility job is {job_status}, it has no result yet.",
+            log_data={
+                "Visibility job": job_id,
+                "status": job_status,
+            },
+        )
@@ -0,0 +1,122 @@
+from typing import Annotated
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, status
+
+from ......core.enums.visibility_job_kind import VisibilityJobKind
+from ....instrument.service import InstrumentService
+from ..schemas import (
+    JointVisibilityReadParams,
+    JointVisibilityResult,
+    VisibilityReadParams,
+    VisibilityResult,
+)
+from . import schemas
+from .service import VisibilityJobService
+
+router = APIRouter(
+    prefix="/visibility-calculator/jobs",
+    tags=["Tools"],
+    responses={
+        status.HTTP_404_NOT_FOUND: {
+            "description": "The visibility job does not exist.",
+        },
+    },
+)
+
+
+@router.post(
+    "/windows/{instrument_id}",
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Submit a Visibility Windows Job",
+    description="Calculate visibility windows of an instrument for a given observation coordinate in the background, over date ranges too long for GET /tools/visibility-calculator/windows/{instrument_id} \n\n Returns the job, poll GET /tools/visibility-calculator/jobs/{job_id} for its progress and download its `VisibilityResult` from GET /tools/visibility-calculator/jobs/{job_id}/result once it succeeded \n\n Submitting the parameters of a pending job returns that job",
+    responses={
+        status.HTTP_202_ACCEPTED: {
+            "description": "Return the submitted visibility job.",
+        },
+    },
+)
+async def submit_windows_job(
+    instrument_id: UUID,
+    parameters: VisibilityReadParams,
+    job_service: Annotated[VisibilityJobService, Depends(VisibilityJobService)],
+    instrument_service: Annotated[InstrumentService, Depends(InstrumentService)],
+) -> schemas.VisibilityJob:
+    await instrument_service.get(instrument_id)
+
+    job = await job_service.submit(
+        VisibilityJobKind.WINDOWS,
+        JointVisibilityReadParams(
+            **parameters.model_dump(), instrument_ids=[instrument_id]
+        ),
+    )
+
+    return schemas.VisibilityJob.model_validate(job)
+
+
+@router.post(
+    "/windows/",
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Submit a Joint Visibility Windows Job",
+    description="Calculate joint visibility windows between instruments for a given observation coordinate in the background, over date ranges too long for GET /tools/visibility-calculator/windows/ \n\n Returns the job, poll GET /tools/visibility-calculator/jobs/{job_id} for its progress and download its `JointVisibilityResult` from GET /tools/visibility-calculator/jobs/{job_id}/result once it succeeded \n\n Submitting the parameters of a pending job returns that job",
+    responses={
+        status.HTTP_202_ACCEPTED: {
+            "description": "Return the submitted visibility job.",
+        },
+    },
+)
+async def submit_joint_windows_job(
+    parameters: JointVisibilityReadParams,
+    job_service: Annotated[VisibilityJobService, Depends(VisibilityJobService)],
+    instrument_service: Annotated[InstrumentService, Depends(InstrumentService)],
+) -> schemas.VisibilityJob:
+    await instrument_service.get_by_ids(parameters.instrument_ids)
+
+    job = await job_service.submit(VisibilityJobKind.JOINT_WINDOWS, parameters)
+
+    return schemas.VisibilityJob.model_validate(job)
+
+
+@router.get(
+    "/{job_id}",
+    status_code=status.HTTP_200_OK,
+    summary="Read a Visibility Job",
+    description="Read the status and progress of a visibility job.",
+    responses={
+        status.HTTP_200_OK: {
+            "description": "Return the visibility job.",
+        },
+    },
+)
+async def get_job(
+    job_id: UUID,
+    job_service: Annotated[VisibilityJobService, Depends(VisibilityJobService)],
+) -> schemas.VisibilityJob:
+    job = await job_service.get(job_id)
+
+    return schemas.VisibilityJob.model_validate(job)
+
+
+@router.get(
+    "/{job_id}/result",
+    status_code=status.HTTP_200_OK,
+    summary="Read the Result of a Visibility Job",
+    description="Download the result of a succeeded visibility job, a `VisibilityResult` or a `JointVisibilityResult` by the kind of job \n\n Results are kept for `VISIBILITY_JOB_RETENTION_DAYS` after the job completed",
+    responses={
+        status.HTTP_200_OK: {
+            "description": "Return the result of the visibility job.",
+        },
+        status.HTTP_409_CONFLICT: {
+            "description": "The visibility job is pending or failed.",
+        },
+    },
+)
+async def get_job_result(
+    job_id: UUID,
+    job_service: Annotated[VisibilityJobService, Depends(VisibilityJobService)],
+) -> VisibilityResult | JointVisibilityResult:
+    job = await job_service.get_result(job_id)
+
+    if job.kind == VisibilityJobKind.WINDOWS:
+        return VisibilityResult.model_validate(job.result)
+    return JointVisibilityResult.model_validate(job.result)
@@ -0,0 +1,38 @@
+from datetime import datetime
+from uuid import UUID
+
+from ......core.enums.visibility_job_kind import VisibilityJobKind
+from ......core.enums.visibility_job_status import VisibilityJobStatus
+from ......core.schemas.base import BaseSchema
+
+
+class VisibilityJob(BaseSchema):
+    """
+    A visibility calculation running in the background.
+
+    Parameters
+    ----------
+    id: UUID
+        Job id, to poll its progress and download its result
+    kind: VisibilityJobKind
+        Whether the job calculates the windows of one instrument, or the
+        joint windows of many
+    status: VisibilityJobStatus
+        Status of the job, its result can be downloaded once `succeeded`
+    progress: float
+        Percentage of the date range calculated
+    error: str | None
+        Why the job failed, if it did
+    created_on: datetime
+        When the job was submitted
+    completed_on: datetime | None
+        When the job succeeded or failed
+    """
+
+    id: UUID
+    kind: VisibilityJobKind
+    status: VisibilityJobStatus
+    progress: float
+    error: str | None = None
+    created_on: datetime
+    completed_on: datetime | None = None
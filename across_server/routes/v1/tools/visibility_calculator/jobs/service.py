@@ -0,0 +1,181 @@
+import hashlib
+import json
+from datetime import timedelta
+from typing import Annotated
+from uuid import UUID
+
+from fastapi import Depends
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ......core.config import config
+from ......core.enums.visibility_job_kind import VisibilityJobKind
+from ......core.enums.visibility_job_status import VisibilityJobStatus
+from ......core.exceptions import InvalidEntityException
+from ......db import models
+from ......db.database import get_session
+from ..schemas import JointVisibilityReadParams
+from . import worker
+from .exceptions import (
+    VisibilityJobNotCompleteException,
+    VisibilityJobNotFoundException,
+)
+
+PENDING_STATUSES = [VisibilityJobStatus.QUEUED, VisibilityJobStatus.RUNNING]
+
+
+def fingerprint(kind: VisibilityJobKind, parameters: dict) -> str:
+    """Identifies jobs of the same kind and parameters, with `parameters` as JSON"""
+    payload = json.dumps({"kind": kind, "parameters": parameters}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class VisibilityJobService:
+    """
+    Visibility job service for calculating visibility windows in the
+    background, over date ranges too long for a request.
+    Jobs are run by the workers of `worker.py`.
+
+    Methods
+    -------
+    submit(kind: VisibilityJobKind, parameters: JointVisibilityReadParams) -> models.VisibilityJob
+        Queue a job, or return the pending job with the same parameters.
+    get(job_id: UUID) -> models.VisibilityJob
+        Retrieve the job with the given id.
+    get_result(job_id: UUID) -> models.VisibilityJob
+        Retrieve the job with the given id, once it has a result.
+    """
+
+    def __init__(self, db: Annotated[AsyncSession, Depends(get_session)]) -> None:
+        self.db = db
+
+    async def _get_pending(self, job_fingerprint: str) -> models.VisibilityJob | None:
+        query = select(models.VisibilityJob).where(
+            models.VisibilityJob.fingerprint == job_fingerprint,
+            models.VisibilityJob.status.in_(PENDING_STATUSES),
+        )
+
+        result = await self.db.execute(query)
+        return result.scalar_one_or_none()
+
+    async def submit(
+        self, kind: VisibilityJobKind, parameters: JointVisibilityReadParams
+    ) -> models.VisibilityJob:
+        """
+        Queue a visibility job, unless one with the same kind and parameters
+        is already queued or running, which is returned instead.
+        Parameters
+        ----------
+        kind : VisibilityJobKind
+            the kind of job
+        parameters : JointVisibilityReadParams
+            the parameters of the job, with the single instrument of a
+            `windows` job
+        Returns
+        -------
+        models.VisibilityJob
+            The pending job with these parameters
+        Raises
+        ------
+        InvalidEntityException
+            If the date range is empty or longer than `VISIBILITY_JOB_MAX_DAYS`
+        """
+        duration = parameters.date_range_end - parameters.date_range_begin
+        if duration <= timedelta(0):
+            raise InvalidEntityException(
+                "Visibility job", "date_range_end must be after date_range_begin"
+            )
+        if duration > timedelta(days=config.VISIBILITY_JOB_MAX_DAYS):
+            raise InvalidEntityException(
+                "Visibility job",
+                f"the date range must be at most {config.VISIBILITY_JOB_MAX_DAYS} days",
+            )
+
+        data = parameters.model_dump(mode="json")
+        job_fingerprint = fingerprint(kind, data)
+
+        job = await self._get_pending(job_fingerprint)
+        if job is not None:
+            return job
+
+        # at most one pending job per fingerprint, see the partial unique index
+        query = (
+            insert(models.VisibilityJob)
+            .values(
+                kind=kind,
+                parameters=data,
+                fingerprint=job_fingerprint,
+                status=VisibilityJobStatus.QUEUED,
+                progress=0,
+                checkpoint=[],
+            )
+            .on_conflict_do_nothing(
+                index_elements=[models.VisibilityJob.fingerprint],
+                index_where=models.VisibilityJob.status.in_(PENDING_STATUSES),
+            )
+            .returning(models.VisibilityJob)
+        )
+        result = await self.db.execute(query)
+        job = result.scalar_one_or_none()
+        await self.db.commit()
+
+        if job is None:
+            # submitted by a concurrent request meanwhile
+            job = await self._get_pending(job_fingerprint)
+            if job is None:
+                # and already completed, rare enough to just queue it again
+                return await self.submit(kind, parameters)
+            return job
+
+        worker.notify()
+        return job
+
+    async def get(self, job_id: UUID) -> models.VisibilityJob:
+        """
+        Retrieve the visibility job with the given id.
+        Parameters
+        ----------
+        job_id : UUID
+            the job id
+        Returns
+        -------
+        models.VisibilityJob
+            The job with the given id
+        Raises
+        ------
+        VisibilityJobNotFoundException
+        """
+        query = select(models.VisibilityJob).where(models.VisibilityJob.id == job_id)
+
+        result = await self.db.execute(query)
+        job = result.scalar_one_or_none()
+
+        if job is None:
+            raise VisibilityJobNotFoundException(job_id)
+
+        return job
+
+    async def get_result(self, job_id: UUID) -> models.VisibilityJob:
+        """
+        Retrieve the visibility job with the given id, once it succeeded.
+        Parameters
+        ----------
+        job_id : UUID
+            the job id
+        Returns
+        -------
+        models.VisibilityJob
+            The job with the given id, with its result
+        Raises
+        ------
+        VisibilityJobNotFoundException
+        VisibilityJobNotCompleteException
+            If the job is pending or failed
+        """
+        job = await self.get(job_id)
+
+        if job.status != VisibilityJobStatus.SUCCEEDED or job.result is None:
+            raise VisibilityJobNotCompleteException(job.id, job.status, job.error)
+
+        return job
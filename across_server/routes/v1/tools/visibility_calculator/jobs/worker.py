@@ -0,0 +1,357 @@
+"""
+Workers running visibility jobs.
+
+Each app process runs `VISIBILITY_JOB_WORKERS` workers, started with the app.
+A worker claims the oldest queued job, skipping rows locked by the workers of
+other processes, and computes it a date chunk at a time, see `chunks.py`.
+After each chunk, the windows computed so far are checkpointed along with
+the job's progress and a heartbeat. A running job not heard from in
+`VISIBILITY_JOB_STALE_SECONDS`, its process stopped, is claimed again and
+resumes from its checkpoint. The heartbeat doubles as the lease of the
+worker: a worker whose job was claimed again stops updating it.
+
+Workers poll for jobs every `VISIBILITY_JOB_POLL_SECONDS`, or right away when
+a job is submitted to their process, and delete the jobs completed more than
+`VISIBILITY_JOB_RETENTION_DAYS` ago.
+"""
+
+import asyncio
+import time
+from contextlib import suppress
+from datetime import datetime, timedelta, timezone
+from typing import Any
+from uuid import UUID
+
+import structlog
+from fastapi import HTTPException
+from pydantic import TypeAdapter
+from sqlalchemy import and_, delete, or_, select, update
+
+from ......core.config import config
+from ......core.enums.visibility_job_kind import VisibilityJobKind
+from ......core.enums.visibility_job_status import VisibilityJobStatus
+from ......db import database, models
+from ....instrument.schemas import Instrument as InstrumentSchema
+from ....instrument.service import InstrumentService
+from ....telescope.exceptions import TelescopeNotFoundException
+from ..schemas import (
+    JointVisibilityReadParams,
+    JointVisibilityResult,
+    VisibilityResult,
+    VisibilityWindow,
+)
+from ..service import VisibilityCalculatorService
+from .chunks import CHUNK_MIN_VISIBILITY_DURATION, chunk_ranges, stitch
+
+logger: structlog.stdlib.BoundLogger = structlog.get_logger()
+
+WindowsAdaptor = TypeAdapter(list[VisibilityWindow])
+
+_workers: list[asyncio.Task] = []
+_submitted: asyncio.Event | None = None
+_pruned_at: float | None = None
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _windows(visibility: Any) -> list[dict]:
+    """The windows of a visibility as JSON, to checkpoint"""
+    return WindowsAdaptor.dump_python(
+        WindowsAdaptor.validate_python(visibility.model_dump()["visibility_windows"]),
+        mode="json",
+    )
+
+
+async def _instruments(
+    instrument_ids: list[UUID],
+) -> list[tuple[InstrumentSchema, UUID]]:
+    """The instruments of a job, each with the id of the observatory hosting it"""
+    async with database.async_session() as session:
+        instruments = []
+        for instrument_model in await InstrumentService(session).get_by_ids(
+            instrument_ids
+        ):
+            instrument = InstrumentSchema.from_orm(instrument_model)
+            if instrument.telescope is None:
+                raise TelescopeNotFoundException(instrument_model.telescope_id)
+            instruments.append((instrument, instrument_model.telescope.observatory_id))
+
+    return instruments
+
+
+async def compute_chunk(
+    kind: VisibilityJobKind,
+    parameters: JointVisibilityReadParams,
+    instruments: list[tuple[InstrumentSchema, UUID]],
+    begin: datetime,
+    end: datetime,
+) -> dict:
+    """The windows of a job from `begin` to `end`, as JSON"""
+    async with database.async_session() as session:
+        visibility_calculator = VisibilityCalculatorService.for_session(session)
+
+        if kind == VisibilityJobKind.WINDOWS:
+            ((instrument, observatory_id),) = instruments
+            visibility = await visibility_calculator.calculate_windows(
+                ra=parameters.ra,
+                dec=parameters.dec,
+                instrument=instrument,
+                observatory_id=observatory_id,
+                date_range_begin=begin,
+                date_range_end=end,
+                hi_res=parameters.hi_res,
+                min_visibility_duration=CHUNK_MIN_VISIBILITY_DURATION,
+            )
+            return {"visibility_windows": _windows(visibility)}
+
+        visibilities = await visibility_calculator.calculate_joint_windows(
+            ra=parameters.ra,
+            dec=parameters.dec,
+            instruments=instruments,
+            date_range_begin=begin,
+            date_range_end=end,
+            hi_res=parameters.hi_res,
+            min_visibility_duration=CHUNK_MIN_VISIBILITY_DURATION,
+        )
+        joint_visibility = await visibility_calculator.find_joint_visibility(
+            visibilities=visibilities,
+            instrument_ids=parameters.instrument_ids,
+            min_visibility_duration=CHUNK_MIN_VISIBILITY_DURATION,
+        )
+        return {
+            "visibility_windows": _windows(joint_visibility),
+            "observatory_visibility_windows": {
+                str(instrument_id): _windows(visibility)
+                for visibility, instrument_id in zip(
+                    visibilities, parameters.instrument_ids
+                )
+            },
+        }
+
+
+def build_result(
+    kind: VisibilityJobKind,
+    parameters: JointVisibilityReadParams,
+    checkpoint: list[dict],
+) -> dict:
+    """The result of a job, stitched from the windows of its chunks, as JSON"""
+    step_size = 60 if parameters.hi_res else 3600
+
+    def stitched(chunks: list[Any]) -> list[VisibilityWindow]:
+        return stitch(
+            [WindowsAdaptor.validate_python(chunk) for chunk in chunks],
+            step_size,
+            parameters.min_visibility_duration,
+        )
+
+    visibility_windows = stitched([chunk["visibility_windows"] for chunk in checkpoint])
+
+    if kind == VisibilityJobKind.WINDOWS:
+        return VisibilityResult(
+            instrument_id=parameters.instrument_ids[0],
+            visibility_windows=visibility_windows,
+        ).model_dump(mode="json")
+
+    return JointVisibilityResult(
+        instrument_ids=parameters.instrument_ids,
+        visibility_windows=visibility_windows,
+        observatory_visibility_windows={
+            instrument_id: stitched(
+                [
+                    chunk["observatory_visibility_windows"][str(instrument_id)]
+                    for chunk in checkpoint
+                ]
+            )
+            for instrument_id in parameters.instrument_ids
+        },
+    ).model_dump(mode="json")
+
+
+async def _save(job_id: UUID, lease: datetime | None, **values: Any) -> datetime | None:
+    """
+    Update a job still held by this worker, renewing its heartbeat. Returns
+    the new lease, or None when the job was claimed again by another worker.
+    """
+    now = _now()
+    query = (
+        update(models.VisibilityJob)
+        .where(
+            models.VisibilityJob.id == job_id,
+            models.VisibilityJob.heartbeat_on == lease,
+        )
+        .values(heartbeat_on=now, **values)
+        .returning(models.VisibilityJob.id)
+        .execution_options(synchronize_session=False)
+    )
+
+    async with database.async_session() as session:
+        result = await session.execute(query)
+        saved = result.scalar_one_or_none()
+        await session.commit()
+
+    return now if saved is not None else None
+
+
+async def run(job: models.VisibilityJob) -> None:
+    """Compute the chunks of a claimed job not yet checkpointed, then its result"""
+    kind = VisibilityJobKind(job.kind)
+    parameters = JointVisibilityReadParams.model_validate(job.parameters)
+    ranges = chunk_ranges(
+        parameters.date_range_begin,
+        parameters.date_range_end,
+        60 if parameters.hi_res else 3600,
+    )
+    checkpoint = list(job.checkpoint or [])
+    lease = job.heartbeat_on
+
+    try:
+        instruments = await _instruments(parameters.instrument_ids)
+
+        for begin, end in ranges[len(checkpoint) :]:
+            checkpoint.append(
+                await compute_chunk(kind, parameters, instruments, begin, end)
+            )
+            lease = await _save(
+                job.id,
+                lease,
+                checkpoint=checkpoint,
+                progress=100 * len(checkpoint) / len(ranges),
+            )
+            if lease is None:
+                logger.warning("Visibility job claimed by another worker", job=job.id)
+                return
+
+        result = build_result(kind, parameters, checkpoint)
+    except Exception as error:
+        logger.exception("Visibility job failed", job=job.id)
+        message = error.detail if isinstance(error, HTTPException) else str(error)
+        await _save(
+            job.id,
+            lease,
+            status=VisibilityJobStatus.FAILED,
+            error=str(message)[:1024],
+            completed_on=_now(),
+        )
+        return
+
+    await _save(
+        job.id,
+        lease,
+        status=VisibilityJobStatus.SUCCEEDED,
+        result=result,
+        checkpoint=[],
+        progress=100,
+        completed_on=_now(),
+    )
+
+
+async def claim() -> models.VisibilityJob | None:
+    """Claim the oldest queued or stale job, None when there is none"""
+    now = _now()
+    stale = now - timedelta(seconds=config.VISIBILITY_JOB_STALE_SECONDS)
+    claimable = (
+        select(models.VisibilityJob.id)
+        .where(
+            or_(
+                models.VisibilityJob.status == VisibilityJobStatus.QUEUED,
+                and_(
+                    models.VisibilityJob.status == VisibilityJobStatus.RUNNING,
+                    models.VisibilityJob.heartbeat_on < stale,
+                ),
+            )
+        )
+        .order_by(models.VisibilityJob.created_on)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    query = (
+        update(models.VisibilityJob)
+        .where(models.VisibilityJob.id == claimable)
+        .values(status=VisibilityJobStatus.RUNNING, heartbeat_on=now)
+        .returning(models.VisibilityJob)
+        .execution_options(synchronize_session=False)
+    )
+
+    async with database.async_session() as session:
+        result = await session.execute(query)
+        job = result.scalar_one_or_none()
+        await session.commit()
+
+    return job
+
+
+async def prune() -> None:
+    """Delete the jobs completed before the retention period, at most hourly"""
+    global _pruned_at
+
+    if _pruned_at is not None and time.monotonic() - _pruned_at < 3600:
+        return
+    _pruned_at = time.monotonic()
+
+    completed_before = _now() - timedelta(days=config.VISIBILITY_JOB_RETENTION_DAYS)
+    async with database.async_session() as session:
+        await session.execute(
+            delete(models.VisibilityJob).where(
+                models.VisibilityJob.completed_on < completed_before
+            )
+        )
+        await session.commit()
+
+
+async def _work() -> None:
+    while True:
+        try:
+            job = await claim()
+            if job is not None:
+                await run(job)
+                continue
+            await prune()
+        except Exception:
+            # e.g. the database is unavailable, try again on the next poll
+            logger.exception("Visibility job worker failed")
+
+        if _submitted is not None:
+            with suppress(TimeoutError):
+                await asyncio.wait_for(
+                    _submitted.wait(), config.VISIBILITY_JOB_POLL_SECONDS
+                )
+            _submitted.clear()
+
+
+def notify() -> None:
+    """Wake the workers of this process up, a job was submitted"""
+    if _submitted is not None:
+        _submitted.set()
+
+
+async def start() -> None:
+    """Start the workers, if configured"""
+    global _submitted
+
+    if config.VISIBILITY_JOB_WORKERS <= 0 or _workers:
+        return
+
+    _submitted = asyncio.Event()
+    _workers.extend(
+        asyncio.create_task(_work()) for _ in range(config.VISIBILITY_JOB_WORKERS)
+    )
+    logger.info("Started visibility job workers", workers=len(_workers))
+
+
+async def stop() -> None:
+    """
+    Stop the workers. Their running jobs are claimed again once stale, by
+    the workers of this or another process.
+    """
+    global _submitted
+
+    for task in _workers:
+        task.cancel()
+    for task in _workers:
+        with suppress(asyncio.CancelledError):
+            await task
+    _workers.clear()
+    _submitted = None
@@ -0,0 +1,258 @@
+"""
+Visibility windows evaluated on a coarse grid, refined around their edges.
+
+A fixed step trades accuracy for evaluations: hourly steps put window edges
+up to an hour off, minute steps evaluate the constraints 43,000 times over a
+month. Adaptive windows are evaluated every
+`VISIBILITY_ADAPTIVE_COARSE_STEP_SECONDS` instead, then each coarse step
+where the target becomes visible or constrained is bisected down to
+`VISIBILITY_ADAPTIVE_PRECISION_SECONDS`. The edges are bisected all at once,
+each round evaluating the constraints once at the middle of every edge, on an
+ephemeris interpolated from the coarse one at those times, see
+`ephemeris/interpolation.py`.
+
+Window edges are then those of windows evaluated every precision step, for
+the evaluations of the coarse grid and `log2(coarse step / precision)` per
+edge. As with any step, visibility or constraints shorter than the coarse
+step may fall between two of its evaluations and be missed, the coarse step
+must stay below the shortest windows of interest. The reasons of an edge are
+those at the coarse step outside of its window.
+"""
+
+import math
+from collections.abc import Sequence
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+import astropy.units as u  # type: ignore[import-untyped]
+import numpy as np
+from across.tools.core.enums import ConstraintType
+from across.tools.core.schemas import (
+    ConstrainedDate,
+    ConstraintReason,
+    VisibilityWindow,
+    Window,
+)
+from across.tools.ephemeris import Ephemeris
+from across.tools.visibility import EphemerisVisibility, compute_ephemeris_visibility
+from across.tools.visibility.constraints.base import ConstraintABC
+from astropy.coordinates import SkyCoord  # type: ignore[import-untyped]
+from astropy.time import Time, TimeDelta  # type: ignore[import-untyped]
+
+from ..ephemeris.cache import CachedEphemeris
+from ..ephemeris.interpolation import INTERPOLATION_POINTS, interpolate_at
+
+
+class _SampledEphemeris(CachedEphemeris):
+    """An ephemeris at increasing times, not necessarily a step apart"""
+
+    def __init__(self, step_size: TimeDelta, series: dict) -> None:
+        super().__init__(step_size, series)
+        self._unix = self.timestamp.unix
+
+    def index(self, t: Time) -> int:
+        return int(np.searchsorted(self._unix, t.unix))
+
+
+def _floor(value: datetime, step_size: int) -> datetime:
+    """The step at or before `value`, as a naive UTC datetime"""
+    timestamp = value.replace(tzinfo=timezone.utc).timestamp()
+    return datetime.fromtimestamp(
+        math.floor(timestamp / step_size) * step_size, timezone.utc
+    ).replace(tzinfo=None)
+
+
+def ephemeris_range(
+    begin: datetime, end: datetime, coarse_step: int
+) -> tuple[datetime, datetime]:
+    """
+    The range of the coarse ephemeris to compute adaptive windows from
+    `begin` to `end`: a coarse step around the range, so its edges are
+    refined as any other, padded to interpolate them.
+    """
+    padding = timedelta(seconds=coarse_step * (INTERPOLATION_POINTS // 2 + 2))
+    return begin - padding, end + padding
+
+
+def _constrained(
+    ephemeris: Ephemeris,
+    constraints: Sequence[ConstraintABC],
+    coordinate: SkyCoord,
+    timestamp: Time,
+) -> np.ndarray:
+    """Whether the target is constrained at each of increasing times"""
+    sampled = _SampledEphemeris(
+        ephemeris.step_size, interpolate_at(ephemeris, timestamp)
+    )
+    return np.logical_or.reduce(
+        [
+            constraint(time=timestamp, ephemeris=sampled, coordinate=coordinate)
+            for constraint in constraints
+        ]
+    )
+
+
+def refine_windows(
+    visibility: EphemerisVisibility,
+    ephemeris: Ephemeris,
+    constraints: Sequence[ConstraintABC],
+    coordinate: SkyCoord,
+    begin: datetime,
+    end: datetime,
+    precision: int,
+    min_vis: int,
+) -> tuple[list[VisibilityWindow], int]:
+    """
+    The windows of a visibility evaluated on a coarse grid, with their edges
+    bisected to `precision` seconds, a divisor of the coarse step, and
+    clipped to `begin` and `end` as a visibility evaluated every `precision`
+    seconds would be.
+
+    Returns
+    -------
+    tuple[list[VisibilityWindow], int]
+        The windows longer than `min_vis` seconds, and how many times the
+        constraints were evaluated to refine them.
+    """
+    if visibility.timestamp is None:
+        raise ValueError("Timestamp not computed. Call compute() first.")
+
+    coarse_unix = visibility.timestamp.unix
+    visible = ~np.asarray(visibility.inconstraint, dtype=bool)
+    # the coarse steps followed by an edge, which lies before the next one
+    edges = np.flatnonzero(visible[:-1] != visible[1:])
+
+    # bisected in precision steps from the coarse step, the target is as
+    # visible at `low` as at the coarse step, and not at `high`
+    low = np.zeros(len(edges), dtype=int)
+    high = np.full(len(edges), round(visibility.step_size.to_value(u.s) / precision))
+    evaluations = 0
+    while len(edges) and high[0] - low[0] > 1:
+        middle = (low + high) // 2
+        constrained = _constrained(
+            ephemeris,
+            constraints,
+            coordinate,
+            Time(coarse_unix[edges] + middle * precision, format="unix"),
+        )
+        evaluations += len(edges)
+        same = constrained != visible[edges]
+        low = np.where(same, middle, low)
+        high = np.where(same, high, middle)
+
+    # the first visible step after a coarse step, the last one before
+    refined = Time(
+        coarse_unix[edges] + np.where(visible[edges], low, high) * precision,
+        format="unix",
+    ).datetime
+    begins = dict(zip((edges + 1).tolist(), refined))
+    ends = dict(zip(edges.tolist(), refined))
+
+    timestamp = visibility.timestamp.datetime
+    # as visibilities evaluated every `precision` seconds from `begin` to `end`
+    first = _floor(begin, precision)
+    last = _floor(end, precision) - timedelta(seconds=precision)
+
+    padded = np.concatenate(([False], visible, [False]))
+    starts = np.flatnonzero(~padded[:-1] & padded[1:])
+    stops = np.flatnonzero(padded[:-1] & ~padded[1:]) - 1
+
+    windows = []
+    for start, stop in zip(starts.tolist(), stops.tolist()):
+        window_begin = begins.get(start, timestamp[start])
+        window_end = ends.get(stop, timestamp[stop])
+        begin_constraint = visibility._constraint(start - 1)
+        end_constraint = visibility._constraint(stop + 1)
+
+        if window_end < first or window_begin > last:
+            continue
+        if window_begin <= first:
+            window_begin, begin_constraint = first, ConstraintType.WINDOW
+        if window_end >= last:
+            window_end, end_constraint = last, ConstraintType.WINDOW
+
+        duration = window_end - window_begin
+        if duration <= timedelta(seconds=min_vis):
+            continue
+
+        windows.append(
+            VisibilityWindow(
+                window=Window(
+                    begin=ConstrainedDate(
+                        datetime=window_begin,
+                        constraint=begin_constraint,
+                        observatory_id=visibility.observatory_id,
+                    ),
+                    end=ConstrainedDate(
+                        datetime=window_end,
+                        constraint=end_constraint,
+                        observatory_id=visibility.observatory_id,
+                    ),
+                ),
+                max_visibility_duration=int(duration.total_seconds()),
+                constraint_reason=ConstraintReason(
+                    start_reason=f"{visibility.observatory_name} {begin_constraint.value}",
+                    end_reason=f"{visibility.observatory_name} {end_constraint.value}",
+                ),
+            )
+        )
+
+    return windows, evaluations
+
+
+def coarse_visibility(
+    begin: datetime,
+    end: datetime,
+    ephemeris: Ephemeris,
+    constraints: Sequence[ConstraintABC],
+    coordinate: SkyCoord,
+    coarse_step: int,
+    observatory_id: UUID | None = None,
+) -> EphemerisVisibility:
+    """
+    The visibility on the coarse grid to refine the windows from `begin` to
+    `end` from, a coarse step beyond them on each side.
+    """
+    return compute_ephemeris_visibility(
+        begin=Time(_floor(begin, coarse_step) - timedelta(seconds=coarse_step)),
+        end=Time(_floor(end, coarse_step) + timedelta(seconds=2 * coarse_step)),
+        ephemeris=ephemeris,
+        constraints=constraints,
+        coordinate=coordinate,
+        step_size=coarse_step * u.s,
+        observatory_id=observatory_id,
+        min_vis=-1,
+    )
+
+
+def compute_adaptive_visibility(
+    begin: datetime,
+    end: datetime,
+    ephemeris: Ephemeris,
+    constraints: Sequence[ConstraintABC],
+    coordinate: SkyCoord,
+    coarse_step: int,
+    precision: int,
+    observatory_id: UUID | None = None,
+    min_vis: int = 0,
+) -> EphemerisVisibility:
+    """
+    Compute visibility windows from `begin` to `end` on a coarse grid of
+    `coarse_step` seconds, refined to `precision` seconds around their
+    edges, from an ephemeris of `coarse_step` covering `ephemeris_range`.
+    """
+    visibility = coarse_visibility(
+        begin, end, ephemeris, constraints, coordinate, coarse_step, observatory_id
+    )
+    visibility.visibility_windows, _ = refine_windows(
+        visibility,
+        ephemeris,
+        constraints,
+        coordinate,
+        begin,
+        end,
+        precision,
+        min_vis,
+    )
+
+    return visibility
@@ -1,23 +1,35 @@
-import asyncio
-from typing import Annotated
+from collections.abc import AsyncGenerator, AsyncIterable
+from contextlib import aclosing
+from typing import Annotated, Any
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Query, status
+import structlog
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 
+from .....core import tracing
+from .....core.admission import Admission
+from .....core.schemas.base import BaseSchema
 from ...instrument.schemas import Instrument as InstrumentSchema
 from ...instrument.service import InstrumentService
 from ...telescope.exceptions import TelescopeNotFoundException
 from ...telescope.service import TelescopeService
+from .admission import visibility_admission, visibility_cost
 from .schemas import (
+    BatchVisibilityParams,
     JointVisibilityReadParams,
     JointVisibilityResult,
-    VisibilityReadParams,
     VisibilityResult,
+    VisibilityStreamError,
+    VisibilityWindowsReadParams,
 )
 from .service import (
     VisibilityCalculatorService,
 )
 
+logger: structlog.stdlib.BoundLogger = structlog.get_logger()
+
 router = APIRouter(
     prefix="/visibility-calculator",
     tags=["Tools"],
@@ -25,15 +37,42 @@ router = APIRouter(
         status.HTTP_404_NOT_FOUND: {
             "description": "The visibility calculator does not exist.",
         },
+        status.HTTP_503_SERVICE_UNAVAILABLE: {
+            "description": "Too many calculations in progress, retry after the `Retry-After` seconds.",
+        },
     },
 )
 
 
+async def _released(
+    admission: Admission, chunks: AsyncIterable[str]
+) -> AsyncGenerator[str]:
+    try:
+        async for chunk in chunks:
+            yield chunk
+    finally:
+        admission.release()
+
+
+def _admitted_stream(
+    admission: Admission, chunks: AsyncIterable[str], **kwargs: Any
+) -> StreamingResponse:
+    """
+    A response streaming `chunks`, releasing the admission once done, or once
+    sent should the stream never start
+    """
+    return StreamingResponse(
+        _released(admission, chunks),
+        background=BackgroundTask(admission.release),
+        **kwargs,
+    )
+
+
 @router.get(
     "/windows/{instrument_id}",
     status_code=status.HTTP_200_OK,
     summary="Calculated Visibility Windows",
-    description="Calculate visibility windows of an instrument for a given observation coordinate \n\n Use GET /telescope/ to retrieve a list of telescopes and their associated instruments \n\n WARNING: This is a long running process and is liable to timeout after a strict 60 second execution limit \n\n If you experience issues retrieving results, please scope your date range to be a smaller window or set `hi_res` to `false`",
+    description="Calculate visibility windows of an instrument for a given observation coordinate \n\n Use GET /telescope/ to retrieve a list of telescopes and their associated instruments \n\n WARNING: This is a long running process and is liable to timeout after a strict 60 second execution limit \n\n If you experience issues retrieving results, please scope your date range to be a smaller window, set `hi_res` to `false`, set `adaptive` to `true` to evaluate every few minutes and refine the window edges to a few seconds, or submit a job with POST /tools/visibility-calculator/jobs/windows/{instrument_id}",
     responses={
         status.HTTP_200_OK: {
             "description": "Return visibility window calculation results.",
@@ -42,7 +81,7 @@ router = APIRouter(
 )
 async def calculate_windows(
     instrument_id: UUID,
-    parameters: Annotated[VisibilityReadParams, Query()],
+    parameters: Annotated[VisibilityWindowsReadParams, Query()],
     visibility_calculator: Annotated[
         VisibilityCalculatorService, Depends(VisibilityCalculatorService)
     ],
@@ -59,17 +98,113 @@ async def calculate_windows(
     # Obtain the telescope that hosts this instrument
     telescope = await telescope_service.get(instrument.telescope.id)
 
-    visibility = await visibility_calculator.calculate_windows(
-        ra=parameters.ra,
-        dec=parameters.dec,
-        instrument=instrument,
-        observatory_id=telescope.observatory_id,
-        date_range_begin=parameters.date_range_begin,
-        date_range_end=parameters.date_range_end,
-        hi_res=parameters.hi_res,
-        min_visibility_duration=parameters.min_visibility_duration,
+    cost = visibility_cost(
+        parameters.date_range_begin,
+        parameters.date_range_end,
+        parameters.hi_res,
+        adaptive=parameters.adaptive,
+    )
+    async with visibility_admission.admit(cost):
+        visibility = await visibility_calculator.calculate_windows(
+            ra=parameters.ra,
+            dec=parameters.dec,
+            instrument=instrument,
+            observatory_id=telescope.observatory_id,
+            date_range_begin=parameters.date_range_begin,
+            date_range_end=parameters.date_range_end,
+            hi_res=parameters.hi_res,
+            min_visibility_duration=parameters.min_visibility_duration,
+            adaptive=parameters.adaptive,
+        )
+
+    with tracing.span("visibility.serialize"):
+        return VisibilityResult.model_validate(
+            {
+                "visibility_windows": visibility.model_dump()["visibility_windows"],
+                "instrument_id": instrument_id,
+            }
+        )
+
+
+@router.post(
+    "/windows/{instrument_id}/batch",
+    status_code=status.HTTP_200_OK,
+    summary="Calculated Visibility Windows of Many Targets",
+    description="Calculate visibility windows of an instrument for many observation coordinates over one date range, sharing the ephemeris between them \n\n Results stream back as newline delimited JSON, one `BatchVisibilityResult` per target in the order of the targets, with an `error` instead of windows for a target that could not be calculated \n\n Use GET /telescope/ to retrieve a list of telescopes and their associated instruments",
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_200_OK: {
+            "description": "Stream visibility window calculation results per target.",
+            "content": {"application/x-ndjson": {}},
+        },
+    },
+)
+async def calculate_batch_windows(
+    instrument_id: UUID,
+    parameters: BatchVisibilityParams,
+    visibility_calculator: Annotated[
+        VisibilityCalculatorService, Depends(VisibilityCalculatorService)
+    ],
+    instrument_service: Annotated[InstrumentService, Depends(InstrumentService)],
+    telescope_service: Annotated[TelescopeService, Depends(TelescopeService)],
+) -> StreamingResponse:
+    instrument_model = await instrument_service.get(instrument_id)
+
+    # Convert the instrument model to a schema
+    instrument = InstrumentSchema.from_orm(instrument_model)
+    if instrument.telescope is None:
+        raise TelescopeNotFoundException(instrument_model.telescope_id)
+
+    # Obtain the telescope that hosts this instrument
+    telescope = await telescope_service.get(instrument.telescope.id)
+
+    admission = await visibility_admission.acquire(
+        visibility_cost(
+            parameters.date_range_begin,
+            parameters.date_range_end,
+            parameters.hi_res,
+            count=len(parameters.targets),
+        )
     )
+    try:
+        results = await visibility_calculator.calculate_batch_windows(
+            targets=parameters.targets,
+            instrument=instrument,
+            observatory_id=telescope.observatory_id,
+            date_range_begin=parameters.date_range_begin,
+            date_range_end=parameters.date_range_end,
+            hi_res=parameters.hi_res,
+            min_visibility_duration=parameters.min_visibility_duration,
+        )
+    except BaseException:
+        admission.release()
+        raise
 
+    return _admitted_stream(
+        admission,
+        (result.model_dump_json() + "\n" async for result in results),
+        media_type="application/x-ndjson",
+    )
+
+
+async def _joint_instruments(
+    instrument_ids: list[UUID], instrument_service: InstrumentService
+) -> list[tuple[InstrumentSchema, UUID]]:
+    """The instruments, each with the id of the observatory hosting it"""
+    instruments = []
+    for instrument_model in await instrument_service.get_by_ids(instrument_ids):
+        # Convert the instrument model to a schema
+        instrument = InstrumentSchema.from_orm(instrument_model)
+        if instrument.telescope is None:
+            raise TelescopeNotFoundException(instrument_model.telescope_id)
+
+        # Pair it with the observatory of the telescope that hosts it
+        instruments.append((instrument, instrument_model.telescope.observatory_id))
+
+    return instruments
+
+
+def _visibility_result(visibility: Any, instrument_id: UUID) -> VisibilityResult:
     return VisibilityResult.model_validate(
         {
             "visibility_windows": visibility.model_dump()["visibility_windows"],
@@ -78,11 +213,30 @@ async def calculate_windows(
     )
 
 
+def _joint_visibility_result(
+    instrument_ids: list[UUID],
+    window_results: list[VisibilityResult],
+    joint_visibility: Any,
+) -> JointVisibilityResult:
+    return JointVisibilityResult.model_validate(
+        {
+            "instrument_ids": instrument_ids,
+            "visibility_windows": [
+                window.model_dump() for window in joint_visibility.visibility_windows
+            ],
+            "observatory_visibility_windows": {
+                window.instrument_id: window.visibility_windows
+                for window in window_results
+            },
+        },
+    )
+
+
 @router.get(
     "/windows/",
     status_code=status.HTTP_200_OK,
     summary="Calculated Joint Visibility Windows",
-    description="Calculate joint visibility windows between instruments for a given observation coordinate \n\n Use GET /telescope/ to retrieve a list of telescopes and their associated instruments \n\n WARNING: This is a long running process and is liable to timeout after a strict 60 second execution limit \n\n If you experience issues retrieving results, please scope your date range to be a smaller window or set `hi_res` to `false`",
+    description="Calculate joint visibility windows between instruments for a given observation coordinate \n\n Use GET /telescope/ to retrieve a list of telescopes and their associated instruments \n\n WARNING: This is a long running process and is liable to timeout after a strict 60 second execution limit \n\n If you experience issues retrieving results, please scope your date range to be a smaller window, set `hi_res` to `false`, stream the results with GET /tools/visibility-calculator/windows/stream/, or submit a job with POST /tools/visibility-calculator/jobs/windows/",
     responses={
         status.HTTP_200_OK: {
             "description": "Return joint visibility window calculation results.",
@@ -95,59 +249,150 @@ async def calculate_joint_windows(
         VisibilityCalculatorService, Depends(VisibilityCalculatorService)
     ],
     instrument_service: Annotated[InstrumentService, Depends(InstrumentService)],
-    telescope_service: Annotated[TelescopeService, Depends(TelescopeService)],
 ) -> JointVisibilityResult:
-    visibility_tasks = []
-    window_results = []
-    for instrument_id in parameters.instrument_ids:
-        instrument_model = await instrument_service.get(instrument_id)
+    instruments = await _joint_instruments(
+        parameters.instrument_ids, instrument_service
+    )
 
-        # Convert the instrument model to a schema
-        instrument = InstrumentSchema.from_orm(instrument_model)
-        if instrument.telescope is None:
-            raise TelescopeNotFoundException(instrument_model.telescope_id)
+    cost = visibility_cost(
+        parameters.date_range_begin,
+        parameters.date_range_end,
+        parameters.hi_res,
+        count=len(instruments),
+    )
+    async with visibility_admission.admit(cost):
+        visibilities = await visibility_calculator.calculate_joint_windows(
+            ra=parameters.ra,
+            dec=parameters.dec,
+            instruments=instruments,
+            date_range_begin=parameters.date_range_begin,
+            date_range_end=parameters.date_range_end,
+            hi_res=parameters.hi_res,
+            min_visibility_duration=parameters.min_visibility_duration,
+        )
 
-        # Obtain the telescope that hosts this instrument
-        telescope = await telescope_service.get(instrument.telescope.id)
-
-        visibility_tasks.append(
-            visibility_calculator.calculate_windows(
-                ra=parameters.ra,
-                dec=parameters.dec,
-                instrument=instrument,
-                observatory_id=telescope.observatory_id,
-                date_range_begin=parameters.date_range_begin,
-                date_range_end=parameters.date_range_end,
-                hi_res=parameters.hi_res,
-                min_visibility_duration=parameters.min_visibility_duration,
+        joint_visibility = await visibility_calculator.find_joint_visibility(
+            visibilities=visibilities,
+            instrument_ids=parameters.instrument_ids,
+            min_visibility_duration=parameters.min_visibility_duration,
+        )
+    with tracing.span("visibility.serialize"):
+        window_results = [
+            _visibility_result(visibility, instrument_id)
+            for visibility, instrument_id in zip(
+                visibilities, parameters.instrument_ids
             )
+        ]
+
+        return _joint_visibility_result(
+            parameters.instrument_ids, window_results, joint_visibility
         )
-    visibilities = await asyncio.gather(*visibility_tasks)
 
-    joint_visibility = await visibility_calculator.find_joint_visibility(
-        visibilities=visibilities,
-        instrument_ids=parameters.instrument_ids,
-        min_visibility_duration=parameters.min_visibility_duration,
-    )
-    window_results = [
-        VisibilityResult.model_validate(
-            {
-                "visibility_windows": visibility.model_dump()["visibility_windows"],
-                "instrument_id": instrument_id,
-            }
+
+def _event(event: str, data: BaseSchema) -> str:
+    """A server-sent event"""
+    return f"event: {event}\ndata: {data.model_dump_json()}\n\n"
+
+
+async def _joint_events(
+    parameters: JointVisibilityReadParams,
+    visibility_calculator: VisibilityCalculatorService,
+    visibilities: AsyncGenerator[tuple[int, Any]],
+) -> AsyncGenerator[str]:
+    calculated: dict[int, tuple[Any, VisibilityResult]] = {}
+
+    try:
+        async with aclosing(visibilities):
+            async for index, visibility in visibilities:
+                result = _visibility_result(
+                    visibility, parameters.instrument_ids[index]
+                )
+                calculated[index] = (visibility, result)
+                yield _event("visibility", result)
+
+        ordered = [calculated[index] for index in range(len(calculated))]
+        joint_visibility = await visibility_calculator.find_joint_visibility(
+            visibilities=[visibility for visibility, _ in ordered],
+            instrument_ids=parameters.instrument_ids,
+            min_visibility_duration=parameters.min_visibility_duration,
+        )
+        yield _event(
+            "joint_visibility",
+            _joint_visibility_result(
+                parameters.instrument_ids,
+                [result for _, result in ordered],
+                joint_visibility,
+            ),
+        )
+    except HTTPException as error:
+        # the response already started, the error is its last event
+        yield _event(
+            "error",
+            VisibilityStreamError(
+                status_code=error.status_code, detail=str(error.detail)
+            ),
+        )
+    except Exception:
+        logger.exception("Streamed joint visibility calculation failed")
+        yield _event(
+            "error",
+            VisibilityStreamError(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Internal Server Error",
+            ),
         )
-        for visibility, instrument_id in zip(visibilities, parameters.instrument_ids)
-    ]
-    observatory_visibility_windows = {
-        window.instrument_id: window.visibility_windows for window in window_results
-    }
 
-    return JointVisibilityResult.model_validate(
-        {
-            "instrument_ids": parameters.instrument_ids,
-            "visibility_windows": [
-                window.model_dump() for window in joint_visibility.visibility_windows
-            ],
-            "observatory_visibility_windows": observatory_visibility_windows,
+
+@router.get(
+    "/windows/stream/",
+    status_code=status.HTTP_200_OK,
+    summary="Streamed Joint Visibility Windows",
+    description="Calculate joint visibility windows between instruments for a given observation coordinate, streaming each result as soon as it is calculated \n\n Results stream back as server-sent events: a `visibility` event with the `VisibilityResult` of each instrument as it is calculated, in any order, then a `joint_visibility` event with the `JointVisibilityResult` \n\n A calculation failing once the stream started sends an `error` event with its `status_code` and `detail` instead, ending the stream \n\n Closing the connection stops the calculations not started yet \n\n Use GET /telescope/ to retrieve a list of telescopes and their associated instruments",
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_200_OK: {
+            "description": "Stream visibility window calculation results per instrument, then the joint visibility windows.",
+            "content": {"text/event-stream": {}},
         },
+    },
+)
+async def stream_joint_windows(
+    parameters: Annotated[JointVisibilityReadParams, Query()],
+    visibility_calculator: Annotated[
+        VisibilityCalculatorService, Depends(VisibilityCalculatorService)
+    ],
+    instrument_service: Annotated[InstrumentService, Depends(InstrumentService)],
+) -> StreamingResponse:
+    instruments = await _joint_instruments(
+        parameters.instrument_ids, instrument_service
+    )
+
+    admission = await visibility_admission.acquire(
+        visibility_cost(
+            parameters.date_range_begin,
+            parameters.date_range_end,
+            parameters.hi_res,
+            count=len(instruments),
+        )
+    )
+    try:
+        visibilities = await visibility_calculator.stream_joint_windows(
+            ra=parameters.ra,
+            dec=parameters.dec,
+            instruments=instruments,
+            date_range_begin=parameters.date_range_begin,
+            date_range_end=parameters.date_range_end,
+            hi_res=parameters.hi_res,
+            min_visibility_duration=parameters.min_visibility_duration,
+        )
+    except BaseException:
+        admission.release()
+        raise
+
+    return _admitted_stream(
+        admission,
+        _joint_events(parameters, visibility_calculator, visibilities),
+        media_type="text/event-stream",
+        # sent as they come, not buffered by proxies
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
@@ -3,6 +3,7 @@ from uuid import UUID
 from across.tools.core.enums import ConstraintType
 from pydantic import ConfigDict, Field
 
+from .....core.config import config
 from .....core.date_utils import UTCDatetime
 from .....core.schemas.base import BaseSchema
 
@@ -73,6 +74,22 @@ class VisibilityReadParams(BaseSchema):
     min_visibility_duration: int = 0
 
 
+class VisibilityWindowsReadParams(VisibilityReadParams):
+    """
+    A Pydantic model class representing the query parameters for the
+    Visibility Windows GET method of a single instrument.
+
+    Parameters
+    ----------
+    adaptive: bool
+        Whether to evaluate visibility on a coarse grid, refined around the
+        window edges to `VISIBILITY_ADAPTIVE_PRECISION_SECONDS`, instead of
+        the step of `hi_res` (default is False)
+    """
+
+    adaptive: bool = False
+
+
 class VisibilityResult(BaseSchema):
     """
     A Pydantic model class representing the visibility calculation parameters.
@@ -131,3 +148,91 @@ class JointVisibilityResult(BaseSchema):
     instrument_ids: list[UUID]
     visibility_windows: list[VisibilityWindow]
     observatory_visibility_windows: dict[UUID, list[VisibilityWindow]]
+
+
+class VisibilityTarget(BaseSchema):
+    """
+    A target of a batch visibility calculation.
+
+    Parameters
+    ----------
+    ra: float
+        Right Ascension in degrees
+    dec: float
+        Declination in degrees
+    """
+
+    ra: float = Field(ge=0.0, le=360.0)
+    dec: float = Field(ge=-90.0, le=90.0)
+
+
+class BatchVisibilityParams(BaseSchema):
+    """
+    A Pydantic model class representing the body of the batch Visibility POST
+    method.
+
+    Parameters
+    ----------
+    targets: list[VisibilityTarget]
+        Coordinates to calculate visibility for, at most
+        `VISIBILITY_BATCH_MAX_TARGETS`
+    date_range_begin: datetime
+        Start of the date range for visibility calculation
+    date_range_end: datetime
+        End of the date range for visibility calculation
+    hi_res: bool
+        Whether to use high-resolution visibility calculation (default is True)
+    min_visibility_duration: int
+        Minimum visibility duration in seconds (default is 0)
+    """
+
+    targets: list[VisibilityTarget] = Field(
+        min_length=1, max_length=config.VISIBILITY_BATCH_MAX_TARGETS
+    )
+    date_range_begin: UTCDatetime
+    date_range_end: UTCDatetime
+    hi_res: bool = True
+    min_visibility_duration: int = 0
+
+
+class BatchVisibilityResult(BaseSchema):
+    """
+    The visibility of one target of a batch, streamed as a line of JSON.
+
+    Parameters
+    ----------
+    index: int
+        Position of the target in the request
+    ra: float
+        Right Ascension in degrees
+    dec: float
+        Declination in degrees
+    visibility_windows: list[VisibilityWindow]
+        Visibility windows of the target
+    error: str | None
+        Why the visibility of the target could not be calculated, if it
+        could not
+    """
+
+    index: int
+    ra: float
+    dec: float
+    visibility_windows: list[VisibilityWindow] = []
+    error: str | None = None
+
+
+class VisibilityStreamError(BaseSchema):
+    """
+    Why a streamed joint visibility calculation stopped, sent as its last
+    event.
+
+    Parameters
+    ----------
+    status_code: int
+        HTTP status code the calculation would have failed with
+    detail: str
+        Why the calculation failed
+    """
+
+    status_code: int
+    detail: str
@@ -1,14 +1,13 @@
+import asyncio
+from collections.abc import AsyncGenerator, AsyncIterator, Callable, Hashable
+from contextlib import aclosing
 from datetime import datetime
 from functools import partial
-from typing import Annotated
+from typing import Annotated, Any
 from uuid import UUID
 
-import anyio.to_thread
 import astropy.units as u  # type: ignore[import-untyped]
-import numpy as np
-from across.tools.core.schemas import Coordinate, Polygon
-from across.tools.footprint import Footprint as ToolsFootprint
-from across.tools.footprint.schemas import Pointing
+from across.tools.ephemeris import Ephemeris
 from across.tools.visibility import (
     EphemerisVisibility,
     JointVisibility,
@@ -27,21 +26,152 @@ from sqlalchemy import and_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import aliased
 
+from .....core import processes, tracing, workloads
+from .....core.config import config
 from .....core.constants import EARTH_CIRCUMFERENCE_METERS_PER_DEGREE
 from .....core.enums.observation_strategy import ObservationStrategy
 from .....core.enums.visibility_type import VisibilityType
-from .....core.math_utils import gc_distance
-from .....db import models
+from .....core.single_flight import SingleFlight
+from .....db import database, models
 from .....db.database import get_session
 from ...instrument.schemas import Instrument as InstrumentSchema
+from ...observatory.service import ObservatoryService
+from ...tle.service import TLEService
 from ...tools.ephemeris.service import EphemerisService
+from ...tools.ephemeris.shared import SharedEphemeris
+from . import footprints
+from .cache import range_key, visibility_cache, visibility_key
 from .exceptions import (
     VisibilityConstraintsNotFoundException,
     VisibilityTypeNotImplementedException,
 )
+from .refinement import compute_adaptive_visibility, ephemeris_range
+from .schemas import BatchVisibilityResult, VisibilityTarget
 
 ConstraintsAdaptor = TypeAdapter(list[Constraint])
 
+_visibilities: SingleFlight[Hashable, EphemerisVisibility] = SingleFlight("visibility")
+
+
+def _compute_ephemeris_visibility(
+    shared: SharedEphemeris,
+    compute: Callable[..., EphemerisVisibility] = compute_ephemeris_visibility,
+    **kwargs: Any,
+) -> EphemerisVisibility:
+    """Compute a visibility in a worker process, see `core/processes.py`"""
+    visibility = compute(ephemeris=shared.load(), **kwargs)
+    # the caller holds the ephemeris, don't pickle it back
+    visibility.__dict__["ephemeris"] = None
+    return visibility
+
+
+def _compute_joint_visibility(
+    visibilities: list[EphemerisVisibility], **kwargs: Any
+) -> JointVisibility:
+    """Compute a joint visibility in a worker process, with shared ephemerides"""
+    ephemerides = {}
+    for visibility in visibilities:
+        shared: SharedEphemeris = visibility.ephemeris  # type: ignore[assignment]
+        if shared.name not in ephemerides:
+            ephemerides[shared.name] = shared.load()
+        visibility.__dict__["ephemeris"] = ephemerides[shared.name]
+
+    joint_visibility = compute_joint_visibility(visibilities=visibilities, **kwargs)
+    # the caller holds the visibilities, don't pickle them back
+    joint_visibility.__dict__["visibilities"] = []
+    return joint_visibility
+
+
+def _compute_batch_visibility(
+    ephemeris: Ephemeris | SharedEphemeris,
+    targets: list[tuple[float, float, list[Constraint | PointingConstraint]]],
+    **kwargs: Any,
+) -> list[dict[str, Any]]:
+    """
+    Compute the visibility windows of many targets over one ephemeris, in a
+    worker thread or process. Returns the windows, or the error, per target.
+    """
+    if isinstance(ephemeris, SharedEphemeris):
+        ephemeris = ephemeris.load()
+
+    results: list[dict[str, Any]] = []
+    for ra, dec, constraints in targets:
+        if not constraints:
+            results.append({"error": "The instrument has no constraints"})
+            continue
+
+        try:
+            visibility = compute_ephemeris_visibility(
+                ephemeris=ephemeris,
+                constraints=constraints,
+                coordinate=SkyCoord(ra=ra * u.deg, dec=dec * u.deg),  # type: ignore
+                **kwargs,
+            )
+        except Exception as e:
+            results.append({"error": str(e)})
+            continue
+
+        results.append(
+            {"visibility_windows": visibility.model_dump()["visibility_windows"]}
+        )
+
+    return results
+
+
+async def _ephemeris_visibility_in_process(
+    vis_function: "partial[EphemerisVisibility]",
+) -> EphemerisVisibility:
+    kwargs = dict(vis_function.keywords)
+    ephemeris = kwargs.pop("ephemeris")
+    shared = SharedEphemeris.create(ephemeris)
+
+    try:
+        visibility = await processes.run(
+            "visibility",
+            "compute_ephemeris_visibility",
+            _compute_ephemeris_visibility,
+            shared,
+            compute=vis_function.func,
+            **kwargs,
+        )
+    finally:
+        shared.unlink()
+
+    visibility.__dict__["ephemeris"] = ephemeris
+    return visibility
+
+
+async def _joint_visibility_in_process(
+    joint_vis_function: "partial[JointVisibility]",
+) -> JointVisibility:
+    kwargs = dict(joint_vis_function.keywords)
+    visibilities: list[EphemerisVisibility] = kwargs.pop("visibilities")
+    # instruments of one observatory share its ephemeris, send it once
+    shared = {
+        id(visibility.ephemeris): SharedEphemeris.create(visibility.ephemeris)
+        for visibility in {id(v.ephemeris): v for v in visibilities}.values()
+    }
+
+    try:
+        joint_visibility = await processes.run(
+            "visibility",
+            "compute_joint_visibility",
+            _compute_joint_visibility,
+            [
+                visibility.model_copy(
+                    update={"ephemeris": shared[id(visibility.ephemeris)]}
+                )
+                for visibility in visibilities
+            ],
+            **kwargs,
+        )
+    finally:
+        for ephemeris in shared.values():
+            ephemeris.unlink()
+
+    joint_visibility.__dict__["visibilities"] = visibilities
+    return joint_visibility
+
 
 class VisibilityCalculatorService:
     def __init__(
@@ -62,9 +192,16 @@ class VisibilityCalculatorService:
         date_range_end: datetime,
         hi_res: bool,
         min_visibility_duration: int = 0,
+        ephemeris: Ephemeris | None = None,
+        use_cache: bool = False,
+        adaptive: bool = False,
     ) -> EphemerisVisibility:
+        # If adaptive, then calculate on a coarse grid refined around the
+        # window edges, see `refinement.py`
+        if adaptive:
+            step_size = config.VISIBILITY_ADAPTIVE_COARSE_STEP_SECONDS
         # If we're hi-res, then calculate with minute resolution
-        if hi_res:
+        elif hi_res:
             step_size = 60
         # If we're not hi-res, then calculate with hour resolution
         else:
@@ -75,13 +212,19 @@ class VisibilityCalculatorService:
             ConstraintsAdaptor.validate_python(instrument.constraints or [])
         )
 
-        # Compute Ephemeris
-        ephemeris = await self.ephem_service.get(
-            observatory_id=observatory_id,
-            date_range_begin=date_range_begin,
-            date_range_end=date_range_end,
-            step_size=step_size,
-        )
+        # Compute Ephemeris, unless shared with other instruments of the observatory
+        if ephemeris is None:
+            ephemeris_begin, ephemeris_end = date_range_begin, date_range_end
+            if adaptive:
+                ephemeris_begin, ephemeris_end = ephemeris_range(
+                    date_range_begin, date_range_end, step_size
+                )
+            ephemeris = await self.ephem_service.get(
+                observatory_id=observatory_id,
+                date_range_begin=ephemeris_begin,
+                date_range_end=ephemeris_end,
+                step_size=step_size,
+            )
 
         # Check if instrument observation strategy is survey, and if so
         # pull footprint, observations, and transform to pointing constraints
@@ -99,22 +242,81 @@ class VisibilityCalculatorService:
         if not len(constraints):
             raise VisibilityConstraintsNotFoundException(instrument_id=instrument.id)
 
+        # Reuse the windows of the same request, see `cache.py`, but not of
+        # survey instruments, whose pointings change as schedules are ingested,
+        # nor adaptive windows, whose edges are not on the grid of the step
+        key = None
+        if (
+            use_cache
+            and not adaptive
+            and instrument.observation_strategy != ObservationStrategy.SURVEY
+        ):
+            key = visibility_key(
+                ConstraintsAdaptor.dump_python(constraints, mode="json"),
+                observatory_id,
+                ephemeris,
+                ra,
+                dec,
+                step_size,
+                min_visibility_duration,
+            )
+        if key is not None:
+            cached = visibility_cache.get(key, date_range_begin, date_range_end)
+            if cached is not None:
+                return cached
+
         # Compute visibility
-        vis_function = partial(
-            compute_ephemeris_visibility,
-            begin=Time(date_range_begin),
-            end=Time(date_range_end),
-            ephemeris=ephemeris,
-            constraints=constraints,
-            coordinate=SkyCoord(ra=ra * u.deg, dec=dec * u.deg),  # type: ignore
-            step_size=step_size * u.s,  # type: ignore
-            observatory_id=observatory_id,
-            min_vis=min_visibility_duration,
-        )
-        visibility = await anyio.to_thread.run_sync(vis_function)
+        coordinate = SkyCoord(ra=ra * u.deg, dec=dec * u.deg)  # type: ignore
+        vis_function: partial[EphemerisVisibility]
+        if adaptive:
+            vis_function = partial(
+                compute_adaptive_visibility,
+                begin=date_range_begin,
+                end=date_range_end,
+                ephemeris=ephemeris,
+                constraints=constraints,
+                coordinate=coordinate,
+                coarse_step=step_size,
+                precision=config.VISIBILITY_ADAPTIVE_PRECISION_SECONDS,
+                observatory_id=observatory_id,
+                min_vis=min_visibility_duration,
+            )
+        else:
+            vis_function = partial(
+                compute_ephemeris_visibility,
+                begin=Time(date_range_begin),
+                end=Time(date_range_end),
+                ephemeris=ephemeris,
+                constraints=constraints,
+                coordinate=coordinate,
+                step_size=step_size * u.s,  # type: ignore
+                observatory_id=observatory_id,
+                min_vis=min_visibility_duration,
+            )
+
+        async def compute() -> EphemerisVisibility:
+            if processes.enabled():
+                visibility = await _ephemeris_visibility_in_process(vis_function)
+            else:
+                visibility = await workloads.run_sync(
+                    "visibility",
+                    tracing.in_thread("compute_ephemeris_visibility", vis_function),
+                )
+
+            if key is not None:
+                visibility_cache.set(key, visibility)
 
-        return visibility
+            return visibility
 
+        if key is None:
+            return await compute()
+
+        # identical requests in flight at once share one computation
+        return await _visibilities.do(
+            range_key(key, date_range_begin, date_range_end, step_size), compute
+        )
+
+    @tracing.traced("visibility.pointing_constraint")
     async def _get_pointing_constraint(
         self,
         instrument: InstrumentSchema,
@@ -128,6 +330,9 @@ class VisibilityCalculatorService:
         convert them to ACROSS-tools Pointings, and build the
         corresponding PointingConstraint.
 
+        Pointings use the footprints stored with their observations, or the
+        instrument footprint projected to them, see `footprints.py`.
+
         Parameters
         ----------
         instrument: schemas.Instrument
@@ -147,33 +352,20 @@ class VisibilityCalculatorService:
             A constraint built from the instrument pointings
         """
         # Get instrument footprints
-        instrument_footprints = instrument.footprints
-        if not instrument_footprints:
+        if not instrument.footprints:
             return None
+        instrument_footprint = footprints.instrument_footprint(
+            instrument.id, instrument.footprints
+        )
 
         # Filter obs with a cone search using the max radial extent of the footprint
-        # Since instrument footprints are centered on (0, 0), the max radial extent
-        # is the max great circle distance of any vertex from the origin
-        footprint_extent: float = max(
-            [
-                max(
-                    gc_distance(
-                        np.asarray([coord.x for coord in footprint]),
-                        np.asarray([coord.y for coord in footprint]),
-                        0.0,
-                        0.0,
-                    )
-                )
-                for footprint in instrument_footprints
-            ]
-        )
         cone_search_point = from_shape(
             Point(ra, dec),  # type: ignore
             srid=4326,
         )
         # Convert degrees to meters
         cone_search_radius = (
-            footprint_extent * EARTH_CIRCUMFERENCE_METERS_PER_DEGREE  # type: ignore
+            instrument_footprint.extent * EARTH_CIRCUMFERENCE_METERS_PER_DEGREE
         )
 
         # Build a subquery to retrieve latest matching schedule ID
@@ -193,14 +385,27 @@ class VisibilityCalculatorService:
             .scalar_subquery()
         )
 
-        # Query observations from most recent schedule that match inputs
+        # Query observations from most recent schedule that match inputs, only
+        # the columns of their pointings, along with their stored footprints
         query = (
-            select(models.Observation)
+            select(
+                models.Observation.id,
+                models.Observation.pointing_ra,
+                models.Observation.pointing_dec,
+                models.Observation.pointing_angle,
+                models.Observation.date_range_begin,
+                models.Observation.date_range_end,
+                models.ObservationFootprint.polygon,
+            )
             .join(
                 models.Instrument,
                 models.Instrument.id == models.Observation.instrument_id,
             )
             .join(models.Schedule, models.Schedule.id == schedule_subquery)
+            .outerjoin(
+                models.ObservationFootprint,
+                models.ObservationFootprint.observation_id == models.Observation.id,
+            )
             .where(
                 and_(
                     models.Observation.instrument_id == instrument.id,
@@ -215,39 +420,29 @@ class VisibilityCalculatorService:
             )
         )
 
-        result = await self.db.execute(query)
-        observations = result.scalars().all()
-
-        # Transform to tools Footprint
-        detectors = []
-        for footprint in instrument_footprints:
-            coordinates = [Coordinate(ra=coord.x, dec=coord.y) for coord in footprint]
-            detectors.append(Polygon(coordinates=coordinates))
+        with tracing.span("visibility.pointing_constraint.query"):
+            result = await self.db.execute(query)
+            observations = result.tuples().all()
 
-        tools_footprint = ToolsFootprint(detectors=detectors)
-
-        # Project and rotate footprints
-        pointings: list[Pointing] = []
-        for obs in observations:
-            if obs.pointing_ra is not None and obs.pointing_dec is not None:
-                projected_footprint = tools_footprint.project(
-                    Coordinate(ra=obs.pointing_ra, dec=obs.pointing_dec),
-                    roll_angle=obs.pointing_angle or 0.0,
-                )
-
-                # Transform to pointing object
-                pointings.append(
-                    Pointing(
-                        footprint=projected_footprint,
-                        start_time=obs.date_range_begin,
-                        end_time=obs.date_range_end,
-                    )
-                )
+        # Stored footprints, or the instrument footprint projected to each pointing
+        with tracing.span(
+            "visibility.pointing_constraint.project", observations=len(observations)
+        ):
+            pointings = await workloads.run_sync(
+                "visibility",
+                tracing.in_thread(
+                    "build_pointings",
+                    partial(
+                        footprints.build_pointings, instrument_footprint, observations
+                    ),
+                ),
+            )
 
         pointing_constraint = PointingConstraint(pointings=pointings)
 
         return pointing_constraint
 
+    @tracing.traced("visibility.calculate_windows")
     async def calculate_windows(
         self,
         ra: float,
@@ -258,6 +453,7 @@ class VisibilityCalculatorService:
         date_range_end: datetime,
         hi_res: bool,
         min_visibility_duration: int = 0,
+        adaptive: bool = False,
     ) -> EphemerisVisibility:
         if instrument.visibility_type == VisibilityType.EPHEMERIS:
             # Calculate visibility using the instrument schema
@@ -270,12 +466,309 @@ class VisibilityCalculatorService:
                 date_range_end=date_range_end,
                 hi_res=hi_res,
                 min_visibility_duration=min_visibility_duration,
+                use_cache=True,
+                adaptive=adaptive,
             )
         else:
             raise VisibilityTypeNotImplementedException(
                 f"Visibility type {instrument.visibility_type} is not implemented. Please select an instrument with visibility type {VisibilityType.EPHEMERIS}"
             )
 
+    @classmethod
+    def for_session(cls, session: AsyncSession) -> "VisibilityCalculatorService":
+        """
+        The service on a session of its own, outside of a request or for a
+        branch running alongside others
+        """
+        return cls(
+            session,
+            EphemerisService(session, TLEService(session), ObservatoryService(session)),
+        )
+
+    @tracing.traced("visibility.calculate_joint_windows")
+    async def calculate_joint_windows(
+        self,
+        ra: float,
+        dec: float,
+        instruments: list[tuple[InstrumentSchema, UUID]],
+        date_range_begin: datetime,
+        date_range_end: datetime,
+        hi_res: bool,
+        min_visibility_duration: int = 0,
+    ) -> list[EphemerisVisibility]:
+        """
+        Calculate the visibility windows of many instruments for one target,
+        to find their joint visibility, see `stream_joint_windows`.
+
+        Parameters
+        ----------
+        instruments: list[tuple[schemas.Instrument, UUID]]
+            The instruments, each with the id of the observatory hosting it
+
+        Returns
+        -------
+        list[EphemerisVisibility]
+            The visibility of each instrument, in the order of the instruments.
+        """
+        visibilities: dict[int, EphemerisVisibility] = {}
+        async with aclosing(
+            await self.stream_joint_windows(
+                ra=ra,
+                dec=dec,
+                instruments=instruments,
+                date_range_begin=date_range_begin,
+                date_range_end=date_range_end,
+                hi_res=hi_res,
+                min_visibility_duration=min_visibility_duration,
+            )
+        ) as results:
+            async for index, visibility in results:
+                visibilities[index] = visibility
+
+        return [visibilities[index] for index in range(len(instruments))]
+
+    async def stream_joint_windows(
+        self,
+        ra: float,
+        dec: float,
+        instruments: list[tuple[InstrumentSchema, UUID]],
+        date_range_begin: datetime,
+        date_range_end: datetime,
+        hi_res: bool,
+        min_visibility_duration: int = 0,
+    ) -> AsyncGenerator[tuple[int, EphemerisVisibility]]:
+        """
+        Calculate the visibility windows of many instruments for one target,
+        each returned as soon as it is calculated.
+
+        Errors about the instruments raise here. The ephemeris of each
+        distinct observatory is then computed once, shared by the instruments
+        it hosts, whose visibilities are computed as soon as it is. The
+        ephemerides and visibilities are computed concurrently, at most
+        `VISIBILITY_JOINT_CONCURRENCY` at a time, each on its own database
+        session since a session can't be used by concurrent tasks.
+
+        Closing the returned generator early, e.g. once the client of a
+        streaming response disconnected, cancels the computations not
+        started yet.
+
+        Parameters
+        ----------
+        instruments: list[tuple[schemas.Instrument, UUID]]
+            The instruments, each with the id of the observatory hosting it
+
+        Returns
+        -------
+        AsyncGenerator[tuple[int, EphemerisVisibility]]
+            The position of each instrument in `instruments` along with its
+            visibility, in the order they are calculated.
+        """
+        for instrument, _ in instruments:
+            if instrument.visibility_type != VisibilityType.EPHEMERIS:
+                raise VisibilityTypeNotImplementedException(
+                    f"Visibility type {instrument.visibility_type} is not implemented. Please select an instrument with visibility type {VisibilityType.EPHEMERIS}"
+                )
+
+        return self._joint_visibilities(
+            ra,
+            dec,
+            instruments,
+            date_range_begin,
+            date_range_end,
+            hi_res,
+            min_visibility_duration,
+        )
+
+    async def _joint_visibilities(
+        self,
+        ra: float,
+        dec: float,
+        instruments: list[tuple[InstrumentSchema, UUID]],
+        date_range_begin: datetime,
+        date_range_end: datetime,
+        hi_res: bool,
+        min_visibility_duration: int,
+    ) -> AsyncGenerator[tuple[int, EphemerisVisibility]]:
+        step_size = 60 if hi_res else 3600
+        branches = asyncio.Semaphore(config.VISIBILITY_JOINT_CONCURRENCY)
+
+        async def get_ephemeris(observatory_id: UUID) -> Ephemeris:
+            async with branches, database.async_session() as session:
+                return await self.for_session(session).ephem_service.get(
+                    observatory_id=observatory_id,
+                    date_range_begin=date_range_begin,
+                    date_range_end=date_range_end,
+                    step_size=step_size,
+                )
+
+        async def calculate(
+            index: int, instrument: InstrumentSchema, observatory_id: UUID
+        ) -> tuple[int, EphemerisVisibility]:
+            # waited for outside of the branches, taken by its computation
+            ephemeris = await ephemerides[observatory_id]
+            async with branches, database.async_session() as session:
+                return index, await self.for_session(
+                    session
+                )._calc_ephemeris_visibility(
+                    ra=ra,
+                    dec=dec,
+                    instrument=instrument,
+                    observatory_id=observatory_id,
+                    date_range_begin=date_range_begin,
+                    date_range_end=date_range_end,
+                    hi_res=hi_res,
+                    min_visibility_duration=min_visibility_duration,
+                    ephemeris=ephemeris,
+                )
+
+        ephemerides: dict[UUID, asyncio.Task[Ephemeris]] = {}
+        for _, observatory_id in instruments:
+            if observatory_id not in ephemerides:
+                ephemerides[observatory_id] = asyncio.create_task(
+                    get_ephemeris(observatory_id)
+                )
+        calculations = [
+            asyncio.create_task(calculate(index, instrument, observatory_id))
+            for index, (instrument, observatory_id) in enumerate(instruments)
+        ]
+
+        try:
+            for calculation in asyncio.as_completed(calculations):
+                yield await calculation
+        finally:
+            # on an error or once closed early, computations already offloaded
+            # to a thread run to completion, the others don't start
+            tasks = [*ephemerides.values(), *calculations]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    @tracing.traced("visibility.calculate_batch_windows")
+    async def calculate_batch_windows(
+        self,
+        targets: list[VisibilityTarget],
+        instrument: InstrumentSchema,
+        observatory_id: UUID,
+        date_range_begin: datetime,
+        date_range_end: datetime,
+        hi_res: bool,
+        min_visibility_duration: int = 0,
+    ) -> AsyncIterator[BatchVisibilityResult]:
+        """
+        Calculate the visibility windows of many targets for one instrument,
+        obtaining the ephemeris and constraints once for all of them.
+
+        Errors about the instrument or its ephemeris raise here. The targets
+        are then computed in chunks of `VISIBILITY_BATCH_CHUNK_SIZE` as the
+        returned iterator is consumed, one offloaded call per chunk, and a
+        target that fails gets its error in its result.
+
+        Returns
+        -------
+        AsyncIterator[BatchVisibilityResult]
+            The result of each target, in the order of the targets.
+        """
+        if instrument.visibility_type != VisibilityType.EPHEMERIS:
+            raise VisibilityTypeNotImplementedException(
+                f"Visibility type {instrument.visibility_type} is not implemented. Please select an instrument with visibility type {VisibilityType.EPHEMERIS}"
+            )
+
+        step_size = 60 if hi_res else 3600
+        constraints: list[Constraint | PointingConstraint] = (
+            ConstraintsAdaptor.validate_python(instrument.constraints or [])
+        )
+        if (
+            not constraints
+            and instrument.observation_strategy != ObservationStrategy.SURVEY
+        ):
+            raise VisibilityConstraintsNotFoundException(instrument_id=instrument.id)
+
+        ephemeris = await self.ephem_service.get(
+            observatory_id=observatory_id,
+            date_range_begin=date_range_begin,
+            date_range_end=date_range_end,
+            step_size=step_size,
+        )
+
+        return self._batch_results(
+            targets,
+            instrument,
+            ephemeris,
+            constraints,
+            date_range_begin,
+            date_range_end,
+            begin=Time(date_range_begin),
+            end=Time(date_range_end),
+            step_size=step_size * u.s,  # type: ignore
+            observatory_id=observatory_id,
+            min_vis=min_visibility_duration,
+        )
+
+    async def _batch_results(
+        self,
+        targets: list[VisibilityTarget],
+        instrument: InstrumentSchema,
+        ephemeris: Ephemeris,
+        constraints: list[Constraint | PointingConstraint],
+        date_range_begin: datetime,
+        date_range_end: datetime,
+        **kwargs: Any,
+    ) -> AsyncGenerator[BatchVisibilityResult]:
+        # sent to the worker processes once for the whole batch
+        shared = SharedEphemeris.create(ephemeris) if processes.enabled() else None
+
+        try:
+            for start in range(0, len(targets), config.VISIBILITY_BATCH_CHUNK_SIZE):
+                chunk = targets[start : start + config.VISIBILITY_BATCH_CHUNK_SIZE]
+                chunk_targets = []
+
+                for target in chunk:
+                    target_constraints = list(constraints)
+                    if instrument.observation_strategy == ObservationStrategy.SURVEY:
+                        pointing_constraint = await self._get_pointing_constraint(
+                            instrument,
+                            date_range_begin,
+                            date_range_end,
+                            target.ra,
+                            target.dec,
+                        )
+                        if pointing_constraint is not None:
+                            target_constraints.append(pointing_constraint)
+                    chunk_targets.append((target.ra, target.dec, target_constraints))
+
+                if shared is None:
+                    results = await workloads.run_sync(
+                        "visibility",
+                        tracing.in_thread(
+                            "compute_batch_visibility",
+                            partial(
+                                _compute_batch_visibility,
+                                ephemeris,
+                                chunk_targets,
+                                **kwargs,
+                            ),
+                        ),
+                    )
+                else:
+                    results = await processes.run(
+                        "visibility",
+                        "compute_batch_visibility",
+                        _compute_batch_visibility,
+                        shared,
+                        chunk_targets,
+                        **kwargs,
+                    )
+
+                for index, (target, result) in enumerate(
+                    zip(chunk, results), start=start
+                ):
+                    yield BatchVisibilityResult.model_validate(
+                        {"index": index, "ra": target.ra, "dec": target.dec, **result}
+                    )
+        finally:
+            if shared is not None:
+                shared.unlink()
+
     async def find_joint_visibility(
         self,
         visibilities: list[EphemerisVisibility],
@@ -289,5 +782,11 @@ class VisibilityCalculatorService:
             instrument_ids=instrument_ids,
             min_vis=min_visibility_duration,
         )
-        joint_visibility = await anyio.to_thread.run_sync(joint_vis_function)
+        if processes.enabled():
+            return await _joint_visibility_in_process(joint_vis_function)
+
+        joint_visibility = await workloads.run_sync(
+            "visibility",
+            tracing.in_thread("compute_joint_visibility", joint_vis_function),
+        )
         return joint_visibility
@@ -7,6 +7,8 @@ from pydantic import EmailStr
 from sqlalchemy import false, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ....auth import versions
+from ....auth.cache import auth_user_cache
 from ....db import models
 from ....db.database import get_session
 from . import schemas
@@ -107,7 +109,9 @@ class UserService:
 
         user.modified_by_id = modified_by.id
 
+        await versions.bump(self.db, user.id)
         await self.db.commit()
+        auth_user_cache.invalidate(user.id)
         await self.db.refresh(user)
 
         return user
@@ -117,6 +121,15 @@ class UserService:
 
         user.is_deleted = True
         user.modified_by_id = user.id
+
+        # service accounts are rejected once their owner is deleted
+        principal_ids = [
+            user.id,
+            *(service_account.id for service_account in user.service_accounts),
+        ]
+
+        await versions.bump(self.db, *principal_ids)
         await self.db.commit()
+        auth_user_cache.invalidate(*principal_ids)
 
         return user
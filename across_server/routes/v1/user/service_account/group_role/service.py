@@ -4,6 +4,8 @@ from typing import Annotated
 from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ......auth import versions
+from ......auth.cache import auth_user_cache
 from ......core.exceptions import NotFoundException
 from ......db import models
 from ......db.database import get_session
@@ -28,7 +30,9 @@ class ServiceAccountGroupRoleService:
             raise NotFoundException("group role in user group roles", group_role.id)
 
         service_account.group_roles.append(group_role)
+        await versions.bump(self.db, service_account.id)
         await self.db.commit()
+        auth_user_cache.invalidate(service_account.id)
         await self.db.refresh(service_account)
 
         return service_account
@@ -42,7 +46,9 @@ class ServiceAccountGroupRoleService:
             return service_account
 
         service_account.group_roles.remove(group_role)
+        await versions.bump(self.db, service_account.id)
         await self.db.commit()
+        auth_user_cache.invalidate(service_account.id)
         await self.db.refresh(service_account)
 
         return service_account
@@ -0,0 +1,32 @@
+"""add permission_version table
+
+Revision ID: 3f6b2d9c1a7e
+Revises: dd08ad0df8af
+Create Date: 2026-10-19 09:30:12.417305
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3f6b2d9c1a7e"
+down_revision: Union[str, None] = "dd08ad0df8af"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "permission_version",
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        schema="across",
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("permission_version", schema="across")
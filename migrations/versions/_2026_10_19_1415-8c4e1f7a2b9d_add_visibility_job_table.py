@@ -0,0 +1,117 @@
+"""add visibility_job table
+
+Revision ID: 8c4e1f7a2b9d
+Revises: 3f6b2d9c1a7e
+Create Date: 2026-10-19 14:15:41.208937
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8c4e1f7a2b9d"
+down_revision: Union[str, None] = "3f6b2d9c1a7e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "visibility_job",
+        sa.Column("kind", sa.String(length=50), nullable=False),
+        sa.Column("parameters", sa.JSON(), nullable=False),
+        sa.Column("fingerprint", sa.String(length=64), nullable=False),
+        sa.Column("status", sa.String(length=50), nullable=False),
+        sa.Column("progress", sa.Float(), nullable=False),
+        sa.Column("checkpoint", sa.JSON(), nullable=False),
+        sa.Column("result", sa.JSON(), nullable=True),
+        sa.Column("error", sa.String(length=1024), nullable=True),
+        sa.Column("heartbeat_on", sa.DateTime(), nullable=True),
+        sa.Column("completed_on", sa.DateTime(), nullable=True),
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("created_by_id", sa.UUID(), nullable=True),
+        sa.Column("created_on", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        schema="across",
+    )
+    op.create_index(
+        op.f("ix_across_visibility_job_fingerprint"),
+        "visibility_job",
+        ["fingerprint"],
+        unique=False,
+        schema="across",
+    )
+    op.create_index(
+        op.f("ix_across_visibility_job_status"),
+        "visibility_job",
+        ["status"],
+        unique=False,
+        schema="across",
+    )
+    op.create_index(
+        op.f("ix_across_visibility_job_completed_on"),
+        "visibility_job",
+        ["completed_on"],
+        unique=False,
+        schema="across",
+    )
+    op.create_index(
+        op.f("ix_across_visibility_job_created_by_id"),
+        "visibility_job",
+        ["created_by_id"],
+        unique=False,
+        schema="across",
+    )
+    op.create_index(
+        op.f("ix_across_visibility_job_created_on"),
+        "visibility_job",
+        ["created_on"],
+        unique=False,
+        schema="across",
+    )
+    op.create_index(
+        "ix_visibility_job_pending_fingerprint",
+        "visibility_job",
+        ["fingerprint"],
+        unique=True,
+        schema="across",
+        postgresql_where=sa.text("status IN ('queued', 'running')"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_visibility_job_pending_fingerprint",
+        table_name="visibility_job",
+        schema="across",
+        postgresql_where=sa.text("status IN ('queued', 'running')"),
+    )
+    op.drop_index(
+        op.f("ix_across_visibility_job_created_on"),
+        table_name="visibility_job",
+        schema="across",
+    )
+    op.drop_index(
+        op.f("ix_across_visibility_job_created_by_id"),
+        table_name="visibility_job",
+        schema="across",
+    )
+    op.drop_index(
+        op.f("ix_across_visibility_job_completed_on"),
+        table_name="visibility_job",
+        schema="across",
+    )
+    op.drop_index(
+        op.f("ix_across_visibility_job_status"),
+        table_name="visibility_job",
+        schema="across",
+    )
+    op.drop_index(
+        op.f("ix_across_visibility_job_fingerprint"),
+        table_name="visibility_job",
+        schema="across",
+    )
+    op.drop_table("visibility_job", schema="across")
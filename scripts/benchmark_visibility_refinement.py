@@ -0,0 +1,207 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from uuid import UUID
+
+import astropy.units as u  # type: ignore[import-untyped]
+import numpy as np
+import structlog
+from across.tools.visibility import EphemerisVisibility, compute_ephemeris_visibility
+from astropy.coordinates import SkyCoord  # type: ignore[import-untyped]
+from astropy.time import Time  # type: ignore[import-untyped]
+
+from across_server.core.config import config
+from across_server.db import database
+from across_server.routes.v1.instrument.schemas import Instrument as InstrumentSchema
+from across_server.routes.v1.instrument.service import InstrumentService
+from across_server.routes.v1.observatory.service import ObservatoryService
+from across_server.routes.v1.telescope.service import TelescopeService
+from across_server.routes.v1.tle.service import TLEService
+from across_server.routes.v1.tools.ephemeris.service import EphemerisService
+from across_server.routes.v1.tools.visibility_calculator.refinement import (
+    coarse_visibility,
+    ephemeris_range,
+    refine_windows,
+)
+from across_server.routes.v1.tools.visibility_calculator.service import (
+    ConstraintsAdaptor,
+)
+
+logger: structlog.stdlib.BoundLogger = structlog.get_logger()
+
+FIXED_STEP_SIZES = [3600, 60]
+
+
+def _edges(visibility: EphemerisVisibility) -> tuple[np.ndarray, np.ndarray]:
+    begins = [window.window.begin.datetime for window in visibility.visibility_windows]
+    ends = [window.window.end.datetime for window in visibility.visibility_windows]
+    return (
+        Time(begins).unix if begins else np.array([]),
+        Time(ends).unix if ends else np.array([]),
+    )
+
+
+def _edge_errors(
+    visibility: EphemerisVisibility, reference: EphemerisVisibility
+) -> np.ndarray:
+    """The distance of each reference window edge to the nearest edge alike"""
+    errors = []
+    for edges, expected in zip(_edges(visibility), _edges(reference)):
+        if not len(expected):
+            continue
+        if not len(edges):
+            return np.array([np.inf])
+        errors.append(np.abs(expected[:, None] - edges[None, :]).min(axis=1))
+
+    return np.concatenate(errors) if errors else np.array([0.0])
+
+
+async def benchmark_visibility_refinement(
+    instrument_id: UUID, ra: float, dec: float, begin: datetime, days: int
+) -> None:
+    """
+    Compare the visibility windows of an instrument over `days` days at each
+    fixed step, and adaptive, against windows at every adaptive precision
+    step: the times the constraints are evaluated at, the time to compute
+    the ephemeris and the visibility, and how far the window edges are.
+    """
+    database.init()
+
+    end = begin + timedelta(days=days)
+    coarse_step = config.VISIBILITY_ADAPTIVE_COARSE_STEP_SECONDS
+    precision = config.VISIBILITY_ADAPTIVE_PRECISION_SECONDS
+    coordinate = SkyCoord(ra=ra * u.deg, dec=dec * u.deg)
+
+    async with database.async_session() as session:
+        instrument = InstrumentSchema.from_orm(
+            await InstrumentService(session).get(instrument_id)
+        )
+        if instrument.telescope is None:
+            raise ValueError(f"Instrument {instrument_id} has no telescope")
+        telescope = await TelescopeService(session).get(instrument.telescope.id)
+        ephemeris_service = EphemerisService(
+            session, TLEService(session), ObservatoryService(session)
+        )
+
+        constraints = ConstraintsAdaptor.validate_python(instrument.constraints or [])
+        if not constraints:
+            raise ValueError(f"Instrument {instrument_id} has no constraints")
+
+        async def fixed(step_size: int) -> tuple[EphemerisVisibility, dict]:
+            start_time = time.perf_counter()
+            ephemeris = await ephemeris_service.get(
+                observatory_id=telescope.observatory_id,
+                date_range_begin=begin,
+                date_range_end=end,
+                step_size=step_size,
+            )
+            ephemeris_seconds = time.perf_counter() - start_time
+
+            start_time = time.perf_counter()
+            visibility = compute_ephemeris_visibility(
+                begin=Time(begin),
+                end=Time(end),
+                ephemeris=ephemeris,
+                constraints=constraints,
+                coordinate=coordinate,
+                step_size=step_size * u.s,
+                observatory_id=telescope.observatory_id,
+            )
+            return visibility, {
+                "evaluations": len(visibility.inconstraint),
+                "ephemeris_seconds": ephemeris_seconds,
+                "visibility_seconds": time.perf_counter() - start_time,
+            }
+
+        async def adaptive() -> tuple[EphemerisVisibility, dict]:
+            ephemeris_begin, ephemeris_end = ephemeris_range(begin, end, coarse_step)
+            start_time = time.perf_counter()
+            ephemeris = await ephemeris_service.get(
+                observatory_id=telescope.observatory_id,
+                date_range_begin=ephemeris_begin,
+                date_range_end=ephemeris_end,
+                step_size=coarse_step,
+            )
+            ephemeris_seconds = time.perf_counter() - start_time
+
+            start_time = time.perf_counter()
+            visibility = coarse_visibility(
+                begin,
+                end,
+                ephemeris,
+                constraints,
+                coordinate,
+                coarse_step,
+                telescope.observatory_id,
+            )
+            visibility.visibility_windows, refinements = refine_windows(
+                visibility,
+                ephemeris,
+                constraints,
+                coordinate,
+                begin,
+                end,
+                precision,
+                0,
+            )
+            return visibility, {
+                "evaluations": len(visibility.inconstraint) + refinements,
+                "ephemeris_seconds": ephemeris_seconds,
+                "visibility_seconds": time.perf_counter() - start_time,
+            }
+
+        reference, reference_stats = await fixed(precision)
+        logger.info(
+            f"Reference at {precision} s",
+            windows=len(reference.visibility_windows),
+            **reference_stats,
+        )
+
+        modes: dict[str, Callable[[], Awaitable[tuple[EphemerisVisibility, dict]]]] = {
+            f"{step_size} s": partial(fixed, step_size)
+            for step_size in FIXED_STEP_SIZES
+        }
+        modes[f"adaptive {coarse_step} s to {precision} s"] = adaptive
+        for name, run in modes.items():
+            visibility, stats = await run()
+            errors = _edge_errors(visibility, reference)
+            logger.info(
+                name,
+                windows=len(visibility.visibility_windows),
+                max_edge_error_seconds=float(errors.max()),
+                mean_edge_error_seconds=float(errors.mean()),
+                **stats,
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark adaptive visibility windows against fixed steps"
+    )
+    parser.add_argument("instrument_id", type=UUID)
+    parser.add_argument("--ra", type=float, required=True)
+    parser.add_argument("--dec", type=float, required=True)
+    parser.add_argument(
+        "--begin",
+        type=datetime.fromisoformat,
+        default=datetime.now(timezone.utc).replace(
+            hour=0, minute=0, second=0, microsecond=0, tzinfo=None
+        ),
+        help="start of the date range, as naive UTC ISO 8601 (default is today)",
+    )
+    parser.add_argument("--days", type=int, default=30)
+    args = parser.parse_args()
+
+    asyncio.run(
+        benchmark_visibility_refinement(
+            args.instrument_id, args.ra, args.dec, args.begin, args.days
+        )
+    )
@@ -0,0 +1,85 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+import structlog
+
+from across_server.core.config import config
+from across_server.core.enums.ephemeris_type import EphemerisType
+from across_server.db import database
+from across_server.routes.v1.observatory import schemas as observatory_schemas
+from across_server.routes.v1.observatory.service import ObservatoryService
+from across_server.routes.v1.tle.service import TLEService
+from across_server.routes.v1.tools.ephemeris.service import EphemerisService
+from across_server.routes.v1.tools.ephemeris.store import ephemeris_store
+
+logger: structlog.stdlib.BoundLogger = structlog.get_logger()
+
+
+async def precompute_ephemeris() -> None:
+    """
+    Store the JPL and SPICE ephemerides of operational observatories from
+    EPHEMERIS_STORE_DAYS_BEFORE days ago to EPHEMERIS_STORE_DAYS_AFTER days
+    ahead, and delete the stored days before that. Meant to run daily.
+    """
+    start_time = time.perf_counter()
+
+    database.init()
+
+    today = datetime.now(timezone.utc).replace(
+        hour=0, minute=0, second=0, microsecond=0, tzinfo=None
+    )
+    date_range_begin = today - timedelta(days=config.EPHEMERIS_STORE_DAYS_BEFORE)
+    date_range_end = today + timedelta(days=config.EPHEMERIS_STORE_DAYS_AFTER)
+
+    async with database.async_session() as session:
+        observatory_service = ObservatoryService(session)
+        ephemeris_service = EphemerisService(
+            session, TLEService(session), observatory_service
+        )
+
+        observatories = await observatory_service.get_many(
+            observatory_schemas.ObservatoryRead(
+                ephemeris_type=[EphemerisType.JPL, EphemerisType.SPICE]
+            )
+        )
+
+        for index, observatory_model in enumerate(observatories, start=1):
+            if not observatory_model.is_operational:
+                continue
+
+            observatory = observatory_schemas.Observatory.model_validate(
+                observatory_model
+            )
+            logger.info(
+                f"({index}/{len(observatories)}) Precomputing ephemeris for {observatory.name}"
+            )
+
+            try:
+                written = await ephemeris_service.precompute(
+                    observatory, date_range_begin, date_range_end
+                )
+            except Exception:
+                # the next run retries the chunks that are still missing
+                logger.exception(
+                    "Failed to precompute ephemeris", observatory=observatory.name
+                )
+                continue
+
+            logger.info("Stored ephemeris chunks", chunks=written)
+
+    pruned = ephemeris_store.prune(before=date_range_begin)
+    logger.info("Pruned ephemeris chunks", chunks=pruned)
+
+    elapsed_seconds = time.perf_counter() - start_time
+    mins, secs = map(int, divmod(elapsed_seconds, 60))
+    logger.info(f"Done. took: {mins} min {secs} sec")
+
+
+if __name__ == "__main__":
+    asyncio.run(precompute_ephemeris())
@@ -10,7 +10,8 @@ from fastapi import FastAPI
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from across_server import main
-from across_server.auth import strategies
+from across_server.auth import strategies, versions
+from across_server.auth.cache import auth_user_cache
 from across_server.db.models import Filter, Group, Instrument, Observatory, Telescope
 from across_server.util.email.service import EmailService
 
@@ -213,3 +214,13 @@ def mock_config_runtime_env_is_local() -> Generator[AsyncMock]:
     with patch("across_server.core.config.Config.is_local") as mock_is_local:
         mock_is_local.return_value = False
         yield mock_is_local
+
+
+@pytest.fixture(autouse=True, scope="function")
+def clear_auth_user_cache() -> Generator[None]:
+    """Resolved principals must not leak between tests"""
+    auth_user_cache.invalidate_all()
+    versions.clear()
+    yield
+    auth_user_cache.invalidate_all()
+    versions.clear()
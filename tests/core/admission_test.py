@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+
+from across_server.core import admission
+from across_server.core.admission import (
+    AdmissionController,
+    ServiceOverloadedException,
+)
+
+
+class TestAdmissionController:
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.controller = AdmissionController(
+            "test", max_cost=10, max_queue=2, max_wait=0.1, retry_after=7
+        )
+
+    @pytest.mark.asyncio
+    async def test_should_admit_requests_within_budget(self) -> None:
+        """Should admit requests at once while their cost fits the budget"""
+        first = await self.controller.acquire(4)
+        second = await self.controller.acquire(6)
+
+        assert self.controller.cost_in_use == 10
+        assert len(self.controller) == 0
+
+        first.release()
+        second.release()
+        assert self.controller.cost_in_use == 0
+
+    @pytest.mark.asyncio
+    async def test_should_admit_costlier_request_alone(self) -> None:
+        """Should admit a request costing more than the budget once it is free"""
+        ticket = await self.controller.acquire(1000)
+
+        assert ticket.cost == self.controller.max_cost
+
+    @pytest.mark.asyncio
+    async def test_should_release_once(self) -> None:
+        """Should give the cost back once however often released"""
+        ticket = await self.controller.acquire(4)
+        await self.controller.acquire(2)
+
+        ticket.release()
+        ticket.release()
+
+        assert self.controller.cost_in_use == 2
+
+    @pytest.mark.asyncio
+    async def test_should_admit_waiting_requests_in_order_when_released(
+        self,
+    ) -> None:
+        """Should admit queued requests in order as the budget is released"""
+        ticket = await self.controller.acquire(10)
+        admitted: list[int] = []
+
+        async def wait(index: int, cost: float) -> None:
+            await self.controller.acquire(cost)
+            admitted.append(index)
+
+        waiters = [
+            asyncio.create_task(wait(0, 8)),
+            asyncio.create_task(wait(1, 1)),
+        ]
+        await asyncio.sleep(0)
+        assert len(self.controller) == 2
+
+        ticket.release()
+        await asyncio.gather(*waiters)
+
+        assert admitted == [0, 1]
+        assert self.controller.cost_in_use == 9
+
+    @pytest.mark.asyncio
+    async def test_should_reject_when_queue_full(self) -> None:
+        """Should reject a request at once with a 503 when the queue is full"""
+        await self.controller.acquire(10)
+        waiters = [asyncio.create_task(self.controller.acquire(1)) for _ in range(2)]
+        await asyncio.sleep(0)
+        rejected = admission.admission_rejected.value("test", "queue_full")
+
+        with pytest.raises(ServiceOverloadedException) as error:
+            await self.controller.acquire(1)
+
+        assert error.value.status_code == 503
+        assert error.value.headers == {"Retry-After": "7"}
+        assert admission.admission_rejected.value("test", "queue_full") == rejected + 1
+        await asyncio.gather(*waiters, return_exceptions=True)
+
+    @pytest.mark.asyncio
+    async def test_should_reject_after_max_wait(self) -> None:
+        """Should reject a request waiting longer than the maximum wait"""
+        await self.controller.acquire(10)
+
+        with pytest.raises(ServiceOverloadedException):
+            await self.controller.acquire(1)
+
+        assert len(self.controller) == 0
+        assert admission.admission_queue_depth.value("test") == 0
+
+    @pytest.mark.asyncio
+    async def test_should_leave_queue_when_cancelled(self) -> None:
+        """Should forget a waiting request once cancelled, admitting the next"""
+        ticket = await self.controller.acquire(10)
+        cancelled = asyncio.create_task(self.controller.acquire(10))
+        waiting = asyncio.create_task(self.controller.acquire(1))
+        await asyncio.sleep(0)
+
+        cancelled.cancel()
+        await asyncio.gather(cancelled, return_exceptions=True)
+        ticket.release()
+
+        assert (await waiting).cost == 1
+        assert self.controller.cost_in_use == 1
+
+    @pytest.mark.asyncio
+    async def test_should_release_when_block_ends(self) -> None:
+        """Should hold the cost for the duration of the admitted block"""
+        async with self.controller.admit(5):
+            assert self.controller.cost_in_use == 5
+
+        assert self.controller.cost_in_use == 0
@@ -0,0 +1,136 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from across_server.core import cache as cache_module
+from across_server.core import metrics
+from across_server.core.cache import SizedLRUCache, TTLCache
+
+
+class TestTTLCache:
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.cache: TTLCache[str, int] = TTLCache(max_size=2, ttl=10)
+
+    def test_should_return_value_when_key_is_cached(self) -> None:
+        """Should return the stored value for a cached key"""
+        self.cache.set("a", 1)
+        assert self.cache.get("a") == 1
+
+    def test_should_return_none_when_key_is_missing(self) -> None:
+        """Should return None for a key that was never stored"""
+        assert self.cache.get("a") is None
+
+    def test_should_count_hits_and_misses(self) -> None:
+        """Should count cache hits and misses"""
+        self.cache.set("a", 1)
+        self.cache.get("a")
+        self.cache.get("b")
+        assert (self.cache.hits, self.cache.misses) == (1, 1)
+
+    def test_should_evict_least_recently_used_when_full(self) -> None:
+        """Should evict the least recently used entry once max_size is exceeded"""
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.cache.get("a")
+        self.cache.set("c", 3)
+        assert self.cache.get("b") is None
+        assert self.cache.get("a") == 1
+
+    @patch("across_server.core.cache.time.monotonic")
+    def test_should_return_none_when_entry_is_expired(
+        self, mock_monotonic: MagicMock
+    ) -> None:
+        """Should treat entries older than the ttl as missing"""
+        mock_monotonic.return_value = 0
+        self.cache.set("a", 1)
+        mock_monotonic.return_value = 11
+        assert self.cache.get("a") is None
+        assert len(self.cache) == 0
+
+    def test_should_not_store_when_max_size_is_zero(self) -> None:
+        """Should disable caching when max_size is zero"""
+        cache: TTLCache[str, int] = TTLCache(max_size=0, ttl=10)
+        cache.set("a", 1)
+        assert cache.get("a") is None
+
+    def test_pop_should_remove_entry(self) -> None:
+        """Should remove and return an entry on pop"""
+        self.cache.set("a", 1)
+        assert self.cache.pop("a") == 1
+        assert self.cache.get("a") is None
+
+    def test_peek_should_not_count_or_refresh(self) -> None:
+        """Should return an entry on peek without counting it or refreshing it"""
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        assert self.cache.peek("a") == 1
+        assert (self.cache.hits, self.cache.misses) == (0, 0)
+        self.cache.set("c", 3)
+        assert self.cache.peek("a") is None
+
+
+class TestSizedLRUCache:
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.cache: SizedLRUCache[str, str] = SizedLRUCache(max_bytes=4, sizeof=len)
+
+    def test_should_return_value_when_key_is_cached(self) -> None:
+        """Should return the stored value for a cached key"""
+        self.cache.set("a", "xx")
+        assert self.cache.get("a") == "xx"
+
+    def test_should_track_size_of_entries(self) -> None:
+        """Should add up the size of the stored entries"""
+        self.cache.set("a", "x")
+        self.cache.set("b", "x")
+        self.cache.set("a", "xx")
+        assert self.cache.size == 3
+
+    def test_should_evict_least_recently_used_when_over_size(self) -> None:
+        """Should evict least recently used entries until the size fits"""
+        self.cache.set("a", "xx")
+        self.cache.set("b", "x")
+        self.cache.get("a")
+        self.cache.set("c", "xx")
+        assert self.cache.get("b") is None
+        assert self.cache.get("a") == "xx"
+        assert self.cache.size == 4
+
+    def test_should_not_store_entries_larger_than_max_bytes(self) -> None:
+        """Should skip entries that could never fit"""
+        self.cache.set("a", "xxxxx")
+        assert self.cache.get("a") is None
+        assert self.cache.size == 0
+
+    def test_pop_should_release_size(self) -> None:
+        """Should remove the entry's size on pop"""
+        self.cache.set("a", "xx")
+        assert self.cache.pop("a") == "xx"
+        assert self.cache.size == 0
+
+
+class TestCacheMetrics:
+    def test_should_report_cache_statistics(self) -> None:
+        """Should report hits, misses and entries labeled by cache name"""
+        cache: TTLCache[str, int] = TTLCache(max_size=10, ttl=60, name="metrics_test")
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("b")
+
+        metrics.registry.render()
+
+        assert cache_module.cache_hits.value("metrics_test") == 1
+        assert cache_module.cache_misses.value("metrics_test") == 1
+        assert cache_module.cache_entries.value("metrics_test") == 1
+
+    def test_should_report_size_of_sized_caches(self) -> None:
+        """Should report the estimated size of sized caches"""
+        cache: SizedLRUCache[str, str] = SizedLRUCache(
+            max_bytes=10, sizeof=len, name="sized_metrics_test"
+        )
+        cache.set("a", "xxx")
+
+        metrics.registry.render()
+
+        assert cache_module.cache_size_bytes.value("sized_metrics_test") == 3
@@ -0,0 +1,97 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from ratelimit import Rule
+
+from across_server.core.limiter import MemoryBucketStore, TokenBucketBackend
+
+
+class TestTokenBucketBackend:
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.store = MemoryBucketStore(max_keys=100)
+        self.backend = TokenBucketBackend(
+            self.store, costs={r"^/free$": 0, r"^/expensive$": 3}
+        )
+        self.rule = Rule(second=3, group="user")
+
+    @pytest.mark.asyncio
+    async def test_should_admit_requests_within_limit(self) -> None:
+        """Should admit as many requests as the rule's limit"""
+        results = [
+            await self.backend.retry_after("/path", "user", self.rule) for _ in range(3)
+        ]
+        assert results == [0, 0, 0]
+
+    @pytest.mark.asyncio
+    async def test_should_return_retry_after_when_limit_exceeded(self) -> None:
+        """Should block with a positive retry after once the bucket is drained"""
+        for _ in range(3):
+            await self.backend.retry_after("/path", "user", self.rule)
+        assert await self.backend.retry_after("/path", "user", self.rule) == 1
+
+    @pytest.mark.asyncio
+    @patch("across_server.core.limiter.backend.time.monotonic")
+    async def test_should_refill_tokens_over_time(
+        self, mock_monotonic: MagicMock
+    ) -> None:
+        """Should admit requests again once tokens are refilled"""
+        mock_monotonic.return_value = 0
+        for _ in range(3):
+            await self.backend.retry_after("/path", "user", self.rule)
+        mock_monotonic.return_value = 1 / 3
+        assert await self.backend.retry_after("/path", "user", self.rule) == 0
+
+    @pytest.mark.asyncio
+    async def test_should_charge_route_cost(self) -> None:
+        """Should drain the bucket by the cost of the matching route"""
+        assert await self.backend.retry_after("/expensive", "user", self.rule) == 0
+        assert await self.backend.retry_after("/expensive", "user", self.rule) > 0
+
+    @pytest.mark.asyncio
+    async def test_should_not_charge_free_routes(self) -> None:
+        """Should always admit routes costing nothing"""
+        for _ in range(10):
+            assert await self.backend.retry_after("/free", "user", self.rule) == 0
+        assert len(self.store) == 0
+
+    @pytest.mark.asyncio
+    async def test_should_admit_cost_above_limit_when_bucket_is_full(self) -> None:
+        """Should cap a cost larger than the limit at the bucket capacity"""
+        backend = TokenBucketBackend(self.store, costs={r".*": 10})
+        assert await backend.retry_after("/path", "user", self.rule) == 0
+        assert await backend.retry_after("/path", "user", self.rule) > 0
+
+    @pytest.mark.asyncio
+    @patch("across_server.core.limiter.backend.time.monotonic")
+    async def test_should_not_charge_any_bucket_when_one_is_drained(
+        self, mock_monotonic: MagicMock
+    ) -> None:
+        """Should charge every limit of a rule or none of them"""
+        mock_monotonic.return_value = 0
+        rule = Rule(second=1, minute=2, group="user")
+        await self.backend.retry_after("/path", "user", rule)
+        await self.backend.retry_after("/path", "user", rule)
+        tokens = [tokens for tokens, _ in self.store._buckets.values()]
+        assert tokens == [0, 1]
+
+    @pytest.mark.asyncio
+    async def test_should_enforce_one_budget_across_workers_sharing_a_store(
+        self,
+    ) -> None:
+        """Should enforce a single budget for backends sharing one store"""
+        workers = [TokenBucketBackend(self.store, costs={}) for _ in range(3)]
+        results = [
+            await worker.retry_after("/path", "user", self.rule) for worker in workers
+        ]
+        assert results == [0, 0, 0]
+        assert await workers[0].retry_after("/path", "user", self.rule) > 0
+
+    @pytest.mark.asyncio
+    async def test_should_evict_least_recently_used_buckets(self) -> None:
+        """Should hold at most max_keys buckets"""
+        store = MemoryBucketStore(max_keys=2)
+        backend = TokenBucketBackend(store, costs={})
+        for user in ["a", "b", "c"]:
+            await backend.retry_after("/path", user, self.rule)
+        assert len(store) == 2 and store.evictions == 1
@@ -0,0 +1,120 @@
+import json
+import logging
+import queue
+import sys
+import uuid
+from datetime import datetime, timezone
+
+from asgi_correlation_id import correlation_id
+
+from across_server.core import logging as core_logging
+
+
+class TestJSONRenderer:
+    def test_should_render_compact_json(self) -> None:
+        """Should render the event dict as compact JSON"""
+        renderer = core_logging.JSONRenderer()
+
+        rendered = renderer(None, "info", {"event": "hello", "status_code": 200})
+
+        assert rendered == '{"event":"hello","status_code":200}'
+
+    def test_should_stringify_unserializable_values(self) -> None:
+        """Should fall back to str for values json cannot encode"""
+        renderer = core_logging.JSONRenderer()
+        id = uuid.uuid4()
+        now = datetime.now()
+
+        rendered = json.loads(renderer(None, "info", {"id": id, "at": now}))
+
+        assert rendered == {"id": str(id), "at": str(now)}
+
+
+class TestQueueHandler:
+    def test_should_enqueue_records_unformatted(self) -> None:
+        """Should leave formatting to the listener thread"""
+        records: queue.Queue[logging.LogRecord] = queue.Queue()
+        handler = core_logging._QueueHandler(records)
+        record = logging.makeLogRecord(
+            # as structlog's `wrap_for_formatter` hands its events to logging
+            {"msg": {"event": "hello"}, "_logger": None, "_name": "info"}
+        )
+
+        handler.handle(record)
+
+        assert records.get_nowait().msg == {"event": "hello"}
+
+    def test_should_merge_stdlib_messages_when_logged(self) -> None:
+        """Should render stdlib arguments as they were when logged"""
+        records: queue.Queue[logging.LogRecord] = queue.Queue()
+        handler = core_logging._QueueHandler(records)
+        rows = [1]
+        record = logging.LogRecord(
+            "test", logging.INFO, __file__, 1, "rows %s", (rows,), None
+        )
+
+        handler.handle(record)
+        rows.append(2)
+        queued = records.get_nowait()
+
+        assert queued.getMessage() == "rows [1]"
+        assert queued.args is None
+
+    def test_should_keep_exception_info(self) -> None:
+        """Should leave exceptions to be formatted on the writer thread"""
+        records: queue.Queue[logging.LogRecord] = queue.Queue()
+        handler = core_logging._QueueHandler(records)
+        try:
+            raise ValueError("failed")
+        except ValueError:
+            exc_info = sys.exc_info()
+        record = logging.LogRecord(
+            "test", logging.ERROR, __file__, 1, "failed", None, exc_info
+        )
+
+        handler.handle(record)
+
+        assert records.get_nowait().exc_info == exc_info
+
+    def test_should_drop_records_when_full(self) -> None:
+        """Should drop and count records instead of blocking"""
+        handler = core_logging._QueueHandler(queue.Queue(maxsize=1))
+        before = core_logging.log_records_dropped.value()
+
+        for _ in range(3):
+            handler.handle(
+                logging.LogRecord("test", logging.INFO, __file__, 1, "x", None, None)
+            )
+
+        assert core_logging.log_records_dropped.value() == before + 2
+
+    def test_should_capture_the_request_id(self) -> None:
+        """Should keep the request id of records rendered on the writer thread"""
+        records: queue.Queue[logging.LogRecord] = queue.Queue()
+        handler = core_logging._QueueHandler(records)
+        token = correlation_id.set("request-1")
+
+        handler.handle(
+            logging.LogRecord("test", logging.INFO, __file__, 1, "x", None, None)
+        )
+        correlation_id.reset(token)
+        record = records.get_nowait()
+
+        event_dict = core_logging._add_correlation(
+            logging.getLogger(), "info", {"_record": record}
+        )
+
+        assert event_dict["request_id"] == "request-1"
+
+
+class TestRecordTimestamp:
+    def test_should_stamp_stdlib_records_when_logged(self) -> None:
+        """Should stamp records with their creation time, not the formatting time"""
+        record = logging.LogRecord("test", logging.INFO, __file__, 1, "x", None, None)
+        record.created = datetime(2025, 1, 2, 3, 4, 5, 678000, timezone.utc).timestamp()
+
+        event_dict = core_logging._add_record_timestamp(
+            logging.getLogger(), "info", {"_record": record}
+        )
+
+        assert event_dict["timestamp"] == "2025-01-02T03:04:05.678000"
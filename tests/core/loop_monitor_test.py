@@ -0,0 +1,67 @@
+import anyio
+import pytest
+import structlog
+
+from across_server.core import loop_monitor, workloads
+from across_server.core.config import config
+
+
+class TestCheck:
+    @pytest.mark.asyncio
+    async def test_should_observe_lag(self) -> None:
+        """Should record every lag sample"""
+        before = loop_monitor.event_loop_lag.count()
+
+        loop_monitor.check(0.001)
+
+        assert loop_monitor.event_loop_lag.count() == before + 1
+
+    @pytest.mark.asyncio
+    async def test_should_not_log_a_healthy_loop(self) -> None:
+        """Should stay quiet while the loop keeps up and no call is queued"""
+        with structlog.testing.capture_logs() as logs:
+            loop_monitor.check(0)
+
+        assert logs == []
+
+    @pytest.mark.asyncio
+    async def test_should_log_lag_over_the_threshold(self) -> None:
+        """Should log the limiters when the loop lags"""
+        with structlog.testing.capture_logs() as logs:
+            loop_monitor.check(config.LOOP_LAG_WARN_MS / 1000)
+
+        assert logs[0]["limiters"]["default"]["capacity"] > 0
+
+    @pytest.mark.asyncio
+    async def test_should_log_saturated_limiters(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Should log workloads with calls waiting for a worker thread"""
+        limiter = anyio.CapacityLimiter(1)
+        monkeypatch.setitem(workloads._limiters, "visibility", limiter)
+
+        async with limiter, anyio.create_task_group() as tg:
+            tg.start_soon(limiter.acquire)
+            await anyio.wait_all_tasks_blocked()
+
+            with structlog.testing.capture_logs() as logs:
+                loop_monitor.check(0)
+
+            tg.cancel_scope.cancel()
+
+        assert logs[0]["saturated"] == ["visibility"]
+
+
+class TestRun:
+    @pytest.mark.asyncio
+    async def test_should_sample_until_cancelled(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Should keep sampling the lag at the configured interval"""
+        monkeypatch.setattr(config, "LOOP_MONITOR_INTERVAL_MS", 1)
+        before = loop_monitor.event_loop_lag.count()
+
+        with anyio.move_on_after(0.05):
+            await loop_monitor.run()
+
+        assert loop_monitor.event_loop_lag.count() > before
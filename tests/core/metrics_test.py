@@ -0,0 +1,88 @@
+import anyio
+import pytest
+
+from across_server.core import metrics
+
+
+class TestRegistry:
+    def test_should_reject_duplicate_names(self) -> None:
+        """Should raise when a metric name is registered twice"""
+        registry = metrics.Registry()
+        registry.counter("requests", "Requests")
+
+        with pytest.raises(ValueError):
+            registry.gauge("requests", "Requests")
+
+    def test_should_run_collectors_before_render(self) -> None:
+        """Should refresh collected values on every render"""
+        registry = metrics.Registry()
+        gauge = registry.gauge("queue_depth", "Queue depth")
+        depth = iter([3, 5])
+        registry.collector(lambda: gauge.set(next(depth)))
+
+        assert "queue_depth 3\n" in registry.render()
+        assert "queue_depth 5\n" in registry.render()
+
+
+class TestCounter:
+    def test_should_render_total_suffix(self) -> None:
+        """Should expose counters with a _total suffix"""
+        registry = metrics.Registry()
+        counter = registry.counter("ingested", "Ingested rows", ("kind",))
+        counter.inc(2, "observation")
+        counter.inc(1, "observation")
+
+        rendered = registry.render()
+
+        assert "# TYPE ingested_total counter" in rendered
+        assert 'ingested_total{kind="observation"} 3' in rendered
+
+    def test_should_escape_label_values(self) -> None:
+        """Should escape quotes and backslashes in label values"""
+        registry = metrics.Registry()
+        counter = registry.counter("hits", "Hits", ("cache",))
+        counter.inc(1, 'a"b\\c')
+
+        assert 'hits_total{cache="a\\"b\\\\c"} 1' in registry.render()
+
+
+class TestHistogram:
+    def test_should_render_cumulative_buckets(self) -> None:
+        """Should render cumulative bucket counts, sum and count"""
+        registry = metrics.Registry()
+        histogram = registry.histogram(
+            "latency_seconds", "Latency", ("route",), buckets=(0.1, 1)
+        )
+        for value in (0.05, 0.1, 0.5, 2):
+            histogram.observe(value, "/health")
+
+        rendered = registry.render()
+
+        assert 'latency_seconds_bucket{route="/health",le="0.1"} 2' in rendered
+        assert 'latency_seconds_bucket{route="/health",le="1"} 3' in rendered
+        assert 'latency_seconds_bucket{route="/health",le="+Inf"} 4' in rendered
+        assert 'latency_seconds_sum{route="/health"} 2.65' in rendered
+        assert 'latency_seconds_count{route="/health"} 4' in rendered
+
+    def test_should_count_observations(self) -> None:
+        """Should count observations per label set"""
+        histogram = metrics.Histogram("latency_seconds", "Latency", ("route",))
+        histogram.observe(0.2, "/a")
+        histogram.observe(0.3, "/a")
+
+        assert histogram.count("/a") == 2
+        assert histogram.count("/b") == 0
+
+
+class TestWatchLimiter:
+    @pytest.mark.asyncio
+    async def test_should_report_limiter_occupancy(self) -> None:
+        """Should report borrowed tokens and capacity of watched limiters"""
+        limiter = anyio.CapacityLimiter(3)
+        metrics.watch_limiter("test", lambda: limiter)
+
+        async with limiter:
+            metrics.registry.render()
+
+        assert metrics.thread_offload_busy.value("test") == 1
+        assert metrics.thread_offload_capacity.value("test") == 3
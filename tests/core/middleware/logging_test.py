@@ -3,6 +3,8 @@ import pytest_asyncio
 import structlog
 from httpx import AsyncClient
 
+from across_server.core.config import config
+
 structlog.configure(cache_logger_on_first_use=False)
 
 
@@ -57,3 +59,90 @@ class TestLoggingMiddleware:
         log = log_output.entries[-1]
 
         assert isinstance(log["duration"], int)
+
+    @pytest.mark.asyncio
+    async def test_should_log_anonymous_principal(
+        self, log_output: structlog.testing.LogCapture
+    ) -> None:
+        """Should log an empty principal for unauthenticated requests"""
+
+        await self.client.get(self.endpoint)
+
+        # call to the middleware logger will be the last/most recent
+        log = log_output.entries[-1]
+
+        assert log["principal"] == {"id": None, "type": None}
+
+    @pytest.mark.asyncio
+    async def test_should_log_db_stats(
+        self, log_output: structlog.testing.LogCapture
+    ) -> None:
+        """Should log the statements executed by the request"""
+
+        await self.client.get(self.endpoint)
+
+        # call to the middleware logger will be the last/most recent
+        log = log_output.entries[-1]
+
+        assert log["db"]["statements"] == 0
+
+    @pytest.mark.asyncio
+    async def test_should_add_server_timing_header(self) -> None:
+        """Should report db and total time in the Server-Timing header"""
+
+        response = await self.client.get(self.endpoint)
+
+        assert response.headers["server-timing"].startswith("db;dur=")
+
+    @pytest.mark.asyncio
+    async def test_should_export_slow_request_traces(
+        self, log_output: structlog.testing.LogCapture, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Should export the request trace after the access log when slow"""
+        monkeypatch.setattr(config, "TRACING_EXPORTER", "log")
+        monkeypatch.setattr(config, "TRACING_MIN_DURATION_MS", 0)
+
+        await self.client.get(self.endpoint)
+
+        access_log, trace = log_output.entries[-2:]
+
+        assert "http" in access_log
+        assert trace["event"] == "trace GET /"
+        assert trace["spans"][-1]["attributes"]["status_code"] == 307
+
+    @pytest.mark.asyncio
+    async def test_should_sample_successful_fast_requests(
+        self, log_output: structlog.testing.LogCapture, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Should skip successful fast requests that are not sampled"""
+        monkeypatch.setattr(config, "LOG_SAMPLE_RATE", 0)
+
+        await self.client.get("/health")
+
+        assert not any("http" in entry for entry in log_output.entries)
+
+    @pytest.mark.asyncio
+    async def test_should_always_log_errors(
+        self, log_output: structlog.testing.LogCapture, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Should log failed requests regardless of the sample rate"""
+        monkeypatch.setattr(config, "LOG_SAMPLE_RATE", 0)
+
+        await self.client.get("/does-not-exist")
+
+        log = log_output.entries[-1]
+
+        assert log["http"]["status_code"] == 404
+        assert log["sample_rate"] == 1.0
+
+    @pytest.mark.asyncio
+    async def test_should_always_log_slow_requests(
+        self, log_output: structlog.testing.LogCapture, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Should log requests slower than the threshold regardless of the sample rate"""
+        monkeypatch.setattr(config, "LOG_SAMPLE_RATE", 0)
+        monkeypatch.setattr(config, "LOG_SLOW_REQUEST_MS", 0)
+
+        await self.client.get("/health")
+
+        assert log_output.entries[-1]["http"]["status_code"] == 200
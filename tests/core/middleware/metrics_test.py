@@ -0,0 +1,45 @@
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+
+from across_server.core.middleware.metrics import (
+    UNMATCHED_ROUTE,
+    http_request_duration,
+    http_requests_in_flight,
+)
+
+
+class TestMetricsMiddleware:
+    @pytest_asyncio.fixture(autouse=True)
+    async def setup(
+        self,
+        async_client: AsyncClient,
+    ) -> None:
+        self.client = async_client
+
+    @pytest.mark.asyncio
+    async def test_should_observe_request_duration_by_route(self) -> None:
+        """Should observe the request duration labeled by route template"""
+        before = http_request_duration.count("GET", "/health", "200")
+
+        await self.client.get("/health")
+
+        assert http_request_duration.count("GET", "/health", "200") == before + 1
+
+    @pytest.mark.asyncio
+    async def test_should_label_unknown_paths_as_unmatched(self) -> None:
+        """Should not use raw paths as label values for unmatched requests"""
+        before = http_request_duration.count("GET", UNMATCHED_ROUTE, "404")
+
+        await self.client.get("/does-not-exist/12345")
+
+        assert http_request_duration.count("GET", UNMATCHED_ROUTE, "404") == before + 1
+
+    @pytest.mark.asyncio
+    async def test_should_release_in_flight_requests(self) -> None:
+        """Should not count finished requests as in flight"""
+        before = http_requests_in_flight.value()
+
+        await self.client.get("/health")
+
+        assert http_requests_in_flight.value() == before
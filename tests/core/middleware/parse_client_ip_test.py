@@ -59,3 +59,13 @@ class TestParsingClientIpMiddleware:
         ip = await parse_client_ip(fake_scope)
 
         assert ip == "123.123.123.123"
+
+    @pytest.mark.asyncio
+    async def test_should_parse_client_ip_once_per_scope(
+        self, fake_scope: dict, mock_client_ip: AsyncMock
+    ) -> None:
+        await parse_client_ip(fake_scope)
+        ip = await parse_client_ip(fake_scope)
+
+        mock_client_ip.assert_awaited_once()
+        assert ip == "123.123.123.123"
@@ -0,0 +1,53 @@
+import os
+from collections.abc import AsyncGenerator
+
+import pytest
+import pytest_asyncio
+
+from across_server.core import processes
+from across_server.core.config import config
+
+
+@pytest_asyncio.fixture(scope="class", loop_scope="class")
+async def pool() -> AsyncGenerator[None, None]:
+    # starting workers takes seconds, tests of a class share one pool
+    workers = config.PROCESS_POOL_WORKERS
+    config.PROCESS_POOL_WORKERS = 1
+    await processes.start()
+    yield
+    processes.stop()
+    config.PROCESS_POOL_WORKERS = workers
+
+
+class TestProcesses:
+    @pytest.mark.asyncio
+    async def test_should_not_start_without_workers(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Should leave computations in threads when no workers are configured"""
+        monkeypatch.setattr(config, "PROCESS_POOL_WORKERS", 0)
+
+        await processes.start()
+
+        assert not processes.enabled()
+
+    def test_should_raise_when_submitting_without_pool(self) -> None:
+        """Should refuse calls while the pool is not started"""
+        with pytest.raises(RuntimeError):
+            processes.submit(os.getpid)
+
+    @pytest.mark.usefixtures("pool")
+    class TestStarted:
+        @pytest.mark.asyncio(loop_scope="class")
+        async def test_should_run_in_a_worker_process(self) -> None:
+            """Should run the function in another process"""
+            assert processes.enabled()
+            assert await processes.run("visibility", "getpid", os.getpid) != (
+                os.getpid()
+            )
+
+        @pytest.mark.asyncio(loop_scope="class")
+        async def test_should_raise_errors_of_the_worker(self) -> None:
+            """Should raise what the function raised in the worker"""
+            with pytest.raises(ValueError):
+                await processes.run("ephemeris", "int", int, "not a number")
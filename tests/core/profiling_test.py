@@ -0,0 +1,114 @@
+import uuid
+from pathlib import Path
+
+import pytest
+from httpx import AsyncClient
+
+from across_server.auth import schemas
+from across_server.auth.tokens import AccessToken
+from across_server.core import profiling
+from across_server.core.config import config
+
+
+def bearer_headers(scopes: list[str]) -> list[tuple[bytes, bytes]]:
+    auth_user = schemas.AuthUser(
+        id=uuid.uuid4(),
+        scopes=scopes,
+        groups=[],
+        type=schemas.PrincipalType.SERVICE_ACCOUNT,
+    )
+    access_token = AccessToken()
+    token = access_token.encode(access_token.to_encode(auth_user))
+    return [(b"authorization", f"Bearer {token}".encode())]
+
+
+@pytest.fixture(autouse=True)
+def enable_profiling(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(config, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(config, "PROFILING_INTERVAL_MS", 1)
+    monkeypatch.setattr(config, "PROFILING_DIR", str(tmp_path))
+
+
+def finish(profiler: profiling.Profiler) -> None:
+    profiler.stop()
+    profiler._thread.join()
+
+
+class TestStart:
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.scope = {
+            "type": "http",
+            "headers": [(b"x-profile", b"1"), *bearer_headers(["system:all:write"])],
+        }
+
+    def test_should_not_profile_when_disabled(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Should ignore the header unless profiling is enabled"""
+        monkeypatch.setattr(config, "PROFILING_ENABLED", False)
+
+        assert profiling.start(self.scope, "request") is None
+
+    def test_should_not_profile_without_header(self) -> None:
+        """Should only profile requests that ask for it"""
+        scope = {"type": "http", "headers": bearer_headers(["system:all:write"])}
+
+        assert profiling.start(scope, "request") is None
+
+    def test_should_not_profile_non_system_principals(self) -> None:
+        """Should ignore the header for principals without a system scope"""
+        scope = {
+            "type": "http",
+            "headers": [(b"x-profile", b"1"), *bearer_headers(["user:read"])],
+        }
+
+        assert profiling.start(scope, "request") is None
+
+    def test_should_write_folded_stacks(self, tmp_path: Path) -> None:
+        """Should write the sampled stacks tagged with the request id"""
+        profiler = profiling.start(self.scope, "request")
+        assert profiler is not None
+
+        while profiler.samples < 3:
+            pass
+        finish(profiler)
+
+        lines = (tmp_path / "request.folded").read_text().splitlines()
+
+        assert lines
+        assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+        assert any("test_should_write_folded_stacks" in line for line in lines)
+
+    def test_should_profile_one_request_at_a_time(self) -> None:
+        """Should ignore profile requests while another request is profiled"""
+        profiler = profiling.start(self.scope, "first")
+        assert profiler is not None
+
+        assert profiling.start(self.scope, "second") is None
+
+        finish(profiler)
+        second = profiling.start(self.scope, "second")
+        assert second is not None
+        finish(second)
+
+
+class TestProfiledRequest:
+    @pytest.mark.asyncio
+    async def test_should_return_the_profile_name(
+        self, async_client: AsyncClient, tmp_path: Path
+    ) -> None:
+        """Should tell the caller where the profile of the request is stored"""
+        headers = {
+            name.decode(): value.decode()
+            for name, value in [
+                (b"x-profile", b"1"),
+                *bearer_headers(["system:all:write"]),
+            ]
+        }
+
+        response = await async_client.get("/health", headers=headers)
+
+        assert response.headers["x-profile"] == (
+            f"{response.headers['x-request-id']}.folded"
+        )
@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+
+from across_server.core import single_flight
+from across_server.core.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.flight: SingleFlight[str, int] = SingleFlight("test")
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.cancelled = False
+
+    async def compute(self) -> int:
+        self.calls += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return self.calls
+
+    @pytest.mark.asyncio
+    async def test_should_share_one_computation_between_concurrent_calls(
+        self,
+    ) -> None:
+        """Should compute once for concurrent calls of the same key"""
+        waiters = [
+            asyncio.create_task(self.flight.do("key", self.compute)) for _ in range(5)
+        ]
+        await asyncio.sleep(0)
+        self.release.set()
+
+        assert await asyncio.gather(*waiters) == [1] * 5
+        assert self.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_should_compute_different_keys_separately(self) -> None:
+        """Should not share computations between different keys"""
+        self.release.set()
+
+        await asyncio.gather(
+            self.flight.do("one", self.compute), self.flight.do("two", self.compute)
+        )
+
+        assert self.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_should_compute_again_once_done(self) -> None:
+        """Should forget a computation once done, later calls computing afresh"""
+        self.release.set()
+
+        assert await self.flight.do("key", self.compute) == 1
+        assert await self.flight.do("key", self.compute) == 2
+        assert len(self.flight) == 0
+
+    @pytest.mark.asyncio
+    async def test_should_raise_exception_to_every_caller(self) -> None:
+        """Should raise the exception of the computation to every waiting call"""
+
+        async def fail() -> int:
+            await self.release.wait()
+            raise ValueError("failed")
+
+        waiters = [asyncio.create_task(self.flight.do("key", fail)) for _ in range(2)]
+        await asyncio.sleep(0)
+        self.release.set()
+
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+
+        assert all(isinstance(result, ValueError) for result in results)
+
+    @pytest.mark.asyncio
+    async def test_should_keep_computing_when_first_caller_cancelled(self) -> None:
+        """Should not cancel the computation for the others when its starter leaves"""
+        first = asyncio.create_task(self.flight.do("key", self.compute))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(self.flight.do("key", self.compute))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        await asyncio.sleep(0)
+        self.release.set()
+
+        assert await second == 1
+        assert first.cancelled()
+        assert not self.cancelled
+
+    @pytest.mark.asyncio
+    async def test_should_cancel_computation_when_every_caller_left(self) -> None:
+        """Should cancel the computation once no call waits for it"""
+        waiters = [
+            asyncio.create_task(self.flight.do("key", self.compute)) for _ in range(2)
+        ]
+        await asyncio.sleep(0)
+
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0)
+
+        assert self.cancelled
+        assert len(self.flight) == 0
+
+    @pytest.mark.asyncio
+    async def test_should_count_joined_calls(self) -> None:
+        """Should report the calls that joined a computation in flight"""
+        joined = single_flight.single_flight_joined.value("test")
+        waiters = [
+            asyncio.create_task(self.flight.do("key", self.compute)) for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+        self.release.set()
+        await asyncio.gather(*waiters)
+
+        assert single_flight.single_flight_joined.value("test") == joined + 2
@@ -0,0 +1,201 @@
+import json
+import threading
+from pathlib import Path
+
+import anyio.to_thread
+import pytest
+import structlog
+from asgi_correlation_id import correlation_id
+
+from across_server.core import tracing
+from across_server.core.config import config
+
+
+@pytest.fixture(autouse=True)
+def export_nothing(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(config, "TRACING_EXPORTER", "none")
+
+
+class TestSpan:
+    def test_should_be_a_noop_outside_a_trace(self) -> None:
+        """Should not record spans when no trace is active"""
+        with tracing.span("work") as span:
+            assert span is None
+
+    def test_should_nest_spans_under_the_current_span(self) -> None:
+        """Should parent spans to the span active when they started"""
+        root, token = tracing.start("request")
+
+        with tracing.span("outer") as outer:
+            with tracing.span("inner") as inner:
+                pass
+
+        tracing.stop(root, token)
+
+        assert outer is not None and inner is not None
+        assert outer.parent_id == root.span_id
+        assert inner.parent_id == outer.span_id
+        assert [span.name for span in root.trace.spans] == ["inner", "outer", "request"]
+
+    def test_should_record_errors(self) -> None:
+        """Should record the exception type raised within the span"""
+        root, token = tracing.start("request")
+
+        with pytest.raises(ValueError):
+            with tracing.span("work"):
+                raise ValueError()
+
+        tracing.stop(root, token)
+
+        assert root.trace.spans[0].error == "ValueError"
+
+    def test_should_use_the_request_id_as_trace_id(self) -> None:
+        """Should reuse the request id so traces and logs correlate"""
+        request_id = correlation_id.set("4b1c0f6a-2a6e-4c43-9d3c-8b7a1f0e9d21")
+        root, token = tracing.start("request")
+        tracing.stop(root, token)
+        correlation_id.reset(request_id)
+
+        assert root.trace.trace_id == "4b1c0f6a2a6e4c439d3c8b7a1f0e9d21"
+
+
+class TestTraced:
+    @pytest.mark.asyncio
+    async def test_should_wrap_coroutines_in_a_span(self) -> None:
+        """Should time decorated coroutine functions"""
+
+        @tracing.traced("compute")
+        async def compute() -> int:
+            return 1
+
+        root, token = tracing.start("request")
+        result = await compute()
+        tracing.stop(root, token)
+
+        assert result == 1
+        assert root.trace.spans[0].name == "compute"
+
+
+class TestInThread:
+    @pytest.mark.asyncio
+    async def test_should_propagate_spans_into_worker_threads(self) -> None:
+        """Should nest spans opened in worker threads under the awaiting span"""
+
+        def work() -> str:
+            with tracing.span("inside"):
+                return "done"
+
+        root, token = tracing.start("request")
+        with tracing.span("offload") as offload:
+            result = await anyio.to_thread.run_sync(tracing.in_thread("work", work))
+        tracing.stop(root, token)
+
+        spans = {span.name: span for span in root.trace.spans}
+
+        assert result == "done"
+        assert offload is not None
+        assert spans["work"].parent_id == offload.span_id
+        assert spans["inside"].parent_id == spans["work"].span_id
+        assert spans["work"].thread != root.thread
+        assert isinstance(spans["work"].attributes["queued"], int)
+
+    def test_should_return_the_function_outside_a_trace(self) -> None:
+        """Should not wrap the callable when no trace is active"""
+
+        def work() -> None:
+            pass
+
+        assert tracing.in_thread("work", work) is work
+
+
+class TestExport:
+    def test_should_log_traces_over_the_threshold(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Should export slow traces as a structured log event"""
+        monkeypatch.setattr(config, "TRACING_EXPORTER", "log")
+        monkeypatch.setattr(config, "TRACING_MIN_DURATION_MS", 0)
+
+        with structlog.testing.capture_logs() as logs:
+            root, token = tracing.start("request")
+            with tracing.span("work"):
+                pass
+            tracing.stop(root, token)
+
+        assert logs[-1]["trace_id"] == root.trace.trace_id
+        assert [span["name"] for span in logs[-1]["spans"]] == ["work", "request"]
+
+    def test_should_not_export_fast_traces(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Should skip traces faster than the threshold"""
+        monkeypatch.setattr(config, "TRACING_EXPORTER", "log")
+        monkeypatch.setattr(config, "TRACING_MIN_DURATION_MS", 60_000)
+
+        with structlog.testing.capture_logs() as logs:
+            root, token = tracing.start("request")
+            tracing.stop(root, token)
+
+        assert logs == []
+
+    def test_should_append_otlp_json_lines(
+        self, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+    ) -> None:
+        """Should append each trace as an OTLP/JSON line"""
+        path = tmp_path / "traces.jsonl"
+        monkeypatch.setattr(config, "TRACING_EXPORTER", "otlp")
+        monkeypatch.setattr(config, "TRACING_MIN_DURATION_MS", 0)
+        monkeypatch.setattr(config, "TRACING_OTLP_FILE", str(path))
+
+        root, token = tracing.start("request")
+        with tracing.span("work", rows=3):
+            pass
+        tracing.stop(root, token)
+        tracing.shutdown()
+
+        line = json.loads(path.read_text().splitlines()[0])
+        spans = line["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        work = spans[0]
+
+        assert work["traceId"] == root.trace.trace_id
+        assert work["parentSpanId"] == root.span_id
+        assert {"key": "rows", "value": {"intValue": "3"}} in work["attributes"]
+        assert "parentSpanId" not in spans[1]
+
+    def test_should_describe_service_and_environment_in_otlp_resource(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Should name the service, reporting the environment separately"""
+        monkeypatch.setattr(config, "APP_ENV", "staging")
+        root, token = tracing.start("request")
+        tracing.stop(root, token)
+
+        resource = tracing.to_otlp(root.trace)["resourceSpans"][0]["resource"]
+
+        assert resource["attributes"] == [
+            {"key": "service.name", "value": {"stringValue": "across-server"}},
+            {"key": "deployment.environment", "value": {"stringValue": "staging"}},
+        ]
+
+    def test_should_write_otlp_off_the_calling_thread(
+        self, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+    ) -> None:
+        """Should render and append OTLP traces on the writer thread"""
+        monkeypatch.setattr(config, "TRACING_EXPORTER", "otlp")
+        monkeypatch.setattr(config, "TRACING_MIN_DURATION_MS", 0)
+        monkeypatch.setattr(config, "TRACING_OTLP_FILE", str(tmp_path / "t.jsonl"))
+        rendered_on: list[threading.Thread] = []
+        to_otlp = tracing.to_otlp
+
+        def recorded(trace: tracing.Trace) -> dict:
+            rendered_on.append(threading.current_thread())
+            return to_otlp(trace)
+
+        monkeypatch.setattr(tracing, "to_otlp", recorded)
+
+        root, token = tracing.start("request")
+        tracing.stop(root, token)
+        tracing.shutdown()
+
+        assert len(rendered_on) == 1
+        assert rendered_on[0] is not threading.current_thread()
@@ -0,0 +1,51 @@
+import threading
+
+import anyio
+import pytest
+
+from across_server.core import metrics, workloads
+from across_server.core.config import config
+
+
+class TestWorkloads:
+    @pytest.mark.asyncio
+    async def test_should_size_limiters_from_config(self) -> None:
+        """Should bound each workload by its configured thread limit"""
+        limiter = workloads.limiter("visibility")
+
+        assert limiter.total_tokens == config.THREAD_LIMIT_VISIBILITY
+        assert workloads.limiter("visibility") is limiter
+
+    @pytest.mark.asyncio
+    async def test_should_run_in_a_worker_thread(self) -> None:
+        """Should run the function off the event loop thread"""
+        thread = await workloads.run_sync("ephemeris", threading.get_ident)
+
+        assert thread != threading.get_ident()
+
+    @pytest.mark.asyncio
+    async def test_should_not_borrow_from_the_default_limiter(self) -> None:
+        """Should leave the default limiter's tokens to other requests"""
+        default = anyio.to_thread.current_default_thread_limiter()
+        borrowed = []
+
+        def work() -> None:
+            borrowed.append(default.borrowed_tokens)
+
+        await workloads.run_sync("resolve_object", work)
+
+        assert borrowed == [0]
+
+    @pytest.mark.asyncio
+    async def test_should_report_workload_limiters(self) -> None:
+        """Should report the occupancy of workload limiters in metrics"""
+        limiter = workloads.limiter("ephemeris")
+
+        async with limiter:
+            metrics.registry.render()
+
+        assert metrics.thread_offload_busy.value("ephemeris") == 1
+        assert (
+            metrics.thread_offload_capacity.value("ephemeris")
+            == config.THREAD_LIMIT_EPHEMERIS
+        )
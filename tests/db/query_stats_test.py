@@ -0,0 +1,86 @@
+from collections.abc import Generator
+
+import pytest
+from sqlalchemy import Engine, create_engine, text
+
+from across_server.db import query_stats
+
+
+@pytest.fixture
+def engine() -> Generator[Engine]:
+    engine = create_engine("sqlite://")
+    query_stats.instrument(engine)
+
+    yield engine
+
+    engine.dispose()
+
+
+class TestQueryStats:
+    def test_should_record_statements_while_active(self, engine: Engine) -> None:
+        """Should count statements and rows executed while stats are active"""
+        stats, token = query_stats.start()
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1 UNION ALL SELECT 2")).all()
+            conn.execute(text("SELECT 1")).all()
+        query_stats.stop(token)
+
+        assert stats.statements == 2
+        assert stats.duration_ns > 0
+        assert stats.slowest_statement is not None
+
+    def test_should_not_record_statements_when_inactive(self, engine: Engine) -> None:
+        """Should ignore statements executed outside of active stats"""
+        stats, token = query_stats.start()
+        query_stats.stop(token)
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+        assert stats.statements == 0
+
+    def test_should_count_repeated_statements(self, engine: Engine) -> None:
+        """Should report how often the most repeated statement ran"""
+        stats, token = query_stats.start()
+        with engine.connect() as conn:
+            for id in range(3):
+                conn.execute(text("SELECT :id"), {"id": id})
+        query_stats.stop(token)
+
+        assert stats.max_repeats == 3
+
+    def test_should_propagate_statements_to_outer_stats(self, engine: Engine) -> None:
+        """Should record statements into stats that were already active"""
+        outer, outer_token = query_stats.start()
+        inner, inner_token = query_stats.start()
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        query_stats.stop(inner_token)
+        query_stats.stop(outer_token)
+
+        assert outer.statements == inner.statements == 1
+
+    def test_should_recover_from_failed_statements(self, engine: Engine) -> None:
+        """Should keep timing statements after one fails"""
+        stats, token = query_stats.start()
+        with engine.connect() as conn:
+            with pytest.raises(Exception):
+                conn.execute(text("SELECT * FROM missing_table"))
+            conn.execute(text("SELECT 1"))
+        query_stats.stop(token)
+
+        assert stats.statements == 1
+
+    class TestQueryBudget:
+        def test_should_pass_within_budget(self, engine: Engine) -> None:
+            """Should not fail when the budget is respected"""
+            with query_stats.query_budget(1):
+                with engine.connect() as conn:
+                    conn.execute(text("SELECT 1"))
+
+        def test_should_fail_over_budget(self, engine: Engine) -> None:
+            """Should fail when more statements than budgeted are executed"""
+            with pytest.raises(AssertionError):
+                with query_stats.query_budget(1):
+                    with engine.connect() as conn:
+                        conn.execute(text("SELECT 1"))
+                        conn.execute(text("SELECT 2"))
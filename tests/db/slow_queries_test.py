@@ -0,0 +1,114 @@
+import asyncio
+from collections.abc import Generator
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy import Engine, create_engine, text
+
+from across_server.db import query_stats, slow_queries
+from across_server.db.config import config
+
+
+@pytest.fixture(autouse=True)
+def clear_slow_queries(monkeypatch: pytest.MonkeyPatch) -> Generator[None]:
+    monkeypatch.setattr(slow_queries, "_engine", None)
+    slow_queries.clear()
+    yield
+    slow_queries.clear()
+
+
+@pytest.fixture
+def explain_engine(monkeypatch: pytest.MonkeyPatch) -> MagicMock:
+    conn = AsyncMock()
+    conn.exec_driver_sql.return_value = MagicMock(
+        scalar=MagicMock(return_value=[{"Plan": {"Node Type": "Seq Scan"}}])
+    )
+    engine = MagicMock()
+    engine.connect.return_value.__aenter__.return_value = conn
+    slow_queries.instrument(engine)
+    return engine
+
+
+class TestFingerprint:
+    def test_should_ignore_whitespace(self) -> None:
+        """Should give reformatted statements the same fingerprint"""
+        assert slow_queries.fingerprint(
+            "SELECT *\n  FROM observation"
+        ) == slow_queries.fingerprint("SELECT * FROM observation")
+
+    def test_should_collapse_in_lists(self) -> None:
+        """Should group statements whose IN lists only differ in length"""
+        assert slow_queries.normalize(
+            "SELECT * FROM tle WHERE id IN ($1, $2, $3)"
+        ) == slow_queries.normalize("SELECT * FROM tle WHERE id IN ($1)")
+
+
+class TestParameterShape:
+    def test_should_report_types_not_values(self) -> None:
+        """Should describe bound parameters by type only"""
+        assert slow_queries.parameter_shape(("secret", 1), False) == ["str", "int"]
+
+    def test_should_report_batch_size(self) -> None:
+        """Should report the number of parameter sets of executemany"""
+        assert slow_queries.parameter_shape([(1,), (2,)], True) == ["2 x int"]
+
+
+class TestRecord:
+    def test_should_aggregate_by_fingerprint(self) -> None:
+        """Should aggregate executions of the same statement"""
+        slow_queries.record("INSERT INTO tle VALUES ($1)", (1,), 2_000, False)
+        slow_queries.record("INSERT  INTO tle VALUES ($1)", (2,), 1_000, False)
+
+        [slow] = slow_queries.statements()
+
+        assert (slow.count, slow.total_ns, slow.max_ns) == (2, 3_000, 2_000)
+
+    def test_should_record_statements_over_the_threshold(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Should record statements of an instrumented engine once slow"""
+        monkeypatch.setattr(config, "SLOW_QUERY_THRESHOLD_MS", 0)
+        engine: Engine = create_engine("sqlite://")
+        query_stats.instrument(engine)
+
+        with engine.connect() as conn:
+            conn.execute(text("SELECT :id"), {"id": 1})
+        engine.dispose()
+
+        [slow] = slow_queries.statements()
+
+        assert slow.statement == "SELECT ?"
+        assert slow.parameters == ["int"]
+
+    @pytest.mark.asyncio
+    async def test_should_explain_in_the_background(
+        self, explain_engine: MagicMock
+    ) -> None:
+        """Should capture the plan of a slow select off the request path"""
+        slow_queries.record("SELECT * FROM tle WHERE id = $1", (1,), 1_000, False)
+        await asyncio.gather(*slow_queries._tasks)
+
+        [slow] = slow_queries.statements()
+        conn = explain_engine.connect.return_value.__aenter__.return_value
+
+        conn.exec_driver_sql.assert_awaited_once_with(
+            "EXPLAIN (FORMAT JSON) SELECT * FROM tle WHERE id = $1", (1,)
+        )
+        assert slow.plan == [{"Plan": {"Node Type": "Seq Scan"}}]
+
+    @pytest.mark.asyncio
+    async def test_should_rate_limit_explains(self, explain_engine: MagicMock) -> None:
+        """Should explain a fingerprint at most once per interval"""
+        for _ in range(3):
+            slow_queries.record("SELECT 1", (), 1_000, False)
+            await asyncio.gather(*slow_queries._tasks)
+
+        explain_engine.connect.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_should_not_explain_writes(self, explain_engine: MagicMock) -> None:
+        """Should only explain statements without side effects"""
+        slow_queries.record("DELETE FROM tle", (), 1_000, False)
+
+        assert not slow_queries._tasks
+        explain_engine.connect.assert_not_called()
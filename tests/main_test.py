@@ -3,6 +3,8 @@ import pytest
 import pytest_asyncio
 from httpx import AsyncClient
 
+from across_server.auth.config import auth_config
+
 
 class TestTopLevelRoute:
     @pytest_asyncio.fixture(autouse=True)
@@ -26,3 +28,35 @@ class TestTopLevelRoute:
         res = await self.client.get(self.endpoint)
 
         assert res.json() == "ok"
+
+
+class TestMetricsRoute:
+    @pytest_asyncio.fixture(autouse=True)
+    async def setup(
+        self,
+        async_client: AsyncClient,
+    ) -> None:
+        self.client = async_client
+        self.endpoint = "/metrics"
+
+    @pytest.mark.asyncio
+    async def test_should_return_prometheus_text(self) -> None:
+        """Should return metrics in the prometheus text format"""
+        await self.client.get("/health")
+
+        res = await self.client.get(self.endpoint)
+
+        assert res.status_code == fastapi.status.HTTP_200_OK
+        assert res.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert "http_request_duration_seconds_bucket" in res.text
+
+    @pytest.mark.asyncio
+    async def test_should_hide_metrics_from_other_hosts(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Should return a 404 to peers not listed in ALLOWED_IPS"""
+        monkeypatch.setattr(auth_config, "ALLOWED_IPS", ["10.0.0.1"])
+
+        res = await self.client.get(self.endpoint)
+
+        assert res.status_code == fastapi.status.HTTP_404_NOT_FOUND
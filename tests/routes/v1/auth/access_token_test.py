@@ -0,0 +1,48 @@
+import uuid
+
+import pytest
+
+from across_server.auth import schemas
+from across_server.auth.tokens import AccessToken
+
+
+class TestAccessToken:
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.admin_group = schemas.Group(
+            id=uuid.uuid4(), scopes=["group:all:write"], is_admin=True
+        )
+        self.auth_user = schemas.AuthUser(
+            id=uuid.uuid4(),
+            scopes=["user:read"],
+            groups=[self.admin_group, schemas.Group(id=uuid.uuid4(), scopes=[])],
+            type=schemas.PrincipalType.SERVICE_ACCOUNT,
+            first_name="Sandy",
+            last_name="Cheeks",
+            username="SandyTheSquirrel",
+        )
+
+    def test_should_not_embed_version_by_default(self) -> None:
+        """Should issue tokens without a permissions version when none is given"""
+        token_data = AccessToken().to_encode(self.auth_user)
+        assert token_data.ver is None
+        assert token_data.admin_groups == []
+
+    def test_should_not_embed_profile_by_default(self) -> None:
+        """Should leave the profile to the database when no version is given"""
+        token_data = AccessToken().to_encode(self.auth_user)
+        assert token_data.first_name is None
+        assert token_data.last_name is None
+        assert token_data.username is None
+
+    def test_should_embed_admin_groups_with_version(self) -> None:
+        """Should embed the administered group ids in self-contained tokens"""
+        token_data = AccessToken().to_encode(self.auth_user, (1, 2))
+        assert token_data.admin_groups == [str(self.admin_group.id)]
+
+    def test_should_rebuild_auth_user_from_encoded_token(self) -> None:
+        """Should rebuild an identical principal, profile included, from a self-contained token"""
+        access_token = AccessToken()
+        encoded = access_token.encode(access_token.to_encode(self.auth_user, (1, 2)))
+        token_data = access_token.decode(encoded)
+        assert access_token.to_auth_user(token_data) == self.auth_user
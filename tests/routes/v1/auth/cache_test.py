@@ -0,0 +1,58 @@
+import uuid
+
+import pytest
+
+from across_server.auth import schemas
+from across_server.auth.cache import AuthUserCache
+
+
+class TestAuthUserCache:
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.cache = AuthUserCache(max_size=10, ttl=60)
+        self.auth_user = schemas.AuthUser(
+            id=uuid.uuid4(),
+            scopes=["system:user:write"],
+            groups=[],
+            type=schemas.PrincipalType.USER,
+        )
+
+    def test_should_return_cached_principal(self) -> None:
+        """Should return a principal stored under the current version"""
+        self.cache.set(self.auth_user, self.cache.version(self.auth_user.id))
+        assert self.cache.get(self.auth_user.id) == self.auth_user
+
+    def test_should_return_copy_of_cached_principal(self) -> None:
+        """Should not let callers mutate the cached principal"""
+        self.cache.set(self.auth_user, self.cache.version(self.auth_user.id))
+        cached = self.cache.get(self.auth_user.id)
+        assert cached is not None
+        cached.scopes.append("group:all:write")
+        assert self.cache.get(self.auth_user.id) == self.auth_user
+
+    def test_should_miss_after_principal_is_invalidated(self) -> None:
+        """Should miss once the principal's version is bumped"""
+        self.cache.set(self.auth_user, self.cache.version(self.auth_user.id))
+        self.cache.invalidate(self.auth_user.id)
+        assert self.cache.get(self.auth_user.id) is None
+
+    def test_should_miss_after_all_principals_are_invalidated(self) -> None:
+        """Should miss once the global epoch is bumped"""
+        self.cache.set(self.auth_user, self.cache.version(self.auth_user.id))
+        self.cache.invalidate_all()
+        assert self.cache.get(self.auth_user.id) is None
+
+    def test_should_not_store_principal_loaded_before_invalidation(self) -> None:
+        """Should drop a principal resolved under a version that has since changed"""
+        version = self.cache.version(self.auth_user.id)
+        self.cache.invalidate(self.auth_user.id)
+        self.cache.set(self.auth_user, version)
+        assert self.cache.get(self.auth_user.id) is None
+
+    def test_should_keep_other_principals_when_one_is_invalidated(self) -> None:
+        """Should only invalidate the requested principal"""
+        other = self.auth_user.model_copy(update={"id": uuid.uuid4()})
+        self.cache.set(self.auth_user, self.cache.version(self.auth_user.id))
+        self.cache.set(other, self.cache.version(other.id))
+        self.cache.invalidate(self.auth_user.id)
+        assert self.cache.get(other.id) == other
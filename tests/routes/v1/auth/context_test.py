@@ -0,0 +1,59 @@
+import uuid
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+
+from across_server.auth import context, schemas
+from across_server.auth.tokens import AccessToken
+
+
+class TestRequestPrincipal:
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.auth_user = schemas.AuthUser(
+            id=uuid.uuid4(),
+            scopes=[],
+            groups=[],
+            type=schemas.PrincipalType.SERVICE_ACCOUNT,
+        )
+        access_token = AccessToken()
+        self.token = access_token.encode(access_token.to_encode(self.auth_user))
+        self.scope = {
+            "type": "http",
+            "headers": [(b"authorization", f"Bearer {self.token}".encode())],
+        }
+
+    def test_should_return_principal_of_bearer_token(self) -> None:
+        """Should expose the id and type of the bearer token"""
+        principal = context.get_request_principal(self.scope)
+        assert (principal.id, principal.type) == (
+            str(self.auth_user.id),
+            schemas.PrincipalType.SERVICE_ACCOUNT,
+        )
+
+    def test_should_return_anonymous_principal_without_token(self) -> None:
+        """Should return an empty principal when no bearer token is sent"""
+        principal = context.get_request_principal({"type": "http", "headers": []})
+        assert principal.id is None and principal.error is None
+
+    def test_should_decode_token_once_per_scope(self) -> None:
+        """Should reuse the memoized decode for the request's own token"""
+        with patch.object(AccessToken, "decode", wraps=AccessToken().decode) as decode:
+            context.get_request_principal(self.scope)
+            context.decode_access_token(self.token, self.scope)
+            decode.assert_called_once()
+
+    def test_should_decode_token_that_is_not_the_bearer_token(self) -> None:
+        """Should decode a token other than the request's bearer token"""
+        context.get_request_principal(self.scope)
+        with pytest.raises(HTTPException):
+            context.decode_access_token("not-a-token", self.scope)
+
+    def test_should_raise_decode_error_for_invalid_bearer_token(self) -> None:
+        """Should re-raise the 401 of an invalid bearer token to every caller"""
+        scope = {"type": "http", "headers": [(b"authorization", b"Bearer invalid")]}
+        for _ in range(2):
+            with pytest.raises(HTTPException) as exception:
+                context.decode_access_token("invalid", scope)
+            assert exception.value.status_code == 401
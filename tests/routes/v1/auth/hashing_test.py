@@ -0,0 +1,21 @@
+import argon2
+import pytest
+
+from across_server.auth import hashing
+
+
+class TestVerify:
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.hash = hashing.password_hasher.hash("PASSWORD")
+
+    @pytest.mark.asyncio
+    async def test_should_return_true_when_password_matches(self) -> None:
+        """Should verify a matching password in a worker thread"""
+        assert await hashing.verify(self.hash, "PASSWORD") is True
+
+    @pytest.mark.asyncio
+    async def test_should_raise_when_password_mismatches(self) -> None:
+        """Should raise the argon2 mismatch error for a wrong password"""
+        with pytest.raises(argon2.exceptions.VerifyMismatchError):
+            await hashing.verify(self.hash, "WRONG!PASSWORD")
@@ -1,15 +1,29 @@
 import datetime
 import uuid
+from collections.abc import Generator
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 from fastapi import HTTPException
 from fastapi.security import HTTPBasicCredentials
+from sqlalchemy import Engine, create_engine
+from sqlalchemy.orm import Session
 
-from across_server.auth import schemas
+from across_server.auth import schemas, tokens, versions
+from across_server.auth.cache import auth_user_cache
+from across_server.auth.config import auth_config
 from across_server.auth.service import AuthService
+from across_server.auth.tokens.access_token import AccessTokenData
 from across_server.core.exceptions import AcrossHTTPException
-from across_server.db.models import Group, GroupRole, ServiceAccount, User
+from across_server.db import models, query_stats
+from across_server.db.models import (
+    Group,
+    GroupRole,
+    Permission,
+    Role,
+    ServiceAccount,
+    User,
+)
 
 
 class TestAuthService:
@@ -203,3 +217,238 @@ class TestAuthService:
                         password="PASSWORD",
                     )
                 )
+
+    class TestServiceAccountQuery:
+        @pytest.fixture(autouse=True)
+        def patch_datetime_now(self) -> None:
+            """The real clock, as the database binds real datetimes"""
+
+        @pytest.fixture
+        def service_account_engine(self) -> Generator[Engine]:
+            """An in-memory database holding the service account permission graph"""
+            engine = create_engine("sqlite://").execution_options(
+                schema_translate_map={models.base_metadata.schema: None}
+            )
+            query_stats.instrument(engine)
+            models.Base.metadata.create_all(
+                engine,
+                tables=[
+                    table
+                    for table in models.Base.metadata.sorted_tables
+                    if table.name
+                    in {
+                        "permission",
+                        "role",
+                        "group",
+                        "group_role",
+                        "service_account",
+                        "user",
+                        "user_service_account",
+                        "service_account_role",
+                        "service_account_group_role",
+                        "role_permission",
+                        "group_role_permission",
+                    }
+                ],
+            )
+
+            yield engine
+
+            engine.dispose()
+
+        def test_should_load_service_account_in_single_query(
+            self,
+            service_account_engine: Engine,
+            fixed_expiration: datetime.datetime,
+        ) -> None:
+            """Should load everything the principal is built from in one statement"""
+            with Session(service_account_engine, expire_on_commit=False) as session:
+                service_account = ServiceAccount(
+                    name="test service account",
+                    expiration=fixed_expiration,
+                    expiration_duration=30,
+                    hashed_key="hashed",
+                    user=[
+                        User(
+                            username="SandyTheSquirrel",
+                            first_name="Sandy",
+                            last_name="Cheeks",
+                            email="sandy@treedome.space",
+                        )
+                    ],
+                    roles=[
+                        Role(
+                            name="role",
+                            permissions=[Permission(name="observation:read")],
+                        )
+                    ],
+                    group_roles=[
+                        GroupRole(
+                            name="Schedule Operations",
+                            group=Group(name="test group", short_name="test"),
+                            permissions=[Permission(name="group:schedule:write")],
+                        )
+                    ],
+                )
+                session.add(service_account)
+                session.commit()
+
+            with Session(service_account_engine) as session:
+                with query_stats.query_budget(1):
+                    loaded = (
+                        session.execute(
+                            AuthService.service_account_query(service_account.id)
+                        )
+                        .unique()
+                        .scalar_one()
+                    )
+                    auth_user = AuthService(session)._build_service_account_auth_user(  # type: ignore[arg-type]
+                        loaded
+                    )
+
+            assert auth_user.username == "SandyTheSquirrel"
+            assert auth_user.scopes == ["observation:read"]
+            assert auth_user.groups[0].scopes == ["group:schedule:write"]
+
+    class TestAuthenticateJwt:
+        @pytest.fixture(autouse=True)
+        def setup(self, fake_user: User) -> None:
+            self.token = tokens.AccessToken().encode(
+                AccessTokenData(
+                    sub=str(fake_user.id),
+                    scopes=[],
+                    groups=[],
+                    type=schemas.PrincipalType.USER,
+                )
+            )
+
+        @pytest.mark.asyncio
+        async def test_should_return_auth_user(
+            self,
+            mock_db: AsyncMock,
+            mock_scalar_one_or_none: MagicMock,
+            fake_user: User,
+        ) -> None:
+            """Should resolve the principal from the database on a cache miss"""
+            mock_scalar_one_or_none.return_value = fake_user
+            service = AuthService(mock_db)
+            auth_user = await service.authenticate_jwt(self.token)
+            assert str(auth_user.id) == str(fake_user.id)
+
+        @pytest.mark.asyncio
+        async def test_should_not_query_database_when_principal_is_cached(
+            self,
+            mock_db: AsyncMock,
+            mock_scalar_one_or_none: MagicMock,
+            fake_user: User,
+        ) -> None:
+            """Should serve a repeat authentication from the cache"""
+            mock_scalar_one_or_none.return_value = fake_user
+            service = AuthService(mock_db)
+            await service.authenticate_jwt(self.token)
+            await service.authenticate_jwt(self.token)
+            mock_db.execute.assert_awaited_once()
+
+        @pytest.mark.asyncio
+        async def test_should_query_database_when_principal_is_invalidated(
+            self,
+            mock_db: AsyncMock,
+            mock_scalar_one_or_none: MagicMock,
+            fake_user: User,
+        ) -> None:
+            """Should reload the principal after its cache entry is invalidated"""
+            mock_scalar_one_or_none.return_value = fake_user
+            service = AuthService(mock_db)
+            await service.authenticate_jwt(self.token)
+            auth_user_cache.invalidate(uuid.UUID(str(fake_user.id)))
+            await service.authenticate_jwt(self.token)
+            assert mock_db.execute.await_count == 2
+
+    class TestSelfContainedAccessToken:
+        @pytest.fixture(autouse=True)
+        def setup(
+            self,
+            monkeypatch: pytest.MonkeyPatch,
+            mock_scalar_one_or_none: MagicMock,
+            fake_user: User,
+        ) -> None:
+            monkeypatch.setattr(auth_config, "SELF_CONTAINED_ACCESS_TOKENS", True)
+            # the principal as currently in the database
+            mock_scalar_one_or_none.return_value = fake_user
+            self.auth_user = schemas.AuthUser(
+                id=uuid.UUID(str(fake_user.id)),
+                scopes=["user:read"],
+                groups=[
+                    schemas.Group(
+                        id=uuid.uuid4(), scopes=["group:all:write"], is_admin=True
+                    )
+                ],
+                type=schemas.PrincipalType.USER,
+            )
+
+        @pytest.mark.asyncio
+        async def test_should_embed_permissions_version(
+            self,
+            mock_db: AsyncMock,
+            mock_tuples: MagicMock,
+        ) -> None:
+            """Should issue access tokens carrying the current permissions version"""
+            mock_tuples.return_value.all.return_value = [(self.auth_user.id, 3)]
+            service = AuthService(mock_db)
+            auth_tokens = await service.get_auth_tokens(self.auth_user)
+            token_data = tokens.AccessToken().decode(auth_tokens["access"])
+            assert token_data.ver == (0, 3)
+
+        @pytest.mark.asyncio
+        async def test_should_authorize_without_loading_principal(
+            self,
+            mock_db: AsyncMock,
+            mock_tuples: MagicMock,
+        ) -> None:
+            """Should rebuild the principal from the token when its version is current"""
+            mock_tuples.return_value.all.return_value = []
+            service = AuthService(mock_db)
+            auth_tokens = await service.get_auth_tokens(self.auth_user)
+            issued = mock_db.execute.await_count
+            auth_user = await service.authenticate_jwt(auth_tokens["access"])
+            assert auth_user == await service.get_authenticated_user(
+                user_id=self.auth_user.id
+            )
+            assert mock_db.execute.await_count == issued + 1
+
+        @pytest.mark.asyncio
+        async def test_should_load_principal_when_version_is_stale(
+            self,
+            mock_db: AsyncMock,
+            mock_tuples: MagicMock,
+            mock_scalar_one_or_none: MagicMock,
+            fake_user: User,
+        ) -> None:
+            """Should fall back to the database once the permissions version moved on"""
+            mock_tuples.return_value.all.return_value = []
+            service = AuthService(mock_db)
+            auth_tokens = await service.get_auth_tokens(self.auth_user)
+            await versions.bump(mock_db, self.auth_user.id)
+            mock_tuples.return_value.all.return_value = [(self.auth_user.id, 1)]
+            auth_user = await service.authenticate_jwt(auth_tokens["access"])
+            assert auth_user.scopes != self.auth_user.scopes
+
+        @pytest.mark.asyncio
+        async def test_should_reload_principal_bumped_before_issue(
+            self,
+            mock_db: AsyncMock,
+            mock_tuples: MagicMock,
+        ) -> None:
+            """Should not issue permissions revoked after the principal was loaded"""
+            # loaded, or cached, with "user:read" before a role change revoked it
+            service = AuthService(mock_db)
+            await versions.bump(mock_db, self.auth_user.id)
+            mock_tuples.return_value.all.return_value = [(self.auth_user.id, 1)]
+
+            auth_tokens = await service.get_auth_tokens(self.auth_user)
+            auth_user = await service.authenticate_jwt(auth_tokens["access"])
+
+            token_data = tokens.AccessToken().decode(auth_tokens["access"])
+            assert token_data.ver == (0, 1)
+            assert "user:read" not in token_data.scopes
+            assert "user:read" not in auth_user.scopes
@@ -21,6 +21,34 @@ class TestInstrumentService:
             with pytest.raises(InstrumentNotFoundException):
                 await service.get(uuid4())
 
+        class TestGetByIds:
+            @pytest.mark.asyncio
+            async def test_should_return_not_found_exception_when_any_does_not_exist(
+                self, mock_db: AsyncMock, mock_result: AsyncMock
+            ) -> None:
+                """Should raise a not found exception when any instrument does not exist"""
+                instrument = MagicMock(id=uuid4())
+                mock_result.scalars.return_value.all.return_value = [instrument]
+
+                service = InstrumentService(mock_db)
+                with pytest.raises(InstrumentNotFoundException):
+                    await service.get_by_ids([instrument.id, uuid4()])
+
+            @pytest.mark.asyncio
+            async def test_should_return_instruments_in_order_of_ids(
+                self, mock_db: AsyncMock, mock_result: AsyncMock
+            ) -> None:
+                """Should return the instruments in the order of the given ids"""
+                instruments = [MagicMock(id=uuid4()), MagicMock(id=uuid4())]
+                mock_result.scalars.return_value.all.return_value = instruments
+
+                service = InstrumentService(mock_db)
+                values = await service.get_by_ids(
+                    [instruments[1].id, instruments[0].id]
+                )
+                assert values == [instruments[1], instruments[0]]
+                mock_db.execute.assert_called_once()
+
         class TestGetMany:
             @pytest.mark.asyncio
             async def test_should_return_empty_list_when_nothing_matches_params(
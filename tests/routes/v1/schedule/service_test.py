@@ -15,7 +15,10 @@ from across_server.routes.v1.schedule.schemas import (
     ScheduleCreateMany,
     ScheduleRead,
 )
-from across_server.routes.v1.schedule.service import ScheduleService
+from across_server.routes.v1.schedule.service import (
+    ScheduleService,
+    observations_ingested,
+)
 
 
 class TestScheduleService:
@@ -90,6 +93,30 @@ class TestScheduleService:
 
             mock_db.commit.assert_called_once()
 
+        @pytest.mark.asyncio
+        async def test_should_count_ingested_observations(
+            self,
+            mock_db: AsyncMock,
+            schedule_create_example: ScheduleCreate,
+            instrument_model_example: InstrumentModel,
+            mock_result: AsyncMock,
+        ) -> None:
+            """Should count the observations inserted with the schedule"""
+            mock_result.scalars.return_value.all.return_value = []
+            mock_db.execute.return_value = mock_result
+            service = ScheduleService(mock_db)
+            before = observations_ingested.value()
+
+            await service.create(
+                schedule_create_example,
+                instruments=[instrument_model_example],
+                created_by_id=uuid4(),
+            )
+
+            assert observations_ingested.value() == before + len(
+                schedule_create_example.observations
+            )
+
     class TestGet:
         @pytest.mark.asyncio
         async def test_should_return_not_found_exception_when_does_not_exist(
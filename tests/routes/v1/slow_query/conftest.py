@@ -0,0 +1,32 @@
+from collections.abc import Generator
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import FastAPI
+
+from across_server.auth import strategies
+from across_server.db import slow_queries
+
+
+@pytest.fixture(autouse=True)
+def recorded_slow_query() -> Generator[None]:
+    slow_queries.clear()
+    slow_queries.record("DELETE FROM tle WHERE id = $1", (1,), 2_000_000, False)
+    yield
+    slow_queries.clear()
+
+
+@pytest.fixture(scope="function", autouse=True)
+def dep_override(
+    app: FastAPI,
+    fastapi_dep: MagicMock,
+    mock_global_access: MagicMock,
+) -> Generator:
+    overrider = fastapi_dep(app)
+
+    with overrider.override(
+        {
+            strategies.global_access: lambda: mock_global_access,
+        }
+    ):
+        yield overrider
@@ -0,0 +1,28 @@
+import fastapi
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+
+
+class TestSlowQueryRouter:
+    class TestGetMany:
+        @pytest_asyncio.fixture(autouse=True)
+        async def setup(self, async_client: AsyncClient) -> None:
+            self.client = async_client
+            self.endpoint = "/slow-query/"
+
+        @pytest.mark.asyncio
+        async def test_should_return_200(self) -> None:
+            """Should return a 200 when successful"""
+            res = await self.client.get(self.endpoint)
+            assert res.status_code == fastapi.status.HTTP_200_OK
+
+        @pytest.mark.asyncio
+        async def test_should_return_statements_by_fingerprint(self) -> None:
+            """Should return the recorded statements without bound values"""
+            res = await self.client.get(self.endpoint)
+            [slow] = res.json()
+
+            assert slow["statement"] == "DELETE FROM tle WHERE id = $1"
+            assert slow["parameters"] == ["int"]
+            assert slow["count"] == 1
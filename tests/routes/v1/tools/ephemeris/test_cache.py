@@ -0,0 +1,124 @@
+from datetime import datetime, timezone
+from typing import Any
+
+import astropy.units as u  # type: ignore[import-untyped]
+import numpy as np
+import pytest
+from across.tools.ephemeris import Ephemeris
+from astropy.coordinates import SkyCoord  # type: ignore[import-untyped]
+from astropy.time import Time, TimeDelta  # type: ignore[import-untyped]
+
+from across_server.routes.v1.tools.ephemeris.cache import (
+    CachedEphemeris,
+    EphemerisCache,
+    sizeof,
+)
+
+STEP_SIZE = 60
+
+
+class FakeCompute:
+    """Computes an ephemeris whose values are derived from the timestamps"""
+
+    def __init__(self) -> None:
+        self.calls: list[tuple[datetime, datetime]] = []
+
+    def __call__(self, *, begin: datetime, end: datetime) -> Ephemeris:
+        self.calls.append((begin, end))
+        begin_unix = Time(begin).unix // STEP_SIZE * STEP_SIZE
+        end_unix = Time(end).unix // STEP_SIZE * STEP_SIZE
+        timestamp = Time(
+            np.arange(begin_unix, end_unix + STEP_SIZE, STEP_SIZE), format="unix"
+        )
+        series: dict[str, Any] = {
+            "timestamp": timestamp,
+            "sun": SkyCoord(
+                ra=(timestamp.unix / STEP_SIZE % 360) * u.deg,
+                dec=0 * u.deg,
+                frame="gcrs",
+                obstime=timestamp,
+            ),
+            "earth_radius_angle": (timestamp.unix / STEP_SIZE % 90) * u.deg,
+            # the same over the whole ephemeris
+            "longitude": 10 * u.deg,
+        }
+        return CachedEphemeris(TimeDelta(STEP_SIZE * u.s), series)
+
+
+def hour(value: float) -> datetime:
+    return datetime.fromtimestamp(
+        datetime(2025, 1, 1, tzinfo=timezone.utc).timestamp() + value * 3600,
+        tz=timezone.utc,
+    )
+
+
+class TestEphemerisCache:
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.cache = EphemerisCache(max_bytes=2**30, chunk_seconds=3600)
+        self.compute = FakeCompute()
+
+    def test_should_equal_ephemeris_computed_at_once(self) -> None:
+        """Should stitch chunks into the ephemeris computed over the range"""
+        self.cache.get(("test",), hour(0.5), hour(1.5), STEP_SIZE, self.compute)
+
+        ephemeris = self.cache.get(
+            ("test",), hour(0.25), hour(3.75), STEP_SIZE, self.compute
+        )
+        expected = FakeCompute()(begin=hour(0.25), end=hour(3.75))
+
+        assert len(ephemeris) == len(expected)
+        assert np.allclose(ephemeris.timestamp.unix, expected.timestamp.unix)
+        assert np.allclose(ephemeris.sun.ra.deg, expected.sun.ra.deg)
+        assert np.allclose(ephemeris.sun.obstime.unix, expected.sun.obstime.unix)
+        assert np.allclose(ephemeris.earth_radius_angle, expected.earth_radius_angle)
+        assert ephemeris.longitude == expected.longitude
+
+    def test_should_index_stitched_ephemeris(self) -> None:
+        """Should index the stitched ephemeris from the start of the range"""
+        ephemeris = self.cache.get(
+            ("test",), hour(0.5), hour(2.5), STEP_SIZE, self.compute
+        )
+
+        assert ephemeris.index(Time(hour(2))) == 90
+
+    def test_should_only_compute_missing_chunks(self) -> None:
+        """Should compute the chunks not cached by an overlapping range"""
+        self.cache.get(("test",), hour(0), hour(2), STEP_SIZE, self.compute)
+        self.compute.calls.clear()
+
+        self.cache.get(("test",), hour(1.5), hour(3.5), STEP_SIZE, self.compute)
+
+        assert self.compute.calls == [(hour(2), hour(4))]
+
+    def test_should_compute_contiguous_missing_chunks_at_once(self) -> None:
+        """Should compute consecutive missing chunks in one computation"""
+        self.cache.get(("test",), hour(0.5), hour(3.5), STEP_SIZE, self.compute)
+
+        assert self.compute.calls == [(hour(0), hour(4))]
+
+    def test_should_not_compute_next_chunk_for_range_ending_on_boundary(
+        self,
+    ) -> None:
+        """Should serve a range ending on a chunk boundary from one chunk"""
+        ephemeris = self.cache.get(("test",), hour(0), hour(1), STEP_SIZE, self.compute)
+
+        assert self.compute.calls == [(hour(0), hour(1))]
+        assert len(ephemeris) == 61
+
+    def test_should_keep_ephemerides_apart_by_key(self) -> None:
+        """Should compute again for a different key"""
+        self.cache.get(("test",), hour(0), hour(1), STEP_SIZE, self.compute)
+        self.cache.get(("other",), hour(0), hour(1), STEP_SIZE, self.compute)
+
+        assert len(self.compute.calls) == 2
+
+    def test_should_stay_within_max_bytes(self) -> None:
+        """Should evict chunks once their size exceeds max_bytes"""
+        chunk = FakeCompute()(begin=hour(0), end=hour(1))
+        cache = EphemerisCache(max_bytes=sizeof(chunk) * 2, chunk_seconds=3600)
+
+        cache.get(("test",), hour(0), hour(3), STEP_SIZE, self.compute)
+
+        assert len(cache.chunks) == 2
+        assert cache.chunks.size <= sizeof(chunk) * 2
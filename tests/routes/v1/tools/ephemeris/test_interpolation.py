@@ -0,0 +1,229 @@
+from datetime import datetime, timezone
+
+import astropy.units as u  # type: ignore[import-untyped]
+import numpy as np
+import pytest
+from astropy.constants import R_earth  # type: ignore[import-untyped]
+from astropy.coordinates import (  # type: ignore[import-untyped]
+    GCRS,
+    CartesianDifferential,
+    CartesianRepresentation,
+    EarthLocation,
+    SkyCoord,
+)
+from astropy.time import Time, TimeDelta  # type: ignore[import-untyped]
+
+from across_server.core.config import config
+from across_server.core.enums.ephemeris_type import EphemerisType
+from across_server.routes.v1.tools.ephemeris.cache import CachedEphemeris
+from across_server.routes.v1.tools.ephemeris.interpolation import (
+    INTERPOLATION_POINTS,
+    coarse_range,
+    coarse_step,
+    interpolate,
+)
+
+# a circular low Earth orbit of 88 minutes, the fastest motion interpolated
+ORBIT_RADIUS = 6700.0
+ORBIT_RATE = 2 * np.pi / (88 * 60)
+INCLINATION = 0.5
+EARTH_ROTATION_RATE = 7.292e-5
+
+BEGIN = datetime(2025, 1, 1, tzinfo=timezone.utc)
+END = datetime(2025, 1, 1, 6, tzinfo=timezone.utc)
+
+
+def _body(
+    timestamp: Time,
+    position: np.ndarray,
+    velocity: np.ndarray,
+    distance: float,
+    period: float,
+    phase: float,
+) -> SkyCoord:
+    angle = timestamp.unix * 2 * np.pi / period + phase
+    geocentric = np.stack(
+        [distance * np.cos(angle), distance * np.sin(angle), np.zeros_like(angle)]
+    )
+    return SkyCoord(
+        CartesianRepresentation((geocentric - position) * u.km),
+        frame=GCRS(
+            obstime=timestamp,
+            obsgeoloc=CartesianRepresentation(position * u.km),
+            obsgeovel=CartesianRepresentation(velocity * u.km / u.s),
+        ),
+    )
+
+
+def orbit(begin: datetime, end: datetime, step_size: int) -> CachedEphemeris:
+    """An ephemeris of a spacecraft in a circular low Earth orbit"""
+    timestamp = Time(
+        np.arange(
+            Time(begin).unix // step_size * step_size,
+            Time(end).unix // step_size * step_size + step_size,
+            step_size,
+        ),
+        format="unix",
+    )
+    phase = timestamp.unix * ORBIT_RATE
+    position = ORBIT_RADIUS * np.stack(
+        [
+            np.cos(phase),
+            np.sin(phase) * np.cos(INCLINATION),
+            np.sin(phase) * np.sin(INCLINATION),
+        ]
+    )
+    velocity = (
+        ORBIT_RADIUS
+        * ORBIT_RATE
+        * np.stack(
+            [
+                -np.sin(phase),
+                np.cos(phase) * np.cos(INCLINATION),
+                np.cos(phase) * np.sin(INCLINATION),
+            ]
+        )
+    )
+    rotation = timestamp.unix * EARTH_ROTATION_RATE
+    earth_location = EarthLocation.from_geocentric(
+        position[0] * np.cos(rotation) + position[1] * np.sin(rotation),
+        -position[0] * np.sin(rotation) + position[1] * np.cos(rotation),
+        position[2],
+        unit=u.km,
+    )
+    return CachedEphemeris(
+        TimeDelta(step_size * u.s),
+        {
+            "timestamp": timestamp,
+            "gcrs": SkyCoord(
+                CartesianRepresentation(position * u.km).with_differentials(
+                    CartesianDifferential(velocity * u.km / u.s)
+                ),
+                frame=GCRS(obstime=timestamp),
+            ),
+            "earth_location": earth_location,
+            "sun": _body(timestamp, position, velocity, 1.496e8, 3.156e7, 1),
+            "moon": _body(timestamp, position, velocity, 384400, 2.36e6, 2),
+            "earth": _body(timestamp, position, velocity, 0, 1, 0),
+            "longitude": earth_location.lon,
+            "latitude": earth_location.lat,
+            "height": earth_location.height,
+        },
+    )
+
+
+def interpolated(step_size: int, coarse: int) -> CachedEphemeris:
+    return interpolate(
+        orbit(*coarse_range(BEGIN, END, coarse), coarse), BEGIN, END, step_size
+    )
+
+
+class TestCoarseStep:
+    @pytest.mark.parametrize("ephemeris_type", list(EphemerisType))
+    def test_should_not_interpolate_by_default(
+        self, ephemeris_type: EphemerisType
+    ) -> None:
+        """Should compute every type at the requested step unless configured"""
+        assert coarse_step(ephemeris_type, 60) == 60
+
+    def test_should_return_interpolation_step_of_type(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Should compute fine steps at the interpolation step of the type"""
+        monkeypatch.setattr(config, "EPHEMERIS_INTERPOLATION_STEP_SIZES", {"tle": 300})
+
+        assert coarse_step(EphemerisType.TLE, 60) == 300
+
+    @pytest.mark.parametrize("step_size", [300, 3600, 120 + 1])
+    def test_should_not_interpolate_coarse_or_misaligned_steps(
+        self, step_size: int, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Should keep steps at least as coarse, or not dividing the coarse step"""
+        monkeypatch.setattr(config, "EPHEMERIS_INTERPOLATION_STEP_SIZES", {"tle": 300})
+
+        assert coarse_step(EphemerisType.TLE, step_size) == step_size
+
+    def test_should_not_interpolate_types_without_step(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Should keep the step of types without an interpolation step"""
+        monkeypatch.setattr(config, "EPHEMERIS_INTERPOLATION_STEP_SIZES", {"tle": 300})
+
+        assert coarse_step(EphemerisType.JPL, 60) == 60
+
+
+class TestCoarseRange:
+    def test_should_pad_range_by_half_stencil(self) -> None:
+        """Should pad the range by half the interpolation points on each side"""
+        begin, end = coarse_range(BEGIN, END, 300)
+
+        assert (BEGIN - begin).total_seconds() == 300 * INTERPOLATION_POINTS // 2
+        assert (end - END).total_seconds() == 300 * INTERPOLATION_POINTS // 2
+
+
+class TestInterpolate:
+    def test_should_return_fine_steps_over_range(self) -> None:
+        """Should return the points of the fine step grid from begin to end"""
+        ephemeris = interpolated(60, 300)
+        expected = orbit(BEGIN, END, 60)
+
+        assert len(ephemeris) == len(expected)
+        assert np.allclose(ephemeris.timestamp.unix, expected.timestamp.unix)
+        assert ephemeris.index(Time(END)) == len(expected) - 1
+
+    def test_should_be_exact_at_coarse_points(self) -> None:
+        """Should return the coarse positions at the coarse points"""
+        ephemeris = interpolated(60, 300)
+        expected = orbit(BEGIN, END, 300)
+
+        assert np.allclose(
+            ephemeris.gcrs.cartesian.xyz[:, ::5].to_value(u.m),
+            expected.gcrs.cartesian.xyz.to_value(u.m),
+            rtol=0,
+            atol=1e-6,
+        )
+
+    def test_should_interpolate_positions_within_5_m(self) -> None:
+        """Should interpolate a low Earth orbit from 300 s steps within 5 m"""
+        ephemeris = interpolated(60, 300)
+        expected = orbit(BEGIN, END, 60)
+
+        for name in ("gcrs", "sun", "moon", "earth"):
+            error = (
+                getattr(ephemeris, name).cartesian.xyz
+                - getattr(expected, name).cartesian.xyz
+            )
+            assert np.abs(error).max() < 5 * u.m
+        assert (
+            np.abs(ephemeris.earth_location.x - expected.earth_location.x).max()
+            < 5 * u.m
+        )
+
+    def test_should_interpolate_directions_within_0_0001_deg(self) -> None:
+        """Should interpolate the directions of the bodies within 0.0001 degrees"""
+        ephemeris = interpolated(60, 300)
+        expected = orbit(BEGIN, END, 60)
+
+        for name in ("sun", "moon", "earth"):
+            separation = getattr(ephemeris, name).separation(getattr(expected, name))
+            assert separation.max() < 1e-4 * u.deg
+        assert ephemeris.latitude is not None and expected.latitude is not None
+        assert np.abs(ephemeris.latitude - expected.latitude).max() < 1e-4 * u.deg
+
+    def test_should_interpolate_velocities(self) -> None:
+        """Should interpolate the velocities with the positions"""
+        ephemeris = interpolated(60, 300)
+        expected = orbit(BEGIN, END, 60)
+
+        error = ephemeris.gcrs.velocity.d_xyz - expected.gcrs.velocity.d_xyz
+        assert np.abs(error).max() < 1 * u.cm / u.s
+
+    def test_should_derive_angular_radii_from_positions(self) -> None:
+        """Should compute the angular radii from the interpolated distances"""
+        ephemeris = interpolated(60, 300)
+
+        assert np.allclose(
+            ephemeris.earth_radius_angle.to_value(u.deg),
+            np.degrees(np.arcsin(R_earth.to_value(u.km) / ORBIT_RADIUS)),
+        )
+        assert ephemeris.distance.shape == (len(ephemeris),)
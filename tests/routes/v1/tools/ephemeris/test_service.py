@@ -1,3 +1,4 @@
+import asyncio
 from datetime import datetime
 from typing import Any, Callable
 from unittest.mock import AsyncMock, MagicMock
@@ -13,6 +14,7 @@ from across.tools.ephemeris import (
 )
 
 import across_server.routes.v1.tools.ephemeris.service as service_mod
+from across_server.core.config import config
 from across_server.routes.v1.observatory import schemas as observatory_schemas
 from across_server.routes.v1.observatory.exceptions import ObservatoryNotFoundException
 from across_server.routes.v1.tle.exceptions import TLENotFoundException
@@ -195,3 +197,252 @@ class TestEphemerisService:
                 fake_date_range["end"],
             )
             assert expected_compute_fn in mock_partial.call_args_list[0][0]
+
+        @pytest.mark.asyncio
+        async def test_should_compute_fine_steps_at_coarse_step(
+            self,
+            mock_db: AsyncMock,
+            fake_observatory_id: UUID,
+            fake_date_range: dict[str, datetime],
+            fake_observatory_model: MagicMock,
+            fake_ground_ephemeris_type: observatory_schemas.ObservatoryEphemerisType,
+            mock_tle_service: AsyncMock,
+            mock_observatory_service: AsyncMock,
+            monkeypatch: pytest.MonkeyPatch,
+        ) -> None:
+            """Should compute the ephemeris at the interpolation step of its type"""
+            fake_observatory_model.ephemeris_types = [fake_ground_ephemeris_type]
+            mock_observatory_service.get.return_value = fake_observatory_model
+            monkeypatch.setattr(anyio.to_thread, "run_sync", AsyncMock())
+            monkeypatch.setattr(
+                config, "EPHEMERIS_INTERPOLATION_STEP_SIZES", {"ground": 1800}
+            )
+            mock_partial = MagicMock()
+            monkeypatch.setattr(service_mod, "partial", mock_partial)
+
+            service = EphemerisService(
+                mock_db, mock_tle_service, mock_observatory_service
+            )
+            await service.get(
+                fake_observatory_id,
+                fake_date_range["begin"],
+                fake_date_range["end"],
+                step_size=60,
+            )
+
+            assert mock_partial.call_args_list[0][1]["step_size"] == 1800
+
+        @pytest.mark.asyncio
+        async def test_should_share_concurrent_computations_of_an_ephemeris(
+            self,
+            mock_db: AsyncMock,
+            fake_observatory_id: UUID,
+            fake_date_range: dict[str, datetime],
+            fake_observatory_model: MagicMock,
+            fake_ground_ephemeris_type: observatory_schemas.ObservatoryEphemerisType,
+            mock_tle_service: AsyncMock,
+            mock_observatory_service: AsyncMock,
+            monkeypatch: pytest.MonkeyPatch,
+        ) -> None:
+            """Should compute an ephemeris once for concurrent identical requests"""
+            fake_observatory_model.ephemeris_types = [fake_ground_ephemeris_type]
+            mock_observatory_service.get.return_value = fake_observatory_model
+            release = asyncio.Event()
+
+            async def run_sync(*args: object, **kwargs: object) -> MagicMock:
+                await release.wait()
+                return MagicMock()
+
+            mock_run = AsyncMock(side_effect=run_sync)
+            monkeypatch.setattr(anyio.to_thread, "run_sync", mock_run)
+
+            service = EphemerisService(
+                mock_db, mock_tle_service, mock_observatory_service
+            )
+            requests = [
+                asyncio.ensure_future(
+                    service.get(
+                        fake_observatory_id,
+                        fake_date_range["begin"],
+                        fake_date_range["end"],
+                    )
+                )
+                for _ in range(3)
+            ]
+            await asyncio.sleep(0.01)
+            release.set()
+            ephemerides = await asyncio.gather(*requests)
+
+            assert all(ephemeris is ephemerides[0] for ephemeris in ephemerides)
+            mock_run.assert_called_once()
+
+        @pytest.mark.asyncio
+        async def test_should_compute_steps_without_interpolation_step(
+            self,
+            mock_db: AsyncMock,
+            fake_observatory_id: UUID,
+            fake_date_range: dict[str, datetime],
+            fake_observatory_model: MagicMock,
+            fake_ground_ephemeris_type: observatory_schemas.ObservatoryEphemerisType,
+            mock_tle_service: AsyncMock,
+            mock_observatory_service: AsyncMock,
+            monkeypatch: pytest.MonkeyPatch,
+        ) -> None:
+            """Should compute at the requested step when its type is not interpolated"""
+            fake_observatory_model.ephemeris_types = [fake_ground_ephemeris_type]
+            mock_observatory_service.get.return_value = fake_observatory_model
+            monkeypatch.setattr(anyio.to_thread, "run_sync", AsyncMock())
+            monkeypatch.setattr(config, "EPHEMERIS_INTERPOLATION_STEP_SIZES", {})
+            mock_partial = MagicMock()
+            monkeypatch.setattr(service_mod, "partial", mock_partial)
+
+            service = EphemerisService(
+                mock_db, mock_tle_service, mock_observatory_service
+            )
+            await service.get(
+                fake_observatory_id,
+                fake_date_range["begin"],
+                fake_date_range["end"],
+                step_size=60,
+            )
+
+            assert mock_partial.call_args_list[0][1]["step_size"] == 60
+
+        @pytest.mark.asyncio
+        async def test_should_return_ephemeris_with_its_source_key(
+            self,
+            mock_db: AsyncMock,
+            fake_observatory_id: UUID,
+            fake_date_range: dict[str, datetime],
+            fake_observatory_model: MagicMock,
+            fake_ground_ephemeris_type: observatory_schemas.ObservatoryEphemerisType,
+            mock_tle_service: AsyncMock,
+            mock_observatory_service: AsyncMock,
+            monkeypatch: pytest.MonkeyPatch,
+        ) -> None:
+            """Should set the key of the ephemeris source on the returned ephemeris"""
+            fake_observatory_model.ephemeris_types = [fake_ground_ephemeris_type]
+            mock_observatory_service.get.return_value = fake_observatory_model
+            monkeypatch.setattr(
+                anyio.to_thread,
+                "run_sync",
+                AsyncMock(side_effect=lambda func, limiter: func()),
+            )
+            monkeypatch.setattr(config, "EPHEMERIS_INTERPOLATION_STEP_SIZES", {})
+            mock_cache = MagicMock()
+            monkeypatch.setattr(service_mod, "ephemeris_cache", mock_cache)
+
+            service = EphemerisService(
+                mock_db, mock_tle_service, mock_observatory_service
+            )
+            ephemeris = await service.get(
+                fake_observatory_id,
+                fake_date_range["begin"],
+                fake_date_range["end"],
+                step_size=60,
+            )
+
+            assert ephemeris is mock_cache.get.return_value
+            assert ephemeris.key == mock_cache.get.call_args[0][0]
+
+    class TestPrecompute:
+        @pytest.mark.asyncio
+        async def test_should_store_each_step_size_of_network_ephemerides(
+            self,
+            mock_db: AsyncMock,
+            fake_date_range: dict[str, datetime],
+            fake_observatory_model: MagicMock,
+            fake_jpl_ephemeris_type: observatory_schemas.ObservatoryEphemerisType,
+            fake_tle_ephemeris_type: observatory_schemas.ObservatoryEphemerisType,
+            mock_tle_service: AsyncMock,
+            mock_observatory_service: AsyncMock,
+            monkeypatch: pytest.MonkeyPatch,
+        ) -> None:
+            """Should store JPL and SPICE ephemerides for each configured step size"""
+            fake_observatory_model.ephemeris_types = [
+                fake_tle_ephemeris_type,
+                fake_jpl_ephemeris_type,
+            ]
+            observatory = observatory_schemas.Observatory.model_validate(
+                fake_observatory_model
+            )
+            monkeypatch.setattr(anyio.to_thread, "run_sync", AsyncMock(return_value=1))
+            monkeypatch.setattr(config, "EPHEMERIS_STORE_STEP_SIZES", [60, 3600])
+            service = EphemerisService(
+                mock_db, mock_tle_service, mock_observatory_service
+            )
+
+            written = await service.precompute(
+                observatory, fake_date_range["begin"], fake_date_range["end"]
+            )
+
+            assert written == 2
+
+        @pytest.mark.asyncio
+        async def test_should_store_interpolated_steps_at_their_coarse_step(
+            self,
+            mock_db: AsyncMock,
+            fake_date_range: dict[str, datetime],
+            fake_observatory_model: MagicMock,
+            fake_jpl_ephemeris_type: observatory_schemas.ObservatoryEphemerisType,
+            mock_tle_service: AsyncMock,
+            mock_observatory_service: AsyncMock,
+            monkeypatch: pytest.MonkeyPatch,
+        ) -> None:
+            """Should only store the steps the ephemeris is computed at"""
+            fake_observatory_model.ephemeris_types = [fake_jpl_ephemeris_type]
+            observatory = observatory_schemas.Observatory.model_validate(
+                fake_observatory_model
+            )
+            mock_run_sync = AsyncMock(return_value=1)
+            monkeypatch.setattr(anyio.to_thread, "run_sync", mock_run_sync)
+            monkeypatch.setattr(config, "EPHEMERIS_STORE_STEP_SIZES", [60, 300, 3600])
+            monkeypatch.setattr(
+                config, "EPHEMERIS_INTERPOLATION_STEP_SIZES", {"jpl": 300}
+            )
+            service = EphemerisService(
+                mock_db, mock_tle_service, mock_observatory_service
+            )
+
+            await service.precompute(
+                observatory, fake_date_range["begin"], fake_date_range["end"]
+            )
+
+            stored = [call.args[0].args[1] for call in mock_run_sync.call_args_list]
+            assert stored == [300, 3600]
+
+        @pytest.mark.asyncio
+        async def test_should_not_store_outside_operational_range(
+            self,
+            mock_db: AsyncMock,
+            fake_date_range: dict[str, datetime],
+            fake_operational_date_range: observatory_schemas.NullableDateRange,
+            fake_observatory_model: MagicMock,
+            fake_jpl_ephemeris_type: observatory_schemas.ObservatoryEphemerisType,
+            mock_tle_service: AsyncMock,
+            mock_observatory_service: AsyncMock,
+            monkeypatch: pytest.MonkeyPatch,
+        ) -> None:
+            """Should skip a range outside the observatory's operational range"""
+            fake_observatory_model.ephemeris_types = [fake_jpl_ephemeris_type]
+            fake_observatory_model.operational_begin_date = (
+                fake_operational_date_range.begin
+            )
+            fake_observatory_model.operational_end_date = (
+                fake_operational_date_range.end
+            )
+            observatory = observatory_schemas.Observatory.model_validate(
+                fake_observatory_model
+            )
+            mock_run_sync = AsyncMock(return_value=1)
+            monkeypatch.setattr(anyio.to_thread, "run_sync", mock_run_sync)
+            service = EphemerisService(
+                mock_db, mock_tle_service, mock_observatory_service
+            )
+
+            written = await service.precompute(
+                observatory, fake_date_range["begin"], fake_date_range["end"]
+            )
+
+            assert written == 0
+            mock_run_sync.assert_not_called()
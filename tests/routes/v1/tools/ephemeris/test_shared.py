@@ -0,0 +1,115 @@
+import pickle
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any
+
+import astropy.units as u  # type: ignore[import-untyped]
+import numpy as np
+import pytest
+from astropy.coordinates import (  # type: ignore[import-untyped]
+    GCRS,
+    CartesianDifferential,
+    CartesianRepresentation,
+    EarthLocation,
+    Latitude,
+    Longitude,
+    SkyCoord,
+)
+from astropy.time import Time, TimeDelta  # type: ignore[import-untyped]
+
+from across_server.routes.v1.tools.ephemeris.cache import CachedEphemeris
+from across_server.routes.v1.tools.ephemeris.shared import SharedEphemeris
+
+STEP_SIZE = 60
+
+
+def ephemeris() -> CachedEphemeris:
+    """An ephemeris with the kinds of values computed ones hold"""
+    timestamp = Time(1735689600 + np.arange(100) * STEP_SIZE, format="unix")
+    position = np.stack(
+        [np.cos(timestamp.unix), np.sin(timestamp.unix), 0 * timestamp.unix]
+    )
+    series: dict[str, Any] = {
+        "timestamp": timestamp,
+        "gcrs": SkyCoord(
+            CartesianRepresentation(7000 * position * u.km).with_differentials(
+                CartesianDifferential(7 * position * u.km / u.s)
+            ),
+            frame=GCRS(obstime=timestamp),
+        ),
+        "sun": SkyCoord(
+            ra=timestamp.unix % 360 * u.deg,
+            dec=10 * u.deg,
+            distance=1 * u.au,
+            frame=GCRS(
+                obstime=timestamp,
+                obsgeoloc=CartesianRepresentation(7000 * position * u.km),
+            ),
+        ),
+        # the same over the whole ephemeris, as for ground observatories
+        "earth_location": EarthLocation.from_geodetic(-170 * u.deg, 20 * u.deg),
+        "longitude": Longitude(-170 * u.deg, wrap_angle=180 * u.deg),
+        "latitude": Latitude(20 * u.deg),
+        "earth_radius_angle": timestamp.unix % 90 * u.deg,
+    }
+    return CachedEphemeris(TimeDelta(STEP_SIZE * u.s), series)
+
+
+class TestSharedEphemeris:
+    @pytest.fixture(autouse=True)
+    def setup(self) -> Any:
+        self.ephemeris = ephemeris()
+        self.shared = SharedEphemeris.create(self.ephemeris)
+        yield
+        try:
+            self.shared.unlink()
+        except FileNotFoundError:
+            pass
+
+    def test_should_pickle_a_handle_not_the_arrays(self) -> None:
+        """Should pickle much less than the ephemeris arrays"""
+        assert len(pickle.dumps(self.shared)) < len(pickle.dumps(self.ephemeris)) / 4
+
+    def test_should_load_equal_ephemeris(self) -> None:
+        """Should rebuild the ephemeris values from shared memory"""
+        loaded = pickle.loads(pickle.dumps(self.shared)).load()
+
+        assert len(loaded) == len(self.ephemeris)
+        assert np.array_equal(loaded.timestamp.unix, self.ephemeris.timestamp.unix)
+        assert np.array_equal(
+            loaded.gcrs.cartesian.xyz, self.ephemeris.gcrs.cartesian.xyz
+        )
+        assert np.array_equal(
+            loaded.gcrs.velocity.d_xyz, self.ephemeris.gcrs.velocity.d_xyz
+        )
+        assert np.array_equal(loaded.sun.ra, self.ephemeris.sun.ra)
+        assert np.array_equal(
+            loaded.sun.obsgeoloc.xyz, self.ephemeris.sun.obsgeoloc.xyz
+        )
+        assert np.array_equal(
+            loaded.earth_radius_angle, self.ephemeris.earth_radius_angle
+        )
+        assert loaded.index(self.ephemeris.timestamp[10]) == 10
+
+    def test_should_keep_scalar_values(self) -> None:
+        """Should keep values that are the same over the whole ephemeris"""
+        loaded = self.shared.load()
+
+        assert loaded.earth_location == self.ephemeris.earth_location
+        assert loaded.longitude is not None
+        assert loaded.longitude.shape == ()
+        assert loaded.longitude.wrap_angle == 180 * u.deg
+        assert loaded.longitude == -170 * u.deg
+
+    def test_should_copy_out_of_shared_memory(self) -> None:
+        """Should keep the loaded ephemeris once the memory is freed"""
+        loaded = self.shared.load()
+        self.shared.unlink()
+
+        assert np.array_equal(loaded.sun.ra, self.ephemeris.sun.ra)
+
+    def test_should_free_shared_memory(self) -> None:
+        """Should free the shared memory once unlinked"""
+        self.shared.unlink()
+
+        with pytest.raises(FileNotFoundError):
+            SharedMemory(name=self.shared.name)
@@ -0,0 +1,149 @@
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import astropy.units as u  # type: ignore[import-untyped]
+import numpy as np
+import pytest
+from across.tools.ephemeris import Ephemeris
+from astropy.coordinates import (  # type: ignore[import-untyped]
+    GCRS,
+    CartesianDifferential,
+    CartesianRepresentation,
+    SkyCoord,
+)
+from astropy.time import Time, TimeDelta  # type: ignore[import-untyped]
+
+from across_server.routes.v1.tools.ephemeris.cache import CachedEphemeris
+from across_server.routes.v1.tools.ephemeris.store import (
+    EphemerisStore,
+    StoredEphemeris,
+)
+
+STEP_SIZE = 60
+KEY = ("jpl", -48)
+
+
+def fixture_states(timestamp: Time) -> np.ndarray:
+    """Circular orbit states, as Horizons would return them"""
+    phase = timestamp.unix / 5400 * 2 * np.pi
+    states = np.zeros((len(timestamp), 6))
+    states[:, 0] = 7000 * np.cos(phase)
+    states[:, 1] = 7000 * np.sin(phase)
+    states[:, 3] = -7.5 * np.sin(phase)
+    states[:, 4] = 7.5 * np.cos(phase)
+    return states
+
+
+class FakeCompute:
+    """Computes an ephemeris from the fixture states"""
+
+    def __init__(self) -> None:
+        self.calls: list[tuple[datetime, datetime]] = []
+
+    def __call__(self, *, begin: datetime, end: datetime) -> Ephemeris:
+        self.calls.append((begin, end))
+        timestamp = Time(
+            np.arange(
+                Time(begin).unix, Time(end).unix + STEP_SIZE, STEP_SIZE, dtype=float
+            ),
+            format="unix",
+        )
+        states = fixture_states(timestamp)
+        gcrs = SkyCoord(
+            CartesianRepresentation(states[:, :3].T * u.km).with_differentials(
+                CartesianDifferential(states[:, 3:].T * u.km / u.s)
+            ),
+            frame=GCRS(obstime=timestamp),
+        )
+        return CachedEphemeris(
+            TimeDelta(STEP_SIZE * u.s), {"timestamp": timestamp, "gcrs": gcrs}
+        )
+
+
+def hour(value: float) -> datetime:
+    return datetime.fromtimestamp(
+        datetime(2025, 1, 1, tzinfo=timezone.utc).timestamp() + value * 3600,
+        tz=timezone.utc,
+    )
+
+
+class TestEphemerisStore:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path: Path) -> None:
+        self.store = EphemerisStore(path=tmp_path, chunk_seconds=3600)
+        self.compute = FakeCompute()
+
+    def test_should_read_none_when_not_stored(self) -> None:
+        """Should return None for a range that is not stored"""
+        assert self.store.read(KEY, STEP_SIZE, hour(0), hour(1)) is None
+
+    def test_should_read_stored_states_over_chunks(self) -> None:
+        """Should return the stored states of a range spanning chunks"""
+        self.store.precompute(KEY, STEP_SIZE, self.compute, hour(0), hour(3))
+
+        states = self.store.read(KEY, STEP_SIZE, hour(0.5), hour(2.5))
+
+        timestamp = Time(
+            np.arange(hour(0.5).timestamp(), hour(2.5).timestamp() + 1, STEP_SIZE),
+            format="unix",
+        )
+        assert states is not None
+        assert np.allclose(states, fixture_states(timestamp))
+
+    def test_should_only_precompute_missing_chunks(self) -> None:
+        """Should compute and write only the chunks that are not stored"""
+        assert (
+            self.store.precompute(KEY, STEP_SIZE, self.compute, hour(0), hour(2)) == 2
+        )
+        self.compute.calls.clear()
+
+        written = self.store.precompute(KEY, STEP_SIZE, self.compute, hour(0), hour(3))
+
+        assert written == 1
+        assert self.compute.calls == [(hour(2), hour(3))]
+
+    def test_should_read_none_when_a_chunk_is_unreadable(self, tmp_path: Path) -> None:
+        """Should treat a corrupt chunk as not stored"""
+        self.store.precompute(KEY, STEP_SIZE, self.compute, hour(0), hour(1))
+        next(tmp_path.glob("*/*/*.npy")).write_bytes(b"corrupt")
+
+        assert self.store.read(KEY, STEP_SIZE, hour(0), hour(1)) is None
+
+    def test_should_compute_with_fallback_when_not_stored(self) -> None:
+        """Should compute with the fallback when the range is not stored"""
+        fallback = MagicMock()
+
+        self.store.compute(KEY, STEP_SIZE, fallback)(begin=hour(0), end=hour(1))
+
+        fallback.assert_called_once_with(begin=hour(0), end=hour(1))
+
+    def test_should_compute_from_store_when_stored(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Should build the ephemeris from the stored states without the fallback"""
+        # the Sun, Moon and Earth positions are computed by across-tools
+        monkeypatch.setattr(StoredEphemeris, "_calc", lambda self: None)
+        self.store.precompute(KEY, STEP_SIZE, self.compute, hour(0), hour(2))
+        fallback = MagicMock()
+
+        ephemeris = self.store.compute(KEY, STEP_SIZE, fallback)(
+            begin=hour(0.5), end=hour(1.5)
+        )
+
+        fallback.assert_not_called()
+        expected = self.compute(begin=hour(0.5), end=hour(1.5))
+        assert len(ephemeris) == len(expected)
+        assert np.allclose(
+            ephemeris.gcrs.cartesian.xyz.value, expected.gcrs.cartesian.xyz.value
+        )
+
+    def test_should_prune_chunks_before_date(self, tmp_path: Path) -> None:
+        """Should delete the chunks ending before the given date"""
+        self.store.precompute(KEY, STEP_SIZE, self.compute, hour(0), hour(3))
+
+        pruned = self.store.prune(before=hour(2))
+
+        assert pruned == 1
+        assert self.store.read(KEY, STEP_SIZE, hour(0), hour(1)) is None
+        assert self.store.read(KEY, STEP_SIZE, hour(1), hour(3)) is not None
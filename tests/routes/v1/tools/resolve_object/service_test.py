@@ -1,5 +1,7 @@
+import asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import anyio.to_thread
 import pytest
 from astropy.coordinates.name_resolve import (  # type: ignore[import-untyped]
     NameResolveError,
@@ -87,7 +89,7 @@ class TestNameResolveService:
     ) -> None:
         """Should return a NameResolver schema when using CDS"""
         mock_run = AsyncMock(return_value=mock_skycoord)
-        monkeypatch.setattr(service_mod.anyio.to_thread, "run_sync", mock_run)
+        monkeypatch.setattr(anyio.to_thread, "run_sync", mock_run)
 
         res = await NameResolveService().resolve(data=mock_resolve_input)
         assert NameResolver.model_validate(res)
@@ -98,11 +100,42 @@ class TestNameResolveService:
     ) -> None:
         """Should raise a NameNotFoundException if CDS raises an error"""
         mock_run = AsyncMock(side_effect=NameResolveError)
-        monkeypatch.setattr(service_mod.anyio.to_thread, "run_sync", mock_run)
+        monkeypatch.setattr(anyio.to_thread, "run_sync", mock_run)
 
         with pytest.raises(NameNotFoundException):
             await NameResolveService().resolve(data=mock_resolve_input)
 
+    @pytest.mark.asyncio
+    async def test_service_should_share_concurrent_resolutions_of_a_name(
+        self,
+        monkeypatch: pytest.MonkeyPatch,
+        mock_skycoord: SkyCoord,
+        mock_resolve_input: NameResolverRead,
+    ) -> None:
+        """Should resolve a name once for concurrent requests of it"""
+        release = asyncio.Event()
+
+        async def run_sync(*args: object, **kwargs: object) -> SkyCoord:
+            await release.wait()
+            return mock_skycoord
+
+        mock_run = AsyncMock(side_effect=run_sync)
+        monkeypatch.setattr(anyio.to_thread, "run_sync", mock_run)
+
+        requests = [
+            asyncio.create_task(NameResolveService().resolve(data=data))
+            for data in (
+                mock_resolve_input,
+                NameResolverRead(object_name=f" {mock_resolve_input.object_name} "),
+            )
+        ]
+        await asyncio.sleep(0)
+        release.set()
+        first, second = await asyncio.gather(*requests)
+
+        assert first == second
+        mock_run.assert_called_once()
+
     @pytest.mark.asyncio
     async def test_antares_resolver_should_return_coordinate(
         self,
@@ -1,4 +1,5 @@
-from collections.abc import Generator
+import importlib
+from collections.abc import AsyncGenerator, Generator
 from datetime import datetime
 from unittest.mock import AsyncMock, MagicMock
 from uuid import UUID, uuid4
@@ -6,18 +7,23 @@ from uuid import UUID, uuid4
 import pytest
 from across.tools.visibility.constraints import PointingConstraint, SunAngleConstraint
 from fastapi import FastAPI
+from geoalchemy2 import WKTElement
 
+from across_server.core.admission import AdmissionController
 from across_server.core.enums.observation_strategy import ObservationStrategy
 from across_server.core.enums.visibility_type import VisibilityType
-from across_server.db.models import Instrument, Telescope
+from across_server.db.models import Instrument, Observation, Telescope
 from across_server.routes.v1.footprint.schemas import Point
 from across_server.routes.v1.instrument.schemas import Instrument as InstrumentSchema
 from across_server.routes.v1.instrument.service import InstrumentService
 from across_server.routes.v1.telescope.service import TelescopeService
 from across_server.routes.v1.tools.ephemeris.service import EphemerisService
 from across_server.routes.v1.tools.visibility_calculator.schemas import (
+    BatchVisibilityParams,
+    BatchVisibilityResult,
     JointVisibilityReadParams,
     VisibilityReadParams,
+    VisibilityTarget,
 )
 from across_server.routes.v1.tools.visibility_calculator.service import (
     VisibilityCalculatorService,
@@ -107,6 +113,31 @@ def fake_footprint() -> list[list[Point]]:
     ]
 
 
+@pytest.fixture
+def fake_observation_rows(fake_observation_data: Observation) -> list[tuple]:
+    """Rows of the pointing constraint query, of an observation without footprint"""
+    return [
+        (
+            fake_observation_data.id,
+            fake_observation_data.pointing_ra,
+            fake_observation_data.pointing_dec,
+            fake_observation_data.pointing_angle,
+            fake_observation_data.date_range_begin,
+            fake_observation_data.date_range_end,
+            None,
+        )
+    ]
+
+
+@pytest.fixture
+def fake_observation_footprint_polygon() -> WKTElement:
+    """Footprint polygon stored along with an observation"""
+    return WKTElement(
+        "POLYGON((123.0 -88.0, 124.0 -88.0, 124.0 -87.0, 123.0 -87.0, 123.0 -88.0))",
+        srid=4326,
+    )
+
+
 @pytest.fixture
 def fake_survey_instrument(
     fake_sun_constraint: SunAngleConstraint,
@@ -158,6 +189,7 @@ def mock_instrument_service(
     mock = AsyncMock(InstrumentService)
 
     mock.get = AsyncMock(return_value=mock_instrument_data)
+    mock.get_by_ids = AsyncMock(return_value=[mock_instrument_data])
     yield mock
 
 
@@ -177,7 +209,31 @@ def mock_visibility_calculator_service(
     mock = AsyncMock(VisibilityCalculatorService)
 
     mock.calculate_windows = AsyncMock(return_value=fake_ephemeris_visibility_result)
+    mock.calculate_joint_windows = AsyncMock(
+        return_value=[fake_ephemeris_visibility_result]
+    )
     mock.find_joint_visibility = AsyncMock(return_value=fake_joint_visibility_result)
+
+    async def batch_results(
+        targets: list[VisibilityTarget], **kwargs: object
+    ) -> AsyncGenerator[BatchVisibilityResult]:
+        for index, target in enumerate(targets):
+            yield BatchVisibilityResult(index=index, ra=target.ra, dec=target.dec)
+
+    mock.calculate_batch_windows = AsyncMock(
+        side_effect=lambda **kwargs: batch_results(**kwargs)
+    )
+
+    async def joint_visibilities(
+        instruments: list, **kwargs: object
+    ) -> AsyncGenerator[tuple[int, MagicMock]]:
+        # as calculated, not in the order of the instruments
+        for index in reversed(range(len(instruments))):
+            yield index, fake_ephemeris_visibility_result
+
+    mock.stream_joint_windows = AsyncMock(
+        side_effect=lambda **kwargs: joint_visibilities(**kwargs)
+    )
     yield mock
 
 
@@ -243,3 +299,30 @@ def dep_override(
         }
     ):
         yield overrider
+
+
+@pytest.fixture
+def fake_batch_visibility_params(
+    fake_date_range: tuple[datetime, datetime],
+) -> dict:
+    return BatchVisibilityParams(
+        targets=[
+            VisibilityTarget(ra=10.0, dec=20.0),
+            VisibilityTarget(ra=30.0, dec=-40.0),
+        ],
+        date_range_begin=fake_date_range[0],
+        date_range_end=fake_date_range[1],
+    ).model_dump(mode="json")
+
+
+@pytest.fixture
+def fake_admission(monkeypatch: pytest.MonkeyPatch) -> AdmissionController:
+    """An admission controller of the router, not queueing any request"""
+    controller = AdmissionController(
+        "test", max_cost=1000, max_queue=0, max_wait=1, retry_after=7
+    )
+    router = importlib.import_module(
+        "across_server.routes.v1.tools.visibility_calculator.router"
+    )
+    monkeypatch.setattr(router, "visibility_admission", controller)
+    return controller
@@ -0,0 +1,79 @@
+from collections.abc import Generator
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+from uuid import UUID, uuid4
+
+import pytest
+from fastapi import FastAPI
+
+from across_server.core.enums.visibility_job_kind import VisibilityJobKind
+from across_server.core.enums.visibility_job_status import VisibilityJobStatus
+from across_server.db.models import VisibilityJob
+from across_server.routes.v1.instrument.service import InstrumentService
+from across_server.routes.v1.tools.visibility_calculator.jobs.service import (
+    VisibilityJobService,
+)
+from across_server.routes.v1.tools.visibility_calculator.schemas import (
+    JointVisibilityReadParams,
+)
+
+
+@pytest.fixture
+def fake_job_parameters(
+    fake_coordinates: tuple[float, float],
+    fake_date_range: tuple[datetime, datetime],
+    fake_instrument_id: UUID,
+) -> JointVisibilityReadParams:
+    return JointVisibilityReadParams(
+        ra=fake_coordinates[0],
+        dec=fake_coordinates[1],
+        date_range_begin=fake_date_range[0],
+        date_range_end=fake_date_range[1],
+        instrument_ids=[fake_instrument_id],
+    )
+
+
+@pytest.fixture
+def fake_visibility_job(
+    fake_job_parameters: JointVisibilityReadParams,
+) -> VisibilityJob:
+    return VisibilityJob(
+        id=uuid4(),
+        kind=VisibilityJobKind.WINDOWS,
+        parameters=fake_job_parameters.model_dump(mode="json"),
+        fingerprint="fingerprint",
+        status=VisibilityJobStatus.QUEUED,
+        progress=0,
+        checkpoint=[],
+        created_on=datetime.now(),
+    )
+
+
+@pytest.fixture(scope="function")
+def mock_visibility_job_service(
+    fake_visibility_job: VisibilityJob,
+) -> Generator[AsyncMock]:
+    mock = AsyncMock(VisibilityJobService)
+
+    mock.submit = AsyncMock(return_value=fake_visibility_job)
+    mock.get = AsyncMock(return_value=fake_visibility_job)
+    mock.get_result = AsyncMock(return_value=fake_visibility_job)
+    yield mock
+
+
+@pytest.fixture(scope="function", autouse=True)
+def dep_override(
+    app: FastAPI,
+    fastapi_dep: MagicMock,
+    mock_instrument_service: AsyncMock,
+    mock_visibility_job_service: AsyncMock,
+) -> Generator[None, None, None]:
+    overrider = fastapi_dep(app)
+
+    with overrider.override(
+        {
+            InstrumentService: lambda: mock_instrument_service,
+            VisibilityJobService: lambda: mock_visibility_job_service,
+        }
+    ):
+        yield overrider
@@ -0,0 +1,217 @@
+from unittest.mock import AsyncMock
+from uuid import UUID, uuid4
+
+import fastapi
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+
+from across_server.core.enums.visibility_job_kind import VisibilityJobKind
+from across_server.core.enums.visibility_job_status import VisibilityJobStatus
+from across_server.db.models import VisibilityJob
+from across_server.routes.v1.instrument.exceptions import (
+    InstrumentNotFoundException,
+)
+from across_server.routes.v1.tools.visibility_calculator.jobs.exceptions import (
+    VisibilityJobNotCompleteException,
+    VisibilityJobNotFoundException,
+)
+from across_server.routes.v1.tools.visibility_calculator.jobs.schemas import (
+    VisibilityJob as VisibilityJobSchema,
+)
+from across_server.routes.v1.tools.visibility_calculator.schemas import (
+    JointVisibilityResult,
+    VisibilityReadParams,
+    VisibilityResult,
+)
+
+
+class TestSubmitWindowsJob:
+    @pytest_asyncio.fixture(autouse=True)
+    async def setup(
+        self,
+        async_client: AsyncClient,
+        fake_instrument_id: UUID,
+        fake_visibility_read_params: dict,
+    ) -> None:
+        self.client = async_client
+        self.endpoint = "/tools/visibility-calculator/jobs"
+        self.fake_instrument_id = fake_instrument_id
+        self.params = VisibilityReadParams.model_validate(
+            fake_visibility_read_params
+        ).model_dump(mode="json")
+
+    @pytest.mark.asyncio
+    async def test_should_return_202_with_the_job(
+        self, fake_visibility_job: VisibilityJob
+    ) -> None:
+        """Should return the submitted job with a 202 status"""
+        res = await self.client.post(
+            f"{self.endpoint}/windows/{self.fake_instrument_id}", json=self.params
+        )
+
+        assert res.status_code == fastapi.status.HTTP_202_ACCEPTED
+        assert VisibilityJobSchema.model_validate(res.json()).id == (
+            fake_visibility_job.id
+        )
+
+    @pytest.mark.asyncio
+    async def test_should_submit_a_windows_job_of_the_instrument(
+        self, mock_visibility_job_service: AsyncMock
+    ) -> None:
+        """Should submit a windows job with the instrument as its only one"""
+        await self.client.post(
+            f"{self.endpoint}/windows/{self.fake_instrument_id}", json=self.params
+        )
+
+        kind, parameters = mock_visibility_job_service.submit.call_args.args
+        assert kind == VisibilityJobKind.WINDOWS
+        assert parameters.instrument_ids == [self.fake_instrument_id]
+
+    @pytest.mark.asyncio
+    async def test_should_return_404_when_the_instrument_does_not_exist(
+        self,
+        mock_instrument_service: AsyncMock,
+        mock_visibility_job_service: AsyncMock,
+    ) -> None:
+        """Should not submit a job of an instrument that does not exist"""
+        mock_instrument_service.get.side_effect = InstrumentNotFoundException(
+            self.fake_instrument_id
+        )
+
+        res = await self.client.post(
+            f"{self.endpoint}/windows/{self.fake_instrument_id}", json=self.params
+        )
+
+        assert res.status_code == fastapi.status.HTTP_404_NOT_FOUND
+        mock_visibility_job_service.submit.assert_not_called()
+
+
+class TestSubmitJointWindowsJob:
+    @pytest_asyncio.fixture(autouse=True)
+    async def setup(
+        self, async_client: AsyncClient, fake_visibility_read_params: dict
+    ) -> None:
+        self.client = async_client
+        self.endpoint = "/tools/visibility-calculator/jobs"
+        self.params = VisibilityReadParams.model_validate(
+            fake_visibility_read_params
+        ).model_dump(mode="json")
+
+    @pytest.mark.asyncio
+    async def test_should_submit_a_joint_windows_job(
+        self, mock_visibility_job_service: AsyncMock
+    ) -> None:
+        """Should submit a joint windows job of the instruments"""
+        instrument_ids = [uuid4(), uuid4()]
+
+        res = await self.client.post(
+            f"{self.endpoint}/windows/",
+            json={
+                **self.params,
+                "instrument_ids": [str(id) for id in instrument_ids],
+            },
+        )
+
+        assert res.status_code == fastapi.status.HTTP_202_ACCEPTED
+        kind, parameters = mock_visibility_job_service.submit.call_args.args
+        assert kind == VisibilityJobKind.JOINT_WINDOWS
+        assert parameters.instrument_ids == instrument_ids
+
+
+class TestGetJob:
+    @pytest_asyncio.fixture(autouse=True)
+    async def setup(self, async_client: AsyncClient) -> None:
+        self.client = async_client
+        self.endpoint = "/tools/visibility-calculator/jobs"
+
+    @pytest.mark.asyncio
+    async def test_should_return_the_progress_of_the_job(
+        self, fake_visibility_job: VisibilityJob
+    ) -> None:
+        """Should return the status and progress of the job"""
+        fake_visibility_job.status = VisibilityJobStatus.RUNNING
+        fake_visibility_job.progress = 42.5
+
+        res = await self.client.get(f"{self.endpoint}/{fake_visibility_job.id}")
+
+        assert res.status_code == fastapi.status.HTTP_200_OK
+        job = VisibilityJobSchema.model_validate(res.json())
+        assert job.status == VisibilityJobStatus.RUNNING
+        assert job.progress == 42.5
+
+    @pytest.mark.asyncio
+    async def test_should_return_404_when_the_job_does_not_exist(
+        self, mock_visibility_job_service: AsyncMock
+    ) -> None:
+        """Should return a 404 status when the job does not exist"""
+        job_id = uuid4()
+        mock_visibility_job_service.get.side_effect = VisibilityJobNotFoundException(
+            job_id
+        )
+
+        res = await self.client.get(f"{self.endpoint}/{job_id}")
+
+        assert res.status_code == fastapi.status.HTTP_404_NOT_FOUND
+
+
+class TestGetJobResult:
+    @pytest_asyncio.fixture(autouse=True)
+    async def setup(self, async_client: AsyncClient, fake_instrument_id: UUID) -> None:
+        self.client = async_client
+        self.endpoint = "/tools/visibility-calculator/jobs"
+        self.fake_instrument_id = fake_instrument_id
+
+    @pytest.mark.asyncio
+    async def test_should_return_the_visibility_result_of_a_windows_job(
+        self, fake_visibility_job: VisibilityJob
+    ) -> None:
+        """Should return the VisibilityResult of a succeeded windows job"""
+        fake_visibility_job.status = VisibilityJobStatus.SUCCEEDED
+        fake_visibility_job.result = {
+            "instrument_id": str(self.fake_instrument_id),
+            "visibility_windows": [],
+        }
+
+        res = await self.client.get(f"{self.endpoint}/{fake_visibility_job.id}/result")
+
+        assert res.status_code == fastapi.status.HTTP_200_OK
+        assert VisibilityResult.model_validate(res.json()).instrument_id == (
+            self.fake_instrument_id
+        )
+
+    @pytest.mark.asyncio
+    async def test_should_return_the_joint_visibility_result_of_a_joint_job(
+        self, fake_visibility_job: VisibilityJob
+    ) -> None:
+        """Should return the JointVisibilityResult of a succeeded joint job"""
+        fake_visibility_job.kind = VisibilityJobKind.JOINT_WINDOWS
+        fake_visibility_job.status = VisibilityJobStatus.SUCCEEDED
+        fake_visibility_job.result = {
+            "instrument_ids": [str(self.fake_instrument_id)],
+            "visibility_windows": [],
+            "observatory_visibility_windows": {str(self.fake_instrument_id): []},
+        }
+
+        res = await self.client.get(f"{self.endpoint}/{fake_visibility_job.id}/result")
+
+        assert JointVisibilityResult.model_validate(res.json()).instrument_ids == [
+            self.fake_instrument_id
+        ]
+
+    @pytest.mark.asyncio
+    async def test_should_return_409_when_the_job_is_pending(
+        self,
+        fake_visibility_job: VisibilityJob,
+        mock_visibility_job_service: AsyncMock,
+    ) -> None:
+        """Should return a 409 status while the job has no result"""
+        mock_visibility_job_service.get_result.side_effect = (
+            VisibilityJobNotCompleteException(
+                fake_visibility_job.id, VisibilityJobStatus.RUNNING
+            )
+        )
+
+        res = await self.client.get(f"{self.endpoint}/{fake_visibility_job.id}/result")
+
+        assert res.status_code == fastapi.status.HTTP_409_CONFLICT
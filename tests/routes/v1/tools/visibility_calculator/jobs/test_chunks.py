@@ -0,0 +1,142 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import astropy.units as u  # type: ignore
+import numpy as np
+import pytest
+from across.tools.core.enums import ConstraintType
+from across.tools.visibility import EphemerisVisibility
+from astropy.time import Time, TimeDelta  # type: ignore
+from pydantic import TypeAdapter
+
+from across_server.core.config import config
+from across_server.routes.v1.tools.visibility_calculator.jobs.chunks import (
+    CHUNK_MIN_VISIBILITY_DURATION,
+    chunk_ranges,
+    stitch,
+)
+from across_server.routes.v1.tools.visibility_calculator.schemas import (
+    VisibilityWindow,
+)
+
+STEP_SIZE = 60
+OBSERVATORY_ID = uuid4()
+# a day in, on the step grid
+FIRST = 1440
+
+WindowsAdaptor = TypeAdapter(list[VisibilityWindow])
+
+
+def windows(inconstraint: np.ndarray, first: int, min_vis: int) -> list:
+    """The windows of points `first` onwards, as computed by across-tools"""
+    timestamp = Time((first + np.arange(len(inconstraint))) * STEP_SIZE, format="unix")
+    visibility = EphemerisVisibility.model_construct(
+        ephemeris=None,  # type: ignore[arg-type]
+        begin=timestamp[0],
+        end=Time((first + len(inconstraint)) * STEP_SIZE, format="unix"),
+        step_size=TimeDelta(STEP_SIZE * u.s),
+        timestamp=timestamp,
+        inconstraint=inconstraint,
+        calculated_constraints=OrderedDict({ConstraintType.SUN: inconstraint}),
+        constraints=[],
+        min_vis=min_vis,
+        observatory_name="Observatory",
+        observatory_id=OBSERVATORY_ID,
+    )
+    return WindowsAdaptor.validate_python(
+        [window.model_dump() for window in visibility._make_windows()]
+    )
+
+
+class TestChunkRanges:
+    @pytest.fixture(autouse=True)
+    def setup(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setattr(config, "VISIBILITY_JOB_CHUNK_DAYS", 7)
+
+    def test_should_overlap_the_first_step_of_the_next_chunk(self) -> None:
+        """Should end each chunk but the last a step into the next one"""
+        begin = datetime(2025, 1, 1)
+
+        ranges = chunk_ranges(begin, begin + timedelta(days=20), STEP_SIZE)
+
+        assert ranges == [
+            (begin, begin + timedelta(days=7, seconds=STEP_SIZE)),
+            (
+                begin + timedelta(days=7),
+                begin + timedelta(days=14, seconds=STEP_SIZE),
+            ),
+            (begin + timedelta(days=14), begin + timedelta(days=20)),
+        ]
+
+    def test_should_begin_on_the_step_grid(self) -> None:
+        """Should begin chunks at the step at or before the beginning"""
+        begin = datetime(2025, 1, 1, 0, 30)
+
+        ranges = chunk_ranges(begin, begin + timedelta(days=20), 3600)
+
+        assert [chunk_begin.minute for chunk_begin, _ in ranges] == [0, 0, 0]
+
+    def test_should_not_make_a_chunk_of_the_last_step(self) -> None:
+        """Should compute a last step past a chunk as its overlap"""
+        begin = datetime(2025, 1, 1)
+        end = begin + timedelta(days=7, seconds=STEP_SIZE)
+
+        assert chunk_ranges(begin, end, STEP_SIZE) == [(begin, end)]
+
+
+class TestStitch:
+    @pytest.mark.parametrize("seed", range(5))
+    @pytest.mark.parametrize("min_vis", [0, 600])
+    def test_should_equal_computing_over_the_whole_range(
+        self, seed: int, min_vis: int
+    ) -> None:
+        """Should stitch the windows of chunks into those of their whole range"""
+        random = np.random.default_rng(seed)
+        # runs of constrained and unconstrained steps
+        inconstraint = np.repeat(
+            random.integers(0, 2, 40).astype(bool), random.integers(1, 30, 40)
+        )
+        chunk = int(random.integers(1, 60))
+
+        chunks = []
+        start = 0
+        while start + chunk + 1 < len(inconstraint):
+            chunks.append(
+                windows(
+                    inconstraint[start : start + chunk + 1],
+                    FIRST + start,
+                    CHUNK_MIN_VISIBILITY_DURATION,
+                )
+            )
+            start += chunk
+        chunks.append(
+            windows(inconstraint[start:], FIRST + start, CHUNK_MIN_VISIBILITY_DURATION)
+        )
+
+        result = stitch(chunks, STEP_SIZE, min_vis)
+
+        assert WindowsAdaptor.dump_python(result, mode="json") == (
+            WindowsAdaptor.dump_python(
+                windows(inconstraint, FIRST, min_vis), mode="json"
+            )
+        )
+
+    def test_should_join_a_window_across_a_boundary(self) -> None:
+        """Should join the window reaching a boundary with the one starting at it"""
+        inconstraint = np.zeros(21, dtype=bool)
+
+        result = stitch(
+            [
+                windows(inconstraint[:11], FIRST, CHUNK_MIN_VISIBILITY_DURATION),
+                windows(inconstraint[10:], FIRST + 10, CHUNK_MIN_VISIBILITY_DURATION),
+            ],
+            STEP_SIZE,
+            0,
+        )
+
+        (window,) = result
+        assert window.max_visibility_duration == 20 * STEP_SIZE
+        assert window.window.begin.datetime == datetime.fromtimestamp(
+            FIRST * STEP_SIZE, tz=timezone.utc
+        ).replace(tzinfo=None)
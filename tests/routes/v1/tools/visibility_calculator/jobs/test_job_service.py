@@ -0,0 +1,177 @@
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+
+from across_server.core.config import config
+from across_server.core.enums.visibility_job_kind import VisibilityJobKind
+from across_server.core.enums.visibility_job_status import VisibilityJobStatus
+from across_server.core.exceptions import InvalidEntityException
+from across_server.db.models import VisibilityJob
+from across_server.routes.v1.tools.visibility_calculator.jobs import worker
+from across_server.routes.v1.tools.visibility_calculator.jobs.exceptions import (
+    VisibilityJobNotCompleteException,
+    VisibilityJobNotFoundException,
+)
+from across_server.routes.v1.tools.visibility_calculator.jobs.service import (
+    VisibilityJobService,
+    fingerprint,
+)
+from across_server.routes.v1.tools.visibility_calculator.schemas import (
+    JointVisibilityReadParams,
+)
+
+
+class TestFingerprint:
+    def test_should_not_depend_on_the_order_of_the_parameters(self) -> None:
+        """Should identify the same parameters in any order"""
+        assert fingerprint(VisibilityJobKind.WINDOWS, {"ra": 1, "dec": 2}) == (
+            fingerprint(VisibilityJobKind.WINDOWS, {"dec": 2, "ra": 1})
+        )
+
+    def test_should_change_with_the_kind(self) -> None:
+        """Should tell apart jobs of the same parameters but another kind"""
+        assert fingerprint(VisibilityJobKind.WINDOWS, {"ra": 1}) != (
+            fingerprint(VisibilityJobKind.JOINT_WINDOWS, {"ra": 1})
+        )
+
+
+class TestVisibilityJobService:
+    class TestSubmit:
+        @pytest.fixture(autouse=True)
+        def setup(self, monkeypatch: pytest.MonkeyPatch) -> None:
+            self.mock_notify = MagicMock()
+            monkeypatch.setattr(worker, "notify", self.mock_notify)
+
+        @pytest.mark.asyncio
+        async def test_should_return_the_pending_job_with_the_same_parameters(
+            self,
+            mock_db: AsyncMock,
+            mock_scalar_one_or_none: MagicMock,
+            fake_visibility_job: VisibilityJob,
+            fake_job_parameters: JointVisibilityReadParams,
+        ) -> None:
+            """Should deduplicate a job already queued or running"""
+            mock_scalar_one_or_none.return_value = fake_visibility_job
+
+            job = await VisibilityJobService(mock_db).submit(
+                VisibilityJobKind.WINDOWS, fake_job_parameters
+            )
+
+            assert job is fake_visibility_job
+            mock_db.execute.assert_called_once()
+            self.mock_notify.assert_not_called()
+
+        @pytest.mark.asyncio
+        async def test_should_queue_a_new_job(
+            self,
+            mock_db: AsyncMock,
+            mock_scalar_one_or_none: MagicMock,
+            fake_visibility_job: VisibilityJob,
+            fake_job_parameters: JointVisibilityReadParams,
+        ) -> None:
+            """Should insert a job and wake the workers up"""
+            mock_scalar_one_or_none.side_effect = [None, fake_visibility_job]
+
+            job = await VisibilityJobService(mock_db).submit(
+                VisibilityJobKind.WINDOWS, fake_job_parameters
+            )
+
+            assert job is fake_visibility_job
+            mock_db.commit.assert_called_once()
+            self.mock_notify.assert_called_once()
+
+        @pytest.mark.asyncio
+        async def test_should_return_the_job_submitted_concurrently(
+            self,
+            mock_db: AsyncMock,
+            mock_scalar_one_or_none: MagicMock,
+            fake_visibility_job: VisibilityJob,
+            fake_job_parameters: JointVisibilityReadParams,
+        ) -> None:
+            """Should return the pending job inserted by a concurrent request"""
+            mock_scalar_one_or_none.side_effect = [None, None, fake_visibility_job]
+
+            job = await VisibilityJobService(mock_db).submit(
+                VisibilityJobKind.WINDOWS, fake_job_parameters
+            )
+
+            assert job is fake_visibility_job
+
+        @pytest.mark.asyncio
+        async def test_should_raise_when_the_date_range_is_too_long(
+            self,
+            mock_db: AsyncMock,
+            fake_job_parameters: JointVisibilityReadParams,
+        ) -> None:
+            """Should not queue jobs longer than VISIBILITY_JOB_MAX_DAYS"""
+            fake_job_parameters.date_range_end = (
+                fake_job_parameters.date_range_begin
+                + timedelta(days=config.VISIBILITY_JOB_MAX_DAYS + 1)
+            )
+
+            with pytest.raises(InvalidEntityException):
+                await VisibilityJobService(mock_db).submit(
+                    VisibilityJobKind.WINDOWS, fake_job_parameters
+                )
+
+        @pytest.mark.asyncio
+        async def test_should_raise_when_the_date_range_is_empty(
+            self,
+            mock_db: AsyncMock,
+            fake_job_parameters: JointVisibilityReadParams,
+        ) -> None:
+            """Should not queue jobs ending before they begin"""
+            fake_job_parameters.date_range_end = fake_job_parameters.date_range_begin
+
+            with pytest.raises(InvalidEntityException):
+                await VisibilityJobService(mock_db).submit(
+                    VisibilityJobKind.WINDOWS, fake_job_parameters
+                )
+
+    class TestGet:
+        @pytest.mark.asyncio
+        async def test_should_raise_when_the_job_does_not_exist(
+            self, mock_db: AsyncMock, mock_scalar_one_or_none: MagicMock
+        ) -> None:
+            """Should raise a not found exception when the job does not exist"""
+            mock_scalar_one_or_none.return_value = None
+
+            with pytest.raises(VisibilityJobNotFoundException):
+                await VisibilityJobService(mock_db).get(uuid4())
+
+    class TestGetResult:
+        @pytest.mark.asyncio
+        async def test_should_return_a_succeeded_job(
+            self,
+            mock_db: AsyncMock,
+            mock_scalar_one_or_none: MagicMock,
+            fake_visibility_job: VisibilityJob,
+        ) -> None:
+            """Should return the job once it succeeded"""
+            fake_visibility_job.status = VisibilityJobStatus.SUCCEEDED
+            fake_visibility_job.result = {"visibility_windows": []}
+            mock_scalar_one_or_none.return_value = fake_visibility_job
+
+            job = await VisibilityJobService(mock_db).get_result(fake_visibility_job.id)
+
+            assert job is fake_visibility_job
+
+        @pytest.mark.asyncio
+        @pytest.mark.parametrize(
+            "status", [VisibilityJobStatus.QUEUED, VisibilityJobStatus.FAILED]
+        )
+        async def test_should_raise_when_the_job_has_no_result(
+            self,
+            mock_db: AsyncMock,
+            mock_scalar_one_or_none: MagicMock,
+            fake_visibility_job: VisibilityJob,
+            status: VisibilityJobStatus,
+        ) -> None:
+            """Should raise a conflict while the job is pending, or when it failed"""
+            fake_visibility_job.status = status
+            mock_scalar_one_or_none.return_value = fake_visibility_job
+
+            with pytest.raises(VisibilityJobNotCompleteException):
+                await VisibilityJobService(mock_db).get_result(fake_visibility_job.id)
@@ -0,0 +1,190 @@
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+
+from across_server.core.config import config
+from across_server.core.enums.visibility_job_kind import VisibilityJobKind
+from across_server.core.enums.visibility_job_status import VisibilityJobStatus
+from across_server.db.models import VisibilityJob
+from across_server.routes.v1.tools.visibility_calculator.exceptions import (
+    VisibilityConstraintsNotFoundException,
+)
+from across_server.routes.v1.tools.visibility_calculator.jobs import worker
+from across_server.routes.v1.tools.visibility_calculator.schemas import (
+    JointVisibilityReadParams,
+    JointVisibilityResult,
+)
+
+
+def window(begin: datetime, minutes: int) -> dict:
+    observatory_id = str(uuid4())
+    return {
+        "window": {
+            "begin": {
+                "datetime": begin.isoformat(),
+                "constraint": "Window",
+                "observatory_id": observatory_id,
+            },
+            "end": {
+                "datetime": (begin + timedelta(minutes=minutes)).isoformat(),
+                "constraint": "Window",
+                "observatory_id": observatory_id,
+            },
+        },
+        "max_visibility_duration": minutes * 60,
+        "constraint_reason": {
+            "start_reason": "Observatory Window",
+            "end_reason": "Observatory Window",
+        },
+    }
+
+
+class TestRun:
+    @pytest.fixture(autouse=True)
+    def setup(
+        self,
+        monkeypatch: pytest.MonkeyPatch,
+        fake_visibility_job: VisibilityJob,
+        fake_job_parameters: JointVisibilityReadParams,
+    ) -> None:
+        monkeypatch.setattr(config, "VISIBILITY_JOB_CHUNK_DAYS", 1)
+        fake_job_parameters.date_range_end = (
+            fake_job_parameters.date_range_begin + timedelta(days=3)
+        )
+        fake_visibility_job.parameters = fake_job_parameters.model_dump(mode="json")
+        fake_visibility_job.status = VisibilityJobStatus.RUNNING
+        fake_visibility_job.heartbeat_on = datetime.now()
+        self.job = fake_visibility_job
+
+        monkeypatch.setattr(
+            worker, "_instruments", AsyncMock(return_value=[(MagicMock(), uuid4())])
+        )
+        self.mock_compute_chunk = AsyncMock(return_value={"visibility_windows": []})
+        monkeypatch.setattr(worker, "compute_chunk", self.mock_compute_chunk)
+        self.mock_save = AsyncMock(side_effect=lambda *args, **kwargs: datetime.now())
+        monkeypatch.setattr(worker, "_save", self.mock_save)
+
+    @pytest.mark.asyncio
+    async def test_should_checkpoint_the_progress_of_each_chunk(self) -> None:
+        """Should save the windows and progress of the job after each chunk"""
+        await worker.run(self.job)
+
+        progress = [
+            call.kwargs["progress"]
+            for call in self.mock_save.call_args_list
+            if "checkpoint" in call.kwargs and "status" not in call.kwargs
+        ]
+        assert progress == pytest.approx([100 / 3, 200 / 3, 100])
+
+    @pytest.mark.asyncio
+    async def test_should_store_the_result(self) -> None:
+        """Should save the result of the job once every chunk is computed"""
+        await worker.run(self.job)
+
+        saved = self.mock_save.call_args.kwargs
+        assert saved["status"] == VisibilityJobStatus.SUCCEEDED
+        assert saved["result"]["instrument_id"] == str(
+            self.job.parameters["instrument_ids"][0]
+        )
+
+    @pytest.mark.asyncio
+    async def test_should_resume_from_the_checkpoint(self) -> None:
+        """Should only compute the chunks not yet checkpointed"""
+        self.job.checkpoint = [{"visibility_windows": []}] * 2
+
+        await worker.run(self.job)
+
+        self.mock_compute_chunk.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_should_stop_when_the_job_was_claimed_again(self) -> None:
+        """Should stop computing a job another worker holds"""
+        self.mock_save.side_effect = None
+        self.mock_save.return_value = None
+
+        await worker.run(self.job)
+
+        self.mock_compute_chunk.assert_called_once()
+        self.mock_save.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_should_save_the_error_of_a_failed_job(self) -> None:
+        """Should fail the job with the error that stopped it"""
+        self.mock_compute_chunk.side_effect = VisibilityConstraintsNotFoundException(
+            uuid4()
+        )
+
+        await worker.run(self.job)
+
+        saved = self.mock_save.call_args.kwargs
+        assert saved["status"] == VisibilityJobStatus.FAILED
+        assert saved["error"] == "Constraint not found."
+
+
+class TestBuildResult:
+    def test_should_stitch_the_windows_of_each_instrument(
+        self, fake_job_parameters: JointVisibilityReadParams
+    ) -> None:
+        """Should stitch the joint windows and the windows of each instrument"""
+        begin = fake_job_parameters.date_range_begin
+        boundary = begin + timedelta(days=1)
+        checkpoint = [
+            {
+                "visibility_windows": [window(boundary - timedelta(hours=1), 60)],
+                "observatory_visibility_windows": {
+                    str(fake_job_parameters.instrument_ids[0]): [window(begin, 10)]
+                },
+            },
+            {
+                "visibility_windows": [window(boundary, 30)],
+                "observatory_visibility_windows": {
+                    str(fake_job_parameters.instrument_ids[0]): [
+                        window(boundary + timedelta(hours=1), 10)
+                    ]
+                },
+            },
+        ]
+
+        result = JointVisibilityResult.model_validate(
+            worker.build_result(
+                VisibilityJobKind.JOINT_WINDOWS, fake_job_parameters, checkpoint
+            )
+        )
+
+        (joint_window,) = result.visibility_windows
+        assert joint_window.max_visibility_duration == 90 * 60
+        assert (
+            len(
+                result.observatory_visibility_windows[
+                    fake_job_parameters.instrument_ids[0]
+                ]
+            )
+            == 2
+        )
+
+
+class TestWorkers:
+    @pytest.mark.asyncio
+    async def test_should_claim_jobs_when_notified(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Should look for a job as soon as one is submitted"""
+        monkeypatch.setattr(config, "VISIBILITY_JOB_WORKERS", 1)
+        monkeypatch.setattr(config, "VISIBILITY_JOB_POLL_SECONDS", 60)
+        mock_claim = AsyncMock(return_value=None)
+        monkeypatch.setattr(worker, "claim", mock_claim)
+        monkeypatch.setattr(worker, "prune", AsyncMock())
+
+        await worker.start()
+        try:
+            await asyncio.sleep(0)
+            worker.notify()
+            for _ in range(10):
+                await asyncio.sleep(0)
+        finally:
+            await worker.stop()
+
+        assert mock_claim.call_count == 2
@@ -1,3 +1,4 @@
+import json
 from unittest.mock import AsyncMock, MagicMock
 from uuid import UUID
 
@@ -6,9 +7,14 @@ import pytest
 import pytest_asyncio
 from httpx import AsyncClient
 
+from across_server.core.admission import AdmissionController
+from across_server.core.config import config
+from across_server.db.models import Instrument
 from across_server.routes.v1.tools.visibility_calculator.schemas import (
+    BatchVisibilityResult,
     JointVisibilityResult,
     VisibilityResult,
+    VisibilityStreamError,
 )
 
 
@@ -63,6 +69,124 @@ class TestVisibilityCalculatorRouter:
         )
         assert VisibilityResult.model_validate(res.json())
 
+    @pytest.mark.asyncio
+    async def test_get_should_pass_adaptive_to_service(
+        self,
+        mock_visibility_calculator_service: AsyncMock,
+        fake_visibility_read_params: dict,
+    ) -> None:
+        """Should calculate adaptive windows when requested"""
+        res = await self.client.get(
+            self.endpoint,
+            params={**fake_visibility_read_params, "adaptive": True},
+        )
+
+        assert res.status_code == fastapi.status.HTTP_200_OK
+        call = mock_visibility_calculator_service.calculate_windows.call_args
+        assert call.kwargs["adaptive"] is True
+
+    @pytest.mark.asyncio
+    async def test_get_should_return_503_with_retry_after_when_overloaded(
+        self,
+        fake_admission: AdmissionController,
+        fake_visibility_read_params: dict,
+    ) -> None:
+        """Should reject with a 503 and a Retry-After when calculations are over budget"""
+        await fake_admission.acquire(fake_admission.max_cost)
+
+        res = await self.client.get(
+            self.endpoint,
+            params=fake_visibility_read_params,
+        )
+
+        assert res.status_code == fastapi.status.HTTP_503_SERVICE_UNAVAILABLE
+        assert res.headers["retry-after"] == "7"
+
+    @pytest.mark.asyncio
+    async def test_get_should_release_admission_when_done(
+        self,
+        fake_admission: AdmissionController,
+        fake_visibility_read_params: dict,
+    ) -> None:
+        """Should give the cost of the calculation back once done"""
+        await self.client.get(
+            self.endpoint,
+            params=fake_visibility_read_params,
+        )
+
+        assert fake_admission.cost_in_use == 0
+
+
+class TestBatchVisibilityCalculatorRouter:
+    @pytest_asyncio.fixture(autouse=True)
+    async def setup(
+        self,
+        async_client: AsyncClient,
+        fake_instrument_id: UUID,
+    ) -> None:
+        self.client = async_client
+        self.endpoint = (
+            f"/tools/visibility-calculator/windows/{fake_instrument_id}/batch"
+        )
+
+    @pytest.mark.asyncio
+    async def test_post_should_return_404_when_instrument_has_no_telescope(
+        self,
+        mock_instrument_service: AsyncMock,
+        fake_instrument_schema_from_orm: MagicMock,
+        fake_batch_visibility_params: dict,
+    ) -> None:
+        """Should return a 404 status when instrument has no associated telescope"""
+        fake_instrument_schema_from_orm.telescope = None
+        mock_instrument_service.get.return_value = fake_instrument_schema_from_orm
+
+        res = await self.client.post(self.endpoint, json=fake_batch_visibility_params)
+        assert res.status_code == fastapi.status.HTTP_404_NOT_FOUND
+
+    @pytest.mark.asyncio
+    async def test_post_should_stream_a_result_per_target(
+        self,
+        fake_batch_visibility_params: dict,
+    ) -> None:
+        """Should stream one line of JSON per target, in the order of the targets"""
+        res = await self.client.post(self.endpoint, json=fake_batch_visibility_params)
+
+        assert res.status_code == fastapi.status.HTTP_200_OK
+        assert res.headers["content-type"] == "application/x-ndjson"
+        results = [
+            BatchVisibilityResult.model_validate_json(line)
+            for line in res.text.splitlines()
+        ]
+        assert [(result.index, result.ra, result.dec) for result in results] == [
+            (0, 10.0, 20.0),
+            (1, 30.0, -40.0),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_post_should_release_admission_once_streamed(
+        self,
+        fake_admission: AdmissionController,
+        fake_batch_visibility_params: dict,
+    ) -> None:
+        """Should hold the cost of the calculations until the results are streamed"""
+        res = await self.client.post(self.endpoint, json=fake_batch_visibility_params)
+
+        assert res.status_code == fastapi.status.HTTP_200_OK
+        assert fake_admission.cost_in_use == 0
+
+    @pytest.mark.asyncio
+    async def test_post_should_return_422_when_too_many_targets(
+        self,
+        fake_batch_visibility_params: dict,
+    ) -> None:
+        """Should return a 422 status code over the maximum number of targets"""
+        fake_batch_visibility_params["targets"] = [{"ra": 10.0, "dec": 20.0}] * (
+            config.VISIBILITY_BATCH_MAX_TARGETS + 1
+        )
+
+        res = await self.client.post(self.endpoint, json=fake_batch_visibility_params)
+        assert res.status_code == fastapi.status.HTTP_422_UNPROCESSABLE_CONTENT
+
 
 class TestJointVisibilityCalculatorRouter:
     @pytest_asyncio.fixture(autouse=True)
@@ -82,7 +206,9 @@ class TestJointVisibilityCalculatorRouter:
     ) -> None:
         """Should return a 404 status when any instrument has no associated telescope"""
         fake_instrument_schema_from_orm.telescope = None
-        mock_instrument_service.get.return_value = fake_instrument_schema_from_orm
+        mock_instrument_service.get_by_ids.return_value = [
+            fake_instrument_schema_from_orm
+        ]
 
         res = await self.client.get(
             self.endpoint,
@@ -126,3 +252,126 @@ class TestJointVisibilityCalculatorRouter:
             params=fake_joint_visibility_read_params,
         )
         assert res.status_code == fastapi.status.HTTP_422_UNPROCESSABLE_CONTENT
+
+
+def parse_events(text: str) -> list[tuple[str, dict]]:
+    """The event name and data of each server-sent event"""
+    events = []
+    for block in text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+class TestStreamJointVisibilityCalculatorRouter:
+    @pytest_asyncio.fixture(autouse=True)
+    async def setup(
+        self,
+        async_client: AsyncClient,
+    ) -> None:
+        self.client = async_client
+        self.endpoint = "/tools/visibility-calculator/windows/stream/"
+
+    @pytest.mark.asyncio
+    async def test_get_should_return_404_when_instrument_has_no_telescope(
+        self,
+        mock_instrument_service: AsyncMock,
+        fake_instrument_schema_from_orm: MagicMock,
+        fake_joint_visibility_read_params: dict,
+    ) -> None:
+        """Should return a 404 status before streaming when any instrument has no telescope"""
+        fake_instrument_schema_from_orm.telescope = None
+        mock_instrument_service.get_by_ids.return_value = [
+            fake_instrument_schema_from_orm
+        ]
+
+        res = await self.client.get(
+            self.endpoint,
+            params=fake_joint_visibility_read_params,
+        )
+        assert res.status_code == fastapi.status.HTTP_404_NOT_FOUND
+
+    @pytest.mark.asyncio
+    async def test_get_should_stream_server_sent_events(
+        self,
+        fake_joint_visibility_read_params: dict,
+    ) -> None:
+        """Should stream the results as server-sent events"""
+        res = await self.client.get(
+            self.endpoint,
+            params=fake_joint_visibility_read_params,
+        )
+
+        assert res.status_code == fastapi.status.HTTP_200_OK
+        assert res.headers["content-type"].startswith("text/event-stream")
+
+    @pytest.mark.asyncio
+    async def test_get_should_return_503_before_streaming_when_overloaded(
+        self,
+        fake_admission: AdmissionController,
+        fake_joint_visibility_read_params: dict,
+    ) -> None:
+        """Should reject with a 503 before streaming when calculations are over budget"""
+        await fake_admission.acquire(fake_admission.max_cost)
+
+        res = await self.client.get(
+            self.endpoint,
+            params=fake_joint_visibility_read_params,
+        )
+
+        assert res.status_code == fastapi.status.HTTP_503_SERVICE_UNAVAILABLE
+        assert res.headers["retry-after"] == "7"
+
+    @pytest.mark.asyncio
+    async def test_get_should_stream_each_visibility_then_joint_visibility(
+        self,
+        mock_instrument_service: AsyncMock,
+        mock_instrument_data: Instrument,
+        fake_joint_visibility_read_params: dict,
+    ) -> None:
+        """Should stream each instrument's visibility as calculated, then the joint visibility"""
+        mock_instrument_service.get_by_ids.return_value = [
+            mock_instrument_data,
+            mock_instrument_data,
+        ]
+
+        res = await self.client.get(
+            self.endpoint,
+            params=fake_joint_visibility_read_params,
+        )
+
+        events = parse_events(res.text)
+        assert [event for event, _ in events] == [
+            "visibility",
+            "visibility",
+            "joint_visibility",
+        ]
+        instrument_ids = fake_joint_visibility_read_params["instrument_ids"]
+        assert [
+            VisibilityResult.model_validate(data).instrument_id
+            for _, data in events[:2]
+        ] == [instrument_ids[1], instrument_ids[0]]
+        assert JointVisibilityResult.model_validate(events[-1][1])
+
+    @pytest.mark.asyncio
+    async def test_get_should_stream_error_when_calculation_fails(
+        self,
+        mock_visibility_calculator_service: AsyncMock,
+        fake_joint_visibility_read_params: dict,
+    ) -> None:
+        """Should end the stream with an error event when a calculation fails"""
+        mock_visibility_calculator_service.find_joint_visibility.side_effect = (
+            fastapi.HTTPException(
+                status_code=fastapi.status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Ephemeris unavailable",
+            )
+        )
+
+        res = await self.client.get(
+            self.endpoint,
+            params=fake_joint_visibility_read_params,
+        )
+
+        event, data = parse_events(res.text)[-1]
+        assert event == "error"
+        assert VisibilityStreamError.model_validate(data).status_code == 503
@@ -0,0 +1,126 @@
+from datetime import datetime
+from uuid import uuid4
+
+import numpy as np
+import pytest
+from across.tools.core.schemas import Coordinate, Polygon
+from across.tools.footprint import Footprint as ToolsFootprint
+
+from across_server.routes.v1.footprint.schemas import Point
+from across_server.routes.v1.tools.visibility_calculator import footprints
+
+
+class TestProject:
+    @pytest.fixture(autouse=True)
+    def setup(self, fake_footprint: list[list[Point]]) -> None:
+        self.instrument_footprint = footprints.InstrumentFootprint.create(
+            fake_footprint
+        )
+        self.tools_footprint = ToolsFootprint(
+            detectors=[
+                Polygon(
+                    coordinates=[
+                        Coordinate(ra=point.x, dec=point.y) for point in footprint
+                    ]
+                )
+                for footprint in fake_footprint
+            ]
+        )
+
+    @pytest.mark.asyncio
+    async def test_should_project_as_across_tools(self) -> None:
+        """Should project the footprint to each pointing as across-tools does"""
+        rng = np.random.default_rng(0)
+        ra = rng.uniform(0, 360, 100)
+        dec = rng.uniform(-90, 90, 100)
+        roll_angle = rng.uniform(-360, 360, 100)
+
+        projected = footprints.project(self.instrument_footprint, ra, dec, roll_angle)
+
+        for footprint, pointing in zip(projected, zip(ra, dec, roll_angle)):
+            expected = self.tools_footprint.project(
+                Coordinate(ra=pointing[0], dec=pointing[1]), roll_angle=pointing[2]
+            )
+            for detector, expected_detector in zip(
+                footprint.detectors, expected.detectors
+            ):
+                assert np.allclose(
+                    [(c.ra, c.dec) for c in detector.coordinates],
+                    [(c.ra, c.dec) for c in expected_detector.coordinates],
+                    atol=1e-4,
+                )
+
+    @pytest.mark.asyncio
+    async def test_should_compute_extent_of_footprint(self) -> None:
+        """Should compute the largest distance of a vertex from the center"""
+        assert self.instrument_footprint.extent == pytest.approx(7.07, abs=0.01)
+
+
+class TestInstrumentFootprint:
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        footprints._footprints.clear()
+
+    @pytest.mark.asyncio
+    async def test_should_cache_instrument_footprint(
+        self, fake_footprint: list[list[Point]]
+    ) -> None:
+        """Should reuse the footprint of an instrument across calls"""
+        instrument_id = uuid4()
+
+        first = footprints.instrument_footprint(instrument_id, fake_footprint)
+        second = footprints.instrument_footprint(instrument_id, fake_footprint)
+
+        assert first is second
+
+    @pytest.mark.asyncio
+    async def test_should_not_reuse_changed_footprint(
+        self, fake_footprint: list[list[Point]]
+    ) -> None:
+        """Should not reuse the footprint of an instrument once it changed"""
+        instrument_id = uuid4()
+
+        first = footprints.instrument_footprint(instrument_id, fake_footprint)
+        second = footprints.instrument_footprint(
+            instrument_id,
+            [[Point(x=point.x / 2, y=point.y / 2) for point in fake_footprint[0]]],
+        )
+
+        assert first is not second
+
+
+class TestBuildPointings:
+    @pytest.fixture(autouse=True)
+    def setup(self, fake_footprint: list[list[Point]]) -> None:
+        self.instrument_footprint = footprints.InstrumentFootprint.create(
+            fake_footprint
+        )
+        self.begin = datetime(2026, 1, 1)
+        self.end = datetime(2026, 1, 2)
+
+    @pytest.mark.asyncio
+    async def test_should_skip_observations_without_pointing(self) -> None:
+        """Should skip observations without a pointing nor stored footprint"""
+        rows = [
+            (uuid4(), None, None, None, self.begin, self.end, None),
+            (uuid4(), 10.0, 20.0, None, self.begin, self.end, None),
+        ]
+
+        pointings = footprints.build_pointings(self.instrument_footprint, rows)
+
+        assert len(pointings) == 1
+
+    @pytest.mark.asyncio
+    async def test_should_return_no_pointings_without_observations(self) -> None:
+        """Should return no pointings when there are no observations"""
+        assert footprints.build_pointings(self.instrument_footprint, []) == []
+
+    @pytest.mark.asyncio
+    async def test_should_keep_observation_date_range(self) -> None:
+        """Should set the times of a pointing to the date range of its observation"""
+        rows = [(uuid4(), 10.0, 20.0, 30.0, self.begin, self.end, None)]
+
+        (pointing,) = footprints.build_pointings(self.instrument_footprint, rows)
+
+        assert pointing.start_time == self.begin
+        assert pointing.end_time == self.end
@@ -0,0 +1,211 @@
+from datetime import datetime, timedelta
+from typing import Any
+
+import astropy.units as u  # type: ignore[import-untyped]
+import numpy as np
+import pytest
+from across.tools.core.enums import ConstraintType
+from across.tools.visibility import EphemerisVisibility, compute_ephemeris_visibility
+from across.tools.visibility.constraints import EarthLimbConstraint
+from astropy.constants import R_earth  # type: ignore[import-untyped]
+from astropy.coordinates import (  # type: ignore[import-untyped]
+    GCRS,
+    CartesianDifferential,
+    CartesianRepresentation,
+    EarthLocation,
+    SkyCoord,
+)
+from astropy.time import Time, TimeDelta  # type: ignore[import-untyped]
+
+from across_server.routes.v1.tools.ephemeris.cache import CachedEphemeris
+from across_server.routes.v1.tools.visibility_calculator.refinement import (
+    compute_adaptive_visibility,
+    ephemeris_range,
+)
+
+# a circular low Earth orbit of 88 minutes
+ORBIT_RADIUS = 6700.0
+ORBIT_RATE = 2 * np.pi / (88 * 60)
+INCLINATION = 0.5
+
+BEGIN = datetime(2025, 1, 1, 0, 7, 13)
+END = datetime(2025, 1, 3, 5, 3, 1)
+COARSE_STEP = 300
+PRECISION = 10
+
+
+def _body(
+    timestamp: Time, position: np.ndarray, velocity: np.ndarray, geocentric: list
+) -> SkyCoord:
+    """A body fixed in GCRS, as seen from the spacecraft"""
+    return SkyCoord(
+        CartesianRepresentation((np.array(geocentric)[:, None] - position) * u.km),
+        frame=GCRS(
+            obstime=timestamp,
+            obsgeoloc=CartesianRepresentation(position * u.km),
+            obsgeovel=CartesianRepresentation(velocity * u.km / u.s),
+        ),
+    )
+
+
+def orbit(begin: datetime, end: datetime, step_size: int) -> CachedEphemeris:
+    """An ephemeris of a spacecraft in a circular low Earth orbit"""
+    timestamp = Time(
+        np.arange(
+            Time(begin).unix // step_size * step_size,
+            Time(end).unix // step_size * step_size + step_size,
+            step_size,
+        ),
+        format="unix",
+    )
+    phase = timestamp.unix * ORBIT_RATE
+    position = ORBIT_RADIUS * np.stack(
+        [
+            np.cos(phase),
+            np.sin(phase) * np.cos(INCLINATION),
+            np.sin(phase) * np.sin(INCLINATION),
+        ]
+    )
+    velocity = (
+        ORBIT_RADIUS
+        * ORBIT_RATE
+        * np.stack(
+            [
+                -np.sin(phase),
+                np.cos(phase) * np.cos(INCLINATION),
+                np.cos(phase) * np.sin(INCLINATION),
+            ]
+        )
+    )
+    gcrs = SkyCoord(
+        CartesianRepresentation(position * u.km).with_differentials(
+            CartesianDifferential(velocity * u.km / u.s)
+        ),
+        frame=GCRS(obstime=timestamp),
+    )
+    earth_location = EarthLocation.from_geocentric(*position, unit=u.km)
+
+    return CachedEphemeris(
+        TimeDelta(step_size * u.s),
+        {
+            "timestamp": timestamp,
+            "gcrs": gcrs,
+            "earth": _body(timestamp, position, velocity, [0, 0, 0]),
+            "sun": _body(timestamp, position, velocity, [1.496e8, 0, 0]),
+            "moon": _body(timestamp, position, velocity, [0, 384400, 0]),
+            "earth_location": earth_location,
+            "longitude": earth_location.lon,
+            "latitude": earth_location.lat,
+            "height": earth_location.height,
+            "distance": gcrs.distance,
+            "earth_radius_angle": np.arcsin(np.minimum(R_earth / gcrs.distance, 1)),
+        },
+    )
+
+
+def edges(
+    visibility: EphemerisVisibility,
+) -> list[tuple[float, float, ConstraintType, ConstraintType]]:
+    """The times and constraints of the window edges of a visibility"""
+    return [
+        (
+            Time(window.window.begin.datetime).unix,
+            Time(window.window.end.datetime).unix,
+            window.window.begin.constraint,
+            window.window.end.constraint,
+        )
+        for window in visibility.visibility_windows
+    ]
+
+
+class TestComputeAdaptiveVisibility:
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.constraints = [EarthLimbConstraint(min_angle=30)]
+        self.coordinate = SkyCoord(40 * u.deg, 10 * u.deg)
+        self.ephemeris = orbit(*ephemeris_range(BEGIN, END, COARSE_STEP), COARSE_STEP)
+
+    def adaptive(
+        self, begin: datetime = BEGIN, min_vis: int = 0
+    ) -> EphemerisVisibility:
+        return compute_adaptive_visibility(
+            begin=begin,
+            end=END,
+            ephemeris=self.ephemeris,
+            constraints=self.constraints,
+            coordinate=self.coordinate,
+            coarse_step=COARSE_STEP,
+            precision=PRECISION,
+            min_vis=min_vis,
+        )
+
+    def reference(
+        self, begin: datetime = BEGIN, min_vis: int = 0
+    ) -> EphemerisVisibility:
+        return compute_ephemeris_visibility(
+            begin=Time(begin),
+            end=Time(END),
+            ephemeris=orbit(
+                begin - timedelta(hours=1), END + timedelta(hours=1), PRECISION
+            ),
+            constraints=self.constraints,
+            coordinate=self.coordinate,
+            step_size=PRECISION * u.s,
+            min_vis=min_vis,
+        )
+
+    def test_should_match_windows_of_precision_step(self) -> None:
+        """Should return the windows of a visibility at every precision step"""
+        adaptive = edges(self.adaptive())
+        reference = edges(self.reference())
+
+        assert len(adaptive) == len(reference) > 10
+        assert [edge[2:] for edge in adaptive] == [edge[2:] for edge in reference]
+        assert np.allclose(
+            [edge[:2] for edge in adaptive],
+            [edge[:2] for edge in reference],
+            rtol=0,
+            atol=PRECISION,
+        )
+
+    def test_should_clip_windows_to_date_range(self) -> None:
+        """Should clip the windows at the date range, as constrained by it"""
+        adaptive = self.adaptive()
+        reference = self.reference()
+
+        first = adaptive.visibility_windows[0].window
+        last = adaptive.visibility_windows[-1].window
+        assert first.begin.constraint == ConstraintType.WINDOW
+        assert last.end.constraint == ConstraintType.WINDOW
+        assert (
+            first.begin.datetime
+            == reference.visibility_windows[0].window.begin.datetime
+        )
+        assert last.end.datetime == reference.visibility_windows[-1].window.end.datetime
+
+    def test_should_skip_windows_shorter_than_min_vis(self) -> None:
+        """Should return only the windows longer than the minimum duration"""
+        adaptive = edges(self.adaptive(min_vis=1200))
+        reference = edges(self.reference(min_vis=1200))
+
+        assert 0 < len(adaptive) == len(reference)
+        assert all(end - begin > 1200 for begin, end, *_ in adaptive)
+
+    def test_should_evaluate_coarse_grid_and_edges_only(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Should evaluate far fewer times than a visibility at every precision step"""
+        evaluated: list[int] = []
+        constraint = self.constraints[0]
+        original = type(constraint).__call__
+
+        def counted(self: EarthLimbConstraint, time: Time, **kwargs: Any) -> Any:
+            evaluated.append(time.size)
+            return original(self, time=time, **kwargs)
+
+        monkeypatch.setattr(type(constraint), "__call__", counted)
+
+        self.adaptive()
+
+        steps = (END - BEGIN).total_seconds() / PRECISION
+        assert sum(evaluated) < steps / 10
@@ -0,0 +1,188 @@
+from collections import OrderedDict
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+from uuid import uuid4
+
+import astropy.units as u  # type: ignore
+import numpy as np
+import pytest
+from across.tools.core.enums import ConstraintType
+from across.tools.visibility import EphemerisVisibility
+from astropy.time import Time, TimeDelta  # type: ignore
+
+from across_server.routes.v1.tools.visibility_calculator.cache import (
+    VisibilityCache,
+    cut,
+    visibility_key,
+)
+
+STEP_SIZE = 60
+OBSERVATORY_ID = uuid4()
+# a day in, on the step grid
+FIRST = 1440
+
+
+def compute(
+    inconstraint: np.ndarray, first: int = FIRST, min_vis: int = 0
+) -> EphemerisVisibility:
+    """The visibility of points `first` onwards, as computed by across-tools"""
+    timestamp = Time((first + np.arange(len(inconstraint))) * STEP_SIZE, format="unix")
+    visibility = EphemerisVisibility.model_construct(
+        ephemeris=None,  # type: ignore[arg-type]
+        begin=timestamp[0],
+        end=Time((first + len(inconstraint)) * STEP_SIZE, format="unix"),
+        step_size=TimeDelta(STEP_SIZE * u.s),
+        timestamp=timestamp,
+        inconstraint=inconstraint,
+        calculated_constraints=OrderedDict({ConstraintType.SUN: inconstraint}),
+        constraints=[],
+        min_vis=min_vis,
+        observatory_name="Observatory",
+        observatory_id=OBSERVATORY_ID,
+    )
+    return visibility.model_copy(
+        update={"visibility_windows": visibility._make_windows()}
+    )
+
+
+def point(index: int) -> datetime:
+    return datetime.fromtimestamp(index * STEP_SIZE, tz=timezone.utc).replace(
+        tzinfo=None
+    )
+
+
+def windows(visibility: EphemerisVisibility) -> list[dict]:
+    return [window.model_dump(mode="json") for window in visibility.visibility_windows]
+
+
+class TestCut:
+    @pytest.mark.parametrize("seed", range(5))
+    @pytest.mark.parametrize("min_vis", [0, 600])
+    def test_should_equal_computing_over_the_range(
+        self, seed: int, min_vis: int
+    ) -> None:
+        """Should cut the windows computed over the range from a wider range"""
+        random = np.random.default_rng(seed)
+        # runs of constrained and unconstrained steps
+        inconstraint = np.repeat(
+            random.integers(0, 2, 40).astype(bool), random.integers(1, 30, 40)
+        )
+        start, stop = sorted(random.integers(0, len(inconstraint), 2))
+        full = compute(inconstraint, min_vis=min_vis)
+
+        result = cut(full, point(FIRST + start), point(FIRST + stop))
+
+        assert windows(result) == windows(
+            compute(inconstraint[start:stop], FIRST + start, min_vis)
+        )
+
+    def test_should_constrain_clipped_windows_by_the_window(self) -> None:
+        """Should end windows reaching the range's ends with the window"""
+        inconstraint = np.array([True] * 5 + [False] * 20 + [True] * 5)
+        full = compute(inconstraint)
+
+        result = cut(full, point(FIRST + 10), point(FIRST + 15))
+
+        window = result.visibility_windows[0]
+        assert window.window.begin.constraint == ConstraintType.WINDOW
+        assert window.window.end.constraint == ConstraintType.WINDOW
+        assert window.constraint_reason.start_reason == "Observatory Window"
+        assert window.max_visibility_duration == 4 * STEP_SIZE
+
+    def test_should_set_the_range_of_the_visibility(self) -> None:
+        """Should return the visibility over the cut range"""
+        full = compute(np.zeros(30, dtype=bool))
+
+        result = cut(full, point(FIRST + 10), point(FIRST + 15))
+
+        assert result.begin.unix == (FIRST + 10) * STEP_SIZE
+        assert result.end.unix == (FIRST + 15) * STEP_SIZE
+
+
+class TestVisibilityKey:
+    def key(self, constraints: list, ephemeris: object) -> tuple | None:
+        return visibility_key(
+            constraints,
+            OBSERVATORY_ID,
+            ephemeris,  # type: ignore
+            10.0,
+            20.0,
+            STEP_SIZE,
+            0,
+        )
+
+    def test_should_return_none_when_ephemeris_has_no_key(self) -> None:
+        """Should not cache windows from an ephemeris of unknown source"""
+        assert self.key([], MagicMock(key=None)) is None
+
+    def test_should_change_with_the_constraints(self) -> None:
+        """Should make a new key when the instrument's constraints change"""
+        ephemeris = MagicMock(key=("tle", 1, "line 1", "line 2"))
+
+        assert self.key([{"min_angle": 45}], ephemeris) != self.key(
+            [{"min_angle": 46}], ephemeris
+        )
+
+    def test_should_change_with_the_ephemeris_source(self) -> None:
+        """Should make a new key when the ephemeris source changes, e.g. a newer TLE"""
+        assert self.key([], MagicMock(key=("tle", 1, "a", "b"))) != self.key(
+            [], MagicMock(key=("tle", 1, "c", "d"))
+        )
+
+    def test_should_round_the_coordinate_to_an_arcsecond(self) -> None:
+        """Should share the key of coordinates within an arcsecond"""
+        ephemeris = MagicMock(key=("ground",))
+
+        assert visibility_key(
+            [], OBSERVATORY_ID, ephemeris, 10.0, 20.0, STEP_SIZE, 0
+        ) == visibility_key(
+            [], OBSERVATORY_ID, ephemeris, 10.0001, 20.0001, STEP_SIZE, 0
+        )
+
+
+class TestVisibilityCache:
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.cache = VisibilityCache(max_size=10, ttl=60, ranges=2)
+        self.full = compute(np.array([True] * 5 + [False] * 20 + [True] * 5))
+
+    def test_should_return_none_when_nothing_cached(self) -> None:
+        """Should miss when the key has no cached ranges"""
+        assert self.cache.get(("key",), point(FIRST), point(FIRST + 30)) is None
+        assert self.cache.entries.misses == 1
+
+    def test_should_return_windows_within_a_cached_range(self) -> None:
+        """Should cut the windows of a range within a cached one"""
+        self.cache.set(("key",), self.full)
+
+        result = self.cache.get(("key",), point(FIRST + 10), point(FIRST + 20))
+
+        assert result is not None
+        assert windows(result) == windows(
+            cut(self.full, point(FIRST + 10), point(FIRST + 20))
+        )
+        assert self.cache.entries.hits == 1
+
+    def test_should_miss_a_range_beyond_cached_ones(self) -> None:
+        """Should miss when no cached range covers the range"""
+        self.cache.set(("key",), self.full)
+
+        assert self.cache.get(("key",), point(FIRST + 10), point(FIRST + 40)) is None
+
+    def test_should_keep_the_latest_ranges(self) -> None:
+        """Should keep at most `ranges` ranges per key, dropping the oldest"""
+        for first in (0, 100, 200):
+            self.cache.set(("key",), compute(np.zeros(30, dtype=bool), first))
+
+        assert self.cache.get(("key",), point(0), point(30)) is None
+        assert self.cache.get(("key",), point(100), point(130)) is not None
+        assert self.cache.get(("key",), point(200), point(230)) is not None
+
+    def test_should_not_keep_the_arrays_of_the_visibility(self) -> None:
+        """Should only keep the windows of cached visibilities"""
+        self.cache.set(("key",), self.full)
+
+        (cached,) = self.cache.entries.peek(("key",)) or ()
+        assert cached.timestamp is None
+        assert len(cached.inconstraint) == 0
+        assert cached.ephemeris is None
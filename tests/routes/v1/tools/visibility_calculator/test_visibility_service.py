@@ -1,20 +1,29 @@
+import asyncio
+from collections.abc import AsyncGenerator
+from contextlib import aclosing
 from datetime import datetime
+from typing import Any
 from unittest.mock import AsyncMock, MagicMock
-from uuid import UUID
+from uuid import UUID, uuid4
 
+import anyio.to_thread
 import astropy.units as u  # type: ignore
 import pytest
 from across.tools.footprint.schemas import Pointing
 from across.tools.visibility.constraints import PointingConstraint
 
 import across_server.routes.v1.tools.visibility_calculator.service as service_mod
+from across_server.core import processes
+from across_server.core.config import config
 from across_server.core.enums.visibility_type import VisibilityType
-from across_server.db.models import Observation
 from across_server.routes.v1.instrument.schemas import Instrument as InstrumentSchema
 from across_server.routes.v1.tools.visibility_calculator.exceptions import (
     VisibilityConstraintsNotFoundException,
     VisibilityTypeNotImplementedException,
 )
+from across_server.routes.v1.tools.visibility_calculator.schemas import (
+    VisibilityTarget,
+)
 from across_server.routes.v1.tools.visibility_calculator.service import (
     VisibilityCalculatorService,
 )
@@ -85,6 +94,47 @@ class TestVisibilityService:
             expected_step_size = 3600 * u.s  # type: ignore
             assert expected_step_size == mock_partial.call_args_list[0][1]["step_size"]
 
+        @pytest.mark.asyncio
+        async def test_should_return_adaptive_visibility_when_adaptive_is_true(
+            self,
+            mock_db: AsyncMock,
+            fake_coordinates: tuple[float, float],
+            fake_date_range: tuple[datetime, datetime],
+            mock_ephemeris_service: AsyncMock,
+            fake_instrument_with_constraints: InstrumentSchema,
+            fake_observatory_id: UUID,
+            monkeypatch: pytest.MonkeyPatch,
+        ) -> None:
+            """Should calculate adaptive visibility on the coarse step when adaptive is True"""
+            ra, dec = fake_coordinates
+            date_range_begin, date_range_end = fake_date_range
+
+            mock_partial = MagicMock()
+            monkeypatch.setattr(service_mod, "partial", mock_partial)
+
+            service = VisibilityCalculatorService(mock_db, mock_ephemeris_service)
+            await service.calculate_windows(
+                ra=ra,
+                dec=dec,
+                instrument=fake_instrument_with_constraints,
+                observatory_id=fake_observatory_id,
+                date_range_begin=date_range_begin,
+                date_range_end=date_range_end,
+                hi_res=True,
+                adaptive=True,
+            )
+
+            coarse_step = config.VISIBILITY_ADAPTIVE_COARSE_STEP_SECONDS
+            args, kwargs = mock_partial.call_args_list[0]
+            assert args == (service_mod.compute_adaptive_visibility,)
+            assert kwargs["coarse_step"] == coarse_step
+            assert kwargs["precision"] == config.VISIBILITY_ADAPTIVE_PRECISION_SECONDS
+            # padded to refine and interpolate the edges of the date range
+            ephemeris_kwargs = mock_ephemeris_service.get.call_args[1]
+            assert ephemeris_kwargs["step_size"] == coarse_step
+            assert ephemeris_kwargs["date_range_begin"] < date_range_begin
+            assert ephemeris_kwargs["date_range_end"] > date_range_end
+
         @pytest.mark.asyncio
         async def test_ephemeris_visibility_raises_exception_when_no_constraints(
             self,
@@ -254,6 +304,637 @@ class TestVisibilityService:
                 "constraints"
             ]
 
+    class TestVisibilityCache:
+        @pytest.fixture(autouse=True)
+        def setup(
+            self, monkeypatch: pytest.MonkeyPatch, mock_ephemeris_service: AsyncMock
+        ) -> None:
+            monkeypatch.setattr(
+                anyio.to_thread,
+                "run_sync",
+                AsyncMock(side_effect=lambda func, limiter: func()),
+            )
+            self.mock_compute = MagicMock()
+            monkeypatch.setattr(
+                service_mod, "compute_ephemeris_visibility", self.mock_compute
+            )
+            self.mock_cache = MagicMock()
+            self.mock_cache.get.return_value = None
+            monkeypatch.setattr(service_mod, "visibility_cache", self.mock_cache)
+            mock_ephemeris_service.get.return_value = MagicMock(key=("tle", 1))
+
+        async def calculate(
+            self,
+            service: VisibilityCalculatorService,
+            instrument: InstrumentSchema,
+            fake_observatory_id: UUID,
+            fake_date_range: tuple[datetime, datetime],
+        ) -> Any:
+            return await service.calculate_windows(
+                ra=10.0,
+                dec=20.0,
+                instrument=instrument,
+                observatory_id=fake_observatory_id,
+                date_range_begin=fake_date_range[0],
+                date_range_end=fake_date_range[1],
+                hi_res=True,
+            )
+
+        @pytest.mark.asyncio
+        async def test_should_return_cached_visibility(
+            self,
+            mock_db: AsyncMock,
+            fake_date_range: tuple[datetime, datetime],
+            mock_ephemeris_service: AsyncMock,
+            fake_instrument_with_constraints: InstrumentSchema,
+            fake_observatory_id: UUID,
+        ) -> None:
+            """Should return the cached windows without computing them"""
+            self.mock_cache.get.return_value = "cached visibility"
+            service = VisibilityCalculatorService(mock_db, mock_ephemeris_service)
+
+            visibility = await self.calculate(
+                service,
+                fake_instrument_with_constraints,
+                fake_observatory_id,
+                fake_date_range,
+            )
+
+            assert visibility == "cached visibility"
+            self.mock_compute.assert_not_called()
+
+        @pytest.mark.asyncio
+        async def test_should_cache_computed_visibility(
+            self,
+            mock_db: AsyncMock,
+            fake_date_range: tuple[datetime, datetime],
+            mock_ephemeris_service: AsyncMock,
+            fake_instrument_with_constraints: InstrumentSchema,
+            fake_observatory_id: UUID,
+        ) -> None:
+            """Should cache the windows computed on a miss"""
+            service = VisibilityCalculatorService(mock_db, mock_ephemeris_service)
+
+            await self.calculate(
+                service,
+                fake_instrument_with_constraints,
+                fake_observatory_id,
+                fake_date_range,
+            )
+
+            self.mock_cache.set.assert_called_once_with(
+                self.mock_cache.get.call_args[0][0], self.mock_compute.return_value
+            )
+
+        @pytest.mark.asyncio
+        async def test_should_not_cache_survey_instruments(
+            self,
+            monkeypatch: pytest.MonkeyPatch,
+            mock_db: AsyncMock,
+            fake_date_range: tuple[datetime, datetime],
+            mock_ephemeris_service: AsyncMock,
+            fake_survey_instrument: InstrumentSchema,
+            fake_observatory_id: UUID,
+        ) -> None:
+            """Should not cache survey instruments, whose pointings change"""
+            monkeypatch.setattr(
+                VisibilityCalculatorService,
+                "_get_pointing_constraint",
+                AsyncMock(return_value=None),
+            )
+            service = VisibilityCalculatorService(mock_db, mock_ephemeris_service)
+
+            await self.calculate(
+                service, fake_survey_instrument, fake_observatory_id, fake_date_range
+            )
+
+            self.mock_cache.get.assert_not_called()
+            self.mock_cache.set.assert_not_called()
+
+        @pytest.mark.asyncio
+        async def test_should_share_concurrent_computations_of_visibility(
+            self,
+            monkeypatch: pytest.MonkeyPatch,
+            mock_db: AsyncMock,
+            fake_date_range: tuple[datetime, datetime],
+            mock_ephemeris_service: AsyncMock,
+            fake_instrument_with_constraints: InstrumentSchema,
+            fake_observatory_id: UUID,
+        ) -> None:
+            """Should compute the windows once for concurrent identical requests"""
+            release = asyncio.Event()
+
+            async def run_sync(func: Any, limiter: Any) -> Any:
+                await release.wait()
+                return func()
+
+            monkeypatch.setattr(
+                anyio.to_thread, "run_sync", AsyncMock(side_effect=run_sync)
+            )
+            service = VisibilityCalculatorService(mock_db, mock_ephemeris_service)
+
+            requests = [
+                asyncio.create_task(
+                    self.calculate(
+                        service,
+                        fake_instrument_with_constraints,
+                        fake_observatory_id,
+                        fake_date_range,
+                    )
+                )
+                for _ in range(3)
+            ]
+            await asyncio.sleep(0.01)
+            release.set()
+            visibilities = await asyncio.gather(*requests)
+
+            assert visibilities == [self.mock_compute.return_value] * 3
+            self.mock_compute.assert_called_once()
+            self.mock_cache.set.assert_called_once()
+
+        @pytest.mark.asyncio
+        async def test_should_not_cache_adaptive_visibility(
+            self,
+            monkeypatch: pytest.MonkeyPatch,
+            mock_db: AsyncMock,
+            fake_date_range: tuple[datetime, datetime],
+            mock_ephemeris_service: AsyncMock,
+            fake_instrument_with_constraints: InstrumentSchema,
+            fake_observatory_id: UUID,
+        ) -> None:
+            """Should not cache adaptive windows, whose edges are off the step"""
+            mock_adaptive = MagicMock()
+            monkeypatch.setattr(
+                service_mod, "compute_adaptive_visibility", mock_adaptive
+            )
+            service = VisibilityCalculatorService(mock_db, mock_ephemeris_service)
+
+            visibility = await service.calculate_windows(
+                ra=10.0,
+                dec=20.0,
+                instrument=fake_instrument_with_constraints,
+                observatory_id=fake_observatory_id,
+                date_range_begin=fake_date_range[0],
+                date_range_end=fake_date_range[1],
+                hi_res=True,
+                adaptive=True,
+            )
+
+            assert visibility == mock_adaptive.return_value
+            self.mock_cache.get.assert_not_called()
+            self.mock_cache.set.assert_not_called()
+
+    class TestCalculateBatchWindows:
+        @pytest.fixture(autouse=True)
+        def setup(self, monkeypatch: pytest.MonkeyPatch) -> None:
+            # run the offloaded calls inline
+            monkeypatch.setattr(
+                anyio.to_thread,
+                "run_sync",
+                AsyncMock(side_effect=lambda func, limiter: func()),
+            )
+            self.mock_compute = MagicMock()
+            self.mock_compute.return_value.model_dump.return_value = {
+                "visibility_windows": []
+            }
+            monkeypatch.setattr(
+                service_mod, "compute_ephemeris_visibility", self.mock_compute
+            )
+            monkeypatch.setattr(config, "VISIBILITY_BATCH_CHUNK_SIZE", 2)
+            self.targets = [VisibilityTarget(ra=float(ra), dec=0.0) for ra in range(5)]
+
+        @pytest.mark.asyncio
+        async def test_should_yield_a_result_per_target_in_order(
+            self,
+            mock_db: AsyncMock,
+            fake_date_range: tuple[datetime, datetime],
+            mock_ephemeris_service: AsyncMock,
+            fake_instrument_with_constraints: InstrumentSchema,
+            fake_observatory_id: UUID,
+        ) -> None:
+            """Should yield the result of each target, in the order of the targets"""
+            service = VisibilityCalculatorService(mock_db, mock_ephemeris_service)
+            results = await service.calculate_batch_windows(
+                targets=self.targets,
+                instrument=fake_instrument_with_constraints,
+                observatory_id=fake_observatory_id,
+                date_range_begin=fake_date_range[0],
+                date_range_end=fake_date_range[1],
+                hi_res=True,
+            )
+
+            assert [(result.index, result.ra) async for result in results] == [
+                (index, float(index)) for index in range(5)
+            ]
+
+        @pytest.mark.asyncio
+        async def test_should_get_the_ephemeris_once(
+            self,
+            mock_db: AsyncMock,
+            fake_date_range: tuple[datetime, datetime],
+            mock_ephemeris_service: AsyncMock,
+            fake_instrument_with_constraints: InstrumentSchema,
+            fake_observatory_id: UUID,
+        ) -> None:
+            """Should compute every target over one ephemeris"""
+            service = VisibilityCalculatorService(mock_db, mock_ephemeris_service)
+            results = await service.calculate_batch_windows(
+                targets=self.targets,
+                instrument=fake_instrument_with_constraints,
+                observatory_id=fake_observatory_id,
+                date_range_begin=fake_date_range[0],
+                date_range_end=fake_date_range[1],
+                hi_res=True,
+            )
+            [result async for result in results]
+
+            mock_ephemeris_service.get.assert_called_once()
+            assert self.mock_compute.call_count == len(self.targets)
+            assert all(
+                call[1]["ephemeris"] is mock_ephemeris_service.get.return_value
+                for call in self.mock_compute.call_args_list
+            )
+
+        @pytest.mark.asyncio
+        async def test_should_yield_the_error_of_a_failed_target(
+            self,
+            mock_db: AsyncMock,
+            fake_date_range: tuple[datetime, datetime],
+            mock_ephemeris_service: AsyncMock,
+            fake_instrument_with_constraints: InstrumentSchema,
+            fake_observatory_id: UUID,
+        ) -> None:
+            """Should yield the error of a failed target and go on with the others"""
+            self.mock_compute.side_effect = [
+                self.mock_compute.return_value,
+                ValueError("Failed"),
+                *[self.mock_compute.return_value] * 3,
+            ]
+            service = VisibilityCalculatorService(mock_db, mock_ephemeris_service)
+            results = await service.calculate_batch_windows(
+                targets=self.targets,
+                instrument=fake_instrument_with_constraints,
+                observatory_id=fake_observatory_id,
+                date_range_begin=fake_date_range[0],
+                date_range_end=fake_date_range[1],
+                hi_res=True,
+            )
+
+            assert [result.error async for result in results] == [
+                None,
+                "Failed",
+                None,
+                None,
+                None,
+            ]
+
+        @pytest.mark.asyncio
+        async def test_should_raise_before_streaming_when_no_constraints(
+            self,
+            mock_db: AsyncMock,
+            fake_date_range: tuple[datetime, datetime],
+            mock_ephemeris_service: AsyncMock,
+            fake_instrument_without_constraints: InstrumentSchema,
+            fake_observatory_id: UUID,
+        ) -> None:
+            """Should raise when the instrument has no constraints"""
+            service = VisibilityCalculatorService(mock_db, mock_ephemeris_service)
+
+            with pytest.raises(VisibilityConstraintsNotFoundException):
+                await service.calculate_batch_windows(
+                    targets=self.targets,
+                    instrument=fake_instrument_without_constraints,
+                    observatory_id=fake_observatory_id,
+                    date_range_begin=fake_date_range[0],
+                    date_range_end=fake_date_range[1],
+                    hi_res=True,
+                )
+            mock_ephemeris_service.get.assert_not_called()
+
+    class TestCalculateJointWindows:
+        @pytest.fixture(autouse=True)
+        def setup(
+            self,
+            monkeypatch: pytest.MonkeyPatch,
+            mock_db: AsyncMock,
+            mock_ephemeris_service: AsyncMock,
+            fake_instrument_with_constraints: InstrumentSchema,
+        ) -> None:
+            # a session per branch, each wrapping the mock session
+            self.mock_async_session = MagicMock(
+                side_effect=lambda: AsyncMock(
+                    __aenter__=AsyncMock(return_value=mock_db)
+                )
+            )
+            monkeypatch.setattr(
+                service_mod.database,
+                "async_session",
+                self.mock_async_session,
+                raising=False,
+            )
+            monkeypatch.setattr(
+                service_mod,
+                "EphemerisService",
+                MagicMock(return_value=mock_ephemeris_service),
+            )
+            mock_ephemeris_service.get.side_effect = lambda observatory_id, **kwargs: (
+                f"ephemeris of {observatory_id}"
+            )
+            self.mock_calc = AsyncMock(
+                side_effect=lambda instrument, ephemeris, **kwargs: (
+                    instrument.id,
+                    ephemeris,
+                )
+            )
+            monkeypatch.setattr(
+                VisibilityCalculatorService,
+                "_calc_ephemeris_visibility",
+                self.mock_calc,
+            )
+            self.instruments = [
+                fake_instrument_with_constraints.model_copy(update={"id": uuid4()})
+                for _ in range(3)
+            ]
+            self.observatory_ids = [uuid4(), uuid4()]
+
+        async def calculate(
+            self,
+            service: VisibilityCalculatorService,
+            fake_date_range: tuple[datetime, datetime],
+        ) -> list:
+            return await service.calculate_joint_windows(
+                ra=10.0,
+                dec=20.0,
+                instruments=[
+                    (self.instruments[0], self.observatory_ids[0]),
+                    (self.instruments[1], self.observatory_ids[1]),
+                    (self.instruments[2], self.observatory_ids[0]),
+                ],
+                date_range_begin=fake_date_range[0],
+                date_range_end=fake_date_range[1],
+                hi_res=True,
+            )
+
+        @pytest.mark.asyncio
+        async def test_should_get_each_observatory_ephemeris_once(
+            self,
+            mock_db: AsyncMock,
+            fake_date_range: tuple[datetime, datetime],
+            mock_ephemeris_service: AsyncMock,
+        ) -> None:
+            """Should get the ephemeris of an observatory once for its instruments"""
+            service = VisibilityCalculatorService(mock_db, mock_ephemeris_service)
+            await self.calculate(service, fake_date_range)
+
+            assert sorted(
+                call.kwargs["observatory_id"]
+                for call in mock_ephemeris_service.get.call_args_list
+            ) == sorted(self.observatory_ids)
+
+        @pytest.mark.asyncio
+        async def test_should_return_visibilities_in_order_of_instruments(
+            self,
+            mock_db: AsyncMock,
+            fake_date_range: tuple[datetime, datetime],
+            mock_ephemeris_service: AsyncMock,
+        ) -> None:
+            """Should return the visibility of each instrument, with its observatory ephemeris"""
+            service = VisibilityCalculatorService(mock_db, mock_ephemeris_service)
+            visibilities = await self.calculate(service, fake_date_range)
+
+            assert visibilities == [
+                (self.instruments[0].id, f"ephemeris of {self.observatory_ids[0]}"),
+                (self.instruments[1].id, f"ephemeris of {self.observatory_ids[1]}"),
+                (self.instruments[2].id, f"ephemeris of {self.observatory_ids[0]}"),
+            ]
+
+        @pytest.mark.asyncio
+        async def test_should_open_a_session_per_branch(
+            self,
+            mock_db: AsyncMock,
+            fake_date_range: tuple[datetime, datetime],
+            mock_ephemeris_service: AsyncMock,
+        ) -> None:
+            """Should run each branch on its own session"""
+            service = VisibilityCalculatorService(mock_db, mock_ephemeris_service)
+            await self.calculate(service, fake_date_range)
+
+            # one per observatory ephemeris, and one per instrument
+            assert self.mock_async_session.call_count == 5
+
+        @pytest.mark.asyncio
+        async def test_should_bound_concurrent_branches(
+            self,
+            monkeypatch: pytest.MonkeyPatch,
+            mock_db: AsyncMock,
+            fake_date_range: tuple[datetime, datetime],
+            mock_ephemeris_service: AsyncMock,
+        ) -> None:
+            """Should run at most VISIBILITY_JOINT_CONCURRENCY branches at once"""
+            monkeypatch.setattr(config, "VISIBILITY_JOINT_CONCURRENCY", 2)
+            running = []
+            most_running = 0
+
+            async def calc(**kwargs: Any) -> None:
+                nonlocal most_running
+                running.append(kwargs["instrument"])
+                most_running = max(most_running, len(running))
+                await asyncio.sleep(0.01)
+                running.remove(kwargs["instrument"])
+
+            self.mock_calc.side_effect = calc
+            service = VisibilityCalculatorService(mock_db, mock_ephemeris_service)
+            await self.calculate(service, fake_date_range)
+
+            assert most_running == 2
+
+        @pytest.mark.asyncio
+        async def test_should_raise_when_any_visibility_type_not_implemented(
+            self,
+            mock_db: AsyncMock,
+            fake_date_range: tuple[datetime, datetime],
+            mock_ephemeris_service: AsyncMock,
+        ) -> None:
+            """Should raise before computing when any instrument's visibility type is not implemented"""
+            self.instruments[1].visibility_type = VisibilityType.CUSTOM
+            service = VisibilityCalculatorService(mock_db, mock_ephemeris_service)
+
+            with pytest.raises(VisibilityTypeNotImplementedException):
+                await self.calculate(service, fake_date_range)
+            mock_ephemeris_service.get.assert_not_called()
+
+        async def stream(
+            self,
+            service: VisibilityCalculatorService,
+            fake_date_range: tuple[datetime, datetime],
+        ) -> AsyncGenerator:
+            return await service.stream_joint_windows(
+                ra=10.0,
+                dec=20.0,
+                instruments=[
+                    (self.instruments[0], self.observatory_ids[0]),
+                    (self.instruments[1], self.observatory_ids[1]),
+                    (self.instruments[2], self.observatory_ids[0]),
+                ],
+                date_range_begin=fake_date_range[0],
+                date_range_end=fake_date_range[1],
+                hi_res=True,
+            )
+
+        @pytest.mark.asyncio
+        async def test_stream_should_yield_visibilities_as_calculated(
+            self,
+            mock_db: AsyncMock,
+            fake_date_range: tuple[datetime, datetime],
+            mock_ephemeris_service: AsyncMock,
+        ) -> None:
+            """Should stream each visibility with its index, as soon as it is calculated"""
+
+            async def calc(instrument: InstrumentSchema, **kwargs: Any) -> UUID:
+                if instrument.id == self.instruments[0].id:
+                    await asyncio.sleep(0.05)
+                return instrument.id
+
+            self.mock_calc.side_effect = calc
+            service = VisibilityCalculatorService(mock_db, mock_ephemeris_service)
+
+            results = [
+                result async for result in await self.stream(service, fake_date_range)
+            ]
+
+            assert results[-1] == (0, self.instruments[0].id)
+            assert sorted(results) == [
+                (index, instrument.id)
+                for index, instrument in enumerate(self.instruments)
+            ]
+
+        @pytest.mark.asyncio
+        async def test_stream_should_not_wait_for_other_observatories(
+            self,
+            mock_db: AsyncMock,
+            fake_date_range: tuple[datetime, datetime],
+            mock_ephemeris_service: AsyncMock,
+        ) -> None:
+            """Should calculate a visibility once its own observatory's ephemeris is ready"""
+            slow = asyncio.Event()
+
+            async def get(observatory_id: UUID, **kwargs: Any) -> str:
+                if observatory_id == self.observatory_ids[0]:
+                    await slow.wait()
+                return f"ephemeris of {observatory_id}"
+
+            mock_ephemeris_service.get.side_effect = get
+            service = VisibilityCalculatorService(mock_db, mock_ephemeris_service)
+
+            async with aclosing(await self.stream(service, fake_date_range)) as results:
+                first = await anext(results)
+                slow.set()
+
+            assert first == (
+                1,
+                (self.instruments[1].id, f"ephemeris of {self.observatory_ids[1]}"),
+            )
+
+        @pytest.mark.asyncio
+        async def test_stream_should_cancel_outstanding_calculations_when_closed(
+            self,
+            mock_db: AsyncMock,
+            fake_date_range: tuple[datetime, datetime],
+            mock_ephemeris_service: AsyncMock,
+        ) -> None:
+            """Should cancel the calculations still outstanding once closed early"""
+            cancelled = []
+
+            async def calc(instrument: InstrumentSchema, **kwargs: Any) -> UUID:
+                if instrument.id != self.instruments[1].id:
+                    try:
+                        await asyncio.sleep(10)
+                    except asyncio.CancelledError:
+                        cancelled.append(instrument.id)
+                        raise
+                return instrument.id
+
+            self.mock_calc.side_effect = calc
+            service = VisibilityCalculatorService(mock_db, mock_ephemeris_service)
+
+            async with aclosing(await self.stream(service, fake_date_range)) as results:
+                await anext(results)
+
+            assert sorted(cancelled) == sorted(
+                [self.instruments[0].id, self.instruments[2].id]
+            )
+
+    class TestProcessPool:
+        @pytest.mark.asyncio
+        async def test_should_compute_visibility_in_worker_process(
+            self,
+            mock_db: AsyncMock,
+            fake_coordinates: tuple[float, float],
+            fake_date_range: tuple[datetime, datetime],
+            mock_ephemeris_service: AsyncMock,
+            fake_instrument_with_constraints: InstrumentSchema,
+            fake_observatory_id: UUID,
+            monkeypatch: pytest.MonkeyPatch,
+        ) -> None:
+            """Should send the ephemeris in shared memory to a worker process"""
+            ra, dec = fake_coordinates
+            date_range_begin, date_range_end = fake_date_range
+            mock_shared = MagicMock()
+            monkeypatch.setattr(processes, "enabled", lambda: True)
+            mock_run = AsyncMock(return_value=MagicMock())
+            monkeypatch.setattr(processes, "run", mock_run)
+            monkeypatch.setattr(
+                service_mod.SharedEphemeris, "create", lambda ephemeris: mock_shared
+            )
+
+            service = VisibilityCalculatorService(mock_db, mock_ephemeris_service)
+            visibility = await service.calculate_windows(
+                ra=ra,
+                dec=dec,
+                instrument=fake_instrument_with_constraints,
+                observatory_id=fake_observatory_id,
+                date_range_begin=date_range_begin,
+                date_range_end=date_range_end,
+                hi_res=True,
+            )
+
+            assert mock_run.call_args[0][2:] == (
+                service_mod._compute_ephemeris_visibility,
+                mock_shared,
+            )
+            assert "ephemeris" not in mock_run.call_args[1]
+            mock_shared.unlink.assert_called_once()
+            # the ephemeris is not sent back, but restored
+            assert visibility.ephemeris is mock_ephemeris_service.get.return_value
+
+        @pytest.mark.asyncio
+        async def test_should_compute_joint_visibility_in_worker_process(
+            self,
+            mock_db: AsyncMock,
+            mock_ephemeris_service: AsyncMock,
+            fake_instrument_with_constraints: InstrumentSchema,
+            fake_ephemeris_visibility_result: MagicMock,
+            monkeypatch: pytest.MonkeyPatch,
+        ) -> None:
+            """Should send each distinct ephemeris once to a worker process"""
+            mock_shared = MagicMock()
+            monkeypatch.setattr(processes, "enabled", lambda: True)
+            mock_run = AsyncMock(return_value=MagicMock())
+            monkeypatch.setattr(processes, "run", mock_run)
+            mock_create = MagicMock(return_value=mock_shared)
+            monkeypatch.setattr(service_mod.SharedEphemeris, "create", mock_create)
+            visibilities: list[Any] = [fake_ephemeris_visibility_result] * 2
+
+            service = VisibilityCalculatorService(mock_db, mock_ephemeris_service)
+            joint_visibility = await service.find_joint_visibility(
+                visibilities=visibilities,
+                instrument_ids=[fake_instrument_with_constraints.id] * 2,
+            )
+
+            mock_create.assert_called_once()
+            mock_shared.unlink.assert_called_once()
+            assert joint_visibility.visibilities == visibilities
+
     class TestFindJointVisibility:
         @pytest.mark.asyncio
         async def test_find_joint_visibility_should_call_partial(
@@ -287,7 +968,7 @@ class TestVisibilityService:
             fake_survey_instrument: InstrumentSchema,
         ) -> None:
             """Should return a PointingConstraint object"""
-            mock_result.scalars.return_value.all.return_value = []
+            mock_result.tuples.return_value.all.return_value = []
 
             service = VisibilityCalculatorService(mock_db, mock_ephemeris_service)
 
@@ -311,7 +992,7 @@ class TestVisibilityService:
             fake_survey_instrument: InstrumentSchema,
         ) -> None:
             """Should query the database for observations to build pointing constraints"""
-            mock_result.scalars.return_value.all.return_value = []
+            mock_result.tuples.return_value.all.return_value = []
 
             service = VisibilityCalculatorService(mock_db, mock_ephemeris_service)
 
@@ -336,7 +1017,7 @@ class TestVisibilityService:
             fake_survey_instrument: InstrumentSchema,
         ) -> None:
             """Should return None if instrument has no footprint"""
-            mock_result.scalars.return_value.all.return_value = []
+            mock_result.tuples.return_value.all.return_value = []
 
             service = VisibilityCalculatorService(mock_db, mock_ephemeris_service)
 
@@ -365,7 +1046,7 @@ class TestVisibilityService:
             Should return a PointingConstraint object with no pointings if no
             observations are found
             """
-            mock_result.scalars.return_value.all.return_value = []
+            mock_result.tuples.return_value.all.return_value = []
 
             service = VisibilityCalculatorService(mock_db, mock_ephemeris_service)
 
@@ -387,10 +1068,10 @@ class TestVisibilityService:
             mock_result: AsyncMock,
             mock_ephemeris_service: AsyncMock,
             fake_survey_instrument: InstrumentSchema,
-            fake_observation_data: Observation,
+            fake_observation_rows: list[tuple],
         ) -> None:
             """Should create pointings when observations are returned"""
-            mock_result.scalars.return_value.all.return_value = [fake_observation_data]
+            mock_result.tuples.return_value.all.return_value = fake_observation_rows
 
             service = VisibilityCalculatorService(mock_db, mock_ephemeris_service)
 
@@ -412,10 +1093,10 @@ class TestVisibilityService:
             mock_result: AsyncMock,
             mock_ephemeris_service: AsyncMock,
             fake_survey_instrument: InstrumentSchema,
-            fake_observation_data: Observation,
+            fake_observation_rows: list[tuple],
         ) -> None:
             """Should convert retrieved observations to pointings"""
-            mock_result.scalars.return_value.all.return_value = [fake_observation_data]
+            mock_result.tuples.return_value.all.return_value = fake_observation_rows
 
             service = VisibilityCalculatorService(mock_db, mock_ephemeris_service)
 
@@ -437,10 +1118,10 @@ class TestVisibilityService:
             mock_result: AsyncMock,
             mock_ephemeris_service: AsyncMock,
             fake_survey_instrument: InstrumentSchema,
-            fake_observation_data: Observation,
+            fake_observation_rows: list[tuple],
         ) -> None:
             """Should create pointings from observation parameters"""
-            mock_result.scalars.return_value.all.return_value = [fake_observation_data]
+            mock_result.tuples.return_value.all.return_value = fake_observation_rows
 
             service = VisibilityCalculatorService(mock_db, mock_ephemeris_service)
 
@@ -455,7 +1136,71 @@ class TestVisibilityService:
             pointing = res.pointings[0]  # type: ignore[union-attr]
             assert all(
                 [
-                    pointing.start_time == fake_observation_data.date_range_begin,
-                    pointing.end_time == fake_observation_data.date_range_end,
+                    pointing.start_time == fake_observation_rows[0][4],
+                    pointing.end_time == fake_observation_rows[0][5],
                 ]
             )
+
+        @pytest.mark.asyncio
+        async def test_should_create_pointings_from_stored_footprints(
+            self,
+            mock_db: AsyncMock,
+            fake_coordinates: tuple[float, float],
+            mock_result: AsyncMock,
+            mock_ephemeris_service: AsyncMock,
+            fake_survey_instrument: InstrumentSchema,
+            fake_observation_rows: list[tuple],
+            fake_observation_footprint_polygon: Any,
+        ) -> None:
+            """Should use the footprints stored with observations instead of projecting"""
+            row = fake_observation_rows[0]
+            mock_result.tuples.return_value.all.return_value = [
+                (*row[:6], fake_observation_footprint_polygon)
+            ]
+
+            service = VisibilityCalculatorService(mock_db, mock_ephemeris_service)
+
+            ra, dec = fake_coordinates
+            res = await service._get_pointing_constraint(
+                fake_survey_instrument,
+                datetime.now(),
+                datetime.now(),
+                ra,
+                dec,
+            )
+            (pointing,) = res.pointings  # type: ignore[union-attr]
+            assert [
+                (coordinate.ra, coordinate.dec)
+                for coordinate in pointing.footprint.detectors[0].coordinates
+            ] == [(123, -88), (124, -88), (124, -87), (123, -87), (123, -88)]
+
+        @pytest.mark.asyncio
+        async def test_should_create_one_pointing_per_observation(
+            self,
+            mock_db: AsyncMock,
+            fake_coordinates: tuple[float, float],
+            mock_result: AsyncMock,
+            mock_ephemeris_service: AsyncMock,
+            fake_survey_instrument: InstrumentSchema,
+            fake_observation_rows: list[tuple],
+            fake_observation_footprint_polygon: Any,
+        ) -> None:
+            """Should create a detector per stored footprint of an observation"""
+            row = fake_observation_rows[0]
+            mock_result.tuples.return_value.all.return_value = [
+                (*row[:6], fake_observation_footprint_polygon),
+                (*row[:6], fake_observation_footprint_polygon),
+            ]
+
+            service = VisibilityCalculatorService(mock_db, mock_ephemeris_service)
+
+            ra, dec = fake_coordinates
+            res = await service._get_pointing_constraint(
+                fake_survey_instrument,
+                datetime.now(),
+                datetime.now(),
+                ra,
+                dec,
+            )
+            (pointing,) = res.pointings  # type: ignore[union-attr]
+            assert len(pointing.footprint.detectors) == 2